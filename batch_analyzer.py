@@ -6,16 +6,23 @@
 import sys
 import os
 import re
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Iterator
 import logging
 
 # モジュールパスを追加
 sys.path.insert(0, str(Path(__file__).parent))
 
+from config.settings import load_batch_config
 from modules.final_content_extractor import FinalContentExtractor
 from modules.flexible_excel_formatter import FlexibleExcelFormatter
+from utils.question_features import extract_question_features, scan_question_features
+from utils.text_utils import read_text_file
+from modules.result_spool import ResultSpool, compact_analysis_data
+from utils.worker_pool import IsolatedWorkerPool, STATUS_OK, STATUS_ERROR
+from utils.batch_telemetry import BatchTelemetry, StageTimer, STAGE_LOAD, STAGE_QUESTIONS, STAGE_EXCEL
 
 # ログ設定
 logging.basicConfig(
@@ -24,16 +31,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# スプールから一度に読み出して保存・集計する件数
+SPOOL_CHUNK_SIZE = 200
+
+
+# ワーカープロセスごとの分析器（_init_worker で作成）
+_worker_analyzer = None
+_worker_compact = False
+
+
+def _init_worker(excel_path: str, compact: bool = False) -> None:
+    """ワーカープロセスの初期化"""
+    global _worker_analyzer, _worker_compact
+    _worker_analyzer = BatchAnalyzer(excel_path, config={})
+    _worker_compact = compact
+
+
+def _analyze_file_in_worker(file_path: str) -> Dict[str, Any]:
+    """ワーカープロセスで1ファイルを分析（ストリーミングモードでは本文を除いて返す）"""
+    result = _worker_analyzer.analyze_single_file(file_path)
+    if result and _worker_compact:
+        result = compact_analysis_data(result)
+    return result
+
 
 class BatchAnalyzer:
     """複数の入試問題を一括分析するクラス"""
     
-    def __init__(self, excel_path: str = None):
+    def __init__(self, excel_path: str = None, config: Dict[str, Any] = None):
         """
         初期化
         
         Args:
             excel_path: 出力先のExcelファイルパス（Noneの場合はデフォルトパスを使用）
+            config: バッチ処理の設定（Noneの場合は batch_config.json を読み込む）
         """
         # デフォルトの出力先を設定
         if excel_path is None:
@@ -43,6 +74,21 @@ class BatchAnalyzer:
         self.extractor = FinalContentExtractor()
         self.formatter = FlexibleExcelFormatter(excel_path)
         self.results = []
+        self.failures = []  # (ファイルパス, 状態, エラー内容)
+        
+        config = load_batch_config() if config is None else config
+        batch_processing = config.get('batch_processing', {})
+        self.parallel_mode = batch_processing.get('parallel_mode', False)
+        self.max_workers = batch_processing.get('max_workers', 1)
+        self.timeout_seconds = batch_processing.get('timeout_seconds')
+        
+        # ストリーミングモード: 結果をメモリに溜めず、本文を除いてスプールへ書き出す
+        self.stream_results = batch_processing.get('stream_results', False)
+        self.spool = ResultSpool(batch_processing.get('spool_path')) if self.stream_results else None
+        
+        # ファイルごと・段階ごとの処理時間（write_report でJSONに書き出す）
+        self.telemetry = BatchTelemetry()
+        self.report_path = batch_processing.get('report_path')
         
     def extract_school_year_from_filename(self, filename: str) -> Tuple[str, int]:
         """
@@ -93,24 +139,26 @@ class BatchAnalyzer:
             file_path: 分析するファイルのパス
             
         Returns:
-            分析結果の辞書
+            分析結果の辞書（stage_timings に段階ごとの処理時間）
         """
         logger.info(f"分析開始: {file_path}")
+        timer = StageTimer()
         
         # ファイル名から学校名と年度を抽出
         filename = os.path.basename(file_path)
         school_name, year = self.extract_school_year_from_filename(filename)
         
-        # テキストを読み込み
+        # テキストを読み込み（エンコーディングを判定して一度で復号）
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
+            with timer.stage(STAGE_LOAD):
+                text, _ = read_text_file(file_path)
         except Exception as e:
             logger.error(f"ファイル読み込みエラー: {file_path} - {e}")
             return None
         
-        # 内容を抽出
-        result = self.extractor.extract_all_content(text)
+        # 内容を抽出（分割・出典抽出・設問分析の時間は抽出器の中で測る）
+        with timer.activate():
+            result = self.extractor.extract_all_content(text)
         
         # 基本情報
         analysis_data = {
@@ -124,13 +172,16 @@ class BatchAnalyzer:
             'question_types': result['question_types']
         }
         
-        # 選択肢数の分析
-        choice_counts = self._analyze_choice_counts(text)
-        analysis_data['choice_counts'] = choice_counts
+        with timer.stage(STAGE_QUESTIONS):
+            # 選択肢数の分析
+            choice_counts = self._analyze_choice_counts(text)
+            analysis_data['choice_counts'] = choice_counts
+            
+            # 記述問題の字数分析
+            description_limits = self._analyze_description_limits(text)
+            analysis_data['description_limits'] = description_limits
         
-        # 記述問題の字数分析
-        description_limits = self._analyze_description_limits(text)
-        analysis_data['description_limits'] = description_limits
+        analysis_data['stage_timings'] = timer.timings
         
         logger.info(f"分析完了: {school_name} {year}年 - {len(result['sections'])}大問, {result['total_questions']}設問")
         
@@ -163,22 +214,39 @@ class BatchAnalyzer:
                 check_lines = lines[i:min(i+15, len(lines))]
                 check_text = '\n'.join(check_lines)
                 
-                # 選択肢を数える
-                if 'ア' in check_text and 'イ' in check_text:
-                    if 'カ' in check_text:
-                        if '二つ選' in check_text or '２つ選' in check_text:
-                            counts['複数選択'] += 1
-                        else:
-                            counts['6択'] += 1
-                    elif 'オ' in check_text:
-                        counts['5択'] += 1
-                    elif 'エ' in check_text:
-                        counts['4択'] += 1
-                    elif 'ウ' in check_text:
-                        counts['3択'] += 1
+                # ア・イがない場合は選択問題ではない
+                if 'ア' not in check_text or 'イ' not in check_text:
+                    continue
+                
+                # 選択肢を数える（設問ごとの特徴レコードから取得し、ラベルの書式がOCRで
+                # 失われている場合は含まれているラベルの文字から数える）
+                features = extract_question_features(check_text)
+                choice_count = features.choice_count or self._contained_label_count(check_text)
+                if choice_count >= 6:
+                    key = '複数選択' if features.multiple_selection else '6択'
+                else:
+                    key = f'{choice_count}択'
+                if key in counts:
+                    counts[key] += 1
         
         return counts
     
+    @staticmethod
+    def _contained_label_count(text: str) -> int:
+        """
+        テキストに含まれる選択肢ラベル（ア～カ）のうち最後のものまでの数
+        
+        Args:
+            text: 問題文テキスト
+            
+        Returns:
+            選択肢数（6つ以上は6）
+        """
+        for count, label in ((6, 'カ'), (5, 'オ'), (4, 'エ'), (3, 'ウ')):
+            if label in text:
+                return count
+        return 0
+    
     def _analyze_description_limits(self, text: str) -> Dict[str, Any]:
         """
         記述問題の字数制限を分析
@@ -195,29 +263,12 @@ class BatchAnalyzer:
             'all_limits': []
         }
         
-        # 字数指定パターン
-        patterns = [
-            r'(\d+)字以上(\d+)字以内',
-            r'(\d+)字〜(\d+)字',
-            r'(\d+)字程度',
-            r'(\d+)字で',
-            r'(\d+)字以内'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                if isinstance(match, tuple):
-                    if len(match) == 2:
-                        # 範囲指定
-                        limits['all_limits'].append((int(match[0]), int(match[1])))
-                    else:
-                        # 単一指定
-                        num = int(match[0]) if isinstance(match[0], str) else int(match)
-                        limits['all_limits'].append(num)
-                else:
-                    num = int(match)
-                    limits['all_limits'].append(num)
+        # 字数指定（範囲 → 程度 → で → 以内の順）
+        features = scan_question_features(text)
+        for limit in features.limits_with('範囲'):
+            limits['all_limits'].append((limit.min, limit.max))
+        for limit in features.limits_with('程度', 'で', '以内'):
+            limits['all_limits'].append(limit.value)
         
         # 最小・最大を計算
         if limits['all_limits']:
@@ -243,7 +294,7 @@ class BatchAnalyzer:
             pattern: ファイルパターン（デフォルト: *.txt）
             
         Returns:
-            分析結果のリスト
+            分析結果のリスト（ストリーミングモードではこれまでの全結果を保存したスプール）
         """
         folder = Path(folder_path)
         if not folder.exists():
@@ -251,38 +302,157 @@ class BatchAnalyzer:
             return []
         
         # 対象ファイルを取得
-        files = list(folder.glob(pattern))
+        files = sorted(folder.glob(pattern))
         logger.info(f"{len(files)}個のファイルを検出")
+        self.telemetry.total_files += len(files)
         
-        # 各ファイルを分析
         results = []
+        for result in self._iter_file_results(files):
+            if self.spool is not None:
+                self.spool.append(result)
+            else:
+                results.append(result)
+        
+        if self.spool is not None:
+            return self.spool
+        self.results.extend(results)
+        return results
+    
+    def _iter_file_results(self, files: List[Path]) -> Iterator[Dict[str, Any]]:
+        """
+        ファイルを分析し、分析できたものの結果をファイルの順番で返す
+        
+        分析できなかったファイルは self.failures に、処理時間（結果の stage_timings）は
+        self.telemetry に記録する。
+        
+        Args:
+            files: 分析するファイルのリスト
+            
+        Yields:
+            分析結果
+        """
+        if self.parallel_mode and self.max_workers > 1 and len(files) > 1:
+            yield from self._analyze_files_parallel(files)
+            return
+        
+        # 各ファイルを分析
         for file_path in files:
+            start = time.perf_counter()
             result = self.analyze_single_file(str(file_path))
+            elapsed = time.perf_counter() - start
             if result:
-                results.append(result)
-                self.results.append(result)
+                self.telemetry.record_file(file_path, STATUS_OK, elapsed, result.pop('stage_timings', None))
+                yield result
+            else:
+                self.telemetry.record_file(file_path, STATUS_ERROR, elapsed)
+                self.failures.append((str(file_path), 'error', '分析できませんでした'))
+    
+    def _analyze_files_parallel(self, files: List[Path]) -> Iterator[Dict[str, Any]]:
+        """
+        ワーカープロセスで並列に分析（終わったものから、ファイルの順番で結果を返す）
         
-        return results
+        制限時間を超えたファイルはワーカーごと終了させ、異常終了したファイルと同様に
+        失敗として記録して残りのファイルの分析を続ける。
+        
+        Args:
+            files: 分析するファイルのリスト
+            
+        Yields:
+            分析できたファイルの結果
+        """
+        workers = min(self.max_workers, len(files))
+        logger.info(f"{workers}プロセスで並列分析（1ファイルの制限時間: {self.timeout_seconds}秒）")
+        
+        pool = IsolatedWorkerPool(
+            _analyze_file_in_worker,
+            max_workers=workers,
+            timeout=self.timeout_seconds,
+            initializer=_init_worker,
+            initargs=(self.excel_path, self.stream_results)
+        )
+        
+        # 前のファイルの結果がそろったものから順番に返す
+        finished = {}
+        next_index = 0
+        for outcome in pool.imap_unordered([str(file_path) for file_path in files]):
+            finished[outcome.index] = outcome
+            while next_index in finished:
+                outcome = finished.pop(next_index)
+                next_index += 1
+                if outcome.ok and outcome.value:
+                    self.telemetry.record_file(outcome.item, outcome.status, outcome.elapsed,
+                                               outcome.value.pop('stage_timings', None))
+                    yield outcome.value
+                else:
+                    self.telemetry.record_file(outcome.item, outcome.status, outcome.elapsed)
+                    error = outcome.error or '分析できませんでした'
+                    logger.error(f"分析失敗 ({outcome.status}): {outcome.item} - {error}")
+                    self.failures.append((outcome.item, outcome.status, error))
+    
+    def _iter_result_chunks(self) -> Iterator[List[Dict[str, Any]]]:
+        """内部の結果を少しずつ返す（ストリーミングモードではスプールから読み出す）"""
+        if self.spool is not None:
+            yield from self.spool.iter_chunks(SPOOL_CHUNK_SIZE)
+        elif self.results:
+            yield self.results
     
     def save_to_excel(self, results: List[Dict[str, Any]] = None) -> bool:
         """
         分析結果をExcelに保存
         
+        ストリーミングモードではスプールから SPOOL_CHUNK_SIZE 件ずつ読み出して保存する
+        （バックアップは最初の1回だけ）。
+        
         Args:
             results: 保存する分析結果のリスト（省略時は内部の結果を使用）
             
         Returns:
             成功した場合True
         """
-        if results is None:
-            results = self.results
+        chunks = [results] if results is not None else self._iter_result_chunks()
         
-        if not results:
+        success_count = 0
+        failed_count = 0
+        saved_any = False
+        
+        for chunk in chunks:
+            if not chunk:
+                continue
+            rows, chunk_failed = self._build_rows(chunk)
+            failed_count += chunk_failed
+            
+            # Excelに保存（まとめて1回、バックアップは最初の1回）
+            if rows:
+                with self.telemetry.stage(STAGE_EXCEL):
+                    saved = self.formatter.save_rows_to_excel(rows, backup=not saved_any)
+                if saved:
+                    success_count += len(rows)
+                    for school_name, row_data in rows:
+                        logger.info(f"保存成功: {school_name} {row_data['年度']}年")
+                else:
+                    failed_count += len(rows)
+                    logger.error(f"保存失敗: {len(rows)}件")
+            saved_any = True
+        
+        if not saved_any:
             logger.warning("保存するデータがありません")
             return False
         
-        success_count = 0
+        logger.info(f"保存完了: 成功 {success_count}件, 失敗 {failed_count}件")
+        return failed_count == 0
+    
+    def _build_rows(self, results: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, Dict[str, Any]]], int]:
+        """
+        分析結果をExcelの行データに整形
+        
+        Args:
+            results: 分析結果のリスト
+            
+        Returns:
+            ((学校名, 行データ) のリスト, 整形できなかった件数)
+        """
         failed_count = 0
+        rows = []
         
         for result in results:
             try:
@@ -319,30 +489,31 @@ class BatchAnalyzer:
                     additional_info=additional_info
                 )
                 
-                # Excelに保存
-                success = self.formatter.save_to_excel(
-                    school_name=result['school_name'],
-                    row_data=row_data,
-                    backup=(success_count == 0)  # 最初だけバックアップ
-                )
-                
-                if success:
-                    success_count += 1
-                    logger.info(f"保存成功: {result['school_name']} {result['year']}年")
-                else:
-                    failed_count += 1
-                    logger.error(f"保存失敗: {result['school_name']} {result['year']}年")
+                rows.append((result['school_name'], row_data))
                     
             except Exception as e:
                 failed_count += 1
                 logger.error(f"エラー: {result.get('school_name', '不明')} - {e}")
         
-        logger.info(f"保存完了: 成功 {success_count}件, 失敗 {failed_count}件")
-        return failed_count == 0
+        return rows, failed_count
     
     def print_summary(self):
         """分析結果のサマリーを表示"""
-        if not self.results:
+        # 学校別に整理（表示に使う項目だけを残す）
+        schools = {}
+        file_count = 0
+        for chunk in self._iter_result_chunks():
+            for result in chunk:
+                file_count += 1
+                schools.setdefault(result['school_name'], []).append({
+                    'year': result['year'],
+                    'total_characters': result['total_characters'],
+                    'section_count': len(result['sections']),
+                    'total_questions': result['total_questions'],
+                    'choice_counts': result['choice_counts'],
+                })
+        
+        if not file_count:
             print("分析結果がありません")
             return
         
@@ -350,16 +521,7 @@ class BatchAnalyzer:
         print("【一括分析結果サマリー】")
         print("="*80)
         
-        print(f"\n分析ファイル数: {len(self.results)}件")
-        
-        # 学校別に整理
-        schools = {}
-        for result in self.results:
-            school = result['school_name']
-            if school not in schools:
-                schools[school] = []
-            schools[school].append(result)
-        
+        print(f"\n分析ファイル数: {file_count}件")
         print(f"学校数: {len(schools)}校")
         
         # 各学校の詳細
@@ -370,7 +532,7 @@ class BatchAnalyzer:
             for result in sorted(school_results, key=lambda x: x['year']):
                 print(f"  {result['year']}年:")
                 print(f"    - 文字数: {result['total_characters']:,}文字")
-                print(f"    - 大問数: {len(result['sections'])}問")
+                print(f"    - 大問数: {result['section_count']}問")
                 print(f"    - 総設問数: {result['total_questions']}問")
                 
                 # 選択肢数の情報
@@ -382,7 +544,39 @@ class BatchAnalyzer:
                 if choice_info:
                     print(f"    - 選択問題: {', '.join(choice_info)}")
         
+        # 失敗したファイル
+        if self.failures:
+            print(f"\n【分析できなかったファイル】{len(self.failures)}件")
+            for file_path, status, error in self.failures:
+                print(f"  {Path(file_path).name}: {status} - {error}")
+        
+        # 処理時間（段階ごとのパーセンタイルと遅いファイル）
+        print("\n【処理時間】")
+        for line in self.telemetry.to_lines():
+            print(f"  {line}")
+        
         print("\n" + "="*80)
+    
+    def write_report(self, report_path: str = None) -> Path:
+        """
+        処理速度・段階ごとの処理時間・遅いファイルをJSONに書き出す
+        
+        Args:
+            report_path: 書き出し先（省略時は設定の report_path、なければExcelファイルの隣）
+            
+        Returns:
+            書き出したファイルのパス
+        """
+        path = report_path or self.report_path
+        if not path:
+            excel_path = Path(self.excel_path)
+            path = excel_path.with_name(f"{excel_path.stem}_batch_report.json")
+        return self.telemetry.write_json(Path(path))
+    
+    def close(self):
+        """スプールを閉じる（一時ファイルは削除する）"""
+        if self.spool is not None:
+            self.spool.close()
 
 
 def main():
@@ -412,33 +606,54 @@ def main():
         action='store_true',
         help='Excelに保存しない（分析のみ）'
     )
+    parser.add_argument(
+        '--report',
+        help='処理時間の計測レポート（JSON）の出力先（省略時はExcelファイルの隣）'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='結果をメモリに溜めずスプールファイルへ書き出す（大量のファイル向け）'
+    )
     
     args = parser.parse_args()
     
     # アナライザーを初期化
-    analyzer = BatchAnalyzer(args.output)
+    config = load_batch_config()
+    if args.stream:
+        config.setdefault('batch_processing', {})['stream_results'] = True
+    analyzer = BatchAnalyzer(args.output, config=config)
     
     # フォルダを分析
     print(f"フォルダを分析中: {args.folder}")
     print(f"パターン: {args.pattern}")
     
-    results = analyzer.analyze_folder(args.folder, args.pattern)
-    
-    if not results:
-        print("分析可能なファイルが見つかりませんでした")
-        return
-    
-    # サマリーを表示
-    analyzer.print_summary()
-    
-    # Excelに保存
-    if not args.no_save:
-        print(f"\nExcelファイルに保存中: {args.output}")
-        success = analyzer.save_to_excel()
-        if success:
-            print("✅ 保存完了")
-        else:
-            print("⚠️ 一部のファイルの保存に失敗しました")
+    try:
+        results = analyzer.analyze_folder(args.folder, args.pattern)
+        
+        if not results:
+            print("分析可能なファイルが見つかりませんでした")
+            return
+        
+        # サマリーを表示
+        analyzer.print_summary()
+        
+        # Excelに保存
+        if not args.no_save:
+            print(f"\nExcelファイルに保存中: {args.output}")
+            success = analyzer.save_to_excel()
+            if success:
+                print("✅ 保存完了")
+            else:
+                print("⚠️ 一部のファイルの保存に失敗しました")
+        
+        # 計測レポートを書き出す
+        try:
+            print(f"計測レポート: {analyzer.write_report(args.report)}")
+        except OSError as e:
+            logger.warning(f"計測レポートを書き出せませんでした: {e}")
+    finally:
+        analyzer.close()
 
 
 if __name__ == "__main__":
@@ -451,5 +666,6 @@ if __name__ == "__main__":
         print('  python batch_analyzer.py "./texts" --pattern "25*.txt"')
         print('  python batch_analyzer.py "./texts" --output "results.xlsx"')
         print('  python batch_analyzer.py "./texts" --no-save  # 分析のみ')
+        print('  python batch_analyzer.py "./texts" --stream   # 大量のファイルをメモリを抑えて分析')
     else:
         main()
\ No newline at end of file
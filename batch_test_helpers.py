@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+バッチ処理のテストで共通に使う入力ファイルと記録用のExcel管理
+（test_batch_engine・test_batch_parallel・test_batch_journal・test_work_queue・
+test_result_spool・test_batch_telemetry から使う）
+"""
+import sys
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.application import EntranceExamAnalyzer
+
+SAMPLE_TEXT = """
+一 次の文章を読んで、後の問いに答えなさい。
+　むかしむかし、ある村に一人の少年が住んでいました。
+問一 傍線部①について説明しなさい。
+ア 正しい イ 誤り ウ どちらでもない エ わからない
+問二 本文中から十字で抜き出しなさい。
+二 次の各問いに答えなさい。
+問一 漢字の読みを書きなさい。
+"""
+
+
+class RecordingTransaction:
+    """追加された順番を記録し、コミットで保存された年度に加えるトランザクション"""
+
+    def __init__(self, saved: list):
+        self.saved = saved
+        self.results = []
+        self.committed = False
+
+    def add(self, result):
+        self.results.append(result)
+
+    def commit(self):
+        self.committed = True
+        self.saved.extend(result.year for result in self.results)
+        return len(self.results)
+
+
+class RecordingExcelManager:
+    """Excelに保存する代わりにトランザクションと保存された年度を記録する"""
+
+    def __init__(self, db_path='entrance_exam_database.xlsx'):
+        self.db_path = Path(db_path)
+        self.saved = []
+        self.transactions = []
+
+    def transaction(self):
+        self.transactions.append(RecordingTransaction(self.saved))
+        return self.transactions[-1]
+
+
+def make_app(tmp: Path, **config) -> EntranceExamAnalyzer:
+    """
+    分析キャッシュを使わず、ジャーナル・レポートを一時ディレクトリに書くアプリケーション
+
+    Args:
+        tmp: 一時ディレクトリ
+        **config: 追加の設定
+
+    Returns:
+        保存を記録する EntranceExamAnalyzer
+    """
+    app = EntranceExamAnalyzer({'analysis_cache': False, 'batch_journal_path': tmp / 'journal.jsonl',
+                                'batch_report_path': tmp / 'report.json', **config})
+    app.excel_manager = RecordingExcelManager()
+    return app
+
+
+def make_files(folder: Path, years: Iterable[int], schools: Sequence[str] = ('開成中学校',),
+               cycle: Optional[int] = None, repeat: int = 1) -> List[Path]:
+    """
+    年度ごとの入力ファイルを作成
+
+    Args:
+        folder: 作成先のフォルダ
+        years: 年度（ファイルごと）
+        schools: 学校名（ファイルごとに順に使う）
+        cycle: 本文の繰り返し回数の周期（省略時はファイルごとに1回ずつ増やす、1なら全ファイル1回）
+        repeat: 本文の繰り返し回数に掛ける数
+
+    Returns:
+        作成したファイルのパス
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for n, year in enumerate(years):
+        copies = (n % cycle if cycle else n) + 1
+        path = folder / f'{schools[n % len(schools)]}{year}年度国語.txt'
+        path.write_text(f'{year}年度\n' + SAMPLE_TEXT * (copies * repeat), encoding='utf-8')
+        paths.append(path)
+    return paths
@@ -1,8 +1,13 @@
 """
 設定ファイル - すべての定数とコンフィグをここに集約
 """
+import json
+import logging
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
 
 class Settings:
     """アプリケーション全体の設定"""
@@ -127,12 +132,68 @@ class Settings:
     OUTPUT_DIR = Path("data/output")
     BACKUP_DIR = Path("data/backups")
     LOG_DIR = Path("logs")
+    ANALYSIS_CACHE_DIR = Path("data/cache/analysis")
+    SECTION_CACHE_DIR = Path("data/cache/sections")
+    FILE_INDEX_PATH = Path("data/cache/file_index.json")  # ファイル選択用の索引
+    WATCH_STATE_PATH = Path("data/cache/watch_state.json")  # フォルダ監視で分析済みのファイル
+    BATCH_JOURNAL_PATH = Path("data/output/batch_journal.jsonl")  # バッチ分析の完了記録
+    WORK_QUEUE_PATH = Path("data/output/work_queue.sqlite3")  # 複数マシンで分担する作業キュー
+    BATCH_REPORT_PATH = Path("data/output/batch_report.json")  # バッチ分析の段階ごとの処理時間
+    
+    # 分析結果キャッシュ設定
+    ANALYSIS_CACHE_MAX_MB = 200  # キャッシュの最大サイズ（超えたら古いものから削除）
+    SECTION_CACHE_MAX_MB = 100   # 大問ごとの分析結果と大問構成の最大サイズ（超えたら古いものから削除）
+    
+    # フォルダ監視設定
+    WATCH_DEBOUNCE_SECONDS = 2.0  # 最後の変更からこの秒数だけ変更がなければ分析する
+    WATCH_POLL_INTERVAL = 1.0     # 変更を確認する間隔（秒）
+    
+    # バッチ分析設定（1ファイルずつ別プロセスで分析し、止まった・落ちたファイルだけを失敗にする）
+    # ワーカープロセス数は batch_analyzer.py と共通の batch_config.json（batch_processing）の max_workers、
+    # 制限時間はPDFのOCRも含むため batch_analyzer.py の timeout_seconds とは別の app_timeout_seconds を使い
+    # （get_batch_max_workers・get_batch_timeout_seconds）、設定ファイルにない場合だけ次の値を使う
+    BATCH_CONFIG_PATH = Path(__file__).resolve().parent.parent / "batch_config.json"
+    BATCH_MAX_WORKERS = 4          # ワーカープロセス数（0ならプロセスを分けずに順番に分析）
+    BATCH_TIMEOUT_SECONDS = 300    # 1ファイルの制限時間（秒）
+    BATCH_MEMORY_LIMIT_MB = 2048   # 1ファイルの分析に使えるメモリ（MB）
+    BATCH_COMMIT_INTERVAL = 20     # この件数のファイルごとに保存し、完了を記録する
+    
+    # 作業キュー設定（--worker で複数のマシン・プロセスが分担）
+    QUEUE_LEASE_SECONDS = 120.0    # 借りた項目の期限（ハートビートで延長、止まったワーカーの分はこの後に引き継ぐ）
+    QUEUE_POLL_INTERVAL = 5.0      # 他のワーカーの処理中の項目が終わるのを待つ間隔（秒）
     
     # Excel設定
     EXCEL_ENGINE = 'openpyxl'
     # デフォルトパスは環境変数またはapp_configから取得
     DEFAULT_DB_FILENAME = None  # app_config.pyで動的に設定
     
+    @classmethod
+    def get_batch_max_workers(cls) -> int:
+        """
+        バッチ分析のワーカープロセス数
+
+        Returns:
+            batch_config.json の max_workers（parallel_mode が false の場合は0）
+        """
+        options = load_batch_config(cls.BATCH_CONFIG_PATH).get('batch_processing', {})
+        if options.get('parallel_mode') is False:
+            return 0
+        return int(options.get('max_workers', cls.BATCH_MAX_WORKERS))
+
+    @classmethod
+    def get_batch_timeout_seconds(cls) -> float:
+        """
+        バッチ分析（PDFのOCRを含む）の1ファイルの制限時間
+
+        batch_analyzer.py の timeout_seconds はテキストだけの分析用なので使わない。
+
+        Returns:
+            batch_config.json の app_timeout_seconds（秒）
+        """
+        options = load_batch_config(cls.BATCH_CONFIG_PATH).get('batch_processing', {})
+        timeout = options.get('app_timeout_seconds')
+        return float(timeout) if timeout is not None else float(cls.BATCH_TIMEOUT_SECONDS)
+
     @classmethod
     def get_search_directories(cls) -> List[Path]:
         """検索対象ディレクトリのリストを返す"""
@@ -169,4 +230,25 @@ class Settings:
             temp_dir = os.environ.get('TEMP', '')
             if temp_dir:
                 allowed.append(Path(temp_dir).resolve())
-        return allowed
\ No newline at end of file
+        return allowed
+
+
+def load_batch_config(config_path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    バッチ処理の設定を読み込み
+    
+    Args:
+        config_path: 設定ファイルのパス（省略時は batch_config.json）
+        
+    Returns:
+        設定の辞書（ファイルがない・読めない場合は空）
+    """
+    config_path = Path(config_path) if config_path else Settings.BATCH_CONFIG_PATH
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"バッチ設定を読み込めません: {config_path} - {e}")
+        return {}
@@ -1,5 +1,18 @@
 # Core module initialization
-from .application import EntranceExamAnalyzer
-from .cli import CLI
+# 各クラスは最初に使うときに読み込む（CLIの --version などで分析器を読み込まないため）
+import importlib
 
-__all__ = ['EntranceExamAnalyzer', 'CLI']
\ No newline at end of file
+_EXPORTS = {
+    'EntranceExamAnalyzer': '.application',
+    'CLI': '.cli',
+    'FolderWatcher': '.folder_watcher',
+    'QueueWorker': '.queue_worker',
+}
+
+__all__ = ['EntranceExamAnalyzer', 'CLI', 'FolderWatcher', 'QueueWorker']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
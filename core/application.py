@@ -2,8 +2,10 @@
 メインアプリケーションクラス - 全体のコーディネーション
 """
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+import time
 import logging
+import dataclasses
 
 from config.settings import Settings
 from models import (
@@ -21,13 +23,27 @@ from modules.excel_manager import ExcelManager
 from modules.text_analyzer import TextAnalyzer
 from modules.universal_analyzer import UniversalAnalyzer
 from modules.text_file_manager import TextFileManager
+from modules.incremental_analyzer import IncrementalAnalyzer
+from processors.analysis_cache import AnalysisCache, build_analyzer_fingerprint
+from processors.batch_journal import BatchJournal, JOURNAL_DONE, JOURNAL_FAILED, STATUS_SKIPPED
 from exceptions import (
     EntranceExamAnalyzerError,
     FileProcessingError,
     AnalysisError
 )
-from utils.text_utils import detect_encoding, split_text_by_years
+from utils.text_utils import read_text_file, split_text_by_years
 from utils.file_utils import is_valid_text_file, ensure_directory_exists
+from utils.backup_store import file_sha256
+from utils.worker_pool import IsolatedWorkerPool, TaskOutcome, STATUS_OK, STATUS_ERROR
+from utils.batch_telemetry import (
+    BatchTelemetry,
+    StageTimer,
+    timed_stage,
+    STAGE_LOAD,
+    STAGE_OCR,
+    STAGE_SPLIT,
+    STAGE_EXCEL
+)
 from utils.display_utils import (
     print_header,
     print_section,
@@ -39,6 +55,21 @@ from utils.display_utils import (
 )
 
 
+# バッチ分析のワーカープロセスごとのアプリケーション（_init_batch_worker で作成）
+_batch_worker_app: Optional['EntranceExamAnalyzer'] = None
+
+
+def _init_batch_worker(config: Dict[str, Any]) -> None:
+    """バッチ分析ワーカーの初期化"""
+    global _batch_worker_app
+    _batch_worker_app = EntranceExamAnalyzer(config)
+
+
+def _analyze_file_in_worker(file_path: Path) -> Tuple[List[AnalysisResult], Dict[str, float]]:
+    """バッチ分析ワーカーで1ファイルを読み込み・分析（段階ごとの処理時間も返す）"""
+    return _batch_worker_app._analyze_file_timed(file_path)
+
+
 class EntranceExamAnalyzer:
     """入試問題分析アプリケーションのメインクラス"""
     
@@ -62,6 +93,8 @@ class EntranceExamAnalyzer:
         self.excel_manager = ExcelManager()
         self.universal_analyzer = UniversalAnalyzer()
         self.text_file_manager = TextFileManager()  # テキストファイル管理を追加
+        self._analysis_cache: Optional[AnalysisCache] = None  # 初回使用時に作成
+        self._incremental_analyzer: Optional[IncrementalAnalyzer] = None  # 初回使用時に作成
         
         # ディレクトリを確保
         ensure_directory_exists(Settings.OUTPUT_DIR)
@@ -140,10 +173,12 @@ class EntranceExamAnalyzer:
             # ファイル拡張子で処理を分岐
             if file_path.suffix.lower() == '.pdf':
                 # PDFファイルの処理
-                return self._load_pdf_document(file_path)
+                with timed_stage(STAGE_OCR):
+                    return self._load_pdf_document(file_path)
             else:
                 # テキストファイルの処理
-                return self._load_text_document(file_path)
+                with timed_stage(STAGE_LOAD):
+                    return self._load_text_document(file_path)
         
         except Exception as e:
             print_error(f"ファイル読み込みエラー: {e}")
@@ -153,14 +188,8 @@ class EntranceExamAnalyzer:
     def _load_text_document(self, file_path: Path) -> Optional[ExamDocument]:
         """テキストドキュメントを読み込み"""
         try:
-            # エンコーディングを検出
-            encoding = detect_encoding(file_path)
-            if not encoding:
-                raise FileProcessingError(f"エンコーディングを検出できません: {file_path}")
-            
-            # ファイルを読み込み
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
+            # ファイルを一度だけ読み込み、エンコーディングを判定して復号
+            content, encoding = read_text_file(file_path)
             
             # 学校名を検出
             school_name, confidence = self.school_detector.detect_school(content, file_path)
@@ -306,26 +335,105 @@ class EntranceExamAnalyzer:
         if document.is_multi_year():
             # 複数年度の場合はテキストを分割
             print_section("複数年度の分析")
-            year_texts = self.year_detector.split_text_by_years(
-                document.content,
-                document.years
-            )
+            with timed_stage(STAGE_SPLIT):
+                year_texts = self.year_detector.split_text_by_years(
+                    document.content,
+                    document.years
+                )
             
             for i, (year, text) in enumerate(year_texts.items(), 1):
                 print_progress(i, len(year_texts), f"分析中: {year}年")
                 
-                result = self.universal_analyzer.analyze(text, document.school_name, year)
+                result = self._analyze_text(text, document.school_name, year,
+                                            document_key=f"{document.file_path}#{year}")
                 results.append(result)
         else:
             # 単一年度の場合
             print_section("分析中...")
             year = document.years[0] if document.years else "不明"
             
-            result = self.universal_analyzer.analyze(document.content, document.school_name, year)
+            result = self._analyze_text(document.content, document.school_name, year,
+                                        document_key=f"{document.file_path}#{year}")
             results.append(result)
         
         return results
     
+    def _get_analysis_cache(self) -> Optional[AnalysisCache]:
+        """分析結果キャッシュを取得（無効化されている場合はNone）"""
+        if not self.config.get('analysis_cache', True):
+            return None
+        
+        if self._analysis_cache is None:
+            self._analysis_cache = AnalysisCache(
+                Path(self.config.get('analysis_cache_dir', Settings.ANALYSIS_CACHE_DIR)),
+                self._get_analyzer_fingerprint(),
+                max_size_mb=self.config.get('analysis_cache_max_mb', Settings.ANALYSIS_CACHE_MAX_MB)
+            )
+        return self._analysis_cache
+    
+    def _get_analyzer_fingerprint(self) -> str:
+        """分析器・プラグイン・パターン定義のフィンガープリント"""
+        return build_analyzer_fingerprint(
+            self.universal_analyzer,
+            plugin=self.config.get('plugin'),
+            pattern_sets=[Settings.QUESTION_PATTERNS, Settings.SOURCE_PATTERNS]
+        )
+    
+    def _get_incremental_analyzer(self) -> IncrementalAnalyzer:
+        """大問単位の差分再分析器を取得"""
+        if self._incremental_analyzer is None:
+            # キャッシュ無効時は大問ごとの記録もディスクに残さない
+            store_dir = None
+            if self.config.get('analysis_cache', True):
+                store_dir = Path(self.config.get('section_cache_dir', Settings.SECTION_CACHE_DIR))
+            self._incremental_analyzer = IncrementalAnalyzer(
+                self.universal_analyzer,
+                store_dir=store_dir,
+                fingerprint=self._get_analyzer_fingerprint(),
+                max_size_mb=self.config.get('section_cache_max_mb', Settings.SECTION_CACHE_MAX_MB)
+            )
+        return self._incremental_analyzer
+    
+    def _analyze_text(self, text: str, school_name: str, year: str,
+                      document_key: Optional[str] = None) -> AnalysisResult:
+        """
+        テキストを分析
+        
+        同じテキスト・学校・年度・分析器の結果はキャッシュから返す。
+        テキストが修正されている場合は、内容が変わった大問だけを再分析する。
+        
+        Args:
+            text: 分析対象のテキスト
+            school_name: 学校名
+            year: 年度
+            document_key: 文書の識別子（差分レポートの比較対象）
+        
+        Returns:
+            分析結果
+        """
+        cache = self._get_analysis_cache()
+        if cache is not None:
+            cached = cache.get(text, school_name, year)
+            if cached is not None:
+                self.logger.info(f"Analysis cache hit: {school_name} {year}")
+                return cached
+        
+        result = self._get_incremental_analyzer().analyze(text, school_name, year, document_key)
+        
+        report = getattr(result, 'section_diff', None)
+        if report is not None and report.previous_found:
+            for line in report.to_lines():
+                print_info(line)
+        
+        if cache is not None:
+            cache.put(text, school_name, year, result)
+        return result
+    
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """分析結果キャッシュの統計を取得（キャッシュ無効時はNone）"""
+        cache = self._get_analysis_cache()
+        return cache.get_stats() if cache is not None else None
+    
     def _save_results(self, results: List[AnalysisResult]):
         """結果を保存"""
         print_section("結果の保存")
@@ -434,52 +542,258 @@ class EntranceExamAnalyzer:
         if result.genre:
             print(f"ジャンル: {result.genre}")
     
+    def _analyze_file(self, file_path: Path) -> List[AnalysisResult]:
+        """
+        1ファイルを読み込んで年度ごとに分析（バッチ分析の1件分）
+        
+        Args:
+            file_path: ファイルパス
+        
+        Returns:
+            年度ごとの分析結果
+        
+        Raises:
+            FileProcessingError: ファイルを読み込めなかった場合
+        """
+        document = self._load_document(file_path)
+        if not document:
+            raise FileProcessingError(f"ファイルを読み込めませんでした: {file_path}")
+        return self._analyze_by_years(document)
+    
+    def _analyze_file_timed(self, file_path: Path) -> Tuple[List[AnalysisResult], Dict[str, float]]:
+        """
+        1ファイルを分析し、段階ごと（読み込み/OCR・分割・出典抽出・設問分析）の処理時間を測る
+        
+        Args:
+            file_path: ファイルパス
+        
+        Returns:
+            (年度ごとの分析結果, 段階ごとの処理時間（秒）)
+        """
+        with StageTimer().activate() as timer:
+            results = self._analyze_file(file_path)
+        return results, timer.timings
+    
+    def _iter_batch_outcomes(self, file_paths: List[Path],
+                             telemetry: Optional[BatchTelemetry] = None) -> Iterator[TaskOutcome]:
+        """
+        ファイルを分析し、入力の順番で1件ずつ結果を返す
+        
+        ワーカープロセスで並列に分析し、制限時間・メモリを超えたファイルや
+        異常終了したファイルはワーカーを入れ替えてその1件だけを失敗にする。
+        batch_workers が0の場合はこのプロセスで順番に分析する。
+        
+        Args:
+            file_paths: ファイルパスのリスト
+            telemetry: ファイルごと・段階ごとの処理時間の記録先
+        
+        Yields:
+            ファイルごとの処理結果（value は年度ごとの分析結果のリスト）
+        """
+        for outcome in self._iter_timed_outcomes(file_paths):
+            timings = {}
+            if outcome.ok:
+                results, timings = outcome.value
+                outcome = dataclasses.replace(outcome, value=results)
+            if telemetry is not None:
+                telemetry.record_file(outcome.item, outcome.status, outcome.elapsed, timings)
+            yield outcome
+    
+    def _iter_timed_outcomes(self, file_paths: List[Path]) -> Iterator[TaskOutcome]:
+        """_iter_batch_outcomes の本体（value は (分析結果, 段階ごとの処理時間)）"""
+        workers = min(self.config.get('batch_workers', Settings.get_batch_max_workers()), len(file_paths))
+        
+        if workers <= 0:
+            for index, file_path in enumerate(file_paths):
+                start = time.perf_counter()
+                try:
+                    value = self._analyze_file_timed(file_path)
+                    yield TaskOutcome(index, file_path, STATUS_OK, value,
+                                      elapsed=time.perf_counter() - start)
+                except Exception as e:
+                    yield TaskOutcome(index, file_path, STATUS_ERROR, error=f'{type(e).__name__}: {e}',
+                                      elapsed=time.perf_counter() - start)
+            return
+        
+        pool = IsolatedWorkerPool(
+            _analyze_file_in_worker,
+            max_workers=workers,
+            timeout=self.config.get('batch_timeout', Settings.get_batch_timeout_seconds()),
+            memory_limit_mb=self.config.get('batch_memory_mb', Settings.BATCH_MEMORY_LIMIT_MB),
+            initializer=_init_batch_worker,
+            initargs=(dict(self.config),)
+        )
+        
+        # 終わった順に届く結果を、前のファイルがそろったものから順番に渡す
+        finished: Dict[int, TaskOutcome] = {}
+        next_index = 0
+        for outcome in pool.imap_unordered(file_paths):
+            finished[outcome.index] = outcome
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+    
+    def _get_batch_journal(self) -> BatchJournal:
+        """バッチ分析の完了記録を取得（分析器・保存先が変われば以前の記録は使わない）"""
+        return BatchJournal(
+            Path(self.config.get('batch_journal_path', Settings.BATCH_JOURNAL_PATH)),
+            self._get_analyzer_fingerprint(),
+            target=getattr(self.excel_manager, 'db_path', '')
+        )
+    
     def batch_analyze(self, file_paths: List[Path]) -> Dict[str, Any]:
         """
         複数ファイルをバッチ分析
         
+        分析はワーカープロセスで並列に行い、このプロセスは結果を受け取った順に
+        トランザクションへ追加して、一定件数ごとにまとめて保存する。
+        保存できたファイルは内容ハッシュとともにジャーナルに記録し、次回は
+        （内容・分析器・保存先が同じなら）スキップする。config['batch_resume'] が
+        Falseの場合は記録を無視してすべて分析する。
+        
         Args:
             file_paths: ファイルパスのリスト
         
         Returns:
-            分析結果のサマリー
+            分析結果のサマリー（files にファイルごとの状態・処理時間、telemetry に段階ごとの
+            処理時間の集計、report_path にその書き出し先）
         """
         summary = {
             'total': len(file_paths),
             'success': 0,
             'failed': 0,
-            'results': []
+            'skipped': 0,
+            'failed_files': [],
+            'files': [],
+            'elapsed': 0.0,
+            'results': [],
+            'telemetry': None,
+            'report_path': None
         }
         
         print_header(f"バッチ分析 ({len(file_paths)}ファイル)", 60)
-        
-        for i, file_path in enumerate(file_paths, 1):
-            print_progress(i, len(file_paths), f"処理中: {file_path.name}")
-            
+        start = time.perf_counter()
+        
+        # 前回までに完了したファイルを除く
+        journal = self._get_batch_journal()
+        resume = self.config.get('batch_resume', True)
+        content_hashes: Dict[Path, Optional[str]] = {}
+        targets: List[Path] = []
+        for file_path in file_paths:
             try:
-                # ドキュメントを読み込み
-                document = self._load_document(file_path)
-                if not document:
-                    summary['failed'] += 1
-                    continue
-                
-                # 分析
-                results = self._analyze_by_years(document)
-                
-                # 保存
-                for result in results:
-                    if self.excel_manager.save_analysis_result(result):
-                        summary['success'] += 1
-                        summary['results'].append(result)
-                    else:
-                        summary['failed'] += 1
-            
-            except Exception as e:
-                self.logger.error(f"Batch analysis error for {file_path}: {e}")
+                content_hashes[file_path] = file_sha256(file_path)
+            except OSError:
+                content_hashes[file_path] = None
+            if resume and journal.is_done(file_path, content_hashes[file_path]):
+                summary['skipped'] += 1
+                summary['files'].append({'file': file_path, 'status': STATUS_SKIPPED,
+                                         'elapsed': 0.0, 'results': 0, 'error': None})
+            else:
+                targets.append(file_path)
+        if summary['skipped']:
+            print_info(f"前回までに完了した{summary['skipped']}件をスキップします（--force で再分析）")
+        
+        # 一定件数ごとに保存する（対象の学校シートのみ更新、バックアップも保存ごとに1回）
+        commit_interval = max(1, self.config.get('batch_commit_interval', Settings.BATCH_COMMIT_INTERVAL))
+        transaction = self.excel_manager.transaction()
+        committing: List[Dict[str, Any]] = []  # 次の保存で完了になるファイル
+        telemetry = BatchTelemetry(len(targets))
+        summary['telemetry'] = telemetry
+        
+        for outcome in self._iter_batch_outcomes(targets, telemetry):
+            file_path = outcome.item
+            print_progress(outcome.index + 1, len(targets),
+                           f"分析完了: {file_path.name} ({telemetry.progress_text()})")
+            
+            record = {
+                'file': file_path,
+                'status': outcome.status,
+                'elapsed': outcome.elapsed,
+                'results': 0,
+                'error': outcome.error
+            }
+            summary['files'].append(record)
+            
+            if not outcome.ok:
+                self.logger.error(f"Batch analysis {outcome.status} for {file_path}: {outcome.error}")
                 summary['failed'] += 1
+                summary['failed_files'].append(file_path)
+                journal.record(file_path, content_hashes[file_path], JOURNAL_FAILED, error=outcome.error)
+                continue
+            
+            # 保存待ちに追加
+            for result in outcome.value:
+                try:
+                    transaction.add(result)
+                    record['results'] += 1
+                except Exception as e:
+                    self.logger.error(f"Batch save error for {file_path} ({result.year}): {e}")
+                    record['status'] = STATUS_ERROR
+                    record['error'] = str(e)
+                    summary['failed'] += 1
+                    summary['failed_files'].append(file_path)
+            
+            if record['status'] == STATUS_OK:
+                committing.append(record)
+            else:
+                journal.record(file_path, content_hashes[file_path], JOURNAL_FAILED, error=record['error'])
+            
+            if len(committing) >= commit_interval:
+                with telemetry.stage(STAGE_EXCEL):
+                    self._commit_batch(transaction, committing, journal, content_hashes, summary)
+                transaction = self.excel_manager.transaction()
+                committing = []
+        
+        with telemetry.stage(STAGE_EXCEL):
+            self._commit_batch(transaction, committing, journal, content_hashes, summary)
         
+        # サマリーは入力の順番で返す
+        order = {file_path: i for i, file_path in enumerate(file_paths)}
+        summary['files'].sort(key=lambda record: order[record['file']])
+        summary['elapsed'] = time.perf_counter() - start
+        
+        # 段階ごとの処理時間をJSONで書き出す
+        report_path = Path(self.config.get('batch_report_path', Settings.BATCH_REPORT_PATH))
+        try:
+            summary['report_path'] = telemetry.write_json(report_path)
+        except OSError as e:
+            self.logger.warning(f"Failed to write batch report {report_path}: {e}")
         return summary
     
+    def _commit_batch(self, transaction, records: List[Dict[str, Any]], journal: BatchJournal,
+                      content_hashes: Dict[Path, Optional[str]], summary: Dict[str, Any]) -> None:
+        """
+        溜めた分析結果を保存し、ファイルの完了をジャーナルに記録
+        
+        Args:
+            transaction: 書き込みトランザクション
+            records: このトランザクションに結果を追加したファイルの記録
+            journal: バッチ分析の完了記録
+            content_hashes: ファイルの内容ハッシュ
+            summary: 更新するサマリー
+        """
+        try:
+            transaction.commit()
+        except Exception as e:
+            print_error(f"Excel保存に失敗しました: {e}")
+            self.logger.error(f"Batch save error: {e}")
+            summary['failed'] += len(transaction.results)
+            for record in records:
+                record['status'] = STATUS_ERROR
+                record['error'] = f"保存に失敗しました: {e}"
+                summary['failed_files'].append(record['file'])
+                journal.record(record['file'], content_hashes[record['file']], JOURNAL_FAILED,
+                               error=record['error'])
+            return
+        
+        summary['success'] += len(transaction.results)
+        summary['results'].extend(transaction.results)
+        if transaction.results:
+            print_success(f"Excel保存完了: {len(transaction.results)}件")
+        for record in records:
+            journal.record(record['file'], content_hashes[record['file']], JOURNAL_DONE,
+                           results=record['results'])
+    
     def _convert_result_to_dict(self, result: AnalysisResult) -> Dict[str, Any]:
         """
         AnalysisResultを辞書形式に変換
@@ -1,14 +1,17 @@
 """
 CLIインターフェース - コマンドライン操作の最適化
+
+分析器・作業キューなどは使うときに読み込む。--version・--list-schools・--list-plugins
+などの管理コマンドは分析器を読み込まずに終わる。
 """
 import argparse
 import sys
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, TYPE_CHECKING
 import json
 
-from .application import EntranceExamAnalyzer
 from config.settings import Settings
+from config.app_config import get_config
 from utils.display_utils import (
     print_header,
     print_section,
@@ -20,17 +23,31 @@ from utils.display_utils import (
     Colors
 )
 from plugins.loader import get_plugin_loader
-from modules.excel_manager import ExcelManager
-from modules.text_file_manager import TextFileManager
+
+if TYPE_CHECKING:
+    from .application import EntranceExamAnalyzer
+    from processors.work_queue import WorkQueue
 
 
 class CLI:
     """コマンドラインインターフェース"""
     
     def __init__(self):
-        self.app = EntranceExamAnalyzer()
+        self._app: Optional['EntranceExamAnalyzer'] = None
         self.parser = self._create_parser()
     
+    @property
+    def app(self) -> 'EntranceExamAnalyzer':
+        """分析アプリケーション（最初に使うときに作成）"""
+        if self._app is None:
+            from .application import EntranceExamAnalyzer
+            self._app = EntranceExamAnalyzer()
+        return self._app
+    
+    @app.setter
+    def app(self, app: 'EntranceExamAnalyzer'):
+        self._app = app
+    
     def _create_parser(self) -> argparse.ArgumentParser:
         """ArgumentParserを作成"""
         parser = argparse.ArgumentParser(
@@ -41,9 +58,14 @@ class CLI:
   %(prog)s                          # 対話モードで起動
   %(prog)s file.txt                 # ファイルを直接分析
   %(prog)s --batch *.txt            # 複数ファイルをバッチ分析
+  %(prog)s --batch "*.txt" --force  # 完了記録を無視してすべて再分析
+  %(prog)s --batch "*.txt" --worker # 作業キューを複数のマシンで分担して分析
+  %(prog)s --merge                  # 作業キューの分析結果をデータベースへ反映
+  %(prog)s --watch                  # 過去問フォルダを監視して追加されたファイルを自動分析
   %(prog)s --list-plugins           # 利用可能なプラグインを表示
   %(prog)s --validate-db            # データベースを検証
   %(prog)s --export-summary         # サマリーレポートを出力
+  %(prog)s --export-excel           # 更新されたシートをExcelへ出力
             """
         )
         
@@ -61,6 +83,63 @@ class CLI:
             help='バッチ分析モード'
         )
         
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            metavar='N',
+            help=f'バッチ分析のワーカープロセス数（0で並列化しない、デフォルト: batch_config.json の max_workers）'
+        )
+        
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=None,
+            metavar='SECONDS',
+            help=f'バッチ分析の1ファイルの制限時間（デフォルト: batch_config.json の app_timeout_seconds）'
+        )
+        
+        parser.add_argument(
+            '--worker',
+            action='store_true',
+            help='共有作業キューから取り出したファイルを分析（--batch と併用、複数のマシンで分担できる）'
+        )
+        
+        parser.add_argument(
+            '--queue',
+            type=str,
+            default=str(Settings.WORK_QUEUE_PATH),
+            metavar='PATH',
+            help='作業キューのファイル（共有ボリューム上に置く、デフォルト: %(default)s）'
+        )
+        
+        parser.add_argument(
+            '--merge',
+            action='store_true',
+            help='作業キューに溜まった分析結果をデータベースへ反映（--worker と併用すると処理後に反映）'
+        )
+        
+        resume_group = parser.add_mutually_exclusive_group()
+        resume_group.add_argument(
+            '--resume',
+            action='store_true',
+            help='前回までのバッチ分析で完了したファイルをスキップ（デフォルト）'
+        )
+        resume_group.add_argument(
+            '--force',
+            action='store_true',
+            help='完了記録を無視してすべてのファイルを分析'
+        )
+        
+        parser.add_argument(
+            '--watch',
+            nargs='?',
+            const='',
+            default=None,
+            metavar='DIR',
+            help='フォルダを監視し、追加・変更されたファイルを自動で分析（省略時はOCRテキストフォルダ）'
+        )
+        
         parser.add_argument(
             '--output',
             '-o',
@@ -88,6 +167,18 @@ class CLI:
             help='バックアップを作成しない'
         )
         
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='分析結果キャッシュを使用しない（常に再分析）'
+        )
+        
+        parser.add_argument(
+            '--clear-cache',
+            action='store_true',
+            help='分析結果キャッシュを削除'
+        )
+        
         parser.add_argument(
             '--school',
             '-s',
@@ -134,6 +225,12 @@ class CLI:
             help='サマリーレポートをエクスポート'
         )
         
+        parser.add_argument(
+            '--export-excel',
+            action='store_true',
+            help='分析結果ストアから更新されたシートをExcelへ出力'
+        )
+        
         parser.add_argument(
             '--clear',
             action='store_true',
@@ -188,14 +285,26 @@ class CLI:
             if parsed_args.export_summary:
                 return self._export_summary()
             
+            if parsed_args.export_excel:
+                return self._export_excel()
+            
             if parsed_args.clear:
                 clear_screen()
                 return 0
             
+            if parsed_args.clear_cache:
+                return self._clear_cache()
+            
             # 設定を適用
             self._apply_settings(parsed_args)
             
             # メイン処理
+            if parsed_args.watch is not None:
+                return self._run_watch(parsed_args)
+            if parsed_args.batch and parsed_args.worker:
+                return self._run_queue_worker(parsed_args)
+            if parsed_args.merge:
+                return self._run_merge(parsed_args)
             if parsed_args.batch:
                 return self._run_batch(parsed_args)
             else:
@@ -227,6 +336,24 @@ class CLI:
         self.app.config['text_output'] = True  # 常にテキスト出力
         self.app.config['excel_output'] = False  # Excel出力はデフォルトでオフ
         
+        # 分析結果キャッシュ設定
+        if args.no_cache:
+            self.app.config['analysis_cache'] = False
+        
+        # プラグイン設定（キャッシュのフィンガープリントにも反映される）
+        if args.plugin:
+            self.app.config['plugin'] = args.plugin
+        
+        # バッチ分析の並列設定
+        if args.workers is not None:
+            self.app.config['batch_workers'] = max(0, args.workers)
+        if args.timeout is not None:
+            self.app.config['batch_timeout'] = args.timeout
+        if args.force:
+            self.app.config['batch_resume'] = False
+        elif args.resume:
+            self.app.config['batch_resume'] = True
+        
         # テキスト出力ディレクトリ設定
         if args.text_output_dir:
             self.app.config['text_output_dir'] = args.text_output_dir
@@ -279,16 +406,24 @@ class CLI:
             else:
                 print_warning("無効な選択です。")
     
-    def _run_batch(self, args) -> int:
-        """バッチ処理を実行"""
-        # ファイルパターンからファイルリストを作成
-        file_patterns = args.file.split(',') if args.file else ['*.txt']
+    def _collect_batch_files(self, file_arg: Optional[str]) -> List[Path]:
+        """ファイルパターン（カンマ区切り）からファイルリストを作成"""
+        file_patterns = file_arg.split(',') if file_arg else ['*.txt']
         file_paths = []
         
         for pattern in file_patterns:
             paths = list(Path.cwd().glob(pattern))
             file_paths.extend(paths)
         
+        return file_paths
+    
+    def _run_batch(self, args) -> int:
+        """バッチ処理を実行"""
+        from utils.worker_pool import STATUS_OK
+        from processors.batch_journal import STATUS_SKIPPED
+        
+        file_paths = self._collect_batch_files(args.file)
+        
         if not file_paths:
             print_warning("処理対象のファイルが見つかりません。")
             return 1
@@ -301,9 +436,95 @@ class CLI:
         print(f"処理ファイル数: {summary['total']}")
         print(f"成功: {summary['success']}")
         print(f"失敗: {summary['failed']}")
+        if summary['skipped']:
+            print(f"スキップ（完了済み）: {summary['skipped']}")
+        print(f"処理時間: {summary['elapsed']:.1f}秒")
+        
+        for line in summary['telemetry'].to_lines():
+            print(line)
+        if summary['report_path']:
+            print(f"計測レポート: {summary['report_path']}")
+        
+        for record in summary['files']:
+            if record['status'] not in (STATUS_OK, STATUS_SKIPPED):
+                print(f"  {record['file'].name}: {record['status']} "
+                      f"({record['elapsed']:.1f}秒) {record['error']}")
+        
+        cache_stats = self.app.get_cache_stats()
+        if cache_stats:
+            print(f"キャッシュ: ヒット {cache_stats['hits']} / ミス {cache_stats['misses']} "
+                  f"(ヒット率 {cache_stats['hit_rate']:.0%}, "
+                  f"{cache_stats['entries']}件, {cache_stats['size_mb']:.1f}MB)")
         
         return 0 if summary['failed'] == 0 else 1
     
+    def _open_queue(self, args) -> 'WorkQueue':
+        """作業キューを開く"""
+        from processors.work_queue import WorkQueue
+        return WorkQueue(Path(args.queue), lease_seconds=Settings.QUEUE_LEASE_SECONDS)
+    
+    def _run_queue_worker(self, args) -> int:
+        """作業キューのワーカーとして実行"""
+        from .queue_worker import QueueWorker
+        
+        print_header("キューワーカー", 60)
+        queue = self._open_queue(args)
+        
+        # ファイルの指定があればキューに追加（他のワーカーが追加済みのファイルは重複しない）
+        if args.file:
+            file_paths = self._collect_batch_files(args.file)
+            added = queue.enqueue(file_paths, force=args.force)
+            print_info(f"キューに{added}件を追加しました（指定 {len(file_paths)}件）")
+        
+        worker = QueueWorker(self.app, queue)
+        counts = worker.run()
+        if args.merge:
+            worker.merge()
+        
+        print_section("作業キューの状態")
+        for status, count in sorted(queue.counts().items()):
+            print(f"{status}: {count}")
+        queue.close()
+        return 0 if counts['failed'] == 0 else 1
+    
+    def _run_merge(self, args) -> int:
+        """作業キューの分析結果をデータベースへ反映"""
+        from .queue_worker import QueueWorker
+        
+        print_header("分析結果の反映", 60)
+        queue = self._open_queue(args)
+        try:
+            QueueWorker(self.app, queue).merge()
+        finally:
+            queue.close()
+        return 0
+    
+    def _run_watch(self, args) -> int:
+        """フォルダ監視モードを実行"""
+        from .folder_watcher import FolderWatcher
+        
+        watch_dir = Path(args.watch) if args.watch else get_config().get_ocr_dir()
+        if not watch_dir.is_dir():
+            print_error(f"監視するフォルダが見つかりません: {watch_dir}")
+            return 1
+        
+        print_header("フォルダ監視", 60)
+        watcher = FolderWatcher(self.app, watch_dir)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print_info("監視を終了しました。")
+        return 0
+    
+    def _clear_cache(self) -> int:
+        """分析結果キャッシュを削除"""
+        print_header("分析結果キャッシュの削除", 60)
+        
+        cache = self.app._get_analysis_cache()
+        removed = cache.clear() if cache is not None else 0
+        print_success(f"{removed}件のキャッシュを削除しました。")
+        return 0
+    
     def _list_plugins(self) -> int:
         """プラグインを一覧表示"""
         print_header("利用可能なプラグイン", 60)
@@ -337,7 +558,7 @@ class CLI:
         """データベースを検証"""
         print_header("データベース検証", 60)
         
-        manager = ExcelManager()
+        manager = self.app.excel_manager
         result = manager.validate_database()
         
         if result['is_valid']:
@@ -366,7 +587,7 @@ class CLI:
         """サマリーレポートをエクスポート"""
         print_header("サマリーレポート出力", 60)
         
-        manager = ExcelManager()
+        manager = self.app.excel_manager
         output_path = Path("summary_report.xlsx")
         
         if manager.export_summary_report(output_path):
@@ -376,6 +597,18 @@ class CLI:
             print_error("サマリーレポートの出力に失敗しました。")
             return 1
     
+    def _export_excel(self) -> int:
+        """分析結果ストアからExcelを出力"""
+        print_header("Excel出力", 60)
+        
+        manager = self.app.excel_manager
+        exported = manager.export_excel()
+        if exported:
+            print_success(f"{len(exported)}シートを出力しました: {manager.db_path}")
+        else:
+            print_info("Excelは最新です。")
+        return 0
+    
     def _manage_plugins(self):
         """プラグイン管理メニュー"""
         while True:
@@ -405,9 +638,10 @@ class CLI:
             print("1. データベース検証")
             print("2. サマリーレポート出力")
             print("3. バックアップ作成")
+            print("4. バックアップから復元")
             print("0. 戻る")
             
-            choice = input("\n選択してください (0-3): ").strip()
+            choice = input("\n選択してください (0-4): ").strip()
             
             if choice == '0':
                 break
@@ -416,15 +650,49 @@ class CLI:
             elif choice == '2':
                 self._export_summary()
             elif choice == '3':
-                manager = ExcelManager()
-                if manager.db_path.exists():
-                    backup_path = manager._create_backup()
+                manager = self.app.excel_manager
+                if manager._has_database():
+                    try:
+                        backup_path = manager._create_backup()
+                    except Exception as e:
+                        print_error(f"バックアップの作成に失敗しました: {e}")
+                        continue
                     if backup_path:
                         print_success(f"バックアップを作成: {backup_path}")
                     else:
-                        print_error("バックアップの作成に失敗しました。")
+                        print_info("前回のバックアップから変更がないため、作成を省略しました。")
                 else:
                     print_warning("データベースファイルが存在しません。")
+            elif choice == '4':
+                self._restore_backup()
+    
+    def _restore_backup(self):
+        """バックアップを選んで復元"""
+        manager = self.app.excel_manager
+        backups = manager.list_backups()
+        if not backups:
+            print_warning("バックアップがありません。")
+            return
+        
+        print_section("バックアップ一覧")
+        for i, entry in enumerate(backups, 1):
+            size_kb = entry.size / 1024
+            print(f"{i:2d}. {entry.created_at}  {size_kb:.1f}KB  {entry.content_hash[:12]}")
+        
+        choice = input(f"\n復元するバックアップ (1-{len(backups)}, 0でキャンセル): ").strip()
+        if not choice.isdigit() or not 1 <= int(choice) <= len(backups):
+            return
+        entry = backups[int(choice) - 1]
+        
+        confirm = input(f"{entry.created_at} の状態に戻します。よろしいですか？ (y/n): ").strip().lower()
+        if confirm != 'y':
+            return
+        
+        try:
+            manager.restore_backup(entry.backup_id)
+            print_success(f"バックアップを復元しました: {entry.created_at}")
+        except Exception as e:
+            print_error(f"バックアップの復元に失敗しました: {e}")
     
     def _show_help(self):
         """ヘルプを表示"""
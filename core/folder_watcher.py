@@ -0,0 +1,376 @@
+"""
+フォルダ監視モジュール - 過去問フォルダに追加されたファイルを自動で分析
+"""
+import os
+import json
+import time
+import queue
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from config.settings import Settings
+from utils.display_utils import print_info, print_success, print_warning
+from utils.file_utils import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# 監視状態ファイル形式のバージョン（一致しない状態は捨て、記録のないファイルは分析し直す）
+WATCH_STATE_VERSION = 1
+
+# 分析対象の拡張子
+WATCHED_SUFFIXES = ('.txt', '.pdf')
+
+# 書き込み途中のファイル・自動生成されるファイル（PDFのOCR結果）は対象外
+IGNORED_PREFIXES = ('.', '~$')
+IGNORED_SUFFIXES = ('.ocr.txt', '.tmp', '.part', '.crdownload')
+
+Signature = Tuple[int, int]  # (サイズ, 更新時刻ns)
+
+
+def is_watched_file(path: Path) -> bool:
+    """監視対象のファイル名か"""
+    name = path.name.lower()
+    return (name.endswith(WATCHED_SUFFIXES)
+            and not name.startswith(IGNORED_PREFIXES)
+            and not name.endswith(IGNORED_SUFFIXES))
+
+
+def _file_sha256(path: Path) -> str:
+    """ファイル内容のハッシュ"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PollingSource:
+    """
+    定期的にフォルダを走査して変更を検出するイベント源
+
+    前回の走査から (サイズ, 更新時刻) が変わったファイルだけを返す。
+    """
+
+    def __init__(self, watch_dir: Path):
+        self.watch_dir = Path(watch_dir)
+        self._snapshot: Dict[str, Signature] = {}
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def poll(self) -> Set[Path]:
+        """前回から追加・変更されたファイル"""
+        current: Dict[str, Signature] = {}
+        stack = [str(self.watch_dir)]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir():
+                                if not entry.name.startswith('.'):
+                                    stack.append(entry.path)
+                            elif entry.is_file() and is_watched_file(Path(entry.name)):
+                                stat = entry.stat()
+                                current[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+
+        changed = {Path(path) for path, signature in current.items()
+                   if self._snapshot.get(path) != signature}
+        self._snapshot = current
+        return changed
+
+
+class EventSource:
+    """
+    OSのファイル変更通知（inotify など）を使うイベント源
+
+    watchdog パッケージが必要。イベントは監視スレッドからキューに積まれ、
+    poll() でまとめて取り出す。
+    """
+
+    def __init__(self, watch_dir: Path):
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        self.watch_dir = Path(watch_dir)
+        self._events: 'queue.Queue[Path]' = queue.Queue()
+        events = self._events
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                # 移動・名前の変更は移動先を対象にする
+                path = getattr(event, 'dest_path', None) or event.src_path
+                events.put(Path(os.fsdecode(path)))
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), str(self.watch_dir), recursive=True)
+
+    def start(self) -> None:
+        self._observer.start()
+
+    def stop(self) -> None:
+        self._observer.stop()
+        self._observer.join(5)
+
+    def poll(self) -> Set[Path]:
+        """通知を受けたファイル"""
+        changed = set()
+        while True:
+            try:
+                path = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if is_watched_file(path):
+                changed.add(path)
+        return changed
+
+
+class FolderWatcher:
+    """
+    フォルダ監視クラス
+
+    追加・変更されたファイルを、書き込みが落ち着くまで待ってから（デバウンス）
+    まとめて EntranceExamAnalyzer.batch_analyze で分析し、1回の書き込みで保存する。
+    分析済みのファイルは監視状態ファイルに記録し、再起動後も内容が変わらない限り再分析しない。
+    """
+
+    def __init__(self, analyzer: Any, watch_dir: Path,
+                 state_path: Optional[Path] = None,
+                 debounce_seconds: float = Settings.WATCH_DEBOUNCE_SECONDS,
+                 poll_interval: float = Settings.WATCH_POLL_INTERVAL,
+                 use_events: bool = True):
+        """
+        初期化
+
+        Args:
+            analyzer: 分析に使うアプリケーション（batch_analyze を持つもの）
+            watch_dir: 監視するフォルダ
+            state_path: 監視状態ファイルのパス（デフォルトは Settings.WATCH_STATE_PATH）
+            debounce_seconds: 最後の変更からこの秒数だけ変更がなければ分析する
+            poll_interval: 変更を確認する間隔（秒）
+            use_events: OSの変更通知を使うか（使えない場合は定期的な走査）
+        """
+        self.analyzer = analyzer
+        self.watch_dir = Path(watch_dir)
+        self.state_path = Path(state_path or Settings.WATCH_STATE_PATH)
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.source = self._create_source(use_events)
+        self._pending: Dict[Path, Tuple[float, Optional[Signature]]] = {}
+        self._processed: Dict[str, dict] = self._load_state()
+        self._initial_scan_done = False
+
+    def _create_source(self, use_events: bool):
+        """イベント源を作成（watchdog がなければ定期的な走査）"""
+        if use_events:
+            try:
+                source = EventSource(self.watch_dir)
+                logger.info(f"Watching {self.watch_dir} with file system events")
+                return source
+            except ImportError:
+                logger.info("watchdog is not installed; falling back to polling")
+            except Exception as e:
+                logger.warning(f"File system events unavailable ({e}); falling back to polling")
+        return PollingSource(self.watch_dir)
+
+    @property
+    def uses_events(self) -> bool:
+        """OSの変更通知を使っているか"""
+        return isinstance(self.source, EventSource)
+
+    def _load_state(self) -> Dict[str, dict]:
+        """分析済みファイルの記録を読み込み"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable watch state {self.state_path}: {e}")
+            return {}
+        if data.get('version') != WATCH_STATE_VERSION:
+            return {}
+        return data.get('files', {})
+
+    def _save_state(self) -> None:
+        """分析済みファイルの記録を保存"""
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.state_path, json.dumps(
+                {'version': WATCH_STATE_VERSION, 'files': self._processed}, ensure_ascii=False, indent=1))
+        except OSError as e:
+            logger.warning(f"Failed to save watch state {self.state_path}: {e}")
+
+    def _signature(self, path: Path) -> Optional[Signature]:
+        """ファイルの (サイズ, 更新時刻ns)、存在しない場合はNone"""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _needs_analysis(self, path: Path, signature: Signature) -> bool:
+        """
+        分析が必要か（未分析、または前回の分析から内容が変わった）
+
+        更新時刻だけが変わったファイルはハッシュで内容を比べ、同じなら記録だけ更新する。
+        """
+        record = self._processed.get(str(path))
+        if record is None or record.get('status') != 'done':
+            return True
+        if (record['size'], record['mtime_ns']) == signature:
+            return False
+        try:
+            content_hash = _file_sha256(path)
+        except OSError:
+            return False
+        if content_hash != record.get('sha256'):
+            return True
+        record['size'], record['mtime_ns'] = signature
+        return False
+
+    def _record(self, path: Path, signature: Signature, status: str) -> None:
+        """分析結果を記録"""
+        try:
+            content_hash = _file_sha256(path)
+        except OSError:
+            content_hash = None
+        self._processed[str(path)] = {
+            'size': signature[0],
+            'mtime_ns': signature[1],
+            'sha256': content_hash,
+            'status': status,
+            'analyzed_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    def notice(self, paths: Iterable[Path], now: Optional[float] = None) -> None:
+        """
+        変更のあったファイルを保留に追加（変更のたびにデバウンスの待ち時間をやり直す）
+
+        Args:
+            paths: 変更のあったファイル
+            now: 現在時刻（time.monotonic）
+        """
+        now = time.monotonic() if now is None else now
+        for path in paths:
+            path = Path(path)
+            if not is_watched_file(path):
+                continue
+            signature = self._signature(path)
+            previous = self._pending.get(path)
+            if previous is None or previous[1] != signature:
+                self._pending[path] = (now, signature)
+
+    def take_ready(self, now: Optional[float] = None) -> List[Path]:
+        """
+        デバウンスの待ち時間が過ぎ、分析が必要なファイルを取り出す
+
+        Args:
+            now: 現在時刻（time.monotonic）
+
+        Returns:
+            分析するファイルのリスト
+        """
+        now = time.monotonic() if now is None else now
+        ready = []
+        for path, (changed_at, signature) in list(self._pending.items()):
+            if now - changed_at < self.debounce_seconds:
+                continue
+            current = self._signature(path)
+            if current != signature:
+                # 待っている間に書き込まれた（または削除された）
+                if current is None:
+                    del self._pending[path]
+                else:
+                    self._pending[path] = (now, current)
+                continue
+            del self._pending[path]
+            if current[0] > 0 and self._needs_analysis(path, current):
+                ready.append(path)
+        return sorted(ready)
+
+    def process(self, paths: List[Path]) -> Dict[str, Any]:
+        """
+        ファイルをまとめて分析・保存し、結果を記録
+
+        Args:
+            paths: 分析するファイル
+
+        Returns:
+            batch_analyze のサマリー
+        """
+        signatures = {path: self._signature(path) for path in paths}
+        summary = self.analyzer.batch_analyze(paths)
+        failed = {str(path) for path in summary.get('failed_files', [])}
+        for path, signature in signatures.items():
+            if signature is not None:
+                self._record(path, signature, 'failed' if str(path) in failed else 'done')
+        self._save_state()
+
+        succeeded = len(paths) - len(failed)
+        if succeeded:
+            print_success(f"監視フォルダの{succeeded}件を分析しました")
+        if failed:
+            print_warning(f"{len(failed)}件の分析に失敗しました（ファイルが更新されたら再試行します）")
+        return summary
+
+    def run_once(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        1回分の確認（変更の取り込み → 準備のできたファイルの分析）
+
+        Args:
+            now: 現在時刻（time.monotonic）
+
+        Returns:
+            分析した場合は batch_analyze のサマリー、なければNone（分析中の例外を含む）
+        """
+        if not self._initial_scan_done:
+            # 停止中に追加されたファイルを拾う（以降は変更通知・差分の走査だけ）
+            initial = PollingSource(self.watch_dir).poll() if self.uses_events else self.source.poll()
+            self.notice(initial, now=now)
+            self._initial_scan_done = True
+        else:
+            self.notice(self.source.poll(), now=now)
+
+        ready = self.take_ready(now=now)
+        if not ready:
+            return None
+        try:
+            return self.process(ready)
+        except Exception as e:
+            # 記録されないまま失われないように保留に戻し、デバウンスの後に再試行する
+            logger.error(f"Failed to analyze watched files: {e}", exc_info=True)
+            print_warning(f"監視フォルダの分析に失敗しました（{len(ready)}件、しばらくして再試行します）: {e}")
+            self.notice(ready, now=now)
+            return None
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """
+        監視を開始（stop_event がセットされるか Ctrl+C まで続ける）
+
+        Args:
+            stop_event: 停止の合図
+        """
+        stop_event = stop_event or threading.Event()
+        mode = '変更通知' if self.uses_events else f'{self.poll_interval}秒ごとの走査'
+        print_info(f"フォルダを監視しています: {self.watch_dir}（{mode}、Ctrl+Cで終了）")
+        self.source.start()
+        try:
+            while not stop_event.is_set():
+                self.run_once()
+                stop_event.wait(self.poll_interval)
+        finally:
+            self.source.stop()
@@ -0,0 +1,170 @@
+"""
+キューワーカーモジュール - 共有作業キューから取り出したファイルを分析し、
+結果を1か所でまとめてデータベースへ反映
+"""
+import os
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Set
+
+from config.settings import Settings
+from processors.work_queue import WorkQueue
+from utils.display_utils import print_info, print_success, print_warning, print_error
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    """ワーカーの識別子（ホスト名:プロセスID）"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class QueueWorker:
+    """
+    キューワーカークラス
+
+    キューから項目を借り、EntranceExamAnalyzer のバッチ分析と同じワーカープールで分析して、
+    結果をキューに返す。処理中はハートビートでリースを延長し、キューに未処理の項目も
+    他のワーカーが処理中の項目もなくなったら終了する。データベースへの保存は行わない
+    （merge でまとめて反映する）。
+    """
+
+    def __init__(self, analyzer: Any, queue: WorkQueue, worker_id: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 poll_interval: float = Settings.QUEUE_POLL_INTERVAL):
+        """
+        初期化
+
+        Args:
+            analyzer: 分析に使うアプリケーション（EntranceExamAnalyzer）
+            queue: 作業キュー
+            worker_id: ワーカーの識別子（省略時はホスト名:プロセスID）
+            batch_size: 一度に借りる件数（省略時はバッチ分析のワーカープロセス数）
+            poll_interval: 他のワーカーの処理中の項目が終わるのを待つ間隔（秒）
+        """
+        self.analyzer = analyzer
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        if batch_size is None:
+            batch_size = analyzer.config.get('batch_workers', Settings.get_batch_max_workers())
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self._active: Set[int] = set()
+        self._active_lock = threading.Lock()
+
+    def _heartbeat_loop(self, stop_event: threading.Event) -> None:
+        """処理中の項目のリースを期限の1/3ごとに延長"""
+        interval = max(0.1, self.queue.lease_seconds / 3)
+        while not stop_event.wait(interval):
+            with self._active_lock:
+                item_ids = list(self._active)
+            try:
+                self.queue.heartbeat(self.worker_id, item_ids)
+            except Exception as e:
+                logger.warning(f"Heartbeat failed: {e}")
+
+    @contextmanager
+    def _heartbeating(self) -> Iterator[None]:
+        """この間、処理中の項目（分析中・反映中）のリースを延長し続ける"""
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(stop,), daemon=True)
+        heartbeat.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            heartbeat.join(5)
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> Dict[str, int]:
+        """
+        キューが空になるまで分析を続ける
+
+        Args:
+            stop_event: 停止の合図（借りている分を処理し終えてから止まる）
+
+        Returns:
+            このワーカーの処理件数（done / failed / lost）
+        """
+        stop_event = stop_event or threading.Event()
+        counts = {'done': 0, 'failed': 0, 'lost': 0}
+        print_info(f"キューワーカーを開始します: {self.worker_id}")
+
+        with self._heartbeating():
+            while not stop_event.is_set():
+                items = self.queue.claim(self.worker_id, limit=self.batch_size)
+                if not items:
+                    if not self.queue.has_open_work():
+                        break
+                    # 他のワーカーが処理中（止まっていればリースの期限が切れて引き継げる）
+                    stop_event.wait(self.poll_interval)
+                    continue
+
+                by_path = {item.path: item for item in items}
+                with self._active_lock:
+                    self._active.update(item.id for item in items)
+
+                for outcome in self.analyzer._iter_batch_outcomes(list(by_path)):
+                    item = by_path[outcome.item]
+                    if outcome.ok:
+                        recorded = self.queue.complete(item.id, self.worker_id, outcome.value, outcome.elapsed)
+                    else:
+                        logger.error(f"Queue item {outcome.status}: {item.path} - {outcome.error}")
+                        recorded = self.queue.fail(item.id, self.worker_id,
+                                                   f'{outcome.status}: {outcome.error}', outcome.elapsed)
+                    with self._active_lock:
+                        self._active.discard(item.id)
+
+                    if not recorded:
+                        counts['lost'] += 1
+                    elif outcome.ok:
+                        counts['done'] += 1
+                    else:
+                        counts['failed'] += 1
+
+        print_success(f"キューワーカーを終了します: 完了 {counts['done']}件 / 失敗 {counts['failed']}件")
+        if counts['lost']:
+            print_warning(f"リースの期限が切れたため{counts['lost']}件の結果を破棄しました（他のワーカーが処理済み）")
+        return counts
+
+    def merge(self) -> Dict[str, Any]:
+        """
+        キューに溜まった分析結果をまとめてデータベースへ反映
+
+        同時に複数のプロセスが実行しても、同じ結果を二重に反映しない。
+        反映中は取り出した項目のリースを延長し、時間のかかる保存の途中で
+        他のプロセスに引き継がれないようにする。
+
+        Returns:
+            反映した件数（files / results）と分析結果のリスト
+        """
+        claimed = self.queue.claim_results(self.worker_id)
+        summary = {'files': len(claimed), 'results': []}
+        if not claimed:
+            print_info("データベースへ反映する分析結果はありません。")
+            return summary
+
+        item_ids = [item.id for item, _ in claimed]
+        with self._active_lock:
+            self._active.update(item_ids)
+        transaction = self.analyzer.excel_manager.transaction()
+        try:
+            with self._heartbeating():
+                for _, results in claimed:
+                    for result in results:
+                        transaction.add(result)
+                transaction.commit()
+        except Exception as e:
+            print_error(f"データベースへの反映に失敗しました: {e}")
+            logger.error(f"Queue merge error: {e}")
+            self.queue.finish_merge(item_ids, self.worker_id, merged=False)
+            raise
+        finally:
+            with self._active_lock:
+                self._active.difference_update(item_ids)
+
+        self.queue.finish_merge(item_ids, self.worker_id, merged=True)
+        summary['results'] = transaction.results
+        print_success(f"データベースへ反映しました: {len(claimed)}ファイル / {len(transaction.results)}件")
+        return summary
@@ -122,6 +122,15 @@ class ExcelWriteError(DatabaseError):
         super().__init__(message)
 
 
+class LockTimeoutError(DatabaseError):
+    """ファイルロック取得のタイムアウト"""
+    def __init__(self, lock_path: str, timeout: float):
+        self.lock_path = lock_path
+        self.timeout = timeout
+        message = f"ロック '{lock_path}' を{timeout:.0f}秒以内に取得できませんでした。"
+        super().__init__(message)
+
+
 class BackupError(DatabaseError):
     """バックアップエラー"""
     def __init__(self, file_path: str, reason: str = ""):
@@ -124,6 +124,9 @@ class ExcelExportConfig:
     include_timestamp: bool = True
     sheet_name_format: str = "{school_name}"
     use_new_format: bool = True  # 新形式（文章1、文章2、その他1、その他2）を使用
+    store_filename: str = None  # 分析結果ストア（省略時はExcelと同じ場所の .sqlite3）
+    sync_excel: bool = True  # 保存のたびに更新したシートをExcelへ反映
+    max_backup_count: int = None  # バックアップの保持世代数（省略時はapp_configの database.max_backup_count）
     
     
 @dataclass
@@ -3,8 +3,6 @@
 「文章1」「文章2」「その他1」「その他2」形式でデータを整理
 """
 
-import pandas as pd
-import os
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 import logging
@@ -12,6 +10,7 @@ from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from config.app_config import get_config
+from modules.result_writer import ResultWriter
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +32,8 @@ class ContentTypeFormatter:
         
         self.excel_path = excel_path
         self.columns = self._generate_columns()
+        # 同じワークブックへの同時保存でも行が失われないよう、書き込みは ResultWriter 経由で行う
+        self.writer = ResultWriter(Path(excel_path), index=False)
     
     def _generate_columns(self) -> List[str]:
         """カラム名を生成"""
@@ -206,7 +207,7 @@ class ContentTypeFormatter:
     
     def save_to_excel(self, data: Dict[str, Any], sheet_name: str = None):
         """
-        データをExcelファイルに保存
+        データを分析結果ストアに保存し、対象シートだけをExcelへ反映
         
         Args:
             data: 保存するデータ
@@ -215,49 +216,16 @@ class ContentTypeFormatter:
         if sheet_name is None:
             sheet_name = data.get('学校名', 'データ')
         
-        # DataFrameを作成
-        df_new = pd.DataFrame([data], columns=self.columns)
+        # 同じ年度のデータは置き換えられる
+        row = {column: data.get(column) for column in self.columns}
+        self.writer.upsert({sheet_name: [row]}, {sheet_name: self.columns}, export=False)
         
-        # 既存ファイルがある場合
-        if os.path.exists(self.excel_path):
-            try:
-                # 既存データを読み込み
-                with pd.ExcelFile(self.excel_path) as xls:
-                    sheets_dict = {}
-                    for sn in xls.sheet_names:
-                        sheets_dict[sn] = pd.read_excel(xls, sheet_name=sn)
-                
-                # 対象シートが存在する場合
-                if sheet_name in sheets_dict:
-                    df_existing = sheets_dict[sheet_name]
-                    
-                    # 同じ年度のデータがあるか確認
-                    year = data.get('年度')
-                    if year and '年度' in df_existing.columns:
-                        # 既存データから同じ年度のものを除外
-                        df_existing = df_existing[df_existing['年度'] != year]
-                    
-                    # 新しいデータを追加
-                    df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-                    sheets_dict[sheet_name] = df_combined
-                else:
-                    # 新しいシートとして追加
-                    sheets_dict[sheet_name] = df_new
-                
-                # 全シートを書き込み
-                with pd.ExcelWriter(self.excel_path, engine='openpyxl') as writer:
-                    for sn, df in sheets_dict.items():
-                        df.to_excel(writer, sheet_name=sn, index=False)
-                
-            except Exception as e:
-                logger.error(f"既存ファイルの処理中にエラー: {e}")
-                # エラーの場合は新規作成
-                with pd.ExcelWriter(self.excel_path, engine='openpyxl') as writer:
-                    df_new.to_excel(writer, sheet_name=sheet_name, index=False)
-        else:
-            # 新規作成
-            with pd.ExcelWriter(self.excel_path, engine='openpyxl') as writer:
-                df_new.to_excel(writer, sheet_name=sheet_name, index=False)
+        try:
+            self.writer.export(sheets=[sheet_name])
+        except Exception as e:
+            # ストアには保存済み（次回の出力で反映される）
+            logger.error(f"Excelへの反映中にエラー: {e}")
+            return
         
         logger.info(f"データを保存しました: {self.excel_path} (シート: {sheet_name})")
     
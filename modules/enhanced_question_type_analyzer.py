@@ -7,6 +7,8 @@ import logging
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
+from utils.numeral_utils import numeral_to_str
+from utils.question_features import extract_question_features
 
 logger = logging.getLogger(__name__)
 
@@ -164,40 +166,8 @@ class EnhancedQuestionTypeAnalyzer:
             (re.compile(r'助動詞'), 0.9),
         ]
         
-        # 字数制限の詳細パターン
-        self.char_limit_detailed_patterns = [
-            # 単一制限
-            re.compile(r'([0-9０-９]{1,3})\s*字\s*(以内|程度|前後|ぴったり|ちょうど)'),
-            re.compile(r'([0-9０-９]{1,3})\s*文字\s*(以内|程度|前後|ぴったり|ちょうど)'),
-            
-            # 範囲指定
-            re.compile(r'([0-9０-９]{1,3})\s*字\s*～\s*([0-9０-９]{1,3})\s*字'),
-            re.compile(r'([0-9０-９]{1,3})\s*文字\s*～\s*([0-9０-９]{1,3})\s*文字'),
-            re.compile(r'([0-9０-９]{1,3})\s*字\s*から\s*([0-9０-９]{1,3})\s*字'),
-            
-            # 最低・最大指定
-            re.compile(r'([0-9０-９]{1,3})\s*字\s*以上'),
-            re.compile(r'([0-9０-９]{1,3})\s*字\s*以下'),
-        ]
-        
-        # 選択肢数の検出パターン
-        self.choice_detection_patterns = [
-            # カタカナ選択肢
-            (re.compile(r'ア.*?イ.*?ウ.*?エ.*?オ'), 5),
-            (re.compile(r'ア.*?イ.*?ウ.*?エ'), 4),
-            (re.compile(r'ア.*?イ.*?ウ'), 3),
-            
-            # 数字選択肢
-            (re.compile(r'[1１].*?[2２].*?[3３].*?[4４].*?[5５]'), 5),
-            (re.compile(r'[1１].*?[2２].*?[3３].*?[4４]'), 4),
-            
-            # 丸数字選択肢
-            (re.compile(r'①.*?②.*?③.*?④.*?⑤'), 5),
-            (re.compile(r'①.*?②.*?③.*?④'), 4),
-            
-            # 明示的な数の指定
-            (re.compile(r'次の([2-8２-８])つから'), None),  # グループから数を取得
-        ]
+        # 字数制限・選択肢数・サブタイプ・難易度指標は utils.question_features の
+        # 特徴レコード（設問ごとに1回だけ走査）から取得する
     
     def analyze_questions(self, text: str, sections: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
@@ -385,111 +355,57 @@ class EnhancedQuestionTypeAnalyzer:
     
     def _extract_char_limit(self, text: str) -> Optional[Dict[str, Any]]:
         """字数制限を抽出"""
-        for pattern in self.char_limit_detailed_patterns:
-            match = pattern.search(text)
-            if match:
-                groups = match.groups()
-                
-                if '～' in pattern.pattern or 'から' in pattern.pattern:
-                    # 範囲指定
-                    return {
-                        'type': 'range',
-                        'min': int(self._normalize_number(groups[0])),
-                        'max': int(self._normalize_number(groups[1]))
-                    }
-                elif '以上' in match.group(0):
-                    return {
-                        'type': 'minimum',
-                        'min': int(self._normalize_number(groups[0]))
-                    }
-                elif '以下' in match.group(0):
-                    return {
-                        'type': 'maximum',
-                        'max': int(self._normalize_number(groups[0]))
-                    }
-                else:
-                    # 単一制限
-                    limit = int(self._normalize_number(groups[0]))
-                    condition = groups[1] if len(groups) > 1 else '以内'
-                    return {
-                        'type': 'single',
-                        'limit': limit,
-                        'condition': condition
-                    }
+        features = extract_question_features(text)
+        
+        # 単一制限
+        limit = features.first_limit('以内', '程度', '前後', 'ぴったり', 'ちょうど')
+        if limit:
+            return {
+                'type': 'single',
+                'limit': limit.value,
+                'condition': limit.condition
+            }
+        
+        # 範囲指定
+        limit = features.first_limit('範囲')
+        if limit:
+            return {
+                'type': 'range',
+                'min': limit.min,
+                'max': limit.max
+            }
+        
+        # 最低・最大指定
+        limit = features.first_limit('以上')
+        if limit:
+            return {
+                'type': 'minimum',
+                'min': limit.min
+            }
+        limit = features.first_limit('以下')
+        if limit:
+            return {
+                'type': 'maximum',
+                'max': limit.max
+            }
         
         return None
     
     def _count_choices(self, text: str) -> Optional[int]:
         """選択肢数をカウント"""
-        for pattern, count in self.choice_detection_patterns:
-            match = pattern.search(text)
-            if match:
-                if count is None and match.groups():
-                    # グループから数を取得
-                    return int(self._normalize_number(match.group(1)))
-                else:
-                    return count
-        
-        # 選択肢を個別にカウント
-        kata_choices = len(re.findall(r'[アイウエオカキクケコ]\s*[．.]', text))
-        if kata_choices >= 2:
-            return kata_choices
-        
-        num_choices = len(re.findall(r'[1-5１-５]\s*[．.]', text))
-        if num_choices >= 2:
-            return num_choices
-        
-        circle_choices = len(re.findall(r'[①②③④⑤⑥⑦⑧]', text))
-        if circle_choices >= 2:
-            return circle_choices
-        
-        return None
+        return extract_question_features(text).choice_count
     
     def _determine_kanji_subtype(self, text: str) -> Optional[str]:
         """漢字・語句問題のサブタイプを判定"""
-        if '読み' in text:
-            return '読み'
-        elif '書き' in text or '漢字に' in text:
-            return '書き'
-        elif '類義語' in text or '同義語' in text:
-            return '類義語'
-        elif '対義語' in text or '反対' in text:
-            return '対義語'
-        elif 'ことわざ' in text:
-            return 'ことわざ'
-        elif '慣用句' in text:
-            return '慣用句'
-        elif '四字熟語' in text:
-            return '四字熟語'
-        elif '品詞' in text:
-            return '文法'
-        return None
+        return extract_question_features(text).kanji_subtype
     
     def _determine_description_subtype(self, text: str) -> Optional[str]:
         """記述式問題のサブタイプを判定"""
-        if '理由' in text or 'なぜ' in text:
-            return '理由説明'
-        elif 'どのような' in text or 'どういう' in text:
-            return '内容説明'
-        elif '気持ち' in text or '心情' in text:
-            return '心情説明'
-        elif 'あなたの考え' in text or '自分の意見' in text:
-            return '意見記述'
-        elif 'まとめ' in text or '要約' in text:
-            return '要約'
-        return None
+        return extract_question_features(text).description_subtype
     
     def _determine_selection_subtype(self, text: str) -> Optional[str]:
         """選択式問題のサブタイプを判定"""
-        if '正しい' in text:
-            return '正誤'
-        elif '誤って' in text or '間違' in text:
-            return '誤り選択'
-        elif '最も' in text:
-            return '最適選択'
-        elif '該当' in text or '当てはまる' in text:
-            return '該当選択'
-        return None
+        return extract_question_features(text).selection_subtype
     
     def _infer_from_context(self, question: Dict[str, Any], 
                            all_lines: List[str]) -> str:
@@ -519,40 +435,11 @@ class EnhancedQuestionTypeAnalyzer:
     
     def _extract_difficulty_indicators(self, text: str) -> List[str]:
         """難易度を示唆する表現を抽出"""
-        indicators = []
-        
-        difficulty_patterns = [
-            '必ず', '全て', 'すべて', '詳しく', '具体的に',
-            '簡潔に', '要約して', '自分の言葉で', '根拠を示して'
-        ]
-        
-        for pattern in difficulty_patterns:
-            if pattern in text:
-                indicators.append(pattern)
-        
-        return indicators
+        return extract_question_features(text).difficulty_indicators
     
     def _normalize_number(self, num_str: str) -> str:
         """漢数字・全角数字を半角数字に変換"""
-        # 漢数字変換表
-        kanji_map = {
-            '一': '1', '二': '2', '三': '3', '四': '4', '五': '5',
-            '六': '6', '七': '7', '八': '8', '九': '9', '十': '10',
-            '十一': '11', '十二': '12', '十三': '13', '十四': '14', '十五': '15',
-            '十六': '16', '十七': '17', '十八': '18', '十九': '19', '二十': '20',
-            '三十': '30', '四十': '40', '五十': '50', '六十': '60',
-            '七十': '70', '八十': '80', '九十': '90', '百': '100',
-            '二百': '200', '三百': '300', '四百': '400', '五百': '500'
-        }
-        
-        # 漢数字の変換
-        if num_str in kanji_map:
-            return kanji_map[num_str]
-        
-        # 全角数字を半角に変換
-        num_str = num_str.translate(str.maketrans('０１２３４５６７８９', '0123456789'))
-        
-        return num_str
+        return numeral_to_str(num_str)
     
     def _analyze_section_questions(self, section: Dict, 
                                   all_questions: List[Dict]) -> Dict[str, Any]:
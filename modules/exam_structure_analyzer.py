@@ -6,6 +6,7 @@ import re
 import logging
 from typing import Dict, List, Tuple, Optional, Any
 from pathlib import Path
+from utils.numeral_utils import parse_numeral
 
 logger = logging.getLogger(__name__)
 
@@ -52,14 +53,6 @@ class ExamStructureAnalyzer:
             r'^設問([一二三四五六七八九十1-9０-９]+)',
             r'^Q([1-9]+)',
         ]
-        
-        # 漢数字と算用数字の変換辞書
-        self.kanji_to_num = {
-            '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
-            '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
-            '１': 1, '２': 2, '３': 3, '４': 4, '５': 5,
-            '６': 6, '７': 7, '８': 8, '９': 9,
-        }
     
     def analyze_structure(self, text: str, source_info: Optional[Dict] = None) -> Dict[str, Any]:
         """
@@ -262,18 +255,7 @@ class ExamStructureAnalyzer:
     
     def _convert_to_number(self, num_str: str) -> int:
         """漢数字や全角数字を半角数字に変換"""
-        if num_str in self.kanji_to_num:
-            return self.kanji_to_num[num_str]
-        
-        try:
-            return int(num_str)
-        except ValueError:
-            # 全角数字を半角に変換
-            num_str = num_str.translate(str.maketrans('０１２３４５６７８９', '0123456789'))
-            try:
-                return int(num_str)
-            except ValueError:
-                return 0
+        return parse_numeral(num_str) or 0
     
     def _validate_structure(self, structure: Dict, text: str) -> Dict:
         """構造の妥当性を検証し、必要に応じて修正"""
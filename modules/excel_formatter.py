@@ -8,6 +8,9 @@ from typing import Dict, List, Any, Optional
 import os
 from pathlib import Path
 
+from modules.result_writer import ResultWriter
+from utils.file_utils import create_backup
+
 
 class ExcelFormatter:
     """入試問題分析結果をExcel形式に整形するクラス"""
@@ -178,53 +181,23 @@ class ExcelFormatter:
         Returns:
             成功した場合True
         """
+        writer = ResultWriter(Path(self.excel_path), index=True)
         try:
-            # バックアップ作成
-            if backup and os.path.exists(self.excel_path):
-                backup_path = f"data/backups/backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.path.basename(self.excel_path)}"
-                os.makedirs(os.path.dirname(backup_path), exist_ok=True)
-                import shutil
-                shutil.copy2(self.excel_path, backup_path)
-                print(f"バックアップを作成: {backup_path}")
-            
-            # 既存のExcelファイルを読み込むか新規作成
-            if os.path.exists(self.excel_path):
-                excel_file = pd.ExcelFile(self.excel_path)
-                sheets = {sheet: pd.read_excel(excel_file, sheet_name=sheet) 
-                         for sheet in excel_file.sheet_names}
-            else:
-                sheets = {}
-            
-            # 学校のシートが存在しない場合は新規作成
-            if school_name not in sheets:
-                sheets[school_name] = pd.DataFrame(columns=self.COLUMNS)
-            
-            # データフレームを取得
-            df = sheets[school_name]
-            
-            # 同じ年度のデータが存在する場合は更新、なければ追加
-            year = row_data['年度']
-            if year in df['年度'].values:
-                # 既存データを更新
-                index = df[df['年度'] == year].index[0]
-                for col, value in row_data.items():
-                    if col in df.columns:
-                        df.at[index, col] = value
-                print(f"{school_name} {year}年のデータを更新")
-            else:
-                # 新規データを追加
-                new_row = pd.DataFrame([row_data])
-                df = pd.concat([df, new_row], ignore_index=True)
-                print(f"{school_name} {year}年のデータを新規追加")
-            
-            # 年度順にソート
-            df = df.sort_values('年度')
-            sheets[school_name] = df
-            
-            # Excelファイルに書き込み
-            with pd.ExcelWriter(self.excel_path, engine='openpyxl') as writer:
-                for sheet_name, sheet_df in sheets.items():
-                    sheet_df.to_excel(writer, sheet_name=sheet_name, index=True)
+            with writer.lock:
+                # バックアップ作成（内容が前回と同じ場合は省略される）
+                if backup and os.path.exists(self.excel_path):
+                    backup_path = create_backup(Path(self.excel_path), Path("data/backups"))
+                    if backup_path:
+                        print(f"バックアップを作成: {backup_path}")
+                
+                # 同じ年度のデータが存在する場合は更新、なければ追加
+                year = row_data['年度']
+                if writer.store.has_row(school_name, year):
+                    print(f"{school_name} {year}年のデータを更新")
+                else:
+                    print(f"{school_name} {year}年のデータを新規追加")
+                
+                writer.upsert({school_name: [row_data]}, {school_name: self.COLUMNS}, merge=True)
             
             print(f"データを保存しました: {self.excel_path}")
             return True
@@ -232,6 +205,9 @@ class ExcelFormatter:
         except Exception as e:
             print(f"Excel保存エラー: {e}")
             return False
+        
+        finally:
+            writer.close()
     
     def get_school_data(self, school_name: str) -> pd.DataFrame:
         """
@@ -1,23 +1,131 @@
 """
 Excel操作モジュール - データベースの読み書きとバックアップ管理
+
+分析結果はSQLiteのストア（ResultStore）に保存し、Excelはストアから
+更新されたシートだけを書き出す派生ファイルとして扱う。
 """
-import pandas as pd
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, TYPE_CHECKING
 import shutil
 
 from config.settings import Settings
 from models import AnalysisResult, ExcelExportConfig
+from modules.workbook_scanner import scan_workbook
+from modules.result_store import ResultStore, SheetFrameCache
+from modules.result_writer import ResultWriter
 from exceptions import (
     ExcelReadError,
     ExcelWriteError,
     BackupError,
     DatabaseError
 )
-from utils.file_utils import create_backup, ensure_directory_exists
+from utils.file_utils import ensure_directory_exists
+from utils.backup_store import BackupEntry, BackupStore
 from utils.display_utils import print_success, print_warning, print_error, print_info
 
+if TYPE_CHECKING:
+    import pandas as pd  # 実行時は使うときに読み込む（CLIの起動を軽くするため）
+
+
+# 読み込んだシートのキャッシュ（ExcelManagerのインスタンス間で共有）
+_sheet_cache = SheetFrameCache()
+
+
+class ExcelWriteTransaction:
+    """
+    Excelデータベースへの書き込みトランザクション
+    
+    複数の分析結果を溜めておき、ストアへ1回のトランザクションで書き込んだ後、
+    対象の学校シートだけをExcelへ反映する。バックアップもトランザクションごとに1回だけ作成する。
+    
+    使用例:
+        with manager.transaction() as tx:
+            for result in results:
+                tx.add(result)
+    """
+    
+    def __init__(self, manager: 'ExcelManager'):
+        """
+        初期化
+        
+        Args:
+            manager: 書き込み先のExcelManager
+        """
+        self.manager = manager
+        # 学校名（シート名）→ 年度 → 1行分のデータフレーム（同じ年度は後から追加した結果で上書き）
+        self._pending: Dict[str, Dict[int, 'pd.DataFrame']] = {}
+        self._results: List[AnalysisResult] = []
+        self.committed = False
+    
+    def add(self, result: AnalysisResult) -> None:
+        """
+        分析結果をトランザクションに追加
+        
+        Args:
+            result: 分析結果
+        """
+        if self.committed:
+            raise DatabaseError("コミット済みのトランザクションには追加できません")
+        
+        df = self.manager._create_dataframe(result)
+        self._pending.setdefault(result.school_name, {})[int(result.year)] = df
+        self._results.append(result)
+    
+    @property
+    def pending_count(self) -> int:
+        """書き込み待ちの行数"""
+        return sum(len(rows) for rows in self._pending.values())
+    
+    @property
+    def results(self) -> List[AnalysisResult]:
+        """追加された分析結果"""
+        return list(self._results)
+    
+    def commit(self) -> int:
+        """
+        溜めた結果をまとめて書き込み
+        
+        Returns:
+            書き込んだ行数
+        
+        Raises:
+            BackupError: バックアップに失敗した場合
+            ExcelWriteError: 書き込みに失敗した場合
+        """
+        if self.committed:
+            return 0
+        self.committed = True
+        
+        if not self._pending:
+            return 0
+        
+        # バックアップはトランザクションごとに1回
+        if self.manager.config.create_backup and not self.manager.store.is_empty():
+            backup_path = self.manager._create_backup()
+            if backup_path:
+                print_info(f"バックアップを作成: {backup_path}")
+        
+        pending = {school: sorted(rows.items()) for school, rows in self._pending.items()}
+        self.manager._write_sheets(pending)
+        return self.pending_count
+    
+    def rollback(self) -> None:
+        """溜めた結果を破棄"""
+        self._pending.clear()
+        self._results.clear()
+        self.committed = True
+    
+    def __enter__(self) -> 'ExcelWriteTransaction':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
 
 class ExcelManager:
     """Excel データベース管理クラス"""
@@ -40,10 +148,53 @@ class ExcelManager:
             app_config = get_config()
             self.db_path = app_config.get_excel_path()
         
+        self._writer: Optional[ResultWriter] = None
+        
         # 出力ディレクトリを確保
         if self.db_path.parent != Path('.'):
             ensure_directory_exists(self.db_path.parent)
     
+    @property
+    def store_path(self) -> Path:
+        """分析結果ストアのパス（省略時はExcelと同じ場所の .sqlite3）"""
+        if self.config.store_filename:
+            return Path(self.config.store_filename)
+        return self.db_path.with_suffix('.sqlite3')
+    
+    @property
+    def writer(self) -> ResultWriter:
+        """書き込み窓口（同じワークブックへの同時書き込みを直列化する）"""
+        if self._writer is not None and (
+            self._writer.excel_path != self.db_path or self._writer.store_path != self.store_path
+        ):
+            # 出力先（db_path）が変更された
+            self._writer.close()
+            self._writer = None
+        if self._writer is None:
+            self._writer = ResultWriter(
+                self.db_path, store_path=self.store_path, index=True, engine=Settings.EXCEL_ENGINE
+            )
+        return self._writer
+    
+    @property
+    def store(self) -> ResultStore:
+        """
+        分析結果ストア（初回アクセス時に開き、ストアが空で既存のExcelがあれば取り込む）
+        """
+        writer = self.writer
+        migrating = not writer.is_open and not writer.store_path.exists() and self.db_path.exists()
+        try:
+            store = writer.store
+        except Exception as e:
+            raise ExcelReadError(str(self.db_path), str(e))
+        if migrating:
+            print_info(f"既存のExcelデータをストアに取り込みました: {store.record_count()}件")
+        return store
+    
+    def _has_database(self) -> bool:
+        """ストアまたはExcelファイルが存在するか"""
+        return self.store_path.exists() or self.db_path.exists()
+    
     def save_analysis_result(self, result: AnalysisResult) -> bool:
         """
         分析結果をExcelに保存
@@ -55,17 +206,8 @@ class ExcelManager:
             成功した場合True
         """
         try:
-            # バックアップを作成
-            if self.config.create_backup and self.db_path.exists():
-                backup_path = self._create_backup()
-                if backup_path:
-                    print_info(f"バックアップを作成: {backup_path}")
-            
-            # データフレームを作成
-            df = self._create_dataframe(result)
-            
-            # Excelファイルに書き込み
-            self._write_to_excel(df, result.school_name, result.year)
+            with self.transaction() as tx:
+                tx.add(result)
             
             print_success(f"分析結果を保存しました: {result.school_name} {result.year}年")
             return True
@@ -74,6 +216,41 @@ class ExcelManager:
             print_error(f"Excel保存に失敗しました: {str(e)}")
             return False
     
+    def transaction(self) -> ExcelWriteTransaction:
+        """
+        書き込みトランザクションを開始
+        
+        Returns:
+            トランザクション（withブロックを抜けるとまとめて書き込まれる）
+        """
+        return ExcelWriteTransaction(self)
+    
+    def save_analysis_results(self, results: List[AnalysisResult]) -> bool:
+        """
+        複数の分析結果をまとめてExcelに保存（読み込み・バックアップ・書き込みは1回ずつ）
+        
+        Args:
+            results: 分析結果のリスト
+        
+        Returns:
+            成功した場合True
+        """
+        if not results:
+            return True
+        
+        try:
+            with self.transaction() as tx:
+                for result in results:
+                    tx.add(result)
+            
+            schools = {result.school_name for result in results}
+            print_success(f"分析結果を保存しました: {len(results)}件（{len(schools)}校）")
+            return True
+        
+        except Exception as e:
+            print_error(f"Excel保存に失敗しました: {str(e)}")
+            return False
+    
     def _is_text_section(self, section, result, index: int) -> bool:
         """セクションが文章問題かどうかを判定"""
         # is_text_problemフラグがある場合はそれを優先
@@ -119,8 +296,10 @@ class ExcelManager:
             return section.content
         return ''
     
-    def _create_dataframe(self, result: AnalysisResult) -> pd.DataFrame:
+    def _create_dataframe(self, result: AnalysisResult) -> 'pd.DataFrame':
         """分析結果からDataFrameを作成"""
+        import pandas as pd
+        
         data = {
             '年度': [int(result.year)],
             '総設問数': [result.get_question_count()],
@@ -261,89 +440,122 @@ class ExcelManager:
         
         return pd.DataFrame(data)
     
-    def _write_to_excel(self, df: pd.DataFrame, school_name: str, year: str):
+    def _write_to_excel(self, df: 'pd.DataFrame', school_name: str, year: str):
         """DataFrameをExcelに書き込み"""
         # ContentTypeFormatter形式ではシート名は学校名
-        sheet_name = school_name
+        self._write_sheets({school_name: [(int(year), df)]})
+    
+    def _write_sheets(self, pending: Dict[str, List[Tuple[int, 'pd.DataFrame']]]):
+        """
+        書き込み待ちの行をストアに保存し、対象の学校シートだけをExcelへ反映
         
+        Args:
+            pending: シート名 → [(年度, 1行分のデータフレーム)] の辞書
+        """
+        sheet_rows = {
+            sheet: [record for _, df in rows for record in df.to_dict('records')]
+            for sheet, rows in pending.items()
+        }
         try:
-            if self.db_path.exists():
-                # 既存ファイルを読み込み
-                with pd.ExcelFile(self.db_path, engine=Settings.EXCEL_ENGINE) as excel_file:
-                    existing_sheets = excel_file.sheet_names
-                    
-                    # すべてのシートを読み込み
-                    all_data = {}
-                    for sheet in existing_sheets:
-                        all_data[sheet] = pd.read_excel(
-                            excel_file,
-                            sheet_name=sheet,
-                            engine=Settings.EXCEL_ENGINE
-                        )
-                    
-                    # 対象シートの処理
-                    if sheet_name in all_data:
-                        existing_df = all_data[sheet_name]
-                        # 同じ年度のデータを更新または追加
-                        updated_df = self._update_or_append(existing_df, df, int(year))
-                        all_data[sheet_name] = updated_df
-                    else:
-                        all_data[sheet_name] = df
-                
-                # すべてのシートを書き込み
-                with pd.ExcelWriter(
-                    self.db_path,
-                    engine=Settings.EXCEL_ENGINE,
-                    mode='w'
-                ) as writer:
-                    for sheet, data in all_data.items():
-                        data.to_excel(writer, sheet_name=sheet, index=True)
-            
-            else:
-                # 新規ファイル作成
-                with pd.ExcelWriter(
-                    self.db_path,
-                    engine=Settings.EXCEL_ENGINE,
-                    mode='w'
-                ) as writer:
-                    df.to_excel(writer, sheet_name=sheet_name, index=True)
-        
+            self.writer.upsert(sheet_rows, export=False)
         except Exception as e:
-            raise ExcelWriteError(str(self.db_path), str(e))
+            raise DatabaseError(f"分析結果ストアへの保存に失敗しました: {e}")
+        finally:
+            _sheet_cache.invalidate(self.store_path, pending)
+        
+        if self.config.sync_excel:
+            # 失敗してもストアには保存済み（シートは未反映のまま残り、次回の出力で書き出される）
+            self.export_excel(sheets=list(pending))
     
-    def _update_or_append(self, existing_df: pd.DataFrame, new_df: pd.DataFrame, year: int) -> pd.DataFrame:
-        """既存データフレームを更新または追加"""
-        # 年度列が存在するか確認
-        if '年度' not in existing_df.columns:
-            return pd.concat([existing_df, new_df], ignore_index=True)
-        
-        # 同じ年度のデータがあるか確認
-        year_mask = existing_df['年度'] == year
-        
-        if year_mask.any():
-            # 既存データを更新
-            # まず該当年度の行を削除
-            updated_df = existing_df[~year_mask].copy()
-            # 新しいデータを追加
-            updated_df = pd.concat([updated_df, new_df], ignore_index=True)
-        else:
-            # 新しいデータを追加
-            updated_df = pd.concat([existing_df, new_df], ignore_index=True)
+    def export_excel(self, sheets: Optional[List[str]] = None) -> List[str]:
+        """
+        ストアの内容をExcelへ出力（前回の出力以降に更新されたシートだけを置き換える）
         
-        # 年度でソート
-        updated_df = updated_df.sort_values('年度').reset_index(drop=True)
+        Args:
+            sheets: 出力対象を限定するシート名（省略時は更新されたすべてのシート）
         
-        return updated_df
+        Returns:
+            出力したシート名のリスト
+        
+        Raises:
+            ExcelWriteError: 書き込みに失敗した場合
+        """
+        try:
+            return self.writer.export(sheets=sheets)
+        except Exception as e:
+            raise ExcelWriteError(str(self.db_path), str(e))
+    
+    def _backup_store(self) -> BackupStore:
+        """ストアのバックアップ保管庫"""
+        max_count = self.config.max_backup_count
+        if max_count is None:
+            from config.app_config import get_config
+            max_count = get_config().get('database.max_backup_count', 5)
+        return BackupStore(Settings.BACKUP_DIR, self.store_path.name, max_count=max_count)
     
     def _create_backup(self) -> Optional[Path]:
-        """バックアップを作成"""
+        """
+        バックアップを作成（正本であるストアを複製）
+        
+        Returns:
+            作成したバックアップのパス、直前のバックアップと内容が同じため省略した場合はNone
+        """
         try:
-            backup_dir = Settings.BACKUP_DIR
-            return create_backup(self.db_path, backup_dir)
+            store = self.store
+            entry, created = self._backup_store().backup_with(store.content_digest(), store.backup)
+            if not created:
+                return None
+            return Settings.BACKUP_DIR / entry.file_name
         except Exception as e:
-            raise BackupError(str(self.db_path), str(e))
+            raise BackupError(str(self.store_path), str(e))
+    
+    def list_backups(self) -> List[BackupEntry]:
+        """
+        バックアップの一覧を取得
+        
+        Returns:
+            バックアップのリスト（新しい順）
+        """
+        return list(reversed(self._backup_store().entries()))
     
-    def read_school_data(self, school_name: str) -> Optional[pd.DataFrame]:
+    def restore_backup(self, backup_id: str) -> Path:
+        """
+        バックアップからストアを復元し、Excelを作り直す
+        
+        復元前の状態もバックアップしておくため、復元は取り消せる。
+        
+        Args:
+            backup_id: 復元するバックアップのID
+        
+        Returns:
+            復元したストアのパス
+        
+        Raises:
+            BackupError: 復元に失敗した場合
+        """
+        backups = self._backup_store()
+        if backups.get(backup_id) is None:
+            raise BackupError(str(self.store_path), f"バックアップが見つかりません: {backup_id}")
+        
+        if self.store_path.exists():
+            self._create_backup()
+        
+        writer = self.writer
+        with writer.lock:
+            try:
+                # ストアを閉じてから置き換える（置き換え中は開き直させない）
+                writer.replace_store(lambda path: backups.restore(backup_id, path))
+            except Exception as e:
+                raise BackupError(str(self.store_path), str(e))
+            finally:
+                _sheet_cache.invalidate(self.store_path)
+            
+            # Excelは派生ファイルなので、復元したストアから作り直す（復元後にないシートを残さない）
+            self.db_path.unlink(missing_ok=True)
+            self.export_excel()
+        return self.store_path
+    
+    def read_school_data(self, school_name: str) -> Optional['pd.DataFrame']:
         """
         特定の学校のデータを読み込み
         
@@ -353,18 +565,20 @@ class ExcelManager:
         Returns:
             データフレーム、存在しない場合はNone
         """
-        if not self.db_path.exists():
+        if not self._has_database():
             return None
         
+        import pandas as pd
+        
         sheet_name = self.config.sheet_name_format.format(school_name=school_name)
         
         try:
-            df = pd.read_excel(
-                self.db_path,
-                sheet_name=sheet_name,
-                engine=Settings.EXCEL_ENGINE
+            store = self.store
+            df = _sheet_cache.get(
+                store, sheet_name,
+                lambda: pd.DataFrame(store.read_rows(sheet_name), columns=store.sheet_columns(sheet_name))
             )
-            return df
+            return df if not df.empty else None
         except Exception:
             return None
     
@@ -375,12 +589,11 @@ class ExcelManager:
         Returns:
             学校名のリスト
         """
-        if not self.db_path.exists():
+        if not self._has_database():
             return []
         
         try:
-            with pd.ExcelFile(self.db_path, engine=Settings.EXCEL_ENGINE) as excel_file:
-                return excel_file.sheet_names
+            return self.store.sheet_names()
         except Exception:
             return []
     
@@ -394,47 +607,55 @@ class ExcelManager:
         Returns:
             成功した場合True
         """
-        if not self.db_path.exists():
+        if not self._has_database():
             print_warning("データベースが存在しません。")
             return False
         
         try:
             output_path = output_path or Path("summary_report.xlsx")
             
-            with pd.ExcelFile(self.db_path, engine=Settings.EXCEL_ENGINE) as excel_file:
-                summary_data = []
-                
-                for school in excel_file.sheet_names:
-                    df = pd.read_excel(excel_file, sheet_name=school)
-                    
-                    if not df.empty and '年度' in df.columns:
-                        summary = {
-                            '学校名': school,
-                            'データ年数': len(df),
-                            '最古年度': df['年度'].min(),
-                            '最新年度': df['年度'].max(),
-                            '平均文字数': df['総文字数'].mean() if '総文字数' in df.columns else 0,
-                            '平均設問数': df['総設問数'].mean() if '総設問数' in df.columns else 0,
-                        }
-                        summary_data.append(summary)
-                
-                if summary_data:
-                    summary_df = pd.DataFrame(summary_data)
-                    summary_df.to_excel(output_path, index=True, engine=Settings.EXCEL_ENGINE)
-                    print_success(f"サマリーレポートを出力: {output_path}")
-                    return True
-                else:
-                    print_warning("サマリーデータがありません。")
-                    return False
+            summary_data = self._store_summary_rows()
+            
+            if summary_data:
+                import pandas as pd
+                summary_df = pd.DataFrame(summary_data)
+                summary_df.to_excel(output_path, index=True, engine=Settings.EXCEL_ENGINE)
+                print_success(f"サマリーレポートを出力: {output_path}")
+                return True
+            else:
+                print_warning("サマリーデータがありません。")
+                return False
         
         except Exception as e:
             print_error(f"サマリーレポートの出力に失敗: {str(e)}")
             return False
     
-    def validate_database(self) -> Dict[str, Any]:
+    def _store_summary_rows(self) -> List[Dict[str, Any]]:
+        """
+        サマリーレポートの行（集計はストア上で行い、各シートを読み込まない）
+        
+        Returns:
+            学校ごとの行（WorkbookScan.summary_rows と同じ列）
+        """
+        return [
+            {
+                '学校名': row['school'],
+                'データ年数': row['years'],
+                '最古年度': row['oldest'],
+                '最新年度': row['newest'],
+                '平均文字数': row['avg_characters'],
+                '平均設問数': row['avg_questions'],
+            }
+            for row in self.store.summary()
+        ]
+    
+    def validate_database(self, check_excel: bool = True) -> Dict[str, Any]:
         """
         データベースの整合性を検証
         
+        Args:
+            check_excel: 出力済みのExcelがストアと一致するかも確認する
+        
         Returns:
             検証結果の辞書
         """
@@ -445,41 +666,69 @@ class ExcelManager:
             'info': {}
         }
         
-        if not self.db_path.exists():
+        if not self._has_database():
             validation_result['is_valid'] = False
             validation_result['errors'].append("データベースファイルが存在しません")
             return validation_result
         
         try:
-            with pd.ExcelFile(self.db_path, engine=Settings.EXCEL_ENGINE) as excel_file:
-                validation_result['info']['school_count'] = len(excel_file.sheet_names)
-                validation_result['info']['total_records'] = 0
-                
-                for school in excel_file.sheet_names:
-                    df = pd.read_excel(excel_file, sheet_name=school)
-                    validation_result['info']['total_records'] += len(df)
-                    
-                    # 必須列のチェック
-                    required_columns = ['年度', '総設問数', '総文字数', '大問数']
-                    missing_columns = [col for col in required_columns if col not in df.columns]
-                    
-                    if missing_columns:
-                        validation_result['warnings'].append(
-                            f"{school}: 必須列が不足 {missing_columns}"
-                        )
-                    
-                    # データ型のチェック
-                    if '年度' in df.columns:
-                        try:
-                            df['年度'].astype(int)
-                        except Exception:
-                            validation_result['errors'].append(
-                                f"{school}: 年度列に無効なデータが含まれています"
-                            )
-                            validation_result['is_valid'] = False
+            store = self.store
+            validation_result['info']['school_count'] = len(store.sheet_names())
+            validation_result['info']['total_records'] = store.record_count()
+            
+            # 必須列のチェック（年度はストアに整数で保存されている）
+            required_columns = ['年度', '総設問数', '総文字数', '大問数']
+            for school, missing_columns in store.missing_columns(required_columns).items():
+                validation_result['warnings'].append(
+                    f"{school}: 必須列が不足 {missing_columns}"
+                )
+            
+            # Excelへの反映状況
+            stale_sheets = store.sheet_names() if not self.db_path.exists() else store.dirty_sheets()
+            if stale_sheets:
+                validation_result['warnings'].append(
+                    f"Excelに未反映のシートがあります: {stale_sheets}"
+                )
+            elif check_excel:
+                self._validate_excel_export(validation_result)
         
         except Exception as e:
             validation_result['is_valid'] = False
             validation_result['errors'].append(f"データベースの読み込みエラー: {str(e)}")
         
-        return validation_result
\ No newline at end of file
+        return validation_result
+    
+    def _validate_excel_export(self, validation_result: Dict[str, Any]) -> None:
+        """
+        出力済みのExcelを読み取り専用で1回走査し、ストアとの食い違いを検証結果に追加
+        （手作業での編集や壊れたファイルを検出する）
+        """
+        try:
+            scan = scan_workbook(self.db_path)
+        except Exception as e:
+            validation_result['warnings'].append(f"Excelファイルを読み込めません: {str(e)}")
+            return
+        
+        workbook_result = scan.to_validation_result()
+        validation_result['info']['excel_records'] = scan.total_records
+        for error in workbook_result['errors']:
+            validation_result['errors'].append(f"Excel {error}")
+            validation_result['is_valid'] = False
+        
+        # 行数と年度範囲をサマリーレポートと同じ集計で比べる
+        excel_rows = {row['学校名']: row for row in scan.summary_rows()}
+        for row in self._store_summary_rows():
+            school = row['学校名']
+            sheet = scan.sheet(school)
+            excel_row = excel_rows.get(school)
+            if sheet is None:
+                validation_result['warnings'].append(f"{school}: Excelにシートがありません")
+            elif sheet.records != row['データ年数']:
+                validation_result['warnings'].append(
+                    f"{school}: Excelの行数({sheet.records})がストア({row['データ年数']})と一致しません"
+                )
+            elif excel_row is not None and (excel_row['最古年度'], excel_row['最新年度']) != (row['最古年度'], row['最新年度']):
+                validation_result['warnings'].append(
+                    f"{school}: Excelの年度範囲({excel_row['最古年度']}〜{excel_row['最新年度']})が"
+                    f"ストア({row['最古年度']}〜{row['最新年度']})と一致しません"
+                )
@@ -5,212 +5,230 @@ Excel出力モジュール
 import logging
 from pathlib import Path
 from datetime import datetime
-import pandas as pd
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
 from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, NamedStyle
 from openpyxl.utils import get_column_letter
 
 logger = logging.getLogger(__name__)
 
+# 1行分のセル（値のみ、または (値, 名前付きスタイル)、Noneは空セル）
+CellSpec = Union[None, object, Tuple[object, str]]
+RowSpec = List[CellSpec]
+
+# 名前付きスタイル（通常モードとストリーミングモードで共有し、見た目を揃える）
+TITLE_STYLE = 'report_title'
+HEADING_STYLE = 'report_heading'
+HEADER_STYLE = 'report_header'
+
+
+def _named_styles() -> List[NamedStyle]:
+    """レポートで使う名前付きスタイル"""
+    header_fill = PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')
+    return [
+        NamedStyle(name=TITLE_STYLE, font=Font(size=16, bold=True)),
+        NamedStyle(name=HEADING_STYLE, font=Font(bold=True)),
+        NamedStyle(name=HEADER_STYLE, font=Font(bold=True), fill=header_fill),
+    ]
+
 
 class ExcelWriter:
     """Excel出力クラス"""
-    
-    def __init__(self, output_dir: Path):
+
+    # write_only を指定しない場合、設問数と大問数の合計がこれを超えたらストリーミングで出力する
+    STREAMING_ROW_THRESHOLD = 1000
+
+    def __init__(self, output_dir: Path, write_only: Optional[bool] = None):
         """
         初期化
-        
+
         Args:
             output_dir: 出力ディレクトリ
+            write_only: Trueの場合は行を順に書き出すストリーミングモード（メモリ使用量が一定）、
+                        Noneの場合は分析結果の大きさで自動的に選ぶ
         """
-        self.output_dir = output_dir
-        
-    def write_analysis_results(self, analysis_results: dict, 
+        self.output_dir = Path(output_dir)
+        self.write_only = write_only
+
+    def write_analysis_results(self, analysis_results: dict,
                              school_name: str, year: str) -> Path:
         """
         分析結果をExcelに出力
-        
+
         Args:
             analysis_results: 分析結果の辞書
             school_name: 学校名
             year: 年度
-            
+
         Returns:
             出力ファイルのパス
         """
         # 出力ファイル名
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        now = datetime.now()
+        timestamp = now.strftime('%Y%m%d_%H%M%S')
         filename = f"{school_name}_{year}_分析結果_{timestamp}.xlsx"
         output_path = self.output_dir / filename
-        
+
+        write_only = self.write_only
+        if write_only is None:
+            size = len(analysis_results.get('questions', [])) + len(analysis_results.get('sections', []))
+            write_only = size > self.STREAMING_ROW_THRESHOLD
+
         # Workbookの作成
-        wb = Workbook()
-        
-        # 既存のシートを削除
-        wb.remove(wb.active)
-        
+        wb = Workbook(write_only=write_only)
+        if not write_only:
+            # 既存のシートを削除
+            wb.remove(wb.active)
+        for style in _named_styles():
+            wb.add_named_style(style)
+
         # 各シートの作成
-        self._create_summary_sheet(wb, analysis_results, school_name, year)
-        self._create_detail_sheet(wb, analysis_results)
-        self._create_source_sheet(wb, analysis_results)
-        
+        self._write_sheet(wb, 'サマリー',
+                          self._summary_rows(analysis_results, school_name, year, now),
+                          [20, 20, 20])
+        self._write_sheet(wb, '詳細分析', self._detail_rows(analysis_results), [15] * 7)
+        self._write_sheet(wb, '出典一覧', self._source_rows(analysis_results), [10, 20, 30, 20, 10, 40])
+
         # 保存
         wb.save(output_path)
-        logger.info(f"分析結果を保存: {output_path}")
-        
+        logger.info(f"分析結果を保存: {output_path}{'（ストリーミング）' if write_only else ''}")
+
         return output_path
-        
-    def _create_summary_sheet(self, wb: Workbook, results: dict, 
-                            school_name: str, year: str):
+
+    def _write_sheet(self, wb: Workbook, title: str, rows: Iterator[RowSpec], widths: Sequence[int]):
+        """
+        行を順にシートへ書き込む
+
+        ストリーミングモードでは1行ずつ追記し、書き込んだ行は保持しない。
+
+        Args:
+            wb: ワークブック
+            title: シート名
+            rows: 行のイテレータ
+            widths: 列幅（A列から順に）
+        """
+        ws = wb.create_sheet(title)
+        for col, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(col)].width = width
+
+        if wb.write_only:
+            for row in rows:
+                ws.append([self._write_only_cell(ws, spec) for spec in row])
+            return
+
+        for row_index, row in enumerate(rows, 1):
+            for col, spec in enumerate(row, 1):
+                if spec is None:
+                    continue
+                value, style = spec if isinstance(spec, tuple) else (spec, None)
+                cell = ws.cell(row=row_index, column=col, value=value)
+                if style:
+                    cell.style = style
+
+    @staticmethod
+    def _write_only_cell(ws, spec: CellSpec):
+        """ストリーミングモード用のセル（スタイルがなければ値のまま）"""
+        if not isinstance(spec, tuple):
+            return spec
+        value, style = spec
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    def _summary_rows(self, results: dict, school_name: str, year: str,
+                      analyzed_at: datetime) -> Iterator[RowSpec]:
         """
-        サマリーシートを作成
+        サマリーシートの行
         """
-        ws = wb.create_sheet('サマリー')
-        
         # ヘッダー部分
-        ws['A1'] = '国語入試問題分析結果'
-        ws['A1'].font = Font(size=16, bold=True)
-        
-        ws['A3'] = '学校名:'
-        ws['B3'] = school_name
-        ws['A4'] = '年度:'
-        ws['B4'] = year
-        ws['A5'] = '分析日時:'
-        ws['B5'] = datetime.now().strftime('%Y/%m/%d %H:%M')
-        
+        yield [('国語入試問題分析結果', TITLE_STYLE)]
+        yield []
+        yield ['学校名:', school_name]
+        yield ['年度:', year]
+        yield ['分析日時:', analyzed_at.strftime('%Y/%m/%d %H:%M')]
+        yield []
+
         # 基本情報
-        ws['A7'] = '■基本情報'
-        ws['A7'].font = Font(bold=True)
-        
-        row = 8
+        yield [('■基本情報', HEADING_STYLE)]
         basic_info = [
             ('総文字数（概算）', results.get('total_characters', 0)),
             ('大問数', len(results.get('sections', []))),
             ('総設問数', len(results.get('questions', []))),
             ('文章テーマ', results.get('theme', '不明'))
         ]
-        
         for label, value in basic_info:
-            ws[f'A{row}'] = label
-            ws[f'B{row}'] = value
-            row += 1
-            
+            yield [label, value]
+
         # 設問タイプ別集計
-        row += 1
-        ws[f'A{row}'] = '■設問タイプ別集計'
-        ws[f'A{row}'].font = Font(bold=True)
-        row += 1
-        
-        headers = ['設問タイプ', '問題数', '割合(%)']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color='D3D3D3', 
-                                  end_color='D3D3D3', 
-                                  fill_type='solid')
-        
-        row += 1
+        yield []
+        yield [('■設問タイプ別集計', HEADING_STYLE)]
+        yield [(header, HEADER_STYLE) for header in ['設問タイプ', '問題数', '割合(%)']]
+
         total_questions = len(results.get('questions', []))
-        
         for q_type, count in results.get('question_types', {}).items():
-            ws[f'A{row}'] = q_type
-            ws[f'B{row}'] = count
-            ws[f'C{row}'] = f"{(count / total_questions * 100):.1f}" if total_questions > 0 else "0"
-            row += 1
-            
+            ratio = f"{(count / total_questions * 100):.1f}" if total_questions > 0 else "0"
+            yield [q_type, count, ratio]
+
         # 解答用紙情報（あれば）
         if 'answer_sheet_info' in results:
-            row += 2
-            ws[f'A{row}'] = '■解答用紙情報'
-            ws[f'A{row}'].font = Font(bold=True)
-            row += 1
-            
+            yield []
+            yield []
+            yield [('■解答用紙情報', HEADING_STYLE)]
+
             answer_info = results['answer_sheet_info']
             if answer_info.get('total_points'):
-                ws[f'A{row}'] = '満点'
-                ws[f'B{row}'] = f"{answer_info['total_points']}点"
-                row += 1
-                
-        # 列幅の調整
-        for col in ['A', 'B', 'C']:
-            ws.column_dimensions[col].width = 20
-            
-    def _create_detail_sheet(self, wb: Workbook, results: dict):
+                yield ['満点', f"{answer_info['total_points']}点"]
+
+    def _detail_rows(self, results: dict) -> Iterator[RowSpec]:
         """
-        詳細分析シートを作成
+        詳細分析シートの行
         """
-        ws = wb.create_sheet('詳細分析')
-        
         # ヘッダー
-        headers = ['大問', '設問番号', '設問マーカー', '設問タイプ', 
+        headers = ['大問', '設問番号', '設問マーカー', '設問タイプ',
                   '選択肢数', '文字数制限', '配点']
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color='D3D3D3', 
-                                  end_color='D3D3D3', 
-                                  fill_type='solid')
-            
+        yield [(header, HEADER_STYLE) for header in headers]
+
+        question_points = {}
+        if 'answer_sheet_info' in results:
+            question_points = results['answer_sheet_info'].get('question_points', {})
+
         # データ部分
-        row = 2
         for question in results.get('questions', []):
-            ws.cell(row=row, column=1, value=question.get('section', ''))
-            ws.cell(row=row, column=2, value=question.get('number', ''))
-            ws.cell(row=row, column=3, value=question.get('marker', ''))
-            ws.cell(row=row, column=4, value=question.get('type', ''))
-            ws.cell(row=row, column=5, value=question.get('choice_count', ''))
-            
             # 文字数制限
             char_limit = question.get('character_limit', '')
             if isinstance(char_limit, tuple):
                 char_limit = f"{char_limit[0]}～{char_limit[1]}字"
-            ws.cell(row=row, column=6, value=char_limit)
-            
+
             # 配点（解答用紙情報から）
             point_key = f"問{question.get('number', '')}"
-            points = ''
-            if 'answer_sheet_info' in results:
-                points = results['answer_sheet_info'].get('question_points', {}).get(point_key, '')
-            ws.cell(row=row, column=7, value=points)
-            
-            row += 1
-            
-        # 列幅の調整
-        for col in range(1, 8):
-            ws.column_dimensions[get_column_letter(col)].width = 15
-            
-    def _create_source_sheet(self, wb: Workbook, results: dict):
+
+            yield [
+                question.get('section', ''),
+                question.get('number', ''),
+                question.get('marker', ''),
+                question.get('type', ''),
+                question.get('choice_count', ''),
+                char_limit,
+                question_points.get(point_key, ''),
+            ]
+
+    def _source_rows(self, results: dict) -> Iterator[RowSpec]:
         """
-        出典一覧シートを作成
+        出典一覧シートの行
         """
-        ws = wb.create_sheet('出典一覧')
-        
         # ヘッダー
         headers = ['大問', '著者', '作品名', '出版社', '出版年', '備考']
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color='D3D3D3', 
-                                  end_color='D3D3D3', 
-                                  fill_type='solid')
-            
+        yield [(header, HEADER_STYLE) for header in headers]
+
         # データ部分
-        row = 2
         for i, section in enumerate(results.get('sections', []), 1):
             source_info = section.get('source_info', {})
-            
-            ws.cell(row=row, column=1, value=f"大問{i}")
-            ws.cell(row=row, column=2, value=source_info.get('author', ''))
-            ws.cell(row=row, column=3, value=source_info.get('title', ''))
-            ws.cell(row=row, column=4, value=source_info.get('publisher', ''))
-            ws.cell(row=row, column=5, value=source_info.get('year', ''))
-            ws.cell(row=row, column=6, value=source_info.get('raw_source', ''))
-            
-            row += 1
-            
-        # 列幅の調整
-        column_widths = [10, 20, 30, 20, 10, 40]
-        for col, width in enumerate(column_widths, 1):
-            ws.column_dimensions[get_column_letter(col)].width = width
\ No newline at end of file
+            yield [
+                f"大問{i}",
+                source_info.get('author', ''),
+                source_info.get('title', ''),
+                source_info.get('publisher', ''),
+                source_info.get('year', ''),
+                source_info.get('raw_source', ''),
+            ]
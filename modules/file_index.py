@@ -0,0 +1,218 @@
+"""
+試験ファイル索引モジュール
+検索ディレクトリを os.scandir で一度だけ走査し、結果をディスクに保存する。
+次回以降は更新時刻が変わったディレクトリだけを読み直す。
+ファイルへの書き込みはディレクトリの更新時刻を変えないため、0バイトで登録した
+（コピー・保存の途中だった）ファイルだけは毎回確かめ直す。
+"""
+import os
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.file_utils import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# 索引ファイル形式のバージョン（一致しない索引は捨てて全体を走査し直す）
+INDEX_FORMAT_VERSION = 1
+
+# 索引の対象とする拡張子
+INDEXED_SUFFIXES = ('.txt', '.pdf')
+
+
+@dataclass
+class IndexedFile:
+    """索引に登録されたファイル"""
+    path: Path
+    size: int
+    mtime: float
+    valid: bool
+    school: str
+
+
+class FileIndex:
+    """
+    テキスト・PDFファイルの永続索引
+
+    ディレクトリごとに更新時刻（st_mtime_ns）・ファイル一覧・サブディレクトリ一覧を保存する。
+    ファイルの追加・削除・名前の変更はディレクトリの更新時刻を変えるため、更新時刻が
+    同じディレクトリは読み直さずに保存済みの内容を使う（サブディレクトリは個別に確認する）。
+    """
+
+    def __init__(self, index_path: Path, classify: Callable[[Path], str],
+                 max_depth: int = 5):
+        """
+        初期化
+
+        Args:
+            index_path: 索引ファイルのパス
+            classify: ファイルパスから学校名を推測する関数
+            max_depth: 検索ディレクトリからの最大深度
+        """
+        self.index_path = Path(index_path)
+        self.classify = classify
+        self.max_depth = max_depth
+        self._dirs: Dict[str, dict] = self._load()
+        self._dirty = False
+        self.stats = {'scanned_dirs': 0, 'reused_dirs': 0}
+
+    def _load(self) -> Dict[str, dict]:
+        """保存済みの索引を読み込み（ない場合・壊れている場合は空）"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable file index {self.index_path}: {e}")
+            return {}
+        if data.get('version') != INDEX_FORMAT_VERSION:
+            return {}
+        return data.get('dirs', {})
+
+    def save(self) -> None:
+        """変更があれば索引を保存"""
+        if not self._dirty:
+            return
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.index_path, json.dumps(
+                {'version': INDEX_FORMAT_VERSION, 'dirs': self._dirs}, ensure_ascii=False))
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"Failed to save file index {self.index_path}: {e}")
+
+    def refresh(self, roots: Iterable[Path]) -> List[IndexedFile]:
+        """
+        検索ディレクトリの索引を更新し、有効なファイルを返す
+
+        Args:
+            roots: 検索ディレクトリ
+
+        Returns:
+            有効なファイルのリスト（更新時刻の新しい順、重複なし）
+        """
+        self.stats = {'scanned_dirs': 0, 'reused_dirs': 0}
+        visited: Set[Tuple[int, int]] = set()
+        seen_dirs: Set[str] = set()
+        files: Dict[str, IndexedFile] = {}
+
+        for root in roots:
+            root = Path(root)
+            try:
+                root_stat = os.stat(root)
+            except OSError:
+                continue
+            if not root.is_dir():
+                continue
+            self._walk(str(root.absolute()), root_stat, 0, visited, seen_dirs, files)
+
+        # 走査対象から外れたディレクトリ（削除・検索ディレクトリの変更）を索引から除く
+        stale = [path for path in self._dirs if path not in seen_dirs]
+        for path in stale:
+            del self._dirs[path]
+        if stale:
+            self._dirty = True
+
+        self.save()
+        result = [entry for entry in files.values() if entry.valid]
+        result.sort(key=lambda entry: entry.mtime, reverse=True)
+        return result
+
+    def _walk(self, dir_path: str, dir_stat: os.stat_result, depth: int,
+              visited: Set[Tuple[int, int]], seen_dirs: Set[str],
+              files: Dict[str, IndexedFile]) -> None:
+        """ディレクトリを（必要なら読み直して）索引に反映し、サブディレクトリへ進む"""
+        key = (dir_stat.st_dev, dir_stat.st_ino)
+        if key in visited:
+            return  # シンボリックリンクによる循環や、重なった検索ディレクトリ
+        visited.add(key)
+        seen_dirs.add(dir_path)
+
+        record = self._dirs.get(dir_path)
+        if record is None or record['mtime_ns'] != dir_stat.st_mtime_ns:
+            record = self._scan_dir(dir_path, dir_stat)
+            if record is None:
+                return
+            self._dirs[dir_path] = record
+            self._dirty = True
+            self.stats['scanned_dirs'] += 1
+        else:
+            self.stats['reused_dirs'] += 1
+            if self._restat_empty_files(dir_path, record):
+                self._dirty = True
+
+        for name, info in record['files'].items():
+            path = os.path.join(dir_path, name)
+            files[path] = IndexedFile(
+                path=Path(path), size=info['size'], mtime=info['mtime'],
+                valid=info['valid'], school=info['school']
+            )
+
+        if depth >= self.max_depth:
+            return
+        for name in record['subdirs']:
+            sub_path = os.path.join(dir_path, name)
+            try:
+                sub_stat = os.stat(sub_path)
+            except OSError:
+                continue
+            self._walk(sub_path, sub_stat, depth + 1, visited, seen_dirs, files)
+
+    def _restat_empty_files(self, dir_path: str, record: dict) -> bool:
+        """
+        0バイトで登録したファイルのサイズ・更新時刻を読み直す
+
+        Args:
+            dir_path: ディレクトリのパス
+            record: ディレクトリの索引
+
+        Returns:
+            索引を更新した場合True
+        """
+        changed = False
+        for name, info in list(record['files'].items()):
+            if info['size'] > 0:
+                continue
+            try:
+                stat = os.stat(os.path.join(dir_path, name))
+            except OSError:
+                del record['files'][name]
+                changed = True
+                continue
+            if stat.st_size != info['size'] or stat.st_mtime != info['mtime']:
+                info.update(size=stat.st_size, mtime=stat.st_mtime, valid=stat.st_size > 0)
+                changed = True
+        return changed
+
+    def _scan_dir(self, dir_path: str, dir_stat: os.stat_result) -> Optional[dict]:
+        """ディレクトリを os.scandir で一度だけ読む"""
+        file_records = {}
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            subdirs.append(entry.name)
+                            continue
+                        if not entry.name.lower().endswith(INDEXED_SUFFIXES) or not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    file_records[entry.name] = {
+                        'size': stat.st_size,
+                        'mtime': stat.st_mtime,
+                        # 0バイトのファイルは除外（is_valid_text_file と同じ基準）
+                        'valid': stat.st_size > 0,
+                        'school': self.classify(Path(entry.path)),
+                    }
+        except OSError as e:
+            logger.debug(f"Skip unreadable directory {dir_path}: {e}")
+            return None
+        subdirs.sort()
+        return {'mtime_ns': dir_stat.st_mtime_ns, 'files': file_records, 'subdirs': subdirs}
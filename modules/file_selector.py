@@ -9,11 +9,11 @@ from collections import defaultdict
 
 from config.settings import Settings
 from models import FileSelectionResult
+from modules.file_index import FileIndex
 from exceptions import InvalidFileError, PathTraversalError
 from utils.file_utils import (
     is_valid_text_file,
     resolve_path_safely,
-    find_files_recursive,
     get_recent_files
 )
 from utils.display_utils import (
@@ -32,17 +32,21 @@ from utils.text_utils import clean_path_string
 class FileSelector:
     """ファイル選択クラス"""
     
-    def __init__(self, search_dirs: Optional[List[Path]] = None):
+    def __init__(self, search_dirs: Optional[List[Path]] = None,
+                 index_path: Optional[Path] = None):
         """
         初期化
         
         Args:
             search_dirs: 検索対象ディレクトリのリスト
+            index_path: ファイル索引の保存先（デフォルトは Settings.FILE_INDEX_PATH）
         """
         self.search_dirs = search_dirs or Settings.get_search_directories()
         self.allowed_dirs = Settings.get_allowed_directories()
         self.cached_files = None
         self.last_search_time = None
+        self.file_index = FileIndex(index_path or Settings.FILE_INDEX_PATH, self._guess_school_from_path)
+        self._school_by_path: Dict[Path, str] = {}
     
     def select_file(self, cli_arg: Optional[str] = None) -> FileSelectionResult:
         """
@@ -319,38 +323,24 @@ class FileSelector:
             )
     
     def _find_all_text_files(self) -> List[Path]:
-        """すべてのテキストファイルとPDFファイルを検索"""
-        all_files = []
-        
-        for search_dir in self.search_dirs:
-            if not search_dir.exists():
-                continue
-            
-            # 再帰的に検索
-            # テキストファイルとPDFファイルを検索
-            txt_files = find_files_recursive(search_dir, "*.txt", max_depth=5)
-            pdf_files = find_files_recursive(search_dir, "*.pdf", max_depth=5)
-            files = txt_files + pdf_files
-            
-            # 有効なファイルのみフィルタ
-            valid_files = [f for f in files if is_valid_text_file(f)]
-            all_files.extend(valid_files)
-        
-        # 重複を除去
-        unique_files = list(set(all_files))
-        
-        # 更新時刻でソート（新しい順）
-        unique_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+        """
+        すべてのテキストファイルとPDFファイルを検索
+
+        ファイル索引を更新して使う（更新時刻が変わっていないディレクトリは読み直さない）。
+        """
+        # 再帰的に検索（最大深度5、有効なファイルのみ、更新時刻の新しい順）
+        indexed = self.file_index.refresh(self.search_dirs)
+        self._school_by_path = {entry.path: entry.school for entry in indexed}
         
-        return unique_files
+        return [entry.path for entry in indexed]
     
     def _group_files_by_school(self, files: List[Path]) -> Dict[str, List[Path]]:
         """ファイルを学校別にグループ化"""
         grouped = defaultdict(list)
         
         for file_path in files:
-            # ファイル名やディレクトリ名から学校を推測
-            school = self._guess_school_from_path(file_path)
+            # ファイル名やディレクトリ名から学校を推測（索引にあればその結果を使う）
+            school = self._school_by_path.get(file_path) or self._guess_school_from_path(file_path)
             grouped[school].append(file_path)
         
         return dict(grouped)
@@ -5,9 +5,21 @@
 import re
 import logging
 from typing import Dict, List, Any, Optional, Tuple
+from patterns.question_classifier import QuestionTypeClassifier
+from utils.batch_telemetry import timed_stage, STAGE_SPLIT, STAGE_SOURCES, STAGE_QUESTIONS
 
 logger = logging.getLogger(__name__)
 
+# 設問タイプの判定ルール（優先順）
+_QUESTION_TYPE_CLASSIFIER = QuestionTypeClassifier([
+    # 漢字・語句問題
+    ('漢字・語句', ['漢字', '語句', '慣用句', 'ことわざ', '語群'], 0),
+    # 抜き出し問題
+    ('抜き出し', ['抜き出し', '書き抜き', 'そのまま抜き出'], 0),
+    # 選択問題（記号がある場合）
+    ('選択', [r'[ア-ン][。、．\s]', '選び'], 0),
+], default='記述')  # それ以外は記述問題
+
 
 class FinalContentExtractor:
     """入試問題テキストから著者・作品情報を確実に抽出する最終版クラス"""
@@ -23,10 +35,12 @@ class FinalContentExtractor:
             抽出された内容
         """
         # 全ての出典を抽出
-        sources = self._extract_all_sources(text)
+        with timed_stage(STAGE_SOURCES):
+            sources = self._extract_all_sources(text)
         
         # 大問を識別して分割（改良版）
-        sections = self._identify_and_divide_sections(text, sources)
+        with timed_stage(STAGE_SPLIT):
+            sections = self._identify_and_divide_sections(text, sources)
         
         # 結果の初期化
         result = {
@@ -55,13 +69,14 @@ class FinalContentExtractor:
             }
             
             # 設問を抽出
-            questions = self._extract_questions_from_section(section['text'])
+            with timed_stage(STAGE_QUESTIONS):
+                questions = self._extract_questions_from_section(section['text'])
+                # 設問タイプを分類（セクション内の全設問をまとめて分類）
+                q_types = self.classify_questions([q['text'] for q in questions])
             section_info['questions'] = questions
             result['total_questions'] += len(questions)
             
-            # 設問タイプを分類
-            for q in questions:
-                q_type = self._classify_question(q['text'])
+            for q, q_type in zip(questions, q_types):
                 q['type'] = q_type
                 if q_type in result['question_types']:
                     result['question_types'][q_type] += 1
@@ -503,20 +518,19 @@ class FinalContentExtractor:
         Returns:
             設問タイプ
         """
-        # 漢字・語句問題
-        if any(keyword in text for keyword in ['漢字', '語句', '慣用句', 'ことわざ', '語群']):
-            return '漢字・語句'
-        
-        # 抜き出し問題
-        if any(keyword in text for keyword in ['抜き出し', '書き抜き', 'そのまま抜き出']):
-            return '抜き出し'
-        
-        # 選択問題（記号がある場合）
-        if re.search(r'[ア-ン][。、．\s]', text) or '選び' in text:
-            return '選択'
+        return _QUESTION_TYPE_CLASSIFIER.classify(text)
+    
+    def classify_questions(self, texts: List[str]) -> List[str]:
+        """
+        複数の設問のタイプをまとめて分類
         
-        # それ以外は記述問題
-        return '記述'
+        Args:
+            texts: 設問テキストのリスト
+            
+        Returns:
+            設問タイプのリスト（入力と同じ順序）
+        """
+        return _QUESTION_TYPE_CLASSIFIER.classify_all(texts)
     
     def _detect_genre(self, text: str) -> str:
         """
@@ -4,13 +4,14 @@
 """
 import pandas as pd
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import os
-import shutil
 from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from config.app_config import get_config
+from modules.result_writer import ResultWriter
+from utils.file_utils import create_backup
 
 
 class FlexibleExcelFormatter:
@@ -100,6 +101,7 @@ class FlexibleExcelFormatter:
         self.excel_path = excel_path
         self.max_text_sections = max_text_sections
         self.max_other_sections = max_other_sections
+        self.writer = ResultWriter(Path(excel_path), index=True)
 
         
         # 列定義を生成
@@ -179,7 +181,7 @@ class FlexibleExcelFormatter:
                 row_data[f'{prefix}出題形式'] = '、'.join(question_types) if question_types else '不明'
                 
                 # 出典（著者と作品）
-                source = section.get('source', {})
+                source = section.get('source') or {}
                 author = source.get('author', '')
                 work = source.get('work', '')
                 if author and work:
@@ -284,6 +286,24 @@ class FlexibleExcelFormatter:
             row_data: 保存するデータ
             backup: バックアップを作成するか
             
+        Returns:
+            成功した場合True
+        """
+        return self.save_rows_to_excel([(school_name, row_data)], backup=backup)
+    
+    def save_rows_to_excel(self,
+                           rows: List[Tuple[str, Dict[str, Any]]],
+                           backup: bool = True) -> bool:
+        """
+        複数の行をまとめて保存し、対象のシートだけをExcelへ反映
+        
+        書き込みは ResultWriter を経由するため、複数のプロセスから同時に保存しても
+        行は失われない。同じ年度の行は、渡された項目だけを上書きする。
+        
+        Args:
+            rows: (学校名, 行データ) のリスト
+            backup: バックアップを作成するか
+            
         Returns:
             成功した場合True
         """
@@ -293,64 +313,28 @@ class FlexibleExcelFormatter:
             if output_dir:
                 os.makedirs(output_dir, exist_ok=True)
             
-            # バックアップ作成
-            if backup and os.path.exists(self.excel_path):
-                backup_dir = os.path.join(output_dir, "backups")
-                os.makedirs(backup_dir, exist_ok=True)
-                backup_path = os.path.join(
-                    backup_dir,
-                    f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.path.basename(self.excel_path)}"
+            with self.writer.lock:
+                # バックアップ作成（内容が前回と同じ場合は省略される）
+                if backup and os.path.exists(self.excel_path):
+                    backup_path = create_backup(Path(self.excel_path), Path(output_dir or '.') / "backups")
+                    if backup_path:
+                        print(f"バックアップを作成: {backup_path}")
+                
+                store = self.writer.store
+                sheet_rows: Dict[str, List[Dict[str, Any]]] = {}
+                for school_name, row_data in rows:
+                    year = row_data['年度']
+                    if store.has_row(school_name, year):
+                        print(f"{school_name} {year}年のデータを更新")
+                    else:
+                        print(f"{school_name} {year}年のデータを新規追加")
+                    sheet_rows.setdefault(school_name, []).append(row_data)
+                
+                self.writer.upsert(
+                    sheet_rows,
+                    {school_name: self.columns for school_name in sheet_rows},
+                    merge=True
                 )
-                shutil.copy2(self.excel_path, backup_path)
-                print(f"バックアップを作成: {backup_path}")
-            
-            # 既存のExcelファイルを読み込むか新規作成
-            if os.path.exists(self.excel_path):
-                # 既存ファイルから全シートを読み込み
-                with pd.ExcelFile(self.excel_path) as xls:
-                    sheets = {sheet: pd.read_excel(xls, sheet_name=sheet) 
-                             for sheet in xls.sheet_names}
-            else:
-                sheets = {}
-            
-            # 学校のシートが存在しない場合は新規作成
-            if school_name not in sheets:
-                # 必要な列のみでDataFrameを作成
-                sheets[school_name] = pd.DataFrame(columns=self.columns)
-            
-            # データフレームを取得
-            df = sheets[school_name]
-            
-            # 列の整合性を確保（新しい列があれば追加）
-            for col in row_data.keys():
-                if col not in df.columns:
-                    df[col] = None
-            
-            # 同じ年度のデータが存在する場合は更新、なければ追加
-            year = row_data['年度']
-            if not df.empty and year in df['年度'].values:
-                # 既存データを更新
-                index = df[df['年度'] == year].index[0]
-                for col, value in row_data.items():
-                    if col in df.columns:
-                        df.at[index, col] = value
-                print(f"{school_name} {year}年のデータを更新")
-            else:
-                # 新規データを追加
-                new_row = pd.DataFrame([row_data])
-                df = pd.concat([df, new_row], ignore_index=True)
-                print(f"{school_name} {year}年のデータを新規追加")
-            
-            # 年度順にソート
-            df = df.sort_values('年度')
-            sheets[school_name] = df
-            
-            # Excelファイルに書き込み
-            with pd.ExcelWriter(self.excel_path, engine='openpyxl', mode='w') as writer:
-                for sheet_name, sheet_df in sheets.items():
-                    # NaNを空文字に変換してから保存
-                    sheet_df = sheet_df.fillna('')
-                    sheet_df.to_excel(writer, sheet_name=sheet_name, index=True)
             
             print(f"データを保存しました: {self.excel_path}")
             return True
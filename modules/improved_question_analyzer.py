@@ -8,6 +8,7 @@ import re
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import logging
+from utils.numeral_utils import parse_numeral, to_halfwidth_digits
 
 logger = logging.getLogger(__name__)
 
@@ -266,14 +267,7 @@ class ImprovedQuestionAnalyzer:
                     converted_num = self._convert_kanji_to_number(num_part)
                 else:
                     # 全角数字を半角に変換
-                    converted_num = ''
-                    for char in num_part:
-                        if '０' <= char <= '９':
-                            converted_num += str(ord(char) - ord('０'))
-                        elif '１' <= char <= '９':
-                            converted_num += str(ord(char) - ord('１') + 1)
-                        else:
-                            converted_num += char
+                    converted_num = to_halfwidth_digits(num_part)
                 
                 # 行数の場合は約40字として扱う（1行約40字の想定）
                 if suffix == '行':
@@ -346,43 +340,8 @@ class ImprovedQuestionAnalyzer:
     
     def _convert_kanji_to_number(self, kanji_str: str) -> str:
         """漢数字を算用数字に変換"""
-        # 基本的な変換マップ
-        kanji_map = {
-            '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
-            '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
-            '二十': 20, '三十': 30, '四十': 40, '五十': 50,
-            '六十': 60, '七十': 70, '八十': 80, '九十': 90,
-            '百': 100, '千': 1000, '万': 10000
-        }
-        
-        # 完全マッチの場合
-        if kanji_str in kanji_map:
-            return str(kanji_map[kanji_str])
-        
-        # 複合パターンの処理（例：二十五、八十など）
-        result = 0
-        
-        # 十の位の処理
-        for kanji, value in [
-            ('九十', 90), ('八十', 80), ('七十', 70), ('六十', 60),
-            ('五十', 50), ('四十', 40), ('三十', 30), ('二十', 20),
-            ('十', 10)
-        ]:
-            if kanji in kanji_str:
-                result += value
-                kanji_str = kanji_str.replace(kanji, '')
-                break
-        
-        # 一の位の処理
-        for kanji, value in [
-            ('九', 9), ('八', 8), ('七', 7), ('六', 6),
-            ('五', 5), ('四', 4), ('三', 3), ('二', 2), ('一', 1)
-        ]:
-            if kanji in kanji_str:
-                result += value
-                break
-        
-        return str(result) if result > 0 else '0'
+        num = parse_numeral(kanji_str)
+        return str(num) if num else '0'
     
     def analyze_sections_with_questions(self, sections: List, full_text: str) -> QuestionAnalysis:
         """
@@ -392,6 +351,52 @@ class ImprovedQuestionAnalyzer:
             sections: セクションリスト
             full_text: 全体テキスト
         
+        Returns:
+            統合された設問分析結果
+        """
+        return self.combine_section_summaries(
+            [self.summarize_section(section) for section in sections]
+        )
+    
+    def summarize_section(self, section) -> Optional[Tuple[QuestionAnalysis, QuestionAnalysis]]:
+        """
+        統合用にセクション1つ分の設問を分析
+        
+        結果はセクションのテキストとタイトルだけで決まるため、
+        テキストが変わっていないセクションは以前の結果を再利用できる。
+        
+        Args:
+            section: セクション
+        
+        Returns:
+            (タイトルからのタイプ指定付きの分析, 詳細集計用の分析)、テキストがない場合はNone
+        """
+        # セクションのテキストを取得
+        if hasattr(section, 'content'):
+            section_text = section.content
+        elif hasattr(section, 'text'):
+            section_text = section.text
+        else:
+            return None
+        
+        # セクションタイプを判定
+        section_type = None
+        if hasattr(section, 'title'):
+            if '漢字' in section.title or '語句' in section.title:
+                section_type = '漢字・語句'
+        
+        return self.analyze_questions(section_text, section_type), self.analyze_questions(section_text)
+    
+    def combine_section_summaries(
+        self,
+        summaries: List[Optional[Tuple[QuestionAnalysis, QuestionAnalysis]]]
+    ) -> QuestionAnalysis:
+        """
+        セクションごとの分析結果を統合
+        
+        Args:
+            summaries: summarize_section の結果のリスト
+        
         Returns:
             統合された設問分析結果
         """
@@ -415,24 +420,9 @@ class ImprovedQuestionAnalyzer:
         total_no_word_limit = 0
         total_count = 0
         
-        for i, section in enumerate(sections):
-            # セクションのテキストを取得
-            if hasattr(section, 'content'):
-                section_text = section.content
-            elif hasattr(section, 'text'):
-                section_text = section.text
-            else:
-                continue
-            
-            # セクションタイプを判定
-            section_type = None
-            if hasattr(section, 'title'):
-                if '漢字' in section.title or '語句' in section.title:
-                    section_type = '漢字・語句'
-            
-            # セクションを分析
-            analysis = self.analyze_questions(section_text, section_type)
-            
+        summaries = [summary for summary in summaries if summary is not None]
+        
+        for analysis, _ in summaries:
             # 結果を統合
             for key, value in analysis.type_counts.items():
                 total_type_counts[key] += value
@@ -449,17 +439,7 @@ class ImprovedQuestionAnalyzer:
         combined_choice_type_details = {}
         combined_extract_details = {'単語抜き出し': 0, '文章抜き出し': 0, '行抜き出し': 0}
         
-        # 各セクションの詳細分析を再実行して統合
-        for section in sections:
-            if hasattr(section, 'content'):
-                section_text = section.content
-            elif hasattr(section, 'text'):
-                section_text = section.text
-            else:
-                continue
-            
-            section_analysis = self.analyze_questions(section_text)
-            
+        for _, section_analysis in summaries:
             # 詳細情報を統合
             if hasattr(section_analysis, 'word_limit_details') and section_analysis.word_limit_details:
                 for key, value in section_analysis.word_limit_details.items():
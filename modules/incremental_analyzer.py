@@ -0,0 +1,367 @@
+"""
+差分再分析モジュール
+OCRテキストを手修正して再実行したとき、内容が変わった大問だけを再分析する
+"""
+import os
+import copy
+import json
+import pickle
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from models import AnalysisResult, Section
+from modules.universal_analyzer import UniversalAnalyzer, SectionAnalysis
+from utils.file_utils import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+
+def section_content_hash(section: Section, fingerprint: str = '') -> str:
+    """
+    セクションの分析結果を決める内容のハッシュ
+
+    大問番号は含めないため、前に大問が挿入されて番号がずれても同じ内容なら再利用できる。
+
+    Args:
+        section: セクション
+        fingerprint: 分析器のフィンガープリント
+
+    Returns:
+        ハッシュ（16進文字列）
+    """
+    title_type = '漢字・語句' if ('漢字' in section.title or '語句' in section.title) else ''
+    material = '\0'.join((
+        fingerprint,
+        section.text or '',
+        section.content or '',
+        section.section_type or '',
+        title_type,
+    ))
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class SectionChange:
+    """大問ごとの変更状況"""
+    number: int
+    title: str
+    status: str  # 'unchanged', 'changed', 'added', 'removed'
+    reused: bool = False  # 以前の分析結果を再利用したか
+
+
+@dataclass
+class SectionDiffReport:
+    """前回の分析からの大問ごとの差分"""
+    document_key: str
+    changes: List[SectionChange] = field(default_factory=list)
+    previous_found: bool = False
+
+    def sections_with(self, status: str) -> List[SectionChange]:
+        """指定した状態の大問"""
+        return [change for change in self.changes if change.status == status]
+
+    @property
+    def reused_count(self) -> int:
+        """分析結果を再利用した大問数"""
+        return sum(1 for change in self.changes if change.reused)
+
+    @property
+    def reanalyzed_count(self) -> int:
+        """再分析した大問数"""
+        return sum(1 for change in self.changes if change.status != 'removed' and not change.reused)
+
+    @property
+    def has_changes(self) -> bool:
+        """前回から変更があるか"""
+        return any(change.status != 'unchanged' for change in self.changes)
+
+    def to_lines(self) -> List[str]:
+        """差分レポートを表示用の行に変換"""
+        if not self.previous_found:
+            return [f"初回分析: 大問{len(self.changes)}個を分析"]
+
+        labels = {'changed': '変更', 'added': '追加', 'removed': '削除'}
+        lines = [f"再分析: {self.reanalyzed_count}個 / 再利用: {self.reused_count}個"]
+        for change in self.changes:
+            if change.status in labels:
+                lines.append(f"  [{labels[change.status]}] 大問{change.number} {change.title}")
+        if not self.has_changes:
+            lines.append("  変更された大問はありません")
+        return lines
+
+    def to_dict(self) -> Dict:
+        """辞書形式に変換"""
+        return {
+            'document_key': self.document_key,
+            'previous_found': self.previous_found,
+            'reused': self.reused_count,
+            'reanalyzed': self.reanalyzed_count,
+            'changes': [vars(change) for change in self.changes],
+        }
+
+
+class IncrementalAnalyzer:
+    """
+    大問単位の差分再分析
+    セクション分割の後、大問ごとに内容のハッシュを取り、分析済みの大問は
+    記録した結果（出典・ジャンル・テーマ・設問分析）を再利用して全体の結果を組み立てる
+    保存ディレクトリの合計サイズが上限を超えたら、最近使われていない記録から削除する
+    """
+
+    MANIFEST_SUFFIX = '.json'
+    RECORD_SUFFIX = '.pkl'
+
+    def __init__(self, analyzer: Optional[UniversalAnalyzer] = None,
+                 store_dir: Optional[Path] = None,
+                 fingerprint: str = '',
+                 max_memory_entries: int = 512,
+                 max_size_mb: float = 100):
+        """
+        初期化
+
+        Args:
+            analyzer: 汎用分析器
+            store_dir: 大問ごとの分析結果と前回の大問構成を保存するディレクトリ
+                       （Noneの場合はメモリ上でのみ保持）
+            fingerprint: 分析器のフィンガープリント（分析器が変わったら記録を使わない）
+            max_memory_entries: メモリ上に保持する大問の分析結果の最大数
+            max_size_mb: 保存ディレクトリの最大サイズ（MB）
+        """
+        self.analyzer = analyzer or UniversalAnalyzer()
+        self.store_dir = Path(store_dir) if store_dir else None
+        if self.store_dir:
+            (self.store_dir / 'sections').mkdir(parents=True, exist_ok=True)
+            (self.store_dir / 'documents').mkdir(parents=True, exist_ok=True)
+        self.fingerprint = fingerprint
+        self.max_memory_entries = max_memory_entries
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self._total_bytes: Optional[int] = None  # 初回の書き込み時に集計し、以降は差分で更新
+        self.evictions = 0
+        self._records: 'OrderedDict[str, SectionAnalysis]' = OrderedDict()
+        self._manifests: Dict[str, List[Dict]] = {}
+
+    def analyze(self, text: str, school_name: str, year: str,
+                document_key: Optional[str] = None) -> AnalysisResult:
+        """
+        テキストを分析（変更のない大問は以前の結果を再利用）
+
+        差分レポートは結果の section_diff 属性に設定される。
+
+        Args:
+            text: 分析対象のテキスト
+            school_name: 学校名
+            year: 年度
+            document_key: 文書の識別子（ファイルパスなど、省略時は学校名と年度）
+
+        Returns:
+            分析結果
+        """
+        document_key = document_key or f'{school_name}_{year}'
+        sections = self.analyzer._analyze_sections(text)
+        hashes = [section_content_hash(section, self.fingerprint) for section in sections]
+
+        records = []
+        reused_flags = []
+        for section, content_hash in zip(sections, hashes):
+            record = self._load_record(content_hash)
+            reused_flags.append(record is not None)
+            if record is None:
+                record = self.analyzer.analyze_section(section)
+                self._save_record(content_hash, record)
+            records.append(record)
+
+        report = self._build_report(document_key, sections, hashes, reused_flags)
+        self._save_manifest(document_key, sections, hashes)
+
+        logger.info(f"差分再分析: {document_key} 再分析{report.reanalyzed_count}個 / 再利用{report.reused_count}個")
+
+        result = self.analyzer.build_result(text, school_name, year, sections, records)
+        result.section_diff = report
+        return result
+
+    def _build_report(self, document_key: str, sections: List[Section],
+                      hashes: List[str], reused_flags: List[bool]) -> SectionDiffReport:
+        """
+        前回の大問構成と比較して差分レポートを作成
+
+        再利用と同じく内容のハッシュで前回の大問と対応づけ（前に大問が挿入されて番号が
+        ずれても変更なしとする）、対応しなかった大問だけを大問番号で対応づける。
+        """
+        previous = self._load_manifest(document_key)
+        report = SectionDiffReport(document_key=document_key, previous_found=previous is not None)
+        unmatched = dict(enumerate(previous or []))
+
+        # 同じ内容の前回の大問（同じ番号のものを優先）
+        statuses = []
+        for section, content_hash in zip(sections, hashes):
+            candidates = [i for i, entry in unmatched.items() if entry['hash'] == content_hash]
+            if candidates:
+                match = next((i for i in candidates if unmatched[i]['number'] == section.number), candidates[0])
+                del unmatched[match]
+                statuses.append('unchanged')
+            else:
+                statuses.append(None)
+
+        # 内容が一致しなかった大問は同じ番号の前回の大問と対応づける
+        for index, section in enumerate(sections):
+            if statuses[index] is not None:
+                continue
+            match = next((i for i, entry in unmatched.items() if entry['number'] == section.number), None)
+            if match is None:
+                statuses[index] = 'added'
+            else:
+                del unmatched[match]
+                statuses[index] = 'changed'
+
+        for section, status, reused in zip(sections, statuses, reused_flags):
+            report.changes.append(SectionChange(section.number, section.title, status, reused))
+
+        for entry in sorted(unmatched.values(), key=lambda entry: entry['number']):
+            report.changes.append(SectionChange(entry['number'], entry['title'], 'removed'))
+
+        return report
+
+    # ---- 大問ごとの分析結果 ----
+
+    def _record_path(self, content_hash: str) -> Path:
+        return self.store_dir / 'sections' / f'{content_hash}{self.RECORD_SUFFIX}'
+
+    def _load_record(self, content_hash: str) -> Optional[SectionAnalysis]:
+        """記録済みの大問の分析結果を取得"""
+        if content_hash in self._records:
+            self._records.move_to_end(content_hash)
+            # 以前の結果のセクションと属性を共有しないように複製する
+            return copy.deepcopy(self._records[content_hash])
+        if not self.store_dir:
+            return None
+
+        path = self._record_path(content_hash)
+        try:
+            with open(path, 'rb') as f:
+                record = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable section record {content_hash[:12]}: {e}")
+            return None
+
+        self._touch(path)
+        self._remember(content_hash, record)
+        return copy.deepcopy(record)
+
+    def _save_record(self, content_hash: str, record: SectionAnalysis) -> None:
+        """大問の分析結果を記録（呼び出し元の結果と属性を共有しないように複製して保持する）"""
+        self._remember(content_hash, copy.deepcopy(record))
+        if not self.store_dir:
+            return
+
+        try:
+            self._write_entry(self._record_path(content_hash),
+                              pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            logger.warning(f"Failed to store section record: {e}")
+
+    def _remember(self, content_hash: str, record: SectionAnalysis) -> None:
+        """メモリ上の記録に追加（上限を超えたら古いものから削除）"""
+        self._records[content_hash] = record
+        self._records.move_to_end(content_hash)
+        while len(self._records) > self.max_memory_entries:
+            self._records.popitem(last=False)
+
+    # ---- 文書ごとの大問構成 ----
+
+    def _manifest_path(self, document_key: str) -> Path:
+        name = hashlib.sha256(document_key.encode('utf-8')).hexdigest()
+        return self.store_dir / 'documents' / f'{name}{self.MANIFEST_SUFFIX}'
+
+    def _load_manifest(self, document_key: str) -> Optional[List[Dict]]:
+        """前回の大問構成を取得"""
+        if document_key in self._manifests:
+            return self._manifests[document_key]
+        if not self.store_dir:
+            return None
+
+        try:
+            with open(self._manifest_path(document_key), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable section manifest for {document_key}: {e}")
+            return None
+
+        if data.get('fingerprint') != self.fingerprint:
+            return None
+        self._touch(self._manifest_path(document_key))
+        return data.get('sections', [])
+
+    def _save_manifest(self, document_key: str, sections: List[Section], hashes: List[str]) -> None:
+        """今回の大問構成を保存"""
+        entries = [
+            {'number': section.number, 'title': section.title, 'hash': content_hash}
+            for section, content_hash in zip(sections, hashes)
+        ]
+        self._manifests[document_key] = entries
+        if not self.store_dir:
+            return
+
+        data = {'document_key': document_key, 'fingerprint': self.fingerprint, 'sections': entries}
+        try:
+            self._write_entry(self._manifest_path(document_key),
+                              json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Failed to store section manifest for {document_key}: {e}")
+
+    # ---- 保存ディレクトリのサイズ管理 ----
+
+    def _write_entry(self, path: Path, data: bytes) -> None:
+        """記録・大問構成を書き込み、合計サイズが上限を超えたら古いものから削除"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(stat.st_size for _, stat in self._entries())
+        try:
+            replaced = path.stat().st_size
+        except OSError:
+            replaced = 0
+        atomic_write_bytes(path, data)
+
+        self._total_bytes += len(data) - replaced
+        if self._total_bytes > self.max_size_bytes:
+            self._evict_if_needed()
+
+    def _entries(self) -> List[tuple]:
+        """保存ディレクトリの記録・大問構成の (パス, stat) のリスト"""
+        entries = []
+        for folder, suffix in (('sections', self.RECORD_SUFFIX), ('documents', self.MANIFEST_SUFFIX)):
+            for path in (self.store_dir / folder).glob(f'*{suffix}'):
+                try:
+                    entries.append((path, path.stat()))
+                except OSError:
+                    continue
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        """合計サイズが上限を超えていれば、最終使用が古い順に削除（他のプロセスの書き込みも含めて集計し直す）"""
+        entries = self._entries()
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in sorted(entries, key=lambda e: e[1].st_mtime):
+            if total <= self.max_size_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= stat.st_size
+            self.evictions += 1
+        self._total_bytes = total
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        """最終使用時刻を更新（削除順の判定に使用）"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
@@ -5,6 +5,7 @@
 import re
 import logging
 from typing import List, Dict, Optional, Tuple, Any
+from utils.question_features import extract_question_features
 
 logger = logging.getLogger(__name__)
 
@@ -97,20 +98,13 @@ class PatternExtractor:
         Returns:
             選択肢数（4択、5択など）
         """
-        # カタカナの選択肢
-        katakana_choices = re.findall(r'[ア-ン]\s*[\.。、]', question_text)
-        if katakana_choices:
-            return len(katakana_choices)
-            
-        # アルファベットの選択肢
-        alphabet_choices = re.findall(r'[A-H]\s*[\.。、]', question_text)
-        if alphabet_choices:
-            return len(alphabet_choices)
-            
-        # 数字の選択肢
-        number_choices = re.findall(r'[①②③④⑤⑥⑦⑧⑨⑩]', question_text)
-        if number_choices:
-            return len(number_choices)
+        features = extract_question_features(question_text)
+        
+        # カタカナ → アルファベット → 数字（丸数字）の順に選択肢を数える
+        for alphabet in ('katakana', 'alphabet', 'circle'):
+            count = features.choice_marker_count(alphabet)
+            if count:
+                return count
             
         return None
         
@@ -125,19 +119,12 @@ class PatternExtractor:
             (最小文字数, 最大文字数)のタプル
         """
         # パターン: XX字以内、XX字程度、XX字〜YY字
-        patterns = [
-            (r'(\d+)字以内', lambda m: (0, int(m.group(1)))),
-            (r'(\d+)字程度', lambda m: (int(int(m.group(1)) * 0.8), int(int(m.group(1)) * 1.2))),
-            (r'(\d+)字〜(\d+)字', lambda m: (int(m.group(1)), int(m.group(2)))),
-            (r'(\d+)字から(\d+)字', lambda m: (int(m.group(1)), int(m.group(2))))
-        ]
-        
-        for pattern, extractor in patterns:
-            match = re.search(pattern, question_text)
-            if match:
-                return extractor(match)
-                
-        return None
+        limit = extract_question_features(question_text).preferred_limit('以内', '程度', '範囲')
+        if limit is None:
+            return None
+        if limit.condition == '程度':
+            return (int(limit.value * 0.8), int(limit.value * 1.2))
+        return (limit.min, limit.max)
         
     def extract_answer_sheet_info(self, text: str) -> Dict[str, Any]:
         """
@@ -6,6 +6,8 @@ import re
 import logging
 from typing import Dict, List, Tuple, Optional, Any
 from collections import defaultdict
+from utils.numeral_utils import parse_numeral
+from patterns.question_classifier import QuestionTypeClassifier
 
 logger = logging.getLogger(__name__)
 
@@ -87,6 +89,11 @@ class QuestionAnalyzer:
             ],
         }
         
+        # 問題種別を1回の照合で判定する分類器（辞書の順序が優先順）
+        self.type_classifier = QuestionTypeClassifier.from_pattern_table(
+            self.question_types, flags=re.IGNORECASE, default='その他'
+        )
+        
         # 字数制限パターン
         self.char_limit_patterns = [
             r'([0-9０-９]{2,3})\s*字\s*(以内|程度|前後)',
@@ -287,13 +294,7 @@ class QuestionAnalyzer:
         }
         
         # 問題種別を判定
-        for q_type, patterns in self.question_types.items():
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    analysis['type'] = q_type
-                    break
-            if analysis['type'] != 'その他':
-                break
+        analysis['type'] = self.type_classifier.classify(text)
         
         # 字数制限を検出（記述式の場合）
         if analysis['type'] == '記述式':
@@ -336,26 +337,8 @@ class QuestionAnalyzer:
     
     def _normalize_number(self, num_str: str) -> int:
         """漢数字・全角数字を半角数字に変換"""
-        # 漢数字変換表
-        kanji_to_num = {
-            '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
-            '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
-            '十一': 11, '十二': 12, '十三': 13, '十四': 14, '十五': 15,
-            '十六': 16, '十七': 17, '十八': 18, '十九': 19, '二十': 20,
-        }
-        
-        # 全角数字変換
-        num_str = num_str.translate(str.maketrans('０１２３４５６７８９', '0123456789'))
-        
-        # 漢数字の場合
-        if num_str in kanji_to_num:
-            return kanji_to_num[num_str]
-        
-        # 通常の数字
-        try:
-            return int(num_str)
-        except ValueError:
-            return 1  # デフォルト値
+        num = parse_numeral(num_str)
+        return num if num is not None else 1  # デフォルト値
     
     def _determine_genre(self, source: Dict) -> str:
         """出典情報からジャンルを判定"""
@@ -6,6 +6,7 @@ import re
 import unicodedata
 from typing import List, Dict, Tuple, Optional
 import logging
+from utils.numeral_utils import parse_numeral
 
 logger = logging.getLogger(__name__)
 
@@ -69,20 +70,16 @@ class QuestionValidator:
         if not number_str:
             return None
         
-        # 漢数字の場合
-        if number_str in self.KANJI_TO_NUM:
-            return self.KANJI_TO_NUM[number_str]
-        
-        # 算用数字の場合
-        try:
-            num = int(number_str)
-            # 妙に大きい数値を拒否
-            if num < 1 or num > 100:
-                logger.warning(f"設問番号が範囲外: {num}")
-                return None
-            return num
-        except ValueError:
+        # 漢数字・算用数字・丸数字を共通の変換表で解析
+        num = parse_numeral(number_str)
+        if num is None:
             return None
+        
+        # 妙に大きい数値を拒否
+        if num < 1 or num > 100:
+            logger.warning(f"設問番号が範囲外: {num}")
+            return None
+        return num
     
     def check_continuity(self, questions: List[Dict]) -> Tuple[bool, List[str]]:
         """
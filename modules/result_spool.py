@@ -0,0 +1,115 @@
+"""
+分析結果スプールモジュール
+一括分析の結果を1件ずつJSONLファイルに書き出し、メモリに溜めずに後から少しずつ読み直す
+"""
+import os
+import json
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 設問から取り除く本文（Excelの行・サマリーには使わない）
+QUESTION_TEXT_KEYS = ('text', 'full_text')
+
+
+def compact_analysis_data(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    分析結果から本文を取り除く
+
+    大問ごとの文字数・ジャンル・テーマ・出典と、設問の番号・位置・タイプは残すため、
+    Excelの行やサマリーは元の分析結果と同じものが作れる。
+
+    Args:
+        analysis_data: BatchAnalyzer.analyze_single_file の分析結果
+
+    Returns:
+        本文を除いた分析結果（元の辞書は変更しない）
+    """
+    compact = dict(analysis_data)
+    compact['sections'] = [
+        {**section,
+         'questions': [{key: value for key, value in question.items() if key not in QUESTION_TEXT_KEYS}
+                       for question in section.get('questions', [])]}
+        for section in analysis_data.get('sections', [])
+    ]
+    return compact
+
+
+class ResultSpool:
+    """
+    分析結果のスプール
+
+    append した結果は本文を除いてすぐにファイルへ書き出す。読み出しは
+    iter_chunks で指定した件数ずつ行うので、件数が増えてもメモリの使用量は変わらない。
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        初期化
+
+        Args:
+            path: スプールファイルのパス（省略時は一時ファイル、close で削除する）
+        """
+        if path is None:
+            fd, name = tempfile.mkstemp(prefix='batch_results_', suffix='.jsonl')
+            os.close(fd)
+            self.path = Path(name)
+            self._owned = True
+        else:
+            self.path = Path(path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text('', encoding='utf-8')
+            self._owned = False
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._count = 0
+
+    def append(self, analysis_data: Dict[str, Any]) -> None:
+        """
+        分析結果を追加
+
+        Args:
+            analysis_data: 分析結果（本文は取り除いて保存する）
+        """
+        self._file.write(json.dumps(compact_analysis_data(analysis_data), ensure_ascii=False) + '\n')
+        self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def iter_chunks(self, chunk_size: int = 100) -> Iterator[List[Dict[str, Any]]]:
+        """
+        保存した結果を追加した順に指定件数ずつ読み出す
+
+        Args:
+            chunk_size: 1回に返す件数
+
+        Yields:
+            分析結果のリスト
+        """
+        self._file.flush()
+        chunk = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                chunk.append(json.loads(line))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for chunk in self.iter_chunks():
+            yield from chunk
+
+    def close(self) -> None:
+        """ファイルを閉じる（一時ファイルは削除する）"""
+        if not self._file.closed:
+            self._file.close()
+        if self._owned:
+            try:
+                self.path.unlink()
+            except OSError as e:
+                logger.debug(f"Failed to remove spool {self.path}: {e}")
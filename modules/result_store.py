@@ -0,0 +1,606 @@
+"""
+分析結果ストアモジュール
+分析結果の行データをSQLiteに保持し、Excelはここから必要なシートだけ再生成する
+"""
+import json
+import math
+import hashlib
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 集計・検証用に列としても保持する項目（Excelの列名 → テーブルの列名）
+INDEXED_COLUMNS = {
+    '総設問数': 'total_questions',
+    '総文字数': 'total_characters',
+    '大問数': 'section_count',
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    columns TEXT NOT NULL DEFAULT '[]',
+    revision INTEGER NOT NULL DEFAULT 0,
+    exported_revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS records (
+    sheet TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    total_questions REAL,
+    total_characters REAL,
+    section_count REAL,
+    data TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (sheet, year)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _to_plain(value: Any) -> Any:
+    """JSONに保存できる値に変換（numpyの数値やNaNを含むExcel由来の値に対応）"""
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        try:
+            value = value.item()
+        except (ValueError, TypeError):
+            pass
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def workbook_signature(excel_path: Path) -> Optional[str]:
+    """
+    ワークブックの更新時刻とサイズ（Excel出力後に手で編集されたかの判定用）
+
+    Args:
+        excel_path: Excelファイルのパス
+
+    Returns:
+        "更新時刻(ns):サイズ"（ファイルがない場合はNone）
+    """
+    try:
+        stat = Path(excel_path).stat()
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+class ResultStore:
+    """
+    シート（学校）× 年度の行データを保持するSQLiteストア
+    各シートの列順と、Excelへの出力が済んだ版（リビジョン）を記録する
+    """
+
+    def __init__(self, db_path: Path, busy_timeout: float = 60.0):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteファイルのパス
+            busy_timeout: 他のプロセスの書き込みが終わるのを待つ最大秒数
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        # トランザクションは _transaction で明示的に開始する
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=busy_timeout, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._initialize(busy_timeout)
+
+    def _initialize(self, busy_timeout: float) -> None:
+        """
+        WALへの切り替えとテーブルの作成
+
+        WALへの切り替えはビジータイムアウトで待たれないため、複数のプロセスが同時に
+        新しいストアを開いて競合した場合は、間隔を延ばしながら再試行する。
+
+        Args:
+            busy_timeout: 再試行する最大秒数
+        """
+        deadline = time.monotonic() + busy_timeout
+        delay = 0.01
+        while True:
+            try:
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                self._conn.executescript(_SCHEMA)
+                return
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) or time.monotonic() >= deadline:
+                    raise
+                logger.debug(f"Result store is busy, retrying initialization: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 0.5)
+
+    def close(self) -> None:
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        書き込みトランザクション（例外時はロールバック）
+
+        開始時に書き込みロックを取るため、複数のプロセスが同時に書き込んでも
+        読み込んでから書き込むまでの間に他の書き込みが割り込むことはない。
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    # ---- 書き込み ----
+
+    def upsert_rows(self, sheet: str, rows: Iterable[Dict[str, Any]],
+                    columns: Optional[List[str]] = None, merge: bool = False) -> int:
+        """
+        行データを年度単位で追加または置き換え
+
+        Args:
+            sheet: シート名（学校名）
+            rows: 行データ（'年度' を含む辞書）のリスト
+            columns: シートの列順（省略時は既存の列順、いずれの場合も新しい列は末尾に追加）
+            merge: Trueの場合、同じ年度の既存の行に項目を上書きする（含まれない項目は残す）
+
+        Returns:
+            書き込んだ行数
+        """
+        return self.upsert_sheets({sheet: list(rows)}, {sheet: columns} if columns else None, merge=merge)
+
+    def upsert_sheets(self, sheet_rows: Dict[str, List[Dict[str, Any]]],
+                      sheet_columns: Optional[Dict[str, List[str]]] = None,
+                      merge: bool = False) -> int:
+        """
+        複数シートの行データを1つのトランザクションで書き込み
+
+        Args:
+            sheet_rows: シート名 → 行データのリスト
+            sheet_columns: シート名 → 列順（省略したシートは既存の列順に新しい列を追加）
+            merge: Trueの場合、同じ年度の既存の行に項目を上書きする（含まれない項目は残す）
+
+        Returns:
+            書き込んだ行数
+        """
+        sheet_columns = sheet_columns or {}
+        now = datetime.now().isoformat(timespec='seconds')
+        written = 0
+
+        with self._transaction() as conn:
+            for sheet, rows in sheet_rows.items():
+                if not rows:
+                    continue
+                row = conn.execute('SELECT columns FROM sheets WHERE name = ?', (sheet,)).fetchone()
+                if row is None:
+                    position = conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM sheets').fetchone()[0]
+                    conn.execute('INSERT INTO sheets (name, position) VALUES (?, ?)', (sheet, position))
+                    known_columns = []
+                else:
+                    known_columns = json.loads(row['columns'])
+
+                # 指定された列順を優先し、既存の列は後ろに残す
+                columns = list(sheet_columns.get(sheet) or [])
+                columns += [column for column in known_columns if column not in columns]
+                for data in rows:
+                    data = {key: _to_plain(value) for key, value in data.items()}
+                    if merge:
+                        existing = conn.execute(
+                            'SELECT data FROM records WHERE sheet = ? AND year = ?', (sheet, int(data['年度']))
+                        ).fetchone()
+                        if existing is not None:
+                            data = {**json.loads(existing['data']), **data}
+                    for key in data:
+                        if key not in columns:
+                            columns.append(key)
+                    conn.execute(
+                        'INSERT OR REPLACE INTO records '
+                        '(sheet, year, total_questions, total_characters, section_count, data, updated_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (
+                            sheet, int(data['年度']),
+                            *(data.get(column) for column in INDEXED_COLUMNS),
+                            json.dumps(data, ensure_ascii=False),
+                            now,
+                        )
+                    )
+                    written += 1
+
+                conn.execute(
+                    'UPDATE sheets SET columns = ?, revision = revision + 1 WHERE name = ?',
+                    (json.dumps(columns, ensure_ascii=False), sheet)
+                )
+        return written
+
+    def backup(self, dest_path: Path) -> Path:
+        """
+        ストアを別ファイルに複製（書き込み中でも一貫した内容になる）
+
+        Args:
+            dest_path: 複製先のパス
+
+        Returns:
+            複製先のパス
+        """
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        dest = sqlite3.connect(str(dest_path))
+        try:
+            with self._lock:
+                self._conn.backup(dest)
+        finally:
+            dest.close()
+        return dest_path
+
+    def mark_exported(self, sheets: Iterable[str], revisions: Optional[Dict[str, int]] = None) -> None:
+        """
+        シートのExcel出力が済んだことを記録
+
+        Args:
+            sheets: 出力したシート名
+            revisions: シート名 → 出力した内容のリビジョン（省略時は現在のリビジョン）
+                       出力中に他の書き込みがあっても、その変更は未出力のまま残る
+        """
+        with self._transaction() as conn:
+            if revisions is None:
+                conn.executemany(
+                    'UPDATE sheets SET exported_revision = revision WHERE name = ?',
+                    [(sheet,) for sheet in sheets]
+                )
+            else:
+                conn.executemany(
+                    'UPDATE sheets SET exported_revision = ? WHERE name = ?',
+                    [(revisions[sheet], sheet) for sheet in sheets]
+                )
+
+    def set_workbook_signature(self, signature: Optional[str]) -> None:
+        """
+        最後に出力・取り込みしたときのワークブックの更新時刻とサイズを記録
+
+        Args:
+            signature: workbook_signature の値
+        """
+        with self._transaction() as conn:
+            if signature is None:
+                conn.execute("DELETE FROM meta WHERE key = 'workbook_signature'")
+            else:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('workbook_signature', ?)",
+                             (signature,))
+
+    def mark_all_dirty(self) -> None:
+        """すべてのシートを未出力にする（Excelファイルが削除された場合など）"""
+        with self._transaction() as conn:
+            conn.execute('UPDATE sheets SET exported_revision = -1')
+
+    # ---- 読み込み ----
+
+    def is_empty(self) -> bool:
+        """データがないか"""
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM records LIMIT 1').fetchone() is None
+
+    def workbook_signature(self) -> Optional[str]:
+        """最後に出力・取り込みしたときのワークブックの更新時刻とサイズ（記録がない場合はNone）"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'workbook_signature'").fetchone()
+        return row['value'] if row else None
+
+    def sheet_names(self) -> List[str]:
+        """シート名（追加順）"""
+        with self._lock:
+            rows = self._conn.execute('SELECT name FROM sheets ORDER BY position').fetchall()
+        return [row['name'] for row in rows]
+
+    def dirty_sheets(self) -> List[str]:
+        """Excelへの出力が古くなっているシート（追加順）"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT name FROM sheets WHERE exported_revision != revision ORDER BY position'
+            ).fetchall()
+        return [row['name'] for row in rows]
+
+    def sheet_revision(self, sheet: str) -> Optional[int]:
+        """シートのリビジョン（書き込みのたびに増える、シートがない場合はNone）"""
+        with self._lock:
+            row = self._conn.execute('SELECT revision FROM sheets WHERE name = ?', (sheet,)).fetchone()
+        return row['revision'] if row else None
+
+    def sheet_columns(self, sheet: str) -> List[str]:
+        """シートの列順"""
+        with self._lock:
+            row = self._conn.execute('SELECT columns FROM sheets WHERE name = ?', (sheet,)).fetchone()
+        return json.loads(row['columns']) if row else []
+
+    def read_rows(self, sheet: str) -> List[Dict[str, Any]]:
+        """
+        シートの行データを年度順に取得
+
+        Args:
+            sheet: シート名（学校名）
+
+        Returns:
+            行データのリスト
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT data FROM records WHERE sheet = ? ORDER BY year', (sheet,)
+            ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def content_digest(self, ignore_keys: Iterable[str] = ('更新日時',)) -> str:
+        """
+        保存内容のハッシュ（バックアップの重複判定用）
+
+        リビジョンや書き込み時刻などの管理情報は含めないため、同じ内容を保存し直しても変わらない。
+
+        Args:
+            ignore_keys: 比較に含めない行データの項目
+
+        Returns:
+            ハッシュ（16進文字列）
+        """
+        ignore_keys = set(ignore_keys)
+        digest = hashlib.sha256()
+        with self._lock:
+            for row in self._conn.execute('SELECT name, columns FROM sheets ORDER BY position'):
+                digest.update(f"sheet\0{row['name']}\0{row['columns']}\n".encode('utf-8'))
+            for row in self._conn.execute('SELECT sheet, year, data FROM records ORDER BY sheet, year'):
+                data = {key: value for key, value in json.loads(row['data']).items() if key not in ignore_keys}
+                material = json.dumps(data, ensure_ascii=False, sort_keys=True)
+                digest.update(f"row\0{row['sheet']}\0{row['year']}\0{material}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def snapshot(self, sheet: str) -> Tuple[Optional[int], List[str], List[Dict[str, Any]]]:
+        """
+        シートのリビジョン・列順・行データを同じ時点の内容で取得
+
+        Args:
+            sheet: シート名
+
+        Returns:
+            (リビジョン, 列順, 年度順の行データ)
+        """
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                meta = self._conn.execute(
+                    'SELECT revision, columns FROM sheets WHERE name = ?', (sheet,)
+                ).fetchone()
+                rows = self._conn.execute(
+                    'SELECT data FROM records WHERE sheet = ? ORDER BY year', (sheet,)
+                ).fetchall()
+            finally:
+                self._conn.execute('COMMIT')
+        if meta is None:
+            return None, [], []
+        return meta['revision'], json.loads(meta['columns']), [json.loads(row['data']) for row in rows]
+
+    def has_row(self, sheet: str, year: int) -> bool:
+        """指定した年度の行があるか"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT 1 FROM records WHERE sheet = ? AND year = ?', (sheet, int(year))
+            ).fetchone() is not None
+
+    def record_count(self) -> int:
+        """全行数"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        学校ごとの集計（年数・年度範囲・平均文字数・平均設問数）
+
+        Returns:
+            集計行のリスト（シートの追加順）
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT s.name AS school, COUNT(r.year) AS years, MIN(r.year) AS oldest, MAX(r.year) AS newest, '
+                'COALESCE(AVG(r.total_characters), 0) AS avg_characters, '
+                'COALESCE(AVG(r.total_questions), 0) AS avg_questions '
+                'FROM sheets s JOIN records r ON r.sheet = s.name '
+                'GROUP BY s.name ORDER BY s.position'
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def missing_columns(self, required: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        必須列が欠けているシート
+
+        Args:
+            required: 必須列のリスト
+
+        Returns:
+            シート名 → 欠けている列のリスト
+        """
+        missing = {}
+        for sheet in self.sheet_names():
+            columns = self.sheet_columns(sheet)
+            absent = [column for column in required if column not in columns]
+            if absent:
+                missing[sheet] = absent
+        return missing
+
+
+class SheetFrameCache:
+    """
+    シートごとの読み込み結果（DataFrameなど）のキャッシュ
+    ストアのパス・シート名をキーとし、シートのリビジョンが変わったら読み直す。
+    別のプロセスやインスタンスからの書き込みもリビジョンで検出される。
+    """
+
+    def __init__(self, max_entries: int = 64):
+        """
+        初期化
+
+        Args:
+            max_entries: 保持するシートの最大数
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[int, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, store: ResultStore, sheet: str, loader: Callable[[], Any]) -> Any:
+        """
+        シートの読み込み結果を取得（キャッシュが古い場合は loader で読み直す）
+
+        Args:
+            store: 読み込み元のストア
+            sheet: シート名
+            loader: 読み込み関数
+
+        Returns:
+            読み込み結果の複製（呼び出し側で変更してもキャッシュに影響しない）
+        """
+        key = (str(store.db_path.resolve()), sheet)
+        revision = store.sheet_revision(sheet)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == revision:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy(entry[1])
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (revision, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return self._copy(value)
+
+    def invalidate(self, store_path: Path, sheets: Optional[Iterable[str]] = None) -> None:
+        """
+        キャッシュを破棄
+
+        Args:
+            store_path: ストアのパス
+            sheets: 破棄するシート名（省略時はそのストアのすべて）
+        """
+        path = str(Path(store_path).resolve())
+        targets = set(sheets) if sheets is not None else None
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                if targets is None or key[1] in targets:
+                    del self._entries[key]
+
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        return value.copy() if hasattr(value, 'copy') else value
+
+
+# ---- Excelとの変換（pandasが必要） ----
+
+def import_excel_into_store(store: ResultStore, excel_path: Path, batch_size: int = 500) -> int:
+    """
+    既存のExcelファイルの全シートをストアに取り込む（初回移行・手で編集されたExcelの取り込み）
+
+    読み取り専用モードで行を順に読み、batch_size 行ずつ書き込むため、
+    ワークブックの大きさによらずメモリ使用量は一定。同じ年度の行はExcelの内容で置き換え、
+    Excelにない行はストアに残す。取り込んだシートはExcelへの出力済みとして記録する
+    （取り込む前からExcelへの出力が古くなっていたシートは未出力のまま残す）。
+
+    Args:
+        store: 取り込み先のストア
+        excel_path: Excelファイルのパス
+        batch_size: 1回の書き込みでまとめる行数
+
+    Returns:
+        取り込んだ行数
+    """
+    from modules.workbook_scanner import iter_workbook_rows
+
+    imported = 0
+    imported_sheets = []
+    dirty_before = set(store.dirty_sheets())
+    for sheet, columns, rows in iter_workbook_rows(excel_path):
+        if '年度' not in columns:
+            logger.warning(f"Skipping sheet without 年度 column: {sheet}")
+            for _ in rows:
+                pass
+            continue
+
+        batch = []
+        for row in rows:
+            try:
+                row['年度'] = int(row['年度'])
+            except (TypeError, ValueError):
+                logger.warning(f"Skipping row with invalid 年度 in {sheet}: {row['年度']!r}")
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                imported += store.upsert_rows(sheet, batch, columns=columns)
+                batch = []
+        if batch:
+            imported += store.upsert_rows(sheet, batch, columns=columns)
+        imported_sheets.append(sheet)
+
+    store.mark_exported([sheet for sheet in imported_sheets if sheet not in dirty_before])
+    logger.info(f"Imported {imported} rows from {excel_path} into {store.db_path}")
+    return imported
+
+
+def export_store_to_excel(store: ResultStore, excel_path: Path,
+                          sheets: Optional[Iterable[str]] = None,
+                          index: bool = True, engine: str = 'openpyxl') -> List[str]:
+    """
+    ストアの内容をExcelに出力（出力が古くなったシートだけを置き換える）
+
+    Excelファイルがない場合は sheets の指定にかかわらず全シートを新規に書き出す。
+    出力後のワークブックの更新時刻とサイズをストアに記録する。
+
+    Args:
+        store: 出力元のストア
+        excel_path: Excelファイルのパス
+        sheets: 出力対象を限定するシート名（省略時は古くなったすべてのシート）
+        index: 行インデックスを出力するか
+        engine: 書き込みエンジン
+
+    Returns:
+        出力したシート名のリスト
+    """
+    import pandas as pd
+
+    excel_path = Path(excel_path)
+    full = not excel_path.exists()
+    targets = store.sheet_names() if full else store.dirty_sheets()
+    if sheets is not None and not full:
+        requested = set(sheets)
+        targets = [sheet for sheet in targets if sheet in requested]
+    if not targets:
+        return []
+
+    revisions = {}
+    writer_options = {'mode': 'w'} if full else {'mode': 'a', 'if_sheet_exists': 'replace'}
+    with pd.ExcelWriter(excel_path, engine=engine, **writer_options) as writer:
+        for sheet in targets:
+            revisions[sheet], columns, rows = store.snapshot(sheet)
+            df = pd.DataFrame(rows, columns=columns)
+            df.to_excel(writer, sheet_name=sheet, index=index)
+
+    store.mark_exported(targets, revisions)
+    store.set_workbook_signature(workbook_signature(excel_path))
+    return targets
@@ -0,0 +1,154 @@
+"""
+分析結果書き込みモジュール
+ワークブックへの書き込みをすべてここに集め、複数のプロセス・スレッドから
+同時に保存しても行が失われないようにする
+"""
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from modules.result_store import (
+    ResultStore, import_excel_into_store, export_store_to_excel, workbook_signature
+)
+from utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+
+class ResultWriter:
+    """
+    ワークブックの書き込み窓口
+
+    行の追加・更新はストア（SQLite）のトランザクションで行うため、同時に書き込んでも
+    互いの行を上書きしない。Excelへの出力はロックファイルで直列化し、常にストアの
+    最新の内容から書き出すので、最後に出力したプロセスのExcelにすべての行が含まれる。
+
+    出力のたびにワークブックの更新時刻とサイズをストアに記録し、ストアを使う前に
+    ワークブックが変わっていれば（手で編集された場合など）ストアに取り込み直すため、
+    Excelでの編集は次の出力で上書きされない。
+    """
+
+    def __init__(self, excel_path: Path, store_path: Optional[Path] = None,
+                 index: bool = True, engine: str = 'openpyxl', lock_timeout: float = 60.0):
+        """
+        初期化
+
+        Args:
+            excel_path: Excelファイルのパス
+            store_path: ストアのパス（省略時はExcelと同じ場所の .sqlite3）
+            index: Excelに行インデックスを出力するか
+            engine: Excelの読み書きエンジン
+            lock_timeout: ロックを待つ最大秒数
+        """
+        self.excel_path = Path(excel_path)
+        self.store_path = Path(store_path) if store_path else self.excel_path.with_suffix('.sqlite3')
+        self.index = index
+        self.engine = engine
+        self.lock = FileLock(self.excel_path.with_name(f'{self.excel_path.name}.lock'), timeout=lock_timeout)
+        self._store: Optional[ResultStore] = None
+        self._open_lock = threading.Lock()
+        # このインスタンスで最後に確認したワークブックの更新時刻とサイズ
+        self._workbook_signature: Optional[str] = None
+
+    @property
+    def is_open(self) -> bool:
+        """ストアを開いているか"""
+        return self._store is not None
+
+    @property
+    def store(self) -> ResultStore:
+        """
+        ストア（初回アクセス時に開く。前回の出力・取り込みからExcelが変わっていれば取り込む）
+        """
+        with self._open_lock:
+            if self._store is None:
+                self._store = ResultStore(self.store_path)
+            store = self._store
+        self._sync_workbook(store)
+        return store
+
+    def _sync_workbook(self, store: ResultStore) -> None:
+        """
+        前回の出力・取り込みの後にExcelが変更されていれば、その内容をストアに取り込む
+
+        Args:
+            store: 取り込み先のストア
+        """
+        signature = workbook_signature(self.excel_path)
+        if signature is None or signature == self._workbook_signature:
+            return
+        # 他のプロセスが同時に取り込まない・出力しないようにロック内で確認し直す
+        with self.lock:
+            signature = workbook_signature(self.excel_path)
+            if signature is not None and signature != store.workbook_signature():
+                logger.info(f"Workbook changed since last export, importing: {self.excel_path}")
+                import_excel_into_store(store, self.excel_path)
+                store.set_workbook_signature(signature)
+            self._workbook_signature = signature
+
+    def upsert(self, sheet_rows: Dict[str, List[Dict[str, Any]]],
+               sheet_columns: Optional[Dict[str, List[str]]] = None,
+               merge: bool = False, export: bool = True) -> int:
+        """
+        行データを保存し、必要なら対象シートをExcelへ反映
+
+        Args:
+            sheet_rows: シート名 → 行データ（'年度' を含む辞書）のリスト
+            sheet_columns: シート名 → 列順
+            merge: Trueの場合、同じ年度の既存の行に項目を上書きする
+            export: 保存後に対象シートをExcelへ出力するか
+
+        Returns:
+            保存した行数
+        """
+        written = self.store.upsert_sheets(sheet_rows, sheet_columns, merge=merge)
+        if export:
+            self.export(sheets=list(sheet_rows))
+        return written
+
+    def export(self, sheets: Optional[List[str]] = None) -> List[str]:
+        """
+        前回の出力以降に更新されたシートをExcelへ出力（ロック内で実行）
+
+        Args:
+            sheets: 出力対象を限定するシート名（省略時は更新されたすべてのシート）
+
+        Returns:
+            出力したシート名のリスト
+        """
+        # ストアを開く（Excelの変更を取り込む）のはロックの外で行い、ロックの取得順を揃える
+        store = self.store
+        with self.lock:
+            self._sync_workbook(store)
+            exported = export_store_to_excel(
+                store, self.excel_path, sheets=sheets, index=self.index, engine=self.engine
+            )
+            self._workbook_signature = workbook_signature(self.excel_path)
+            return exported
+
+    def replace_store(self, write: Callable[[Path], Any]) -> None:
+        """
+        ストアのファイルを置き換える（バックアップからの復元など）
+
+        ロック内でストアを閉じてから置き換え、置き換えが終わるまで他のスレッドに開かせない。
+        閉じた後のWAL・共有メモリのファイルは削除し、置き換えたストアに適用されないようにする。
+
+        Args:
+            write: ストアのパスに新しい内容を書き出す関数
+        """
+        with self.lock, self._open_lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+            for suffix in ('-wal', '-shm'):
+                Path(f'{self.store_path}{suffix}').unlink(missing_ok=True)
+            write(self.store_path)
+            self._workbook_signature = None
+
+    def close(self) -> None:
+        """ストアを閉じる"""
+        with self._open_lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
@@ -0,0 +1,179 @@
+"""
+大問マーカー一括スキャナー
+ImprovedSectionSplitter（v2）と ImprovedSectionSplitterV3 で共有する
+単一の正規表現による大問マーカー候補の検出
+"""
+import re
+from bisect import bisect_right
+from typing import List, Dict, Tuple
+
+
+KANJI_DIGITS = '一二三四五六七八九十'
+KANJI_TO_INT = {ch: i + 1 for i, ch in enumerate(KANJI_DIGITS)}
+
+# マーカー種別と優先度（高い優先度ほど信頼性が高い）
+MARKER_PRIORITIES = {
+    'daimon_explicit': 10,
+    'dai_mon': 9,
+    'kanji_next_sentence': 8,
+    'kanji_next_text': 8,
+    'kanji_next_general': 7,
+    'bracket_kanji': 6,
+    'paren_kanji': 5,
+    'simple_kanji': 3,
+}
+
+_K = f'[{KANJI_DIGITS}]'
+
+# 行頭で1回だけ照合する統合パターン
+# 漢数字+読点の系統は入れ子の任意グループにより、
+# 「simple_kanji ⊂ kanji_next_general ⊂ kanji_next_sentence/text」を1回のマッチで判定する
+# 先読みで幅0のマッチにしているため、複数行にまたがる候補があっても次の行頭を読み飛ばさない
+_COMBINED_MARKER_PATTERN = re.compile(
+    r'(?m)^(?=(?:'
+    rf'(?P<daimon_explicit>大問\s*(?P<daimon_explicit_num>{_K}))'
+    rf'|(?P<dai_mon>第(?P<dai_mon_num>{_K})問)'
+    rf'|(?P<bracket_kanji>[【［](?P<bracket_kanji_num>{_K})[】］])'
+    rf'|(?P<paren_kanji>[（(](?P<paren_kanji_num>{_K})[）)])'
+    rf'|(?P<simple_kanji>(?P<simple_kanji_num>{_K})[、，])'
+    r'(?:(?P<kanji_next_general>\s*次の)'
+    r'(?:(?P<kanji_next_sentence>文章を読んで)|(?P<kanji_next_text>テキストを読んで))?'
+    r')?'
+    r'))'
+)
+
+# 単独で現れる種別（番号グループ名とともに定義）
+_STANDALONE_TYPES = ('daimon_explicit', 'dai_mon', 'bracket_kanji', 'paren_kanji')
+
+# 漢数字+読点の系統（優先度順）
+_KANJI_COMMA_TYPES = ('kanji_next_sentence', 'kanji_next_text', 'kanji_next_general', 'simple_kanji')
+
+# OCRノイズの指標
+OCR_NOISE_WORDS = (
+    '解答用紙', '問題用紙', 'ページ', '受験番号',
+    '氏名', '学校名', '合計点', '配点',
+    '注意事項', '指示に従って', 'マークシート',
+    '億円', '万円', '点満点'  # 数値単位もノイズとして除外
+)
+_OCR_NOISE_PATTERN = re.compile('|'.join(re.escape(w) for w in OCR_NOISE_WORDS))
+
+# 小問の指標
+_SMALL_QUESTION_PATTERN = re.compile(
+    r'問[一二三四五]'
+    r'|設問[一二三四五]'
+    r'|次の問いに答えなさい'
+    r'|について.*答えなさい'
+    r'|傍線部'
+    r'|空欄'
+)
+
+
+def build_line_starts(text: str) -> List[int]:
+    """
+    各行の開始位置テーブルを作成
+
+    Args:
+        text: 対象テキスト
+
+    Returns:
+        行頭位置のリスト（昇順）
+    """
+    return [0] + [m.end() for m in re.finditer('\n', text)]
+
+
+def line_end_at(line_starts: List[int], pos: int, text_length: int) -> int:
+    """
+    位置 pos を含む行の終端（改行位置）を行頭テーブルから取得
+
+    Args:
+        line_starts: build_line_starts の結果
+        pos: テキスト内の位置
+        text_length: テキスト全体の長さ
+
+    Returns:
+        行末の位置（改行文字の位置、最終行ならテキスト長）
+    """
+    index = bisect_right(line_starts, pos)
+    if index < len(line_starts):
+        return line_starts[index] - 1
+    return text_length
+
+
+class SectionMarkerScanner:
+    """大問マーカー候補を1パスで検出するスキャナー"""
+
+    context_before = 50
+    context_after = 100
+
+    def scan(self, text: str) -> List[Dict]:
+        """
+        大問マーカーの候補を網羅的に検出
+
+        Args:
+            text: 検索対象のテキスト
+
+        Returns:
+            位置順（同一位置では優先度順）に並んだマーカー候補のリスト
+        """
+        candidates = []
+        line_starts = None
+        text_length = len(text)
+
+        for match in _COMBINED_MARKER_PATTERN.finditer(text):
+            if line_starts is None:
+                line_starts = build_line_starts(text)
+
+            start = match.start()
+            for pattern_name, end, num_str in self._expand_match(match):
+                line_end = line_end_at(line_starts, end, text_length)
+                full_line = text[start:line_end].strip()
+
+                candidates.append({
+                    'start': start,
+                    'end': end,
+                    'number': KANJI_TO_INT.get(num_str, 0),
+                    'text': text[start:end].strip(),
+                    'full_line': full_line[:100],  # 最初の100文字
+                    'type': pattern_name,
+                    'priority': MARKER_PRIORITIES[pattern_name]
+                })
+
+        return candidates
+
+    def _expand_match(self, match: re.Match) -> List[Tuple[str, int, str]]:
+        """
+        統合パターンの1マッチを、該当する全マーカー種別に展開
+
+        Returns:
+            (種別名, 終了位置, 漢数字) のリスト（優先度順）
+        """
+        for name in _STANDALONE_TYPES:
+            if match.group(name) is not None:
+                return [(name, match.end(name), match.group(f'{name}_num'))]
+
+        num_str = match.group('simple_kanji_num')
+        expanded = []
+        for name in _KANJI_COMMA_TYPES:
+            if match.group(name) is not None:
+                expanded.append((name, match.end(name), num_str))
+        return expanded
+
+    def get_context(self, candidate: Dict, text: str) -> str:
+        """候補の前後コンテキストを取得"""
+        context_start = max(0, candidate['start'] - self.context_before)
+        context_end = min(len(text), candidate['end'] + self.context_after)
+        return text[context_start:context_end]
+
+    @staticmethod
+    def has_ocr_noise(context: str) -> bool:
+        """コンテキストにOCRノイズの指標が含まれるか"""
+        return _OCR_NOISE_PATTERN.search(context) is not None
+
+    @staticmethod
+    def has_small_question_indicator(context: str) -> bool:
+        """コンテキストに小問の指標が含まれるか"""
+        return _SMALL_QUESTION_PATTERN.search(context) is not None
+
+
+# 共有インスタンス
+default_scanner = SectionMarkerScanner()
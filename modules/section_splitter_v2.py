@@ -5,6 +5,7 @@ Geminiの提案に基づく、より正確な大問分割ロジック
 import re
 from typing import List, Dict, Optional
 from models import Section
+from modules.section_marker_scanner import default_scanner
 
 
 class ImprovedSectionSplitter:
@@ -22,6 +23,7 @@ class ImprovedSectionSplitter:
             '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
             '六': 6, '七': 7, '八': 8, '九': 9, '十': 10
         }
+        self.marker_scanner = default_scanner
     
     def split_sections(self, text: str) -> List[Section]:
         """
@@ -54,52 +56,8 @@ class ImprovedSectionSplitter:
         Returns:
             マーカー候補のリスト
         """
-        # 優先度順にパターンを定義（高い優先度ほど信頼性が高い）
-        patterns = [
-            # 最高優先度: 明確な大問表記
-            ('daimon_explicit', r'(?m)^大問\s*([一二三四五六七八九十])', 10),
-            ('dai_mon', r'(?m)^第([一二三四五六七八九十])問', 9),
-            
-            # 高優先度: 「次の文章」を含む明確なパターン
-            ('kanji_next_sentence', r'(?m)^([一二三四五六七八九十])[、，]\s*次の文章を読んで', 8),
-            ('kanji_next_text', r'(?m)^([一二三四五六七八九十])[、，]\s*次のテキストを読んで', 8),
-            ('kanji_next_general', r'(?m)^([一二三四五六七八九十])[、，]\s*次の', 7),
-            
-            # 中優先度: 括弧付き番号
-            ('bracket_kanji', r'(?m)^[【［]([一二三四五六七八九十])[】］]', 6),
-            ('paren_kanji', r'(?m)^[（(]([一二三四五六七八九十])[）)]', 5),
-            
-            # 低優先度: 単純な番号（他の条件と組み合わせて使用）
-            ('simple_kanji', r'(?m)^([一二三四五六七八九十])[、，]', 3),
-        ]
-        
-        candidates = []
-        
-        for pattern_name, pattern_regex, priority in patterns:
-            for match in re.finditer(pattern_regex, text):
-                num_str = match.group(1)
-                num = self.kanji_to_int.get(num_str, 0)
-                
-                # マッチした行全体を取得（デバッグ用）
-                line_start = text.rfind('\n', 0, match.start()) + 1
-                line_end = text.find('\n', match.end())
-                if line_end == -1:
-                    line_end = len(text)
-                full_line = text[line_start:line_end].strip()
-                
-                candidates.append({
-                    'start': match.start(),
-                    'end': match.end(),
-                    'number': num,
-                    'text': match.group(0).strip(),
-                    'full_line': full_line[:100],  # 最初の100文字
-                    'type': pattern_name,
-                    'priority': priority
-                })
-        
-        # 位置順にソート
-        candidates.sort(key=lambda x: x['start'])
-        return candidates
+        # 統合パターンによる1パス検出（v2/v3共通のスキャナー）
+        return self.marker_scanner.scan(text)
     
     def _filter_true_markers(self, candidates: List[Dict], text: str) -> List[Dict]:
         """
@@ -177,23 +135,11 @@ class ImprovedSectionSplitter:
         # 「問一」「問二」などの小問パターンをチェック
         if candidate['type'] == 'simple_kanji':
             # 前後のコンテキストを確認
-            context_start = max(0, candidate['start'] - 50)
-            context_end = min(len(text), candidate['end'] + 100)
-            context = text[context_start:context_end]
+            context = self.marker_scanner.get_context(candidate, text)
             
             # 小問のインジケーター
-            small_question_indicators = [
-                r'問[一二三四五]',
-                r'設問[一二三四五]',
-                r'次の問いに答えなさい',
-                r'について.*答えなさい',
-                r'傍線部',
-                r'空欄'
-            ]
-            
-            for indicator in small_question_indicators:
-                if re.search(indicator, context):
-                    return True
+            if self.marker_scanner.has_small_question_indicator(context):
+                return True
         
         return False
     
@@ -5,6 +5,7 @@
 import re
 from typing import List, Dict, Optional, Tuple
 from models import Section
+from modules.section_marker_scanner import default_scanner
 
 
 class ImprovedSectionSplitterV3:
@@ -22,6 +23,7 @@ class ImprovedSectionSplitterV3:
             '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
             '六': 6, '七': 7, '八': 8, '九': 9, '十': 10
         }
+        self.marker_scanner = default_scanner
     
     def split_sections(self, text: str) -> List[Section]:
         """
@@ -54,53 +56,8 @@ class ImprovedSectionSplitterV3:
         Returns:
             マーカー候補のリスト
         """
-        # 優先度順にパターンを定義（高い優先度ほど信頼性が高い）
-        patterns = [
-            # 最高優先度: 明確な大問表記
-            ('daimon_explicit', r'(?m)^大問\s*([一二三四五六七八九十])', 10),
-            ('dai_mon', r'(?m)^第([一二三四五六七八九十])問', 9),
-            
-            # 高優先度: 「次の文章」を含む明確なパターン
-            ('kanji_next_sentence', r'(?m)^([一二三四五六七八九十])[、，]\s*次の文章を読んで', 8),
-            ('kanji_next_text', r'(?m)^([一二三四五六七八九十])[、，]\s*次のテキストを読んで', 8),
-            ('kanji_next_general', r'(?m)^([一二三四五六七八九十])[、，]\s*次の', 7),
-            
-            # 中優先度: 括弧付き番号
-            ('bracket_kanji', r'(?m)^[【［]([一二三四五六七八九十])[】］]', 6),
-            ('paren_kanji', r'(?m)^[（(]([一二三四五六七八九十])[）)]', 5),
-            
-            # 低優先度: 単純な番号（他の条件と組み合わせて使用）
-            ('simple_kanji', r'(?m)^([一二三四五六七八九十])[、，]', 3),
-        ]
-        
-        candidates = []
-        
-        for pattern_name, pattern_regex, priority in patterns:
-            for match in re.finditer(pattern_regex, text):
-                num_str = match.group(1)
-                num = self.kanji_to_int.get(num_str, 0)
-                
-                # マッチした行全体を取得（デバッグ用）
-                line_start = text.rfind('\n', 0, match.start()) + 1
-                line_end = text.find('\n', match.end())
-                if line_end == -1:
-                    line_end = len(text)
-                full_line = text[line_start:line_end].strip()
-                
-                candidates.append({
-                    'start': match.start(),
-                    'end': match.end(),
-                    'number': num,
-                    'text': match.group(0).strip(),
-                    'full_line': full_line[:100],  # 最初の100文字
-                    'type': pattern_name,
-                    'priority': priority
-                })
-        
-        # 位置順にソート
-        candidates.sort(key=lambda x: x['start'])
-        
-        return candidates
+        # 統合パターンによる1パス検出（v2/v3共通のスキャナー）
+        return self.marker_scanner.scan(text)
     
     def _filter_true_markers(self, candidates: List[Dict], text: str) -> List[Dict]:
         """
@@ -116,6 +73,15 @@ class ImprovedSectionSplitterV3:
         if not candidates:
             return []
         
+        # 小問判定は候補ごとに1回だけ行う
+        small_flags = {
+            (c['start'], c['type']): self._is_small_question(c, text)
+            for c in candidates
+        }
+        
+        def is_small(candidate: Dict) -> bool:
+            return small_flags[(candidate['start'], candidate['type'])]
+        
         # 優先度でソート（高い順）
         candidates.sort(key=lambda x: (-x['priority'], x['start']))
         
@@ -124,7 +90,7 @@ class ImprovedSectionSplitterV3:
         
         for candidate in candidates:
             # 小問チェック
-            if self._is_small_question(candidate, text):
+            if is_small(candidate):
                 continue
             
             # 番号が1の場合は最初のマーカーとして採用
@@ -135,7 +101,7 @@ class ImprovedSectionSplitterV3:
         if not final_markers:
             # 番号1が見つからない場合、最初の有効な候補を採用
             for candidate in candidates:
-                if not self._is_small_question(candidate, text):
+                if not is_small(candidate):
                     final_markers = [candidate]
                     break
         
@@ -150,7 +116,7 @@ class ImprovedSectionSplitterV3:
                 continue
             
             # 小問チェック
-            if self._is_small_question(candidate, text):
+            if is_small(candidate):
                 continue
             
             # 位置チェック（前のマーカーより後にある）
@@ -199,36 +165,16 @@ class ImprovedSectionSplitterV3:
             小問またはノイズの場合True
         """
         # 前後のコンテキストを確認
-        context_start = max(0, candidate['start'] - 50)
-        context_end = min(len(text), candidate['end'] + 100)
-        context = text[context_start:context_end]
+        context = self.marker_scanner.get_context(candidate, text)
         
         # OCRノイズのパターンを先にチェック（Geminiが指摘した問題）
-        ocr_noise_patterns = [
-            '解答用紙', '問題用紙', 'ページ', '受験番号', 
-            '氏名', '学校名', '合計点', '配点',
-            '注意事項', '指示に従って', 'マークシート',
-            '億円', '万円', '点満点'  # 数値単位もノイズとして除外
-        ]
-        
-        for noise_pattern in ocr_noise_patterns:
-            if noise_pattern in context:
-                return True
+        if self.marker_scanner.has_ocr_noise(context):
+            return True
         
         # 小問パターンのチェック
         if candidate['type'] == 'simple_kanji':
-            small_question_indicators = [
-                r'問[一二三四五]',
-                r'設問[一二三四五]',
-                r'次の問いに答えなさい',
-                r'について.*答えなさい',
-                r'傍線部',
-                r'空欄'
-            ]
-            
-            for indicator in small_question_indicators:
-                if re.search(indicator, context):
-                    return True
+            if self.marker_scanner.has_small_question_indicator(context):
+                return True
         
         return False
 
@@ -6,6 +6,7 @@ import re
 import logging
 from typing import List, Dict, Any, Tuple
 from collections import defaultdict
+from patterns.question_classifier import QuestionTypeClassifier
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,23 @@ class TextAnalyzer:
             self.compiled_patterns[q_type] = [
                 re.compile(pattern, re.IGNORECASE) for pattern in patterns
             ]
+        
+        # パターン表による判定部分を優先順に1本の正規表現にまとめる
+        self.type_classifier = QuestionTypeClassifier([
+            # 漢字・語句問題
+            ('漢字・語句', question_patterns.get('漢字・語句', []), re.IGNORECASE),
+            # 丸数字で慣用句・語句問題の場合
+            ('漢字・語句', [r'\A[①②③④⑤⑥⑦⑧⑨⑩](?=[\s\S]*?(?:慣用句|ことわざ|語句|漢字|語群|に入る))'], 0),
+            # 選択肢の存在（記号選択）
+            ('記号選択', [r'[ア-ン]\s*[\.。、]', r'[A-H]\s*[\.。、]'], 0),
+            ('記号選択', question_patterns.get('記号選択', []), re.IGNORECASE),
+            # 抜き出し問題
+            ('抜き出し', question_patterns.get('抜き出し', []), re.IGNORECASE),
+            # 脱文挿入
+            ('脱文挿入', question_patterns.get('脱文挿入', []), re.IGNORECASE),
+            # 文字数指定がある場合は記述
+            ('記述', [r'\d+字'], 0),
+        ])
             
     def analyze_exam_structure(self, text: str) -> Dict[str, Any]:
         """
@@ -64,9 +82,9 @@ class TextAnalyzer:
                 q['section'] = section['number']
                 result['questions'].append(q)
                 
-        # 設問タイプの分類
-        for question in result['questions']:
-            q_type = self._classify_question_type(question['text'])
+        # 設問タイプの分類（文書内の全設問をまとめて分類）
+        q_types = self.classify_question_types([q['text'] for q in result['questions']])
+        for question, q_type in zip(result['questions'], q_types):
             question['type'] = q_type
             result['question_types'][q_type] += 1
             
@@ -309,6 +327,18 @@ class TextAnalyzer:
         
         return any(keyword in text for keyword in question_keywords)
         
+    def classify_question_types(self, question_texts: List[str]) -> List[str]:
+        """
+        複数の設問タイプをまとめて分類
+        
+        Args:
+            question_texts: 設問テキストのリスト
+            
+        Returns:
+            設問タイプのリスト（入力と同じ順序）
+        """
+        return [self._classify_question_type(text) for text in question_texts]
+        
     def _classify_question_type(self, question_text: str) -> str:
         """
         設問タイプを分類
@@ -319,33 +349,10 @@ class TextAnalyzer:
         Returns:
             設問タイプ
         """
-        # 漢字・語句問題のチェック
-        if any(pattern.search(question_text) for pattern in self.compiled_patterns.get('漢字・語句', [])):
-            return '漢字・語句'
-        
-        # 丸数字で慣用句・語句問題の場合
-        if re.search(r'^[①②③④⑤⑥⑦⑧⑨⑩]', question_text[:10]) and \
-           re.search(r'慣用句|ことわざ|語句|漢字|語群|に入る', question_text):
-            return '漢字・語句'
-            
-        # 選択肢の存在をチェック（記号選択）
-        if re.search(r'[ア-ン]\s*[\.。、]', question_text) or \
-           re.search(r'[A-H]\s*[\.。、]', question_text) or \
-           any(pattern.search(question_text) for pattern in self.compiled_patterns.get('記号選択', [])):
-            return '記号選択'
-            
-        # 抜き出し問題のチェック
-        if any(pattern.search(question_text) for pattern in self.compiled_patterns.get('抜き出し', [])):
-            return '抜き出し'
-            
-        # 脱文挿入のチェック
-        if any(pattern.search(question_text) for pattern in self.compiled_patterns.get('脱文挿入', [])):
-            return '脱文挿入'
-            
-        # 記述問題の判定（より広範なパターン）
-        # 文字数指定がある場合
-        if re.search(r'\d+字', question_text):
-            return '記述'
+        # パターン表による判定（漢字・語句 → 記号選択 → 抜き出し → 脱文挿入 → 字数指定）
+        q_type = self.type_classifier.classify(question_text)
+        if q_type is not None:
+            return q_type
             
         # 記述を示唆するキーワード
         description_keywords = [
@@ -3,16 +3,40 @@
 すべての学校に対応する統一された分析ロジック
 """
 import re
+from dataclasses import dataclass, field
 from typing import Dict, Any, List, Optional, Tuple
 from models import AnalysisResult, Section, ExamSource as Source
 from config.settings import Settings
 from modules.improved_question_analyzer import ImprovedQuestionAnalyzer, QuestionAnalysis
 from modules.section_splitter_v2 import ImprovedSectionSplitter
+from utils.numeral_utils import parse_numeral, numeral_to_str
+from utils.batch_telemetry import timed_stage, STAGE_SPLIT, STAGE_SOURCES, STAGE_QUESTIONS
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class SectionAnalysis:
+    """セクション1つ分の分析結果（テキストが同じなら再利用できる）"""
+    source: Optional[Source] = None
+    genre: Optional[str] = None
+    theme: Optional[str] = None
+    question_details: Dict[str, Any] = field(default_factory=dict)
+    choice_type_details: Optional[Dict[str, List[str]]] = None
+    summary: Optional[Tuple[QuestionAnalysis, QuestionAnalysis]] = None  # 全体統合用
+    
+    def apply_to(self, section: Section) -> None:
+        """分析結果をセクションの属性として設定"""
+        if self.source:
+            section.source = self.source
+            section.genre = self.genre
+            section.theme = self.theme
+        section.question_details = self.question_details
+        if self.choice_type_details:
+            section.choice_type_details = self.choice_type_details
+
+
 class UniversalAnalyzer:
     """すべての学校に対応する汎用分析クラス"""
     
@@ -50,55 +74,97 @@ class UniversalAnalyzer:
         # 基本分析
         sections = self._analyze_sections(text)
         
-        # 各セクションから出典を抽出して直接関連付け
-        for i, section in enumerate(sections):
-            section_text = section.text if hasattr(section, 'text') else section.content
+        # セクションごとの分析
+        records = [self.analyze_section(section) for section in sections]
+        
+        return self.build_result(text, school_name, year, sections, records)
+    
+    def analyze_section(self, section: Section) -> SectionAnalysis:
+        """
+        セクション1つ分の出典・ジャンル・テーマ・設問を分析
+        
+        結果はセクションのテキスト・タイトル・タイプだけで決まる。
+        
+        Args:
+            section: セクション
             
-            # セクション内から出典を抽出
+        Returns:
+            セクションの分析結果
+        """
+        section_text = section.text if hasattr(section, 'text') else section.content
+        record = SectionAnalysis()
+        
+        # セクション内から出典を抽出
+        with timed_stage(STAGE_SOURCES):
             section_sources = self._extract_sources_from_text(section_text)
-            if section_sources:
-                # 最初の出典をセクションに直接設定
-                section.source = section_sources[0]
-                # ジャンルとテーマも個別に検出
-                section.genre = self._detect_genre(section_text)
-                section.theme = self._detect_theme(section_text)
-            
-            # セクションごとの設問分析
+        if section_sources:
+            # 最初の出典をセクションに直接設定
+            record.source = section_sources[0]
+            # ジャンルとテーマも個別に検出
+            record.genre = self._detect_genre(section_text)
+            record.theme = self._detect_theme(section_text)
+        
+        # セクションごとの設問分析
+        with timed_stage(STAGE_QUESTIONS):
             section_analysis = self.improved_analyzer.analyze_questions(
                 section_text, 
                 section_type=section.section_type if hasattr(section, 'section_type') else None
             )
-            
-            # セクションに詳細な設問分析を追加
-            section.question_details = {
-                '選択': {
-                    'count': section_analysis.type_counts.get('選択', 0),
-                    'details': section_analysis.choice_counts
-                },
-                '記述': {
-                    'count': section_analysis.type_counts.get('記述', 0),
-                    'with_limit': section_analysis.has_word_limit,
-                    'without_limit': section_analysis.no_word_limit,
-                    'word_limit_details': section_analysis.word_limit_details
-                },
-                '抜き出し': {
-                    'count': section_analysis.type_counts.get('抜き出し', 0),
-                    'details': section_analysis.extract_details
-                },
-                '漢字': {
-                    'count': section_analysis.type_counts.get('漢字', 0)
-                },
-                '語句': {
-                    'count': section_analysis.type_counts.get('語句', 0)
-                }
+        
+        # セクションに詳細な設問分析を追加
+        record.question_details = {
+            '選択': {
+                'count': section_analysis.type_counts.get('選択', 0),
+                'details': section_analysis.choice_counts
+            },
+            '記述': {
+                'count': section_analysis.type_counts.get('記述', 0),
+                'with_limit': section_analysis.has_word_limit,
+                'without_limit': section_analysis.no_word_limit,
+                'word_limit_details': section_analysis.word_limit_details
+            },
+            '抜き出し': {
+                'count': section_analysis.type_counts.get('抜き出し', 0),
+                'details': section_analysis.extract_details
+            },
+            '漢字': {
+                'count': section_analysis.type_counts.get('漢字', 0)
+            },
+            '語句': {
+                'count': section_analysis.type_counts.get('語句', 0)
             }
+        }
+        
+        # 選択肢の詳細を設定
+        record.choice_type_details = section_analysis.choice_type_details
+        
+        # 全体統合用の分析
+        record.summary = self.improved_analyzer.summarize_section(section)
+        
+        return record
+    
+    def build_result(self, text: str, school_name: str, year: str,
+                     sections: List[Section], records: List[SectionAnalysis]) -> AnalysisResult:
+        """
+        セクションごとの分析結果から全体の分析結果を組み立て
+        
+        Args:
+            text: 分析対象のテキスト
+            school_name: 学校名
+            year: 年度
+            sections: セクションのリスト
+            records: 各セクションの分析結果（sectionsと同じ順序）
             
-            # 選択肢の詳細を設定
-            if section_analysis.choice_type_details:
-                section.choice_type_details = section_analysis.choice_type_details
+        Returns:
+            分析結果
+        """
+        for section, record in zip(sections, records):
+            record.apply_to(section)
         
-        # 全体の統合分析も実行
-        detailed_analysis = self.improved_analyzer.analyze_sections_with_questions(sections, text)
+        # 全体の統合分析（セクションごとの分析結果を統合）
+        detailed_analysis = self.improved_analyzer.combine_section_summaries(
+            [record.summary for record in records]
+        )
         
         # 設問タイプを詳細分析から取得
         question_types = detailed_analysis.type_counts
@@ -166,7 +232,8 @@ class UniversalAnalyzer:
         """セクション（大問）を分析 - 改善版"""
         
         # 新しい改良版セクション分割を使用
-        sections = self.section_splitter.split_sections(text)
+        with timed_stage(STAGE_SPLIT):
+            sections = self.section_splitter.split_sections(text)
         
         # セクションが見つからない場合のフォールバック
         if not sections:
@@ -280,17 +347,7 @@ class UniversalAnalyzer:
     
     def _convert_to_arabic(self, num_str: str) -> str:
         """漢数字やその他の数字を算用数字に変換"""
-        kanji_map = {
-            '一': '1', '二': '2', '三': '3', '四': '4', '五': '5',
-            '六': '6', '七': '7', '八': '8', '九': '9', '十': '10'
-        }
-        
-        # 全角数字を半角に
-        if '１' <= num_str[0] <= '９':
-            return str(ord(num_str[0]) - ord('１') + 1)
-        
-        # 漢数字を変換
-        return kanji_map.get(num_str, num_str)
+        return numeral_to_str(num_str, default=num_str)
     
     def _detect_sections_by_question_reset(self, text: str) -> List[Section]:
         """設問番号のリセットを検出して大問を区切る"""
@@ -375,33 +432,7 @@ class UniversalAnalyzer:
     
     def _convert_to_number(self, num_str: str) -> int:
         """漢数字や丸数字を数値に変換"""
-        # 漢数字
-        kanji_to_num = {
-            '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
-            '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
-            '十一': 11, '十二': 12, '十三': 13, '十四': 14, '十五': 15
-        }
-        
-        # 丸数字
-        circle_to_num = {
-            '①': 1, '②': 2, '③': 3, '④': 4, '⑤': 5,
-            '⑥': 6, '⑦': 7, '⑧': 8, '⑨': 9, '⑩': 10,
-            '⑪': 11, '⑫': 12, '⑬': 13, '⑭': 14, '⑮': 15
-        }
-        
-        # 全角数字を半角に変換
-        if '０' <= num_str[0] <= '９':
-            num_str = ''.join(str(ord(c) - ord('０')) for c in num_str)
-        
-        # 変換
-        if num_str in kanji_to_num:
-            return kanji_to_num[num_str]
-        elif num_str in circle_to_num:
-            return circle_to_num[num_str]
-        elif num_str.isdigit():
-            return int(num_str)
-        else:
-            return 0
+        return parse_numeral(num_str) or 0
     
     def _determine_section_type(self, text: str) -> str:
         """セクションタイプを判定"""
@@ -499,12 +530,7 @@ class UniversalAnalyzer:
                         max_question_num = max(max_question_num, max(nums))
                 elif pattern_type == 'kanji':
                     # 漢数字の場合は変換して最大値を取る
-                    kanji_to_num = {
-                        '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
-                        '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
-                        '十一': 11, '十二': 12, '十三': 13, '十四': 14, '十五': 15
-                    }
-                    nums = [kanji_to_num.get(m, 0) for m in matches]
+                    nums = [parse_numeral(m) or 0 for m in matches]
                     if nums:
                         max_question_num = max(max_question_num, max(nums))
                 elif pattern_type == 'circle':
@@ -0,0 +1,194 @@
+"""
+ワークブック走査モジュール
+openpyxlの読み取り専用モードで行を順に読み、DataFrameを作らずに
+検証・集計を1回の走査で行う（メモリ使用量はシートの大きさによらず一定）
+"""
+import math
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 検証で必須とする列
+REQUIRED_COLUMNS = ('年度', '総設問数', '総文字数', '大問数')
+
+
+def _to_year(value: Any) -> Optional[int]:
+    """年度の値を整数に変換（変換できない場合はNone）"""
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(number) or number != int(number):
+        return None
+    return int(number)
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """数値列の値を変換（空欄・数値でない値はNone）"""
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+@dataclass
+class SheetAggregate:
+    """1シート分の走査結果"""
+    name: str
+    columns: List[str]
+    records: int = 0
+    oldest: Optional[int] = None
+    newest: Optional[int] = None
+    invalid_years: int = 0
+    _sums: Dict[str, float] = field(default_factory=dict)
+    _counts: Dict[str, int] = field(default_factory=dict)
+
+    def add_row(self, row: Dict[str, Any]) -> None:
+        """
+        1行を集計に加える
+
+        Args:
+            row: 列名 → 値の辞書
+        """
+        self.records += 1
+        if '年度' in self.columns:
+            year = _to_year(row.get('年度'))
+            if year is None:
+                self.invalid_years += 1
+            else:
+                self.oldest = year if self.oldest is None else min(self.oldest, year)
+                self.newest = year if self.newest is None else max(self.newest, year)
+
+        for column in ('総文字数', '総設問数'):
+            number = _to_number(row.get(column))
+            if number is not None:
+                self._sums[column] = self._sums.get(column, 0.0) + number
+                self._counts[column] = self._counts.get(column, 0) + 1
+
+    def mean(self, column: str) -> float:
+        """列の平均（列がない場合は0、値がない場合はNaN）"""
+        if column not in self.columns:
+            return 0
+        count = self._counts.get(column, 0)
+        return self._sums[column] / count if count else float('nan')
+
+    def missing_columns(self, required=REQUIRED_COLUMNS) -> List[str]:
+        """不足している必須列"""
+        return [column for column in required if column not in self.columns]
+
+    def summary_row(self) -> Optional[Dict[str, Any]]:
+        """サマリーレポートの1行（データがない・年度列がない場合はNone）"""
+        if not self.records or '年度' not in self.columns:
+            return None
+        return {
+            '学校名': self.name,
+            'データ年数': self.records,
+            '最古年度': self.oldest,
+            '最新年度': self.newest,
+            '平均文字数': self.mean('総文字数'),
+            '平均設問数': self.mean('総設問数'),
+        }
+
+
+@dataclass
+class WorkbookScan:
+    """ワークブック全体の走査結果"""
+    path: Path
+    sheets: List[SheetAggregate] = field(default_factory=list)
+
+    @property
+    def total_records(self) -> int:
+        """全シートの行数"""
+        return sum(sheet.records for sheet in self.sheets)
+
+    def sheet(self, name: str) -> Optional[SheetAggregate]:
+        """シート名で走査結果を取得"""
+        return next((sheet for sheet in self.sheets if sheet.name == name), None)
+
+    def to_validation_result(self) -> Dict[str, Any]:
+        """
+        検証結果の辞書に変換（ExcelManager.validate_database と同じ形式）
+
+        Returns:
+            is_valid・errors・warnings・info を持つ辞書
+        """
+        result = {
+            'is_valid': True,
+            'errors': [],
+            'warnings': [],
+            'info': {'school_count': len(self.sheets), 'total_records': self.total_records}
+        }
+        for sheet in self.sheets:
+            missing_columns = sheet.missing_columns()
+            if missing_columns:
+                result['warnings'].append(f"{sheet.name}: 必須列が不足 {missing_columns}")
+            if sheet.invalid_years:
+                result['errors'].append(f"{sheet.name}: 年度列に無効なデータが含まれています")
+                result['is_valid'] = False
+        return result
+
+    def summary_rows(self) -> List[Dict[str, Any]]:
+        """サマリーレポートの行（ExcelManager.export_summary_report と同じ列）"""
+        return [row for row in (sheet.summary_row() for sheet in self.sheets) if row]
+
+
+def iter_workbook_rows(path: Path) -> Iterator[Tuple[str, List[str], Iterator[Dict[str, Any]]]]:
+    """
+    ワークブックのシートを順に読み取り専用で開き、行を辞書として返す
+
+    見出しが空の列（index=Trueで書き出したインデックス列など）と、すべて空欄の行は除く。
+    各シートの行イテレータは次のシートに進む前に読み切ること。
+
+    Args:
+        path: Excelファイルのパス
+
+    Yields:
+        (シート名, 列名のリスト, 行の辞書のイテレータ)
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            positions = [(i, str(name)) for i, name in enumerate(header) if name not in (None, '')]
+            columns = [name for _, name in positions]
+
+            def sheet_rows(rows=rows, positions=positions):
+                for values in rows:
+                    row = {name: values[i] if i < len(values) else None for i, name in positions}
+                    if any(value is not None for value in row.values()):
+                        yield row
+
+            yield worksheet.title, columns, sheet_rows()
+    finally:
+        workbook.close()
+
+
+def scan_workbook(path: Path) -> WorkbookScan:
+    """
+    ワークブックを1回走査して検証・集計に必要な値を求める
+
+    Args:
+        path: Excelファイルのパス
+
+    Returns:
+        走査結果
+    """
+    scan = WorkbookScan(path=Path(path))
+    for name, columns, rows in iter_workbook_rows(path):
+        aggregate = SheetAggregate(name=name, columns=columns)
+        for row in rows:
+            aggregate.add_row(row)
+        scan.sheets.append(aggregate)
+    logger.debug(f"Scanned {path}: {len(scan.sheets)} sheets, {scan.total_records} rows")
+    return scan
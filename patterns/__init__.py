@@ -8,11 +8,13 @@ from .year_patterns import YEAR_PATTERNS
 from .section_patterns import SECTION_PATTERNS
 from .source_patterns import SOURCE_PATTERNS
 from .question_patterns import QUESTION_PATTERNS
+from .question_classifier import QuestionTypeClassifier
 
 __all__ = [
     'PatternRegistry',
     'YEAR_PATTERNS',
     'SECTION_PATTERNS', 
     'SOURCE_PATTERNS',
-    'QUESTION_PATTERNS'
+    'QUESTION_PATTERNS',
+    'QuestionTypeClassifier'
 ]
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+設問タイプ分類器 - パターン表を1本の正規表現にまとめて1回の走査で分類する
+"""
+import re
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# インラインフラグに変換できるフラグ
+_INLINE_FLAGS = (
+    (re.IGNORECASE, 'i'),
+    (re.MULTILINE, 'm'),
+    (re.DOTALL, 's'),
+    (re.VERBOSE, 'x'),
+)
+
+# 結合すると意味が変わるパターン（番号・名前による後方参照）
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+# 分類ルール: (タイプ名, パターンのリスト, フラグ)
+Rule = Tuple[str, Sequence[str], int]
+
+
+def _scoped(pattern: str, flags: int) -> str:
+    """パターンをフラグ付きの非キャプチャグループで囲む"""
+    letters = ''.join(letter for flag, letter in _INLINE_FLAGS if flags & flag)
+    return f'(?{letters}:{pattern})'
+
+
+class QuestionTypeClassifier:
+    """
+    設問タイプの分類器
+
+    ルールを優先順に並べ、各ルールを名前付きグループの選択肢として1本の先読み
+    （幅0）の正規表現に結合し、テキストを先頭から1回だけ走査する。各位置では選択肢が
+    左から順に試されるので、その位置から始まる最優先のルールが見つかる。全位置のうち
+    最も優先順の高いルールのタイプが、従来の「優先順にパターンを1つずつ search する」
+    方式と同じ結果になる（最優先のルールが見つかった時点で走査を打ち切る）。
+    """
+
+    def __init__(self, rules: Iterable[Rule], default: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            rules: (タイプ名, パターンのリスト, フラグ) のリスト（優先順）
+            default: どのルールにも該当しない場合のタイプ
+        """
+        self.rules: List[Rule] = [(q_type, list(patterns), flags)
+                                  for q_type, patterns, flags in rules if patterns]
+        self.default = default
+        self._group_types: Dict[str, str] = {}
+        self._group_ranks: Dict[str, int] = {}
+        self._combined: Optional[re.Pattern] = None
+        self._sequential: List[Tuple[str, List[re.Pattern]]] = []
+        self._compile()
+
+    @classmethod
+    def from_pattern_table(
+        cls,
+        table: Dict[str, List[str]],
+        flags: int = 0,
+        default: Optional[str] = None,
+        order: Optional[Sequence[str]] = None
+    ) -> 'QuestionTypeClassifier':
+        """
+        タイプ名→パターンリストの辞書から分類器を作成
+
+        Args:
+            table: パターン表（Settings.QUESTION_PATTERNS など）
+            flags: 全パターンに適用する正規表現フラグ
+            default: どのタイプにも該当しない場合のタイプ
+            order: 優先順（省略時は辞書の順序）
+        """
+        types = order if order is not None else list(table.keys())
+        return cls([(q_type, table.get(q_type, []), flags) for q_type in types], default)
+
+    def _compile(self):
+        """ルールを1本の正規表現に結合（結合できない場合は逐次照合に切り替え）"""
+        alternatives = []
+        for index, (q_type, patterns, flags) in enumerate(self.rules):
+            group = f'_r{index}'
+            self._group_types[group] = q_type
+            self._group_ranks[group] = index
+            body = '|'.join(_scoped(p, flags) for p in patterns)
+            alternatives.append(rf'(?:{body})(?P<{group}>)')
+
+        if any(_BACKREFERENCE.search(p) for _, patterns, _ in self.rules for p in patterns):
+            self._compile_sequential()
+            return
+
+        try:
+            self._combined = re.compile('(?=' + '|'.join(alternatives) + ')') if alternatives else None
+        except re.error as e:
+            logger.debug(f"Falling back to sequential question classification: {e}")
+            self._compile_sequential()
+
+    def _compile_sequential(self):
+        """ルールごとの逐次照合用にコンパイル"""
+        self._combined = None
+        self._sequential = [
+            (q_type, [re.compile(p, flags) for p in patterns])
+            for q_type, patterns, flags in self.rules
+        ]
+
+    def classify(self, text: str) -> Optional[str]:
+        """
+        設問テキストを分類
+
+        Args:
+            text: 設問のテキスト
+
+        Returns:
+            最優先で該当したタイプ、該当なしの場合はdefault
+        """
+        if self._combined is not None:
+            best = None
+            for match in self._combined.finditer(text):
+                group = match.lastgroup
+                if best is None or self._group_ranks[group] < self._group_ranks[best]:
+                    best = group
+                    if self._group_ranks[group] == 0:
+                        break
+            return self._group_types[best] if best is not None else self.default
+
+        for q_type, compiled in self._sequential:
+            if any(pattern.search(text) for pattern in compiled):
+                return q_type
+        return self.default
+
+    def classify_all(self, texts: Iterable[str]) -> List[Optional[str]]:
+        """
+        文書内の全設問をまとめて分類
+
+        Args:
+            texts: 設問テキストのリスト
+
+        Returns:
+            各設問のタイプ（入力と同じ順序）
+        """
+        classify = self.classify
+        return [classify(text) for text in texts]
+
+    def count_types(self, texts: Iterable[str]) -> Dict[str, int]:
+        """
+        全設問を分類してタイプ別の件数を集計
+
+        Args:
+            texts: 設問テキストのリスト
+
+        Returns:
+            タイプ別の設問数
+        """
+        counts: Dict[str, int] = {}
+        for q_type in self.classify_all(texts):
+            if q_type is not None:
+                counts[q_type] = counts.get(q_type, 0) + 1
+        return counts
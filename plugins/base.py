@@ -8,6 +8,8 @@ import re
 
 from models import AnalysisResult, Question, Section, ExamSource
 from config.settings import Settings
+from patterns.question_classifier import QuestionTypeClassifier
+from utils.question_features import extract_question_features
 
 
 @dataclass
@@ -60,6 +62,11 @@ class SchoolAnalyzerPlugin(ABC):
                 re.compile(p, re.MULTILINE | re.DOTALL) for p in patterns
             ]
         
+        # 設問タイプの分類器（パターン表の順序が優先順）
+        self.question_classifier = QuestionTypeClassifier.from_pattern_table(
+            self.get_question_patterns(), flags=re.MULTILINE | re.DOTALL
+        )
+        
         # 出典パターンをコンパイル
         self.source_patterns_compiled = [
             re.compile(p, re.MULTILINE) for p in self.get_source_patterns()
@@ -261,22 +268,35 @@ class SchoolAnalyzerPlugin(ABC):
         except Exception:
             return None
     
+    def classify_questions(self, texts: List[str]) -> List[Optional[str]]:
+        """
+        設問テキストをまとめて分類
+        
+        Args:
+            texts: 設問テキストのリスト
+        
+        Returns:
+            各設問のタイプ（該当なしはNone）
+        """
+        return self.question_classifier.classify_all(texts)
+    
     def aggregate_question_types(self, questions: List[Question]) -> Dict[str, int]:
         """
         設問タイプを集計
         
         Args:
-            questions: 設問のリスト
+            questions: 設問のリスト（タイプは detect_questions で一致したパターンのもの、変更しない）
         
         Returns:
-            タイプ別の設問数
+            タイプ別の設問数（タイプ未設定の設問は「その他」）
         """
         type_counts = {}
         
         for question in questions:
-            if question.type not in type_counts:
-                type_counts[question.type] = 0
-            type_counts[question.type] += 1
+            q_type = question.type or 'その他'
+            if q_type not in type_counts:
+                type_counts[q_type] = 0
+            type_counts[q_type] += 1
         
         # デフォルトタイプを0で初期化
         for q_type in ['記述', '選択', '漢字・語句', '抜き出し']:
@@ -346,42 +366,14 @@ class SchoolAnalyzerPlugin(ABC):
     
     def _extract_character_limit(self, text: str) -> Optional[Tuple[int, int]]:
         """設問から文字数制限を抽出"""
-        patterns = [
-            r'(\d+)字以上(\d+)字以内',
-            r'(\d+)〜(\d+)字',
-            r'(\d+)字以内',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                groups = match.groups()
-                if len(groups) == 2:
-                    return (int(groups[0]), int(groups[1]))
-                elif len(groups) == 1:
-                    limit = int(groups[0])
-                    return (0, limit)
-        
-        return None
+        limit = extract_question_features(text).preferred_limit('範囲', '以内')
+        if limit is None:
+            return None
+        return (limit.min, limit.max)
     
     def _extract_choice_count(self, text: str) -> Optional[int]:
         """設問から選択肢数を抽出"""
-        # ア〜オ形式
-        katakana_choices = re.findall(r'[ア-オ]', text)
-        if katakana_choices:
-            return len(set(katakana_choices))
-        
-        # A〜E形式
-        alpha_choices = re.findall(r'[A-E]', text)
-        if alpha_choices:
-            return len(set(alpha_choices))
-        
-        # 1〜5形式
-        num_choices = re.findall(r'[1-5]', text)
-        if len(num_choices) >= 3:
-            return len(set(num_choices))
-        
-        return None
+        return extract_question_features(text).choice_count
     
     def supports_school(self, school_name: str) -> bool:
         """
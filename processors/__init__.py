@@ -5,8 +5,15 @@
 
 from .text_preprocessor import TextPreprocessor
 from .file_manager import FileManager
+from .analysis_cache import AnalysisCache, build_analyzer_fingerprint
+from .batch_journal import BatchJournal
+from .work_queue import WorkQueue
 
 __all__ = [
     'TextPreprocessor',
-    'FileManager'
+    'FileManager',
+    'AnalysisCache',
+    'build_analyzer_fingerprint',
+    'BatchJournal',
+    'WorkQueue'
 ]
\ No newline at end of file
@@ -0,0 +1,289 @@
+"""
+分析結果キャッシュモジュール
+AnalysisResultをディスクに保存し、同じテキストの再分析を省略する
+"""
+import os
+import sys
+import json
+import pickle
+import hashlib
+import inspect
+import logging
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from models import AnalysisResult
+from utils.file_utils import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+# キャッシュファイル形式のバージョン（フィンガープリントに含めるので、上げると既存のエントリはすべて使われなくなる）
+CACHE_FORMAT_VERSION = 1
+
+# 分析結果に影響するモジュール（分析器の構成要素に加えてフィンガープリントに含める）
+FINGERPRINT_MODULES = (
+    'models',
+    'config.settings',
+    'modules.universal_analyzer',
+    'modules.incremental_analyzer',
+    'modules.improved_question_analyzer',
+    'modules.section_splitter_v2',
+    'modules.section_marker_scanner',
+    'utils.numeral_utils',
+    'utils.question_features',
+)
+
+
+def normalize_for_hash(text: str) -> str:
+    """
+    キャッシュキー用にテキストを正規化
+
+    改行コード・行末の空白・Unicodeの表記ゆれだけを吸収し、
+    分析結果が変わりうる差分（語句や行の並び）は区別する。
+
+    Args:
+        text: 分析対象のテキスト
+
+    Returns:
+        正規化したテキスト
+    """
+    text = unicodedata.normalize('NFC', text.replace('\r\n', '\n').replace('\r', '\n'))
+    return '\n'.join(line.rstrip() for line in text.strip().split('\n'))
+
+
+def _module_source_digest(module_name: str) -> str:
+    """モジュールのソースファイルのハッシュ（取得できない場合はモジュール名のみ）"""
+    module = sys.modules.get(module_name)
+    if module is None:
+        try:
+            module = __import__(module_name, fromlist=['_'])
+        except ImportError:
+            return module_name
+    try:
+        source_file = inspect.getsourcefile(module)
+        with open(source_file, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except (TypeError, OSError):
+        return getattr(module, '__version__', module_name)
+
+
+def build_analyzer_fingerprint(analyzer: Any,
+                               plugin: Optional[Any] = None,
+                               pattern_sets: Optional[Iterable[Any]] = None) -> str:
+    """
+    分析器のバージョンを表すフィンガープリントを作成
+
+    分析器とその構成要素（設問分析器・セクション分割器など）のソース、
+    使用するプラグインの名前とバージョン、パターン定義をまとめてハッシュ化する。
+    いずれかが変われば別のキーになるため、古い結果が使われることはない。
+
+    Args:
+        analyzer: 分析器（UniversalAnalyzerなど）
+        plugin: 使用するプラグイン（PluginInfoを持つオブジェクト、またはプラグイン名）
+        pattern_sets: パターン定義（辞書やリスト）
+
+    Returns:
+        フィンガープリント（16進文字列）
+    """
+    module_names = set(FINGERPRINT_MODULES)
+    module_names.add(type(analyzer).__module__)
+    for component in vars(analyzer).values():
+        module_name = type(component).__module__
+        if module_name.split('.')[0] in ('modules', 'utils', 'patterns', 'plugins', 'processors'):
+            module_names.add(module_name)
+
+    digest = hashlib.sha256()
+    digest.update(f'format:{CACHE_FORMAT_VERSION}\n'.encode())
+    for module_name in sorted(module_names):
+        digest.update(f'{module_name}:{_module_source_digest(module_name)}\n'.encode())
+
+    if plugin is not None:
+        info = getattr(plugin, 'info', None)
+        if info is not None:
+            digest.update(f'plugin:{info.name}:{info.version}\n'.encode())
+            digest.update(f'plugin_module:{_module_source_digest(type(plugin).__module__)}\n'.encode())
+        else:
+            digest.update(f'plugin:{plugin}\n'.encode())
+
+    for patterns in pattern_sets or ():
+        digest.update(json.dumps(patterns, ensure_ascii=False, sort_keys=True, default=str).encode())
+
+    return digest.hexdigest()[:32]
+
+
+class AnalysisCache:
+    """
+    分析結果のディスクキャッシュ
+    正規化テキストのハッシュ・学校名・年度・分析器のフィンガープリントをキーとし、
+    合計サイズが上限を超えたら最近使われていないエントリから削除する
+    """
+
+    FILE_SUFFIX = '.pkl'
+
+    def __init__(self, cache_dir: Path, fingerprint: str, max_size_mb: float = 200):
+        """
+        初期化
+
+        Args:
+            cache_dir: キャッシュディレクトリ
+            fingerprint: 分析器のフィンガープリント
+            max_size_mb: キャッシュの最大サイズ（MB）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.fingerprint = fingerprint
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self._total_bytes: Optional[int] = None  # 初回の書き込み時に集計し、以降は差分で更新
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+
+    def make_key(self, text: str, school_name: str, year: str) -> str:
+        """
+        キャッシュキーを作成
+
+        Args:
+            text: 分析対象のテキスト
+            school_name: 学校名
+            year: 年度
+
+        Returns:
+            キャッシュキー
+        """
+        text_hash = hashlib.sha256(normalize_for_hash(text).encode('utf-8')).hexdigest()
+        material = '\0'.join((text_hash, school_name, str(year), self.fingerprint))
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        """エントリのファイルパス"""
+        return self.cache_dir / f'{key}{self.FILE_SUFFIX}'
+
+    def get(self, text: str, school_name: str, year: str) -> Optional[AnalysisResult]:
+        """
+        キャッシュから分析結果を取得
+
+        Args:
+            text: 分析対象のテキスト
+            school_name: 学校名
+            year: 年度
+
+        Returns:
+            キャッシュされた分析結果、ない場合はNone
+        """
+        path = self._entry_path(self.make_key(text, school_name, year))
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            self._stats['misses'] += 1
+            return None
+        except Exception as e:
+            # 壊れたエントリは削除して再分析させる
+            logger.warning(f"Discarding unreadable analysis cache entry {path.name}: {e}")
+            self._stats['errors'] += 1
+            self._stats['misses'] += 1
+            self._remove(path)
+            return None
+
+        # 最終使用時刻を更新（削除順の判定に使用）
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._stats['hits'] += 1
+        return result
+
+    def put(self, text: str, school_name: str, year: str, result: AnalysisResult) -> bool:
+        """
+        分析結果をキャッシュに保存
+
+        Args:
+            text: 分析対象のテキスト
+            school_name: 学校名
+            year: 年度
+            result: 分析結果
+
+        Returns:
+            保存できた場合True
+        """
+        path = self._entry_path(self.make_key(text, school_name, year))
+        try:
+            if self._total_bytes is None:
+                self._total_bytes = sum(stat.st_size for _, stat in self._entries())
+            try:
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = 0
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            atomic_write_bytes(path, data)
+            size = len(data)
+        except Exception as e:
+            logger.warning(f"Failed to write analysis cache entry: {e}")
+            self._stats['errors'] += 1
+            return False
+
+        self._stats['writes'] += 1
+        self._total_bytes += size - replaced
+        if self._total_bytes > self.max_size_bytes:
+            self._evict_if_needed()
+        return True
+
+    def _entries(self):
+        """エントリの (パス, stat) のリスト"""
+        entries = []
+        for path in self.cache_dir.glob(f'*{self.FILE_SUFFIX}'):
+            try:
+                entries.append((path, path.stat()))
+            except OSError:
+                continue
+        return entries
+
+    def _evict_if_needed(self) -> None:
+        """合計サイズが上限を超えていれば、最終使用が古い順に削除（他のプロセスの書き込みも含めて集計し直す）"""
+        entries = self._entries()
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in sorted(entries, key=lambda e: e[1].st_mtime):
+            if total <= self.max_size_bytes:
+                break
+            if self._remove(path):
+                total -= stat.st_size
+                self._stats['evictions'] += 1
+        self._total_bytes = total
+
+    def _remove(self, path: Path) -> bool:
+        """ファイルを削除"""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return False
+        if self._total_bytes is not None and path.suffix == self.FILE_SUFFIX:
+            self._total_bytes -= size
+        return True
+
+    def clear(self) -> int:
+        """
+        すべてのエントリを削除
+
+        Returns:
+            削除したエントリ数
+        """
+        removed = sum(1 for path, _ in self._entries() if self._remove(path))
+        logger.info(f"Analysis cache cleared ({removed} entries)")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        キャッシュ統計を取得
+
+        Returns:
+            ヒット数・ミス数・ヒット率・エントリ数・サイズなどの辞書
+        """
+        entries = self._entries()
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            **self._stats,
+            'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+            'entries': len(entries),
+            'size_mb': sum(stat.st_size for _, stat in entries) / (1024 * 1024),
+            'max_size_mb': self.max_size_bytes / (1024 * 1024),
+        }
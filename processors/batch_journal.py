@@ -0,0 +1,143 @@
+"""
+バッチ分析ジャーナルモジュール
+処理したファイルの内容ハッシュ・分析器のバージョン・結果を追記型のJSONLに記録し、
+中断したバッチ分析を途中から再開できるようにする
+"""
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.file_utils import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# ジャーナル形式のバージョン（一致しない記録は読み飛ばし、そのファイルは分析し直す）
+JOURNAL_FORMAT_VERSION = 1
+
+# 処理結果の状態
+JOURNAL_DONE = 'done'      # 分析・保存まで完了
+JOURNAL_FAILED = 'failed'  # 失敗（次回も再試行する）
+
+# 完了記録があるため分析しなかったファイルの状態（バッチ分析のサマリー用）
+STATUS_SKIPPED = 'skipped'
+
+
+class BatchJournal:
+    """
+    バッチ分析の完了記録
+
+    1件処理するたびに1行を追記するため、途中で異常終了しても
+    それまでの記録は残る。同じファイルの記録は後の行が優先される。
+    ファイルパス・内容ハッシュ・分析器のフィンガープリント・保存先がすべて
+    一致する完了記録があるファイルだけを処理済みとみなす。
+    """
+
+    def __init__(self, journal_path: Path, analyzer_fingerprint: str, target: str = ''):
+        """
+        初期化
+
+        Args:
+            journal_path: ジャーナルファイルのパス
+            analyzer_fingerprint: 分析器のフィンガープリント（変われば全件を再分析）
+            target: 保存先（Excelファイルなど、変われば全件を再分析）
+        """
+        self.journal_path = Path(journal_path)
+        self.analyzer_fingerprint = analyzer_fingerprint
+        self.target = str(target)
+        self._entries: Dict[str, dict] = {}
+        self._line_count = 0
+        self._load()
+
+    def _load(self) -> None:
+        """ジャーナルを読み込み（壊れた行は無視する）"""
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._line_count += 1
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # 書き込み途中で終了した最後の行など
+                    if isinstance(entry, dict) and entry.get('version') == JOURNAL_FORMAT_VERSION:
+                        self._entries[entry.get('path')] = entry
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Ignoring unreadable batch journal {self.journal_path}: {e}")
+
+        # 同じファイルの古い記録が多くなったら詰め直す
+        if self._line_count > 2 * len(self._entries) + 100:
+            self.compact()
+
+    def _key(self, file_path: Path) -> str:
+        """記録のキー（絶対パス）"""
+        return str(Path(file_path).absolute())
+
+    def status(self, file_path: Path, content_hash: Optional[str]) -> Optional[str]:
+        """
+        現在の内容・分析器・保存先での処理結果
+
+        Args:
+            file_path: ファイルパス
+            content_hash: ファイル内容のハッシュ
+
+        Returns:
+            JOURNAL_DONE / JOURNAL_FAILED、記録がない（内容などが変わった）場合はNone
+        """
+        entry = self._entries.get(self._key(file_path))
+        if entry is None or content_hash is None:
+            return None
+        if (entry.get('sha256'), entry.get('analyzer'), entry.get('target')) != \
+                (content_hash, self.analyzer_fingerprint, self.target):
+            return None
+        return entry.get('status')
+
+    def is_done(self, file_path: Path, content_hash: Optional[str]) -> bool:
+        """分析・保存まで完了しているか"""
+        return self.status(file_path, content_hash) == JOURNAL_DONE
+
+    def record(self, file_path: Path, content_hash: Optional[str], status: str,
+               results: int = 0, error: Optional[str] = None) -> None:
+        """
+        処理結果を追記
+
+        Args:
+            file_path: ファイルパス
+            content_hash: ファイル内容のハッシュ
+            status: JOURNAL_DONE / JOURNAL_FAILED
+            results: 保存した分析結果の数
+            error: 失敗した理由
+        """
+        entry = {
+            'version': JOURNAL_FORMAT_VERSION,
+            'path': self._key(file_path),
+            'sha256': content_hash,
+            'analyzer': self.analyzer_fingerprint,
+            'target': self.target,
+            'status': status,
+            'results': results,
+            'error': error,
+            'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        self._entries[entry['path']] = entry
+        try:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._line_count += 1
+        except OSError as e:
+            logger.warning(f"Failed to write batch journal {self.journal_path}: {e}")
+
+    def compact(self) -> None:
+        """各ファイルの最新の記録だけを残して書き直す"""
+        try:
+            atomic_write_text(self.journal_path, ''.join(
+                json.dumps(entry, ensure_ascii=False) + '\n' for entry in self._entries.values()))
+            self._line_count = len(self._entries)
+        except OSError as e:
+            logger.warning(f"Failed to compact batch journal {self.journal_path}: {e}")
@@ -3,14 +3,22 @@
 すべてのファイルI/O操作を中央管理
 """
 import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Dict, Union
+from typing import Any, Callable, List, Optional, Dict, Union
 import json
+import zlib
 import pickle
 import logging
 from datetime import datetime
 import hashlib
 
+from utils.file_utils import atomic_write_bytes
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,34 +27,66 @@ class SecurityError(Exception):
     pass
 
 
+@dataclass
+class CacheEntry:
+    """ファイルキャッシュのエントリ"""
+    content: Any
+    size: int           # メモリ上のバイト数
+    mtime_ns: int       # 読み込み時のファイルの更新時刻
+    file_size: int      # 読み込み時のファイルサイズ
+    loaded_at: float    # 読み込んだ時刻（time.monotonic）
+    timestamp: datetime
+    file_path: str
+
+
+# ディスクキャッシュのファイル形式のバージョン（一致しないエントリは削除して元のファイルを読み直す）
+DISK_CACHE_FORMAT_VERSION = 1
+
+
 class FileManager:
     """
     ファイルI/O操作を中央管理するクラス
     キャッシング、バージョニング、エラーハンドリングを提供
     """
     
+    DISK_CACHE_SUFFIX = '.zpkl'
+    
     def __init__(self, cache_dir: Optional[Path] = None, 
-                 allowed_dirs: Optional[List[Path]] = None):
+                 allowed_dirs: Optional[List[Path]] = None,
+                 use_disk_cache: bool = True):
         """
         初期化
         
         Args:
             cache_dir: キャッシュディレクトリ（デフォルトは .cache）
             allowed_dirs: アクセスを許可するディレクトリのリスト
+            use_disk_cache: 読み込んだテキスト・JSONを cache_dir にも保存し、
+                            次回以降の起動でも再利用するか
         """
-        self.cache_dir = cache_dir or Path.home() / '.cache' / 'entrance_exam_analyzer'
+        self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / '.cache' / 'entrance_exam_analyzer'
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.use_disk_cache = use_disk_cache
+        self.disk_cache_dir = self.cache_dir / 'files'
         
         # セキュリティ: 許可されたディレクトリのリスト
         self.allowed_dirs = allowed_dirs or [Path.cwd()]
         self.allowed_dirs = [Path(d).resolve() for d in self.allowed_dirs]
         
-        # ファイルキャッシュ
-        self._file_cache: Dict[str, any] = {}
-        self._cache_metadata: Dict[str, dict] = {}
+        # ファイルキャッシュ（LRU順: 先頭が最も長く使われていないエントリ）
+        self._file_cache: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_evictions = 0
+        
+        # ディスクキャッシュ（メモリキャッシュの後ろの2段目）
+        self._disk_stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+        self._disk_bytes: Optional[int] = None  # 初回の書き込み時に集計し、以降は差分で更新
         
         # 設定
         self.max_cache_size_mb = 100
+        self.max_disk_cache_mb = 200
         self.cache_ttl_seconds = 3600  # 1時間
         self.max_single_file_mb = 50  # 単一ファイルの最大サイズ
     
@@ -115,24 +155,23 @@ class FileManager:
         # セキュリティチェック
         file_path = self._validate_path(file_path)
         
-        # キャッシュチェック
-        if use_cache:
-            cached = self._get_from_cache(file_path)
-            if cached is not None:
-                logger.debug(f"Using cached content for {file_path}")
-                return cached
+        if not use_cache:
+            return self._read_text(file_path, encoding)
         
-        # ファイル読み込み
+        return self._read_through(
+            file_path, 'text', encoding,
+            load=lambda: self._read_text(file_path, encoding),
+            encode=lambda content: content.encode('utf-8'),
+            decode=lambda payload: payload.decode('utf-8'),
+        )
+    
+    def _read_text(self, file_path: Path, encoding: str) -> str:
+        """キャッシュを使わずにテキストファイルを読み込み"""
         try:
             with open(file_path, 'r', encoding=encoding) as f:
                 content = f.read()
             
             logger.info(f"Read {len(content)} characters from {file_path}")
-            
-            # キャッシュに保存
-            if use_cache:
-                self._save_to_cache(file_path, content)
-            
             return content
             
         except FileNotFoundError:
@@ -175,7 +214,7 @@ class FileManager:
             logger.info(f"Wrote {len(content)} characters to {file_path}")
             
             # キャッシュを無効化
-            self._invalidate_cache(file_path)
+            self._invalidate_cache(file_path, encodings=(encoding,))
             
         except Exception as e:
             logger.error(f"Error writing file {file_path}: {e}")
@@ -193,13 +232,23 @@ class FileManager:
         Returns:
             JSONデータ
         """
-        content = self.read_text_file(file_path, use_cache=use_cache)
+        file_path = self._validate_path(Path(file_path))
         
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in {file_path}: {e}")
-            raise ValueError(f"Invalid JSON in {file_path}: {e}")
+        def load() -> bytes:
+            content = self._read_text(file_path, 'utf-8')
+            try:
+                data = json.loads(content)
+            except json.JSONDecodeError as e:
+                logger.error(f"Invalid JSON in {file_path}: {e}")
+                raise ValueError(f"Invalid JSON in {file_path}: {e}")
+            return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        
+        if not use_cache:
+            return pickle.loads(load())
+        
+        # 解析済みのデータを pickle で保持し、取得のたびに復元して呼び出し側ごとに別の辞書を返す
+        payload = self._read_through(file_path, 'json', 'utf-8', load=load)
+        return pickle.loads(payload)
     
     def write_json(self, file_path: Union[str, Path],
                   data: dict,
@@ -287,78 +336,307 @@ class FileManager:
             'extension': file_path.suffix
         }
     
-    def _get_from_cache(self, file_path: Path) -> Optional[any]:
-        """キャッシュから取得"""
-        cache_key = self._get_cache_key(file_path)
+    def _read_through(self, file_path: Path, kind: str, encoding: str,
+                      load: Callable[[], Any],
+                      encode: Callable[[Any], bytes] = bytes,
+                      decode: Callable[[bytes], Any] = bytes) -> Any:
+        """
+        メモリキャッシュ → ディスクキャッシュ → ファイルの順に読み込み
+
+        Args:
+            file_path: 検証済みのファイルパス
+            kind: 内容の種類（'text' / 'json'）
+            encoding: 読み込みに使うエンコーディング
+            load: ファイルから読み込む関数
+            encode: 内容をディスクキャッシュ用のバイト列に変換する関数
+            decode: ディスクキャッシュのバイト列を内容に戻す関数
+
+        Returns:
+            内容
+        """
+        cache_key = self._get_cache_key(file_path, kind, encoding)
+        cached = self._get_from_cache(file_path, cache_key)
+        if cached is not None:
+            logger.debug(f"Using cached content for {file_path}")
+            return cached
         
-        if cache_key not in self._file_cache:
-            return None
+        # 読み込み前の状態を記録（読み込み中に更新された場合は次回のヒット時に検出される）
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            logger.error(f"File not found: {file_path}")
+            raise
         
-        # TTLチェック
-        metadata = self._cache_metadata.get(cache_key, {})
-        if 'timestamp' in metadata:
-            age = (datetime.now() - metadata['timestamp']).total_seconds()
-            if age > self.cache_ttl_seconds:
+        payload = self._get_from_disk_cache(cache_key, stat)
+        if payload is not None:
+            logger.debug(f"Using disk cached content for {file_path}")
+            content = decode(payload)
+        else:
+            content = load()
+            self._save_to_disk_cache(cache_key, stat, encode(content))
+        
+        self._save_to_cache(file_path, content, stat, cache_key)
+        return content
+    
+    def _get_from_cache(self, file_path: Path, cache_key: Optional[str] = None) -> Optional[Any]:
+        """
+        キャッシュから取得
+
+        期限切れ、またはディスク上のファイルの更新時刻・サイズが読み込み時と
+        異なる場合はエントリを破棄してNoneを返す。
+        """
+        cache_key = cache_key or self._get_cache_key(file_path)
+        
+        with self._cache_lock:
+            entry = self._file_cache.get(cache_key)
+            if entry is None:
+                self._cache_misses += 1
+                return None
+            
+            # TTLチェック
+            if time.monotonic() - entry.loaded_at > self.cache_ttl_seconds:
                 logger.debug(f"Cache expired for {file_path}")
-                del self._file_cache[cache_key]
-                del self._cache_metadata[cache_key]
+                self._remove_entry(cache_key)
+                self._cache_misses += 1
                 return None
         
-        return self._file_cache[cache_key]
+        # 更新チェック（stat はロックの外で行う）
+        try:
+            stat = os.stat(file_path)
+            changed = (stat.st_mtime_ns, stat.st_size) != (entry.mtime_ns, entry.file_size)
+        except OSError:
+            changed = True
+        
+        with self._cache_lock:
+            if changed:
+                logger.debug(f"Cache stale for {file_path}")
+                if self._file_cache.get(cache_key) is entry:
+                    self._remove_entry(cache_key)
+                self._cache_misses += 1
+                return None
+            if cache_key in self._file_cache:
+                self._file_cache.move_to_end(cache_key)
+            self._cache_hits += 1
+            return entry.content
     
-    def _save_to_cache(self, file_path: Path, content: any) -> None:
-        """キャッシュに保存"""
-        cache_key = self._get_cache_key(file_path)
-        
-        # キャッシュサイズチェック
-        if self._get_cache_size_mb() > self.max_cache_size_mb:
-            self._cleanup_cache()
-        
-        self._file_cache[cache_key] = content
-        self._cache_metadata[cache_key] = {
-            'timestamp': datetime.now(),
-            'file_path': str(file_path),
-            'size': len(str(content))
-        }
+    def _save_to_cache(self, file_path: Path, content: Any,
+                       stat: Optional[os.stat_result] = None,
+                       cache_key: Optional[str] = None) -> None:
+        """
+        キャッシュに保存
+
+        上限を超えた分は最も長く使われていないエントリから削除する。
+
+        Args:
+            file_path: ファイルパス
+            content: 保存する内容
+            stat: 読み込み前のファイルの状態（省略時はここで取得）
+            cache_key: キャッシュキー（省略時はテキストとしてのキー）
+        """
+        cache_key = cache_key or self._get_cache_key(file_path)
+        if stat is None:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return
+        
+        size = self._entry_size(content)
+        max_bytes = self.max_cache_size_mb * 1024 * 1024
+        if size > max_bytes:
+            logger.debug(f"Skip caching {file_path}: {size} bytes exceeds cache limit")
+            with self._cache_lock:
+                self._remove_entry(cache_key)
+            return
+        
+        entry = CacheEntry(
+            content=content,
+            size=size,
+            mtime_ns=stat.st_mtime_ns,
+            file_size=stat.st_size,
+            loaded_at=time.monotonic(),
+            timestamp=datetime.now(),
+            file_path=str(file_path),
+        )
+        with self._cache_lock:
+            self._remove_entry(cache_key)
+            self._file_cache[cache_key] = entry
+            self._cache_bytes += size
+            
+            # キャッシュサイズチェック
+            while self._cache_bytes > max_bytes:
+                self._remove_entry(next(iter(self._file_cache)))
+                self._cache_evictions += 1
+    
+    def _remove_entry(self, cache_key: str) -> None:
+        """エントリを削除してバイト数を差し引く（_cache_lock を保持して呼ぶ）"""
+        entry = self._file_cache.pop(cache_key, None)
+        if entry is not None:
+            self._cache_bytes -= entry.size
+    
+    @staticmethod
+    def _entry_size(content: Any) -> int:
+        """
+        キャッシュエントリのメモリ上のバイト数
+
+        文字列・バイト列は sys.getsizeof が定数時間で実際の使用量を返す。
+        """
+        if isinstance(content, (str, bytes, bytearray)):
+            return sys.getsizeof(content)
+        return len(pickle.dumps(content, protocol=pickle.HIGHEST_PROTOCOL))
     
-    def _invalidate_cache(self, file_path: Path) -> None:
-        """キャッシュを無効化"""
-        cache_key = self._get_cache_key(file_path)
-        
-        if cache_key in self._file_cache:
-            del self._file_cache[cache_key]
-        if cache_key in self._cache_metadata:
-            del self._cache_metadata[cache_key]
+    def _invalidate_cache(self, file_path: Path, encodings: tuple = ('utf-8',)) -> None:
+        """
+        キャッシュを無効化
+
+        メモリキャッシュはそのファイルのすべてのエントリを、ディスクキャッシュは
+        指定したエンコーディングのテキストとJSONのエントリを削除する。
+        """
+        path_str = str(file_path)
+        with self._cache_lock:
+            for cache_key in [key for key, entry in self._file_cache.items() if entry.file_path == path_str]:
+                self._remove_entry(cache_key)
+        
+        if self.use_disk_cache:
+            keys = [self._get_cache_key(file_path, 'text', encoding) for encoding in encodings]
+            keys.append(self._get_cache_key(file_path, 'json', 'utf-8'))
+            for cache_key in keys:
+                self._remove_disk_entry(self._disk_entry_path(cache_key))
     
-    def _get_cache_key(self, file_path: Path) -> str:
-        """キャッシュキーを生成"""
-        return hashlib.md5(str(file_path.absolute()).encode()).hexdigest()
+    def _get_cache_key(self, file_path: Path, kind: str = 'text', encoding: str = 'utf-8') -> str:
+        """キャッシュキーを生成（メモリ・ディスク共通）"""
+        material = '\0'.join((kind, encoding, str(file_path.absolute())))
+        return hashlib.md5(material.encode()).hexdigest()
     
     def _get_cache_size_mb(self) -> float:
         """キャッシュサイズを取得（MB）"""
-        total_size = sum(
-            metadata.get('size', 0) 
-            for metadata in self._cache_metadata.values()
-        )
-        return total_size / (1024 * 1024)
+        return self._cache_bytes / (1024 * 1024)
     
-    def _cleanup_cache(self) -> None:
-        """古いキャッシュエントリを削除"""
-        # 最も古いエントリから削除
-        sorted_entries = sorted(
-            self._cache_metadata.items(),
-            key=lambda x: x[1].get('timestamp', datetime.min)
-        )
+    def _disk_entry_path(self, cache_key: str) -> Path:
+        """ディスクキャッシュのエントリのパス"""
+        return self.disk_cache_dir / f'{cache_key}{self.DISK_CACHE_SUFFIX}'
+    
+    def _get_from_disk_cache(self, cache_key: str, stat: os.stat_result) -> Optional[bytes]:
+        """
+        ディスクキャッシュから取得
+
+        Args:
+            cache_key: キャッシュキー
+            stat: 現在のファイルの状態（更新時刻・サイズが保存時と異なれば使わない）
+
+        Returns:
+            保存したバイト列、ない場合・古い場合・壊れている場合はNone
+        """
+        if not self.use_disk_cache:
+            return None
         
-        # 半分を削除
-        to_remove = len(sorted_entries) // 2
-        for cache_key, _ in sorted_entries[:to_remove]:
-            if cache_key in self._file_cache:
-                del self._file_cache[cache_key]
-            if cache_key in self._cache_metadata:
-                del self._cache_metadata[cache_key]
+        path = self._disk_entry_path(cache_key)
+        try:
+            with open(path, 'rb') as f:
+                record = pickle.load(f)
+            if record.get('version') != DISK_CACHE_FORMAT_VERSION:
+                raise ValueError(f"unsupported format {record.get('version')}")
+            if (record['mtime_ns'], record['size']) != (stat.st_mtime_ns, stat.st_size):
+                self._disk_stats['misses'] += 1
+                return None
+            payload = zlib.decompress(record['payload'])
+            if hashlib.sha256(payload).hexdigest() != record['content_hash']:
+                raise ValueError("content hash mismatch")
+        except FileNotFoundError:
+            self._disk_stats['misses'] += 1
+            return None
+        except Exception as e:
+            # 壊れたエントリは削除して読み直させる
+            logger.warning(f"Discarding unreadable file cache entry {path.name}: {e}")
+            self._disk_stats['errors'] += 1
+            self._disk_stats['misses'] += 1
+            self._remove_disk_entry(path)
+            return None
         
-        logger.debug(f"Cleaned up {to_remove} cache entries")
+        # 最終使用時刻を更新（削除順の判定に使用）
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._disk_stats['hits'] += 1
+        return payload
+    
+    def _save_to_disk_cache(self, cache_key: str, stat: os.stat_result, payload: bytes) -> None:
+        """
+        ディスクキャッシュに圧縮して保存し、上限を超えたら最終使用が古い順に削除
+
+        Args:
+            cache_key: キャッシュキー
+            stat: 読み込み前のファイルの状態
+            payload: 保存するバイト列
+        """
+        if not self.use_disk_cache:
+            return
+        
+        record = pickle.dumps({
+            'version': DISK_CACHE_FORMAT_VERSION,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'content_hash': hashlib.sha256(payload).hexdigest(),
+            'payload': zlib.compress(payload),
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        max_bytes = self.max_disk_cache_mb * 1024 * 1024
+        if len(record) > max_bytes:
+            return
+        
+        path = self._disk_entry_path(cache_key)
+        try:
+            self.disk_cache_dir.mkdir(parents=True, exist_ok=True)
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(stat.st_size for _, stat in self._disk_entries())
+            try:
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = 0
+            atomic_write_bytes(path, record)
+        except Exception as e:
+            logger.warning(f"Failed to write file cache entry: {e}")
+            self._disk_stats['errors'] += 1
+            return
+        
+        self._disk_stats['writes'] += 1
+        self._disk_bytes += len(record) - replaced
+        if self._disk_bytes > max_bytes:
+            self._evict_disk_cache(max_bytes)
+    
+    def _disk_entries(self) -> List[tuple]:
+        """ディスクキャッシュのエントリの (パス, stat) のリスト"""
+        entries = []
+        if not self.disk_cache_dir.exists():
+            return entries
+        for path in self.disk_cache_dir.glob(f'*{self.DISK_CACHE_SUFFIX}'):
+            try:
+                entries.append((path, path.stat()))
+            except OSError:
+                continue
+        return entries
+    
+    def _evict_disk_cache(self, max_bytes: int) -> None:
+        """合計サイズが上限を超えていれば、最終使用が古い順に削除（他のプロセスの書き込みも含めて集計し直す）"""
+        entries = self._disk_entries()
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in sorted(entries, key=lambda e: e[1].st_mtime):
+            if total <= max_bytes:
+                break
+            if self._remove_disk_entry(path):
+                total -= stat.st_size
+                self._disk_stats['evictions'] += 1
+        self._disk_bytes = total
+    
+    def _remove_disk_entry(self, path: Path) -> bool:
+        """ディスクキャッシュのファイルを削除"""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return False
+        if self._disk_bytes is not None and path.suffix == self.DISK_CACHE_SUFFIX:
+            self._disk_bytes -= size
+        return True
     
     def _create_backup(self, file_path: Path) -> None:
         """バックアップを作成"""
@@ -372,23 +650,44 @@ class FileManager:
         except Exception as e:
             logger.warning(f"Failed to create backup: {e}")
     
-    def clear_cache(self) -> None:
-        """すべてのキャッシュをクリア"""
-        self._file_cache.clear()
-        self._cache_metadata.clear()
+    def clear_cache(self, include_disk: bool = False) -> None:
+        """
+        すべてのキャッシュをクリア
+
+        Args:
+            include_disk: ディスクキャッシュも削除するか
+        """
+        with self._cache_lock:
+            self._file_cache.clear()
+            self._cache_bytes = 0
+        if include_disk:
+            for path, _ in self._disk_entries():
+                self._remove_disk_entry(path)
+            self._disk_bytes = 0
         logger.info("File cache cleared")
     
     def get_cache_stats(self) -> dict:
         """キャッシュ統計を取得"""
-        return {
-            'entries': len(self._file_cache),
-            'size_mb': self._get_cache_size_mb(),
-            'oldest': min(
-                (m.get('timestamp', datetime.now()) for m in self._cache_metadata.values()),
-                default=None
-            ),
-            'newest': max(
-                (m.get('timestamp', datetime.now()) for m in self._cache_metadata.values()),
-                default=None
-            )
-        }
\ No newline at end of file
+        disk_entries = self._disk_entries()
+        disk_lookups = self._disk_stats['hits'] + self._disk_stats['misses']
+        with self._cache_lock:
+            timestamps = [entry.timestamp for entry in self._file_cache.values()]
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                'entries': len(self._file_cache),
+                'size_bytes': self._cache_bytes,
+                'size_mb': self._get_cache_size_mb(),
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'evictions': self._cache_evictions,
+                'hit_rate': self._cache_hits / lookups if lookups else 0.0,
+                'oldest': min(timestamps, default=None),
+                'newest': max(timestamps, default=None),
+                'disk': {
+                    **self._disk_stats,
+                    'hit_rate': self._disk_stats['hits'] / disk_lookups if disk_lookups else 0.0,
+                    'entries': len(disk_entries),
+                    'size_mb': sum(stat.st_size for _, stat in disk_entries) / (1024 * 1024),
+                    'max_size_mb': self.max_disk_cache_mb,
+                }
+            }
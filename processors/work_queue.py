@@ -0,0 +1,405 @@
+"""
+共有作業キューモジュール
+共有ボリューム上のSQLiteファイルで分析対象のファイルを配り、複数のマシン・プロセスが
+同じファイルを重複して分析しないようにする
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models import AnalysisResult, ExamSource, Question, Section
+from utils.backup_store import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# 項目の状態
+QUEUE_PENDING = 'pending'  # 未処理
+QUEUE_LEASED = 'leased'    # ワーカーが処理中（期限までに延長されなければ他のワーカーが引き継ぐ）
+QUEUE_DONE = 'done'        # 分析済み（データベースへの反映待ち）
+QUEUE_FAILED = 'failed'    # 失敗
+QUEUE_MERGING = 'merging'  # データベースへ反映中
+QUEUE_MERGED = 'merged'    # データベースへ反映済み
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    sha256 TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    elapsed REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (status);
+"""
+
+# キューに保存した分析結果から復元するクラス（ここにないクラスのオブジェクトは作らない）
+_RESULT_TYPES = {cls.__name__: cls for cls in (AnalysisResult, Section, Question, ExamSource)}
+
+
+def _encode_value(value: Any) -> Any:
+    """分析結果をJSONに変換できる値にする（モデルのオブジェクトは後から付けた属性も含める）"""
+    if _RESULT_TYPES.get(type(value).__name__) is type(value):
+        return {'__type__': type(value).__name__,
+                'fields': {key: _encode_value(item) for key, item in vars(value).items()}}
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode_value(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode_value(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _encode_value(item) for key, item in value.items()}
+    if is_dataclass(value) and not isinstance(value, type):
+        return _encode_value(asdict(value))
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _decode_value(value: Any) -> Any:
+    """_encode_value で変換した値を元に戻す"""
+    if isinstance(value, list):
+        return [_decode_value(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if set(value) == {'__tuple__'}:
+        return tuple(_decode_value(item) for item in value['__tuple__'])
+    if set(value) == {'__type__', 'fields'}:
+        cls = _RESULT_TYPES.get(value['__type__'])
+        if cls is None:
+            raise ValueError(f"unknown result type: {value['__type__']!r}")
+        obj = cls.__new__(cls)
+        obj.__dict__.update({key: _decode_value(item) for key, item in value['fields'].items()})
+        return obj
+    return {key: _decode_value(item) for key, item in value.items()}
+
+
+@dataclass
+class QueueItem:
+    """ワーカーに割り当てられた項目"""
+    id: int
+    path: Path
+    sha256: Optional[str]
+    attempts: int
+
+
+class WorkQueue:
+    """
+    リース方式の作業キュー
+
+    ワーカーは項目を期限付きで借り（リース）、処理中は定期的に期限を延長する（ハートビート）。
+    ワーカーのマシンが止まると期限が切れ、他のワーカーが引き継ぐ。期限が切れた後の
+    完了報告は受け付けないため、同じ項目の結果が二重に記録されることはない。
+    分析結果はJSONでキューに保存し、データベースへは1か所でまとめて反映する。
+
+    ファイルパスはキューファイルのあるディレクトリからの相対パスで保存するため、
+    共有ボリュームのマウント先がマシンごとに違っても同じファイルを指す。
+    時刻は各マシンの時計を使うので、時計はおおよそ合わせておくこと。
+    """
+
+    def __init__(self, db_path: Path, lease_seconds: float = 120.0,
+                 max_attempts: int = 3, busy_timeout: float = 60.0):
+        """
+        初期化
+
+        Args:
+            db_path: キューファイル（SQLite）のパス
+            lease_seconds: リースの期限（秒）
+            max_attempts: 期限切れで引き継ぐ回数の上限（超えたら失敗にする）
+            busy_timeout: 他のプロセスの書き込みが終わるのを待つ最大秒数
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.base_dir = self.db_path.absolute().parent
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.RLock()
+        # トランザクションは _transaction で明示的に開始する
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=busy_timeout, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        # WALは共有メモリを使うためネットワーク上のファイルでは使えない（既定のロールバックジャーナル）
+        self._conn.execute('PRAGMA journal_mode=DELETE')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """書き込みトランザクション（開始時に書き込みロックを取る、例外時はロールバック）"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _to_key(self, file_path: Path) -> str:
+        """保存用のパス（キューファイルからの相対パス）"""
+        file_path = Path(file_path).absolute()
+        try:
+            return Path(os.path.relpath(file_path, self.base_dir)).as_posix()
+        except ValueError:
+            return str(file_path)  # Windowsで別のドライブ
+
+    def _to_path(self, key: str) -> Path:
+        """保存用のパスを実際のパスに戻す"""
+        return Path(os.path.normpath(self.base_dir / key))
+
+    def enqueue(self, file_paths: Iterable[Path], force: bool = False,
+                now: Optional[float] = None) -> int:
+        """
+        ファイルをキューに追加
+
+        同じファイルを何度追加しても1件として扱う。内容が変わったファイルは未処理に戻す。
+
+        Args:
+            file_paths: ファイルパスのリスト
+            force: Trueの場合、処理済み・失敗した項目も未処理に戻す
+            now: 現在時刻（time.time）
+
+        Returns:
+            未処理として追加（または戻）した件数
+        """
+        now = time.time() if now is None else now
+        entries = []
+        for file_path in file_paths:
+            try:
+                content_hash = file_sha256(file_path)
+            except OSError:
+                content_hash = None
+            entries.append((self._to_key(file_path), content_hash))
+
+        queued = 0
+        with self._transaction() as conn:
+            for key, content_hash in entries:
+                row = conn.execute('SELECT sha256, status FROM items WHERE path = ?', (key,)).fetchone()
+                if row is None:
+                    conn.execute('INSERT INTO items (path, sha256, updated_at) VALUES (?, ?, ?)',
+                                 (key, content_hash, now))
+                    queued += 1
+                elif force or row['sha256'] != content_hash:
+                    if row['status'] in (QUEUE_LEASED, QUEUE_MERGING) and not force:
+                        continue  # 処理中の項目は内容が変わっていても取り上げない
+                    conn.execute(
+                        "UPDATE items SET sha256 = ?, status = 'pending', worker = NULL, lease_expires = NULL, "
+                        "attempts = 0, result = NULL, error = NULL, elapsed = NULL, updated_at = ? WHERE path = ?",
+                        (content_hash, now, key)
+                    )
+                    queued += 1
+        return queued
+
+    def claim(self, worker_id: str, limit: int = 1, now: Optional[float] = None) -> List[QueueItem]:
+        """
+        未処理の項目（またはリースの期限が切れた項目）を借りる
+
+        Args:
+            worker_id: ワーカーの識別子
+            limit: 借りる最大件数
+            now: 現在時刻（time.time）
+
+        Returns:
+            借りた項目のリスト（なければ空）
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, path, sha256, attempts FROM items "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT ?",
+                (now, max(1, limit) * 2)
+            ).fetchall()
+
+            claimed = []
+            for row in rows:
+                if row['attempts'] >= self.max_attempts:
+                    # 何度もワーカーを止めたファイル
+                    conn.execute(
+                        "UPDATE items SET status = 'failed', worker = NULL, lease_expires = NULL, "
+                        "error = ?, updated_at = ? WHERE id = ?",
+                        (f'lease expired {row["attempts"]} times', now, row['id'])
+                    )
+                    continue
+                if len(claimed) >= limit:
+                    break
+                conn.execute(
+                    "UPDATE items SET status = 'leased', worker = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (worker_id, now + self.lease_seconds, now, row['id'])
+                )
+                claimed.append(QueueItem(row['id'], self._to_path(row['path']),
+                                         row['sha256'], row['attempts'] + 1))
+        return claimed
+
+    def heartbeat(self, worker_id: str, item_ids: Iterable[int], now: Optional[float] = None) -> int:
+        """
+        処理中の項目のリースを延長
+
+        Args:
+            worker_id: ワーカーの識別子
+            item_ids: 処理中の項目のID
+            now: 現在時刻（time.time）
+
+        Returns:
+            延長できた件数（期限が切れて他のワーカーに移った項目は含まない）
+        """
+        now = time.time() if now is None else now
+        item_ids = list(item_ids)
+        if not item_ids:
+            return 0
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE items SET lease_expires = ?, updated_at = ? "
+                f"WHERE worker = ? AND status IN ('leased', 'merging') "
+                f"AND id IN ({','.join('?' * len(item_ids))})",
+                (now + self.lease_seconds, now, worker_id, *item_ids)
+            )
+            return cursor.rowcount
+
+    def _finish(self, item_id: int, worker_id: str, status: str, result: Optional[str],
+                error: Optional[str], elapsed: float, now: Optional[float]) -> bool:
+        """借りている項目の処理結果を記録"""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE items SET status = ?, result = ?, error = ?, elapsed = ?, worker = ?, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (status, result, error, elapsed, worker_id, now, item_id, worker_id)
+            )
+            if cursor.rowcount == 0:
+                logger.warning(f"Lease lost for queue item {item_id}; result discarded")
+                return False
+            return True
+
+    def complete(self, item_id: int, worker_id: str, results: Any,
+                 elapsed: float = 0.0, now: Optional[float] = None) -> bool:
+        """
+        分析結果を記録
+
+        Args:
+            item_id: 項目のID
+            worker_id: ワーカーの識別子
+            results: 分析結果（JSONで保存し、データベースへの反映時に取り出す）
+            elapsed: 処理時間（秒）
+            now: 現在時刻（time.time）
+
+        Returns:
+            記録できた場合True（リースを失っていた場合は結果を捨ててFalse）
+        """
+        result = json.dumps(_encode_value(results), ensure_ascii=False)
+        return self._finish(item_id, worker_id, QUEUE_DONE, result, None, elapsed, now)
+
+    def fail(self, item_id: int, worker_id: str, error: str,
+             elapsed: float = 0.0, now: Optional[float] = None) -> bool:
+        """
+        失敗を記録
+
+        Args:
+            item_id: 項目のID
+            worker_id: ワーカーの識別子
+            error: 失敗した理由
+            elapsed: 処理時間（秒）
+            now: 現在時刻（time.time）
+
+        Returns:
+            記録できた場合True
+        """
+        return self._finish(item_id, worker_id, QUEUE_FAILED, None, error, elapsed, now)
+
+    def has_open_work(self) -> bool:
+        """未処理・処理中の項目があるか"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM items WHERE status IN ('pending', 'leased')"
+            ).fetchone()
+        return row[0] > 0
+
+    def counts(self) -> Dict[str, int]:
+        """状態ごとの件数"""
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM items GROUP BY status').fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def claim_results(self, worker_id: str, now: Optional[float] = None) -> List[Tuple[QueueItem, Any]]:
+        """
+        データベースへ反映する分析結果を取り出す（同時に反映しようとした他のプロセスには渡さない）
+
+        取り出した項目のリースは反映が終わるまでハートビートで延長すること。
+        読めない分析結果（以前の形式など）の項目は失敗にする。
+
+        Args:
+            worker_id: 反映するプロセスの識別子
+            now: 現在時刻（time.time）
+
+        Returns:
+            (項目, 分析結果) のリスト（キューに追加した順）
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            # 反映中に止まったプロセスの分も引き継ぐ
+            conn.execute(
+                "UPDATE items SET status = 'merging', worker = ?, lease_expires = ?, updated_at = ? "
+                "WHERE status = 'done' OR (status = 'merging' AND lease_expires < ?)",
+                (worker_id, now + self.lease_seconds, now, now)
+            )
+            rows = conn.execute(
+                "SELECT id, path, sha256, attempts, result FROM items "
+                "WHERE status = 'merging' AND worker = ? ORDER BY id",
+                (worker_id,)
+            ).fetchall()
+
+            claimed = []
+            for row in rows:
+                try:
+                    results = _decode_value(json.loads(row['result']))
+                except (TypeError, ValueError) as e:
+                    logger.warning(f"Unreadable result for queue item {row['id']}: {e}")
+                    conn.execute(
+                        "UPDATE items SET status = 'failed', worker = NULL, lease_expires = NULL, result = NULL, "
+                        "error = ?, updated_at = ? WHERE id = ?",
+                        ('unreadable result; enqueue again with --force', now, row['id'])
+                    )
+                    continue
+                claimed.append((QueueItem(row['id'], self._to_path(row['path']), row['sha256'],
+                                          row['attempts']), results))
+        return claimed
+
+    def finish_merge(self, item_ids: Iterable[int], worker_id: str, merged: bool = True,
+                     now: Optional[float] = None) -> None:
+        """
+        反映の結果を記録
+
+        Args:
+            item_ids: claim_results で取り出した項目のID
+            worker_id: 反映するプロセスの識別子
+            merged: 反映できた場合True（Falseなら反映待ちに戻す）
+            now: 現在時刻（time.time）
+        """
+        now = time.time() if now is None else now
+        item_ids = list(item_ids)
+        if not item_ids:
+            return
+        # 反映済みの項目は分析結果を消してキューファイルを小さく保つ
+        assignment = "status = 'merged', result = NULL" if merged else "status = 'done'"
+        with self._transaction() as conn:
+            conn.execute(
+                f"UPDATE items SET {assignment}, lease_expires = NULL, updated_at = ? "
+                f"WHERE worker = ? AND status = 'merging' AND id IN ({','.join('?' * len(item_ids))})",
+                (now, worker_id, *item_ids)
+            )
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+分析結果キャッシュのテスト
+キーの区別・再読み込み・サイズ上限による削除・統計を確認
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from processors.analysis_cache import AnalysisCache, build_analyzer_fingerprint, normalize_for_hash
+from modules.universal_analyzer import UniversalAnalyzer
+from config.settings import Settings
+
+
+SAMPLE_TEXT = """2025年度 入学試験問題 国語
+
+一、次の文章を読んで、後の問いに答えなさい。
+""" + "本文が続く。" * 300 + """
+夏目漱石『こころ』による
+
+問一　傍線部①とはどういうことか。三十字以内で説明しなさい。
+問二　空欄に入る語として最も適当なものを次のア～エから選びなさい。
+ア．希望　イ．絶望　ウ．期待　エ．不安
+"""
+
+
+def _make_cache(tmp_dir, fingerprint='fp', max_size_mb=10):
+    return AnalysisCache(Path(tmp_dir), fingerprint, max_size_mb=max_size_mb)
+
+
+def test_roundtrip_and_stats():
+    """保存した結果が同じ内容で読み込め、ヒット・ミスが集計されること"""
+    analyzer = UniversalAnalyzer()
+    result = analyzer.analyze(SAMPLE_TEXT, '開成中学校', '2025')
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _make_cache(tmp)
+        assert cache.get(SAMPLE_TEXT, '開成中学校', '2025') is None
+        assert cache.put(SAMPLE_TEXT, '開成中学校', '2025', result)
+
+        cached = cache.get(SAMPLE_TEXT, '開成中学校', '2025')
+        assert cached == result
+        assert [getattr(s, 'question_details', None) for s in cached.sections] == \
+               [getattr(s, 'question_details', None) for s in result.sections]
+
+        stats = cache.get_stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1 and stats['writes'] == 1
+        assert stats['entries'] == 1 and stats['hit_rate'] == 0.5
+
+
+def test_key_components():
+    """テキスト・学校・年度・フィンガープリントが異なれば別エントリになること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _make_cache(tmp)
+        key = cache.make_key(SAMPLE_TEXT, '開成中学校', '2025')
+        assert key == cache.make_key(SAMPLE_TEXT.replace('\n', '\r\n'), '開成中学校', '2025')
+        assert key == cache.make_key(SAMPLE_TEXT + '  \n', '開成中学校', '2025')
+        assert key != cache.make_key(SAMPLE_TEXT + '問三', '開成中学校', '2025')
+        assert key != cache.make_key(SAMPLE_TEXT, '麻布中学校', '2025')
+        assert key != cache.make_key(SAMPLE_TEXT, '開成中学校', '2024')
+        assert key != _make_cache(tmp, fingerprint='other').make_key(SAMPLE_TEXT, '開成中学校', '2025')
+    assert normalize_for_hash("a  \r\nb\r\n") == "a\nb"
+
+
+def test_fingerprint_tracks_plugin_and_patterns():
+    """プラグインやパターン定義が変わるとフィンガープリントが変わること"""
+    analyzer = UniversalAnalyzer()
+    base = build_analyzer_fingerprint(analyzer, pattern_sets=[Settings.QUESTION_PATTERNS])
+    assert base == build_analyzer_fingerprint(analyzer, pattern_sets=[Settings.QUESTION_PATTERNS])
+    assert base != build_analyzer_fingerprint(analyzer, plugin='kaisei', pattern_sets=[Settings.QUESTION_PATTERNS])
+
+    patterns = dict(Settings.QUESTION_PATTERNS)
+    patterns['記述'] = patterns['記述'] + [r'.*論じなさい']
+    assert base != build_analyzer_fingerprint(analyzer, pattern_sets=[patterns])
+
+
+def test_size_based_eviction():
+    """上限を超えると最終使用が古いエントリから削除されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _make_cache(tmp, max_size_mb=0.07)  # 約70KB（3件まで）
+        payload = 'x' * 20000
+        for i in range(3):
+            cache.put(f'text{i}', 'school', '2025', payload)
+            os.utime(cache._entry_path(cache.make_key(f'text{i}', 'school', '2025')), (i, i))
+        cache.get('text0', 'school', '2025')  # text0を最近使用にする
+        cache.put('text3', 'school', '2025', payload)
+
+        assert cache.get('text1', 'school', '2025') is None
+        assert cache.get('text0', 'school', '2025') == payload
+        assert cache.get('text3', 'school', '2025') == payload
+        assert cache.get_stats()['evictions'] >= 1
+        assert cache.get_stats()['size_mb'] <= 0.07
+
+
+def test_put_scans_directory_only_over_limit():
+    """合計サイズは差分で更新し、上限を超えたときだけディレクトリを集計し直すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _make_cache(tmp, max_size_mb=0.07)
+        scans = []
+        entries = cache._entries
+        cache._entries = lambda: scans.append(1) or entries()
+
+        payload = 'x' * 20000
+        for i in range(3):
+            cache.put(f'text{i}', 'school', '2025', payload)
+        cache.put('text0', 'school', '2025', payload)  # 上書きはサイズを二重に数えない
+        assert len(scans) == 1  # 初回の書き込み時の集計のみ
+        assert cache._total_bytes == sum(stat.st_size for _, stat in entries())
+
+        cache.put('text3', 'school', '2025', payload)
+        assert len(scans) == 2 and cache.get_stats()['evictions'] == 1
+        assert cache._total_bytes == sum(stat.st_size for _, stat in entries()) <= cache.max_size_bytes
+
+
+def test_corrupted_entry_is_discarded():
+    """壊れたエントリはミスとして扱われ、削除されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _make_cache(tmp)
+        path = cache._entry_path(cache.make_key('text', 'school', '2025'))
+        path.write_bytes(b'not a pickle')
+        assert cache.get('text', 'school', '2025') is None
+        assert not path.exists()
+        assert cache.get_stats()['errors'] == 1
+
+
+def benchmark_rerun(files: int = 20):
+    """キャッシュなしの分析とキャッシュヒット時の再実行時間を比較"""
+    analyzer = UniversalAnalyzer()
+    texts = [SAMPLE_TEXT.replace('2025', str(2025 - i)) for i in range(files)]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _make_cache(tmp, fingerprint=build_analyzer_fingerprint(analyzer))
+
+        started = time.perf_counter()
+        for i, text in enumerate(texts):
+            cache.put(text, '開成中学校', str(2025 - i), analyzer.analyze(text, '開成中学校', str(2025 - i)))
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i, text in enumerate(texts):
+            assert cache.get(text, '開成中学校', str(2025 - i)) is not None
+        warm = time.perf_counter() - started
+
+    print(f"=== 分析結果キャッシュ（{files}件） ===")
+    print(f"初回（分析＋保存）: {cold * 1000:8.1f} ms")
+    print(f"再実行（キャッシュ）: {warm * 1000:8.1f} ms （{cold / warm:.0f}倍）")
+
+
+if __name__ == "__main__":
+    test_roundtrip_and_stats()
+    test_key_components()
+    test_fingerprint_tracks_plugin_and_patterns()
+    test_size_based_eviction()
+    test_put_scans_directory_only_over_limit()
+    test_corrupted_entry_is_discarded()
+    print("✅ すべてのテストに合格しました\n")
+    benchmark_rerun()
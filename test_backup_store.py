@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+バックアップ保管庫のテスト
+重複の除外・世代数の上限・復元を確認
+"""
+import sys
+import os
+import tempfile
+import threading
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules.result_store import ResultStore
+from modules.result_writer import ResultWriter
+from utils.backup_store import BackupStore
+from utils.file_utils import atomic_write_bytes, atomic_write_file, create_backup
+
+
+def object_files(backup_dir: Path):
+    """マニフェスト・ロックファイル以外のバックアップの実体"""
+    return sorted(p.name for p in backup_dir.iterdir() if p.suffix not in ('.json', '.lock'))
+
+
+def test_identical_content_is_not_copied():
+    """直前と同じ内容なら世代を追加せず、以前と同じ内容なら実体を共有すること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / 'db.xlsx'
+        backups = BackupStore(tmp / 'backups', source.name, max_count=5)
+
+        source.write_bytes(b'v1')
+        first, created = backups.backup_file(source)
+        assert created
+        _, created = backups.backup_file(source)
+        assert not created
+
+        source.write_bytes(b'v2')
+        backups.backup_file(source)
+        source.write_bytes(b'v1')
+        third, created = backups.backup_file(source)
+        assert created
+        assert third.file_name == first.file_name
+        assert len(backups.entries()) == 3
+        assert len(object_files(tmp / 'backups')) == 2
+
+
+def test_rotation_keeps_max_count():
+    """上限を超えた古い世代と、参照されなくなった実体が削除されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / 'db.xlsx'
+        backups = BackupStore(tmp / 'backups', source.name, max_count=3)
+        for version in range(6):
+            source.write_bytes(f'v{version}'.encode())
+            backups.backup_file(source)
+
+        entries = backups.entries()
+        assert len(entries) == 3
+        assert object_files(tmp / 'backups') == sorted(entry.file_name for entry in entries)
+        assert backups.path_of(backups.latest()).read_bytes() == b'v5'
+
+
+def test_restore():
+    """指定した世代の内容に戻せること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / 'db.xlsx'
+        backups = BackupStore(tmp / 'backups', source.name)
+        source.write_bytes(b'old')
+        old, _ = backups.backup_file(source)
+        source.write_bytes(b'new')
+
+        backups.restore(old.backup_id, source)
+        assert source.read_bytes() == b'old'
+        try:
+            backups.restore('missing', source)
+            assert False, 'FileNotFoundError expected'
+        except FileNotFoundError:
+            pass
+
+
+def test_concurrent_backups_keep_every_generation():
+    """複数のスレッドが同時にバックアップしても、マニフェストの世代が失われないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        backups = BackupStore(tmp / 'backups', 'db.xlsx', max_count=50)
+        start = threading.Barrier(8)
+
+        def backup(n):
+            store = BackupStore(tmp / 'backups', 'db.xlsx', max_count=50)
+            start.wait()
+            for i in range(4):
+                store.backup_with(f'{n:02d}{i:02d}'.ljust(64, '0'), lambda dest: dest.write_bytes(b'x'))
+
+        threads = [threading.Thread(target=backup, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(backups.entries()) == 32
+        assert len(object_files(tmp / 'backups')) == 32
+
+
+def test_restore_closes_store_first():
+    """復元はストアを閉じてから行い、復元中は他のスレッドにストアを開かせないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        writer = ResultWriter(tmp / 'db.xlsx')
+        writer.upsert({'開成中学校': [{'年度': 2024, '総文字数': 1000}]}, export=False)
+        backups = BackupStore(tmp / 'backups', 'db.sqlite3')
+        entry, _ = backups.backup_with(writer.store.content_digest(), writer.store.backup)
+        writer.upsert({'開成中学校': [{'年度': 2024, '総文字数': 2000}]}, export=False)
+
+        opened = []
+        reader = threading.Thread(target=lambda: opened.append(writer.store))
+
+        def restore(path):
+            assert not writer.is_open
+            reader.start()
+            reader.join(0.2)
+            assert not opened  # 置き換えが終わるまで待たされる
+            backups.restore(entry.backup_id, path)
+
+        writer.replace_store(restore)
+        reader.join()
+        assert opened and opened[0].read_rows('開成中学校')[0]['総文字数'] == 1000
+        writer.close()
+
+
+def test_create_backup_deduplicates():
+    """file_utils.create_backup も重複を除き、同じパスを返すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / 'db.xlsx'
+        source.write_bytes(b'data')
+        first = create_backup(source, tmp / 'backups', max_count=2)
+        second = create_backup(source, tmp / 'backups', max_count=2)
+        assert first == second and first.read_bytes() == b'data'
+        assert create_backup(tmp / 'missing.xlsx', tmp / 'backups') is None
+
+
+def test_store_digest_ignores_metadata():
+    """同じ内容の保存し直し（更新日時だけが違う）ではストアのハッシュが変わらないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        store = ResultStore(tmp / 'db.sqlite3')
+        store.upsert_rows('開成中学校', [{'年度': 2024, '総文字数': 1000, '更新日時': '2024-01-01 00:00:00'}])
+        digest = store.content_digest()
+
+        store.upsert_rows('開成中学校', [{'年度': 2024, '総文字数': 1000, '更新日時': '2024-02-01 00:00:00'}])
+        assert store.content_digest() == digest
+
+        backups = BackupStore(tmp / 'backups', 'db.sqlite3')
+        _, created = backups.backup_with(digest, store.backup)
+        assert created
+        _, created = backups.backup_with(store.content_digest(), store.backup)
+        assert not created
+
+        store.upsert_rows('開成中学校', [{'年度': 2024, '総文字数': 2000}])
+        assert store.content_digest() != digest
+
+        restored_path = backups.restore(backups.latest().backup_id, tmp / 'restored.sqlite3')
+        restored = ResultStore(restored_path)
+        assert restored.read_rows('開成中学校')[0]['総文字数'] == 1000
+        restored.close()
+        store.close()
+
+
+def test_atomic_write_removes_temp_on_failure():
+    """書き込みに失敗したら元のファイルを残し、一時ファイルを削除すること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        target = tmp / 'index.json'
+        target.write_text('old', encoding='utf-8')
+
+        def fail(tmp_path: Path):
+            tmp_path.write_text('partial', encoding='utf-8')
+            raise OSError('disk full')
+
+        try:
+            atomic_write_file(target, fail)
+        except OSError:
+            pass
+        else:
+            raise AssertionError('OSError was not raised')
+        assert target.read_text(encoding='utf-8') == 'old'
+        assert [p.name for p in tmp.iterdir()] == ['index.json']
+
+
+def test_atomic_write_from_threads():
+    """複数のスレッドが同じファイルに書き込んでも一時ファイルが衝突しないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        target = tmp / 'cache.pkl'
+        payloads = [bytes([i]) * 200_000 for i in range(8)]
+        errors = []
+
+        def write(data: bytes):
+            try:
+                for _ in range(20):
+                    atomic_write_bytes(target, data)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(data,)) for data in payloads]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert target.read_bytes() in payloads
+        assert [p.name for p in tmp.iterdir()] == ['cache.pkl']
+
+
+if __name__ == "__main__":
+    test_identical_content_is_not_copied()
+    test_rotation_keeps_max_count()
+    test_restore()
+    test_concurrent_backups_keep_every_generation()
+    test_restore_closes_store_first()
+    test_create_backup_deduplicates()
+    test_store_digest_ignores_metadata()
+    test_atomic_write_removes_temp_on_failure()
+    test_atomic_write_from_threads()
+    print("✅ すべてのテストに合格しました")
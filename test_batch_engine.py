@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+EntranceExamAnalyzer.batch_analyze の並列化のテスト
+ワーカープロセスで分析した結果が入力の順番で保存され、止まった・落ちたファイルが
+その1件の失敗として記録されることを確認
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.application import EntranceExamAnalyzer
+from batch_test_helpers import make_app, make_files
+
+
+def test_parallel_matches_in_process():
+    """並列でもプロセスを分けない場合と同じ結果が、入力の順番で保存されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp, [2021, 2019, 2020, 2022])
+
+        sequential = make_app(tmp, batch_workers=0).batch_analyze(paths)
+        app = make_app(tmp, batch_workers=3, batch_resume=False)
+        summary = app.batch_analyze(paths)
+
+        assert (summary['total'], summary['success'], summary['failed']) == (4, 4, 0)
+        assert [result.year for result in summary['results']] == ['2021', '2019', '2020', '2022']
+        assert ([result.get_question_count() for result in summary['results']]
+                == [result.get_question_count() for result in sequential['results']])
+        assert app.excel_manager.transactions[0].committed
+
+        assert [record['file'] for record in summary['files']] == paths
+        assert all(record['status'] == 'ok' and record['results'] == 1 and record['elapsed'] >= 0
+                   for record in summary['files'])
+        assert summary['elapsed'] > 0
+
+
+def test_hang_and_crash_are_isolated():
+    """止まったファイル・ワーカーを落としたファイルだけが失敗になり、他は保存されること"""
+    original = EntranceExamAnalyzer._analyze_file
+
+    def analyze_or_misbehave(self, file_path):
+        if '2019' in file_path.name:
+            time.sleep(60)
+        if '2020' in file_path.name:
+            os._exit(1)
+        return original(self, file_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp, [2018, 2019, 2020, 2021])
+        missing = tmp / '麻布中学校2017年度国語.txt'
+        paths.append(missing)
+
+        # ワーカーは fork で起動するため、差し替えたメソッドを引き継ぐ
+        EntranceExamAnalyzer._analyze_file = analyze_or_misbehave
+        try:
+            app = make_app(tmp, batch_workers=2, batch_timeout=1)
+            start = time.monotonic()
+            summary = app.batch_analyze(paths)
+        finally:
+            EntranceExamAnalyzer._analyze_file = original
+
+        assert time.monotonic() - start < 20
+        statuses = [record['status'] for record in summary['files']]
+        assert statuses == ['ok', 'timeout', 'crashed', 'ok', 'error']
+        assert summary['failed_files'] == [paths[1], paths[2], missing]
+        assert [result.year for result in summary['results']] == ['2018', '2021']
+        assert summary['files'][1]['elapsed'] >= 1
+
+
+if __name__ == "__main__":
+    test_parallel_matches_in_process()
+    test_hang_and_crash_are_isolated()
+    print("✅ すべてのテストに合格しました")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+バッチ分析ジャーナルのテスト
+保存まで完了したファイルだけが次回スキップされ、失敗・内容の変わったファイル・
+中断時に保存前だったファイルは再分析されることを確認
+"""
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.application import EntranceExamAnalyzer
+from processors.batch_journal import BatchJournal, JOURNAL_DONE, JOURNAL_FAILED
+from batch_test_helpers import SAMPLE_TEXT, make_app, make_files
+
+
+def test_journal_matches_content_analyzer_and_target():
+    """内容・分析器・保存先のどれかが変わった記録は完了とみなさないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        journal = BatchJournal(tmp / 'journal.jsonl', 'v1', target='a.xlsx')
+        journal.record(tmp / 'a.txt', 'hash-a', JOURNAL_DONE, results=1)
+        journal.record(tmp / 'b.txt', 'hash-b', JOURNAL_FAILED, error='broken')
+        # 書き込み途中で終了した行
+        with open(tmp / 'journal.jsonl', 'a', encoding='utf-8') as f:
+            f.write('{"version": 1, "path": ')
+
+        reloaded = BatchJournal(tmp / 'journal.jsonl', 'v1', target='a.xlsx')
+        assert reloaded.is_done(tmp / 'a.txt', 'hash-a')
+        assert reloaded.status(tmp / 'b.txt', 'hash-b') == JOURNAL_FAILED
+        assert not reloaded.is_done(tmp / 'a.txt', 'hash-changed')
+        assert not BatchJournal(tmp / 'journal.jsonl', 'v2', target='a.xlsx').is_done(tmp / 'a.txt', 'hash-a')
+        assert not BatchJournal(tmp / 'journal.jsonl', 'v1', target='b.xlsx').is_done(tmp / 'a.txt', 'hash-a')
+
+
+def test_rerun_skips_done_and_retries_failures():
+    """再実行では完了したファイルをスキップし、失敗・変更されたファイルだけを分析すること"""
+    original = EntranceExamAnalyzer._analyze_file
+    fail = {'2020'}
+
+    def analyze_or_fail(self, file_path):
+        if any(year in file_path.name for year in fail):
+            raise ValueError('broken')
+        return original(self, file_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp, [2019, 2020, 2021], cycle=1)
+        EntranceExamAnalyzer._analyze_file = analyze_or_fail
+        try:
+            first = make_app(tmp, batch_workers=0).batch_analyze(paths)
+            assert (first['success'], first['failed'], first['skipped']) == (2, 1, 0)
+
+            fail.clear()
+            paths[2].write_text('2021年度\n' + SAMPLE_TEXT * 2, encoding='utf-8')
+            app = make_app(tmp, batch_workers=0)
+            second = app.batch_analyze(paths)
+            assert app.excel_manager.saved == ['2020', '2021']
+            assert [record['status'] for record in second['files']] == ['skipped', 'ok', 'ok']
+            assert (second['success'], second['failed'], second['skipped']) == (2, 0, 1)
+
+            # --force 相当: 記録を無視してすべて分析
+            app = make_app(tmp, batch_workers=0, batch_resume=False)
+            third = app.batch_analyze(paths)
+            assert app.excel_manager.saved == ['2019', '2020', '2021']
+            assert third['skipped'] == 0
+        finally:
+            EntranceExamAnalyzer._analyze_file = original
+
+
+def test_interrupted_run_resumes_after_last_save():
+    """途中で終了した場合、保存済みのファイルだけが完了として記録されること"""
+    original = EntranceExamAnalyzer._analyze_file
+
+    def analyze_or_die(self, file_path):
+        if '2022' in file_path.name:
+            raise KeyboardInterrupt
+        return original(self, file_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp, [2019, 2020, 2021, 2022, 2023], cycle=1)
+        EntranceExamAnalyzer._analyze_file = analyze_or_die
+        try:
+            app = make_app(tmp, batch_workers=0, batch_commit_interval=2)
+            try:
+                app.batch_analyze(paths)
+                assert False, 'KeyboardInterrupt expected'
+            except KeyboardInterrupt:
+                pass
+            assert app.excel_manager.saved == ['2019', '2020']
+        finally:
+            EntranceExamAnalyzer._analyze_file = original
+
+        app = make_app(tmp, batch_workers=0, batch_commit_interval=2)
+        summary = app.batch_analyze(paths)
+        assert app.excel_manager.saved == ['2021', '2022', '2023']
+        assert summary['skipped'] == 2
+
+
+if __name__ == "__main__":
+    test_journal_matches_content_analyzer_and_target()
+    test_rerun_skips_done_and_retries_failures()
+    test_interrupted_run_resumes_after_last_save()
+    print("✅ すべてのテストに合格しました")
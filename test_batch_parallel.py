@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+BatchAnalyzer の並列分析のテスト
+batch_config.json の並列設定に従い、逐次と同じ結果を同じ順番で返すこと、
+止まったファイルが全体を止めないことを確認
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from batch_analyzer import BatchAnalyzer, load_batch_config
+from config.settings import Settings
+from batch_test_helpers import make_files
+
+
+def make_analyzer(tmp: Path, parallel: bool, timeout=None) -> BatchAnalyzer:
+    config = {'batch_processing': {'parallel_mode': parallel, 'max_workers': 3,
+                                   'timeout_seconds': timeout}}
+    return BatchAnalyzer(str(tmp / 'out.xlsx'), config=config)
+
+
+def comparable(results):
+    return [{key: value for key, value in result.items() if key != 'analysis_date'} for result in results]
+
+
+def test_parallel_matches_sequential():
+    """並列でも逐次と同じ結果がファイル名の順番で返ること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        folder = tmp / 'texts'
+        folder.mkdir()
+        make_files(folder, range(2015, 2020))
+
+        sequential = make_analyzer(tmp, parallel=False).analyze_folder(str(folder))
+        analyzer = make_analyzer(tmp, parallel=True)
+        parallel = analyzer.analyze_folder(str(folder))
+
+        assert len(parallel) == 5
+        assert [result['filename'] for result in parallel] == sorted(path.name for path in folder.iterdir())
+        assert comparable(parallel) == comparable(sequential)
+        assert analyzer.results == parallel and analyzer.failures == []
+
+
+def test_hanging_file_times_out():
+    """制限時間を超えたファイルだけが失敗として記録され、他のファイルは分析されること"""
+    original = BatchAnalyzer.analyze_single_file
+
+    def analyze_or_hang(self, file_path):
+        if '2016' in file_path:
+            time.sleep(60)
+        return original(self, file_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        folder = tmp / 'texts'
+        folder.mkdir()
+        make_files(folder, range(2015, 2019))
+
+        # ワーカーは fork で起動するため、差し替えたメソッドを引き継ぐ
+        BatchAnalyzer.analyze_single_file = analyze_or_hang
+        try:
+            analyzer = make_analyzer(tmp, parallel=True, timeout=1)
+            start = time.monotonic()
+            results = analyzer.analyze_folder(str(folder))
+        finally:
+            BatchAnalyzer.analyze_single_file = original
+
+        assert time.monotonic() - start < 15
+        assert [result['filename'][5:9] for result in results] == ['2015', '2017', '2018']
+        assert len(analyzer.failures) == 1
+        file_path, status, _ = analyzer.failures[0]
+        assert '2016' in file_path and status == 'timeout'
+
+
+def test_load_batch_config():
+    """設定ファイルを読み込み、ない・壊れている場合は空の設定になること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        assert load_batch_config(tmp / 'missing.json') == {}
+        (tmp / 'broken.json').write_text('{', encoding='utf-8')
+        assert load_batch_config(tmp / 'broken.json') == {}
+    assert load_batch_config()['batch_processing']['parallel_mode'] is True
+
+
+def test_engines_share_batch_config():
+    """EntranceExamAnalyzer のバッチ分析も batch_config.json のワーカー数と、OCRを含む分析用の制限時間を使うこと"""
+    options = load_batch_config()['batch_processing']
+    assert Settings.get_batch_max_workers() == options['max_workers']
+    assert Settings.get_batch_timeout_seconds() == options['app_timeout_seconds'] == Settings.BATCH_TIMEOUT_SECONDS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'batch_config.json'
+        path.write_text('{"batch_processing": {"parallel_mode": false, "timeout_seconds": 5}}', encoding='utf-8')
+        with patch.object(Settings, 'BATCH_CONFIG_PATH', path):
+            assert Settings.get_batch_max_workers() == 0
+            # テキストだけの分析用の制限時間は使わない
+            assert Settings.get_batch_timeout_seconds() == Settings.BATCH_TIMEOUT_SECONDS
+        path.write_text('{"batch_processing": {"app_timeout_seconds": 900}}', encoding='utf-8')
+        with patch.object(Settings, 'BATCH_CONFIG_PATH', path):
+            assert Settings.get_batch_timeout_seconds() == 900
+        # 設定ファイルがない場合は Settings の値
+        with patch.object(Settings, 'BATCH_CONFIG_PATH', Path(tmp) / 'missing.json'):
+            assert Settings.get_batch_max_workers() == Settings.BATCH_MAX_WORKERS
+            assert Settings.get_batch_timeout_seconds() == Settings.BATCH_TIMEOUT_SECONDS
+
+
+if __name__ == "__main__":
+    test_parallel_matches_sequential()
+    test_hanging_file_times_out()
+    test_load_batch_config()
+    test_engines_share_batch_config()
+    print("✅ すべてのテストに合格しました")
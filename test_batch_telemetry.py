@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+バッチ処理の計測のテスト
+段階ごとの処理時間がワーカープロセスからも集まり、パーセンタイル・処理速度・
+残り時間・遅いファイルがJSONのレポートに書き出されることを確認
+"""
+import sys
+import os
+import json
+import time
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from batch_analyzer import BatchAnalyzer
+from utils.batch_telemetry import BatchTelemetry, StageTimer, percentile, timed_stage
+from batch_test_helpers import make_app, make_files
+
+
+def test_percentile():
+    """隣り合う値の間を線形補間すること"""
+    values = list(range(100, 0, -1))
+    assert percentile(values, 50) == 50.5
+    assert abs(percentile(values, 95) - 95.05) < 1e-9
+    assert abs(percentile(values, 99) - 99.01) < 1e-9
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_stage_timer_records_only_when_active():
+    """計測中のファイルにだけ記録し、同じ段階は合計すること"""
+    with timed_stage('split'):
+        pass  # 計測していなければ何もしない
+
+    with StageTimer().activate() as timer:
+        for _ in range(2):
+            with timed_stage('split'):
+                time.sleep(0.01)
+    assert list(timer.timings) == ['split']
+    assert timer.timings['split'] >= 0.02
+
+    with timed_stage('split'):
+        time.sleep(0.01)
+    assert timer.timings['split'] < 0.05
+
+
+def test_report_throughput_and_slowest_files():
+    """処理速度・残り時間・段階ごとの統計・遅いファイルをまとめること"""
+    telemetry = BatchTelemetry(total_files=4)
+    telemetry.record_file('a.txt', 'ok', 0.3, {'load': 0.1, 'split': 0.2})
+    telemetry.record_file('b.txt', 'timeout', 5.0)
+    telemetry.record_file('c.txt', 'ok', 1.0, {'load': 0.3, 'split': 0.7})
+    with telemetry.stage('excel'):
+        time.sleep(0.01)
+
+    report = telemetry.report(slowest=2)
+    assert report['processed_files'] == 3
+    assert report['statuses'] == {'ok': 2, 'timeout': 1}
+    assert report['files_per_second'] > 0 and report['eta_seconds'] > 0
+    assert report['stages']['split']['count'] == 2
+    assert abs(report['stages']['split']['p50'] - 0.45) < 1e-9
+    assert report['stages']['excel']['count'] == 1
+    assert [record['file'] for record in report['slowest_files']] == ['b.txt', 'c.txt']
+
+    telemetry.record_file('d.txt', 'ok', 0.1)
+    assert telemetry.eta_seconds() == 0.0
+    assert any(line.strip().startswith('split') for line in telemetry.to_lines())
+
+
+def test_batch_analyze_collects_stages_from_workers():
+    """ワーカープロセスで測った段階の時間を集め、JSONのレポートに書き出すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp / 'texts', range(2011, 2014))
+
+        for workers in (0, 2):
+            app = make_app(tmp, batch_workers=workers, batch_resume=False,
+                           batch_report_path=tmp / f'report_{workers}.json')
+            summary = app.batch_analyze(paths)
+
+            assert summary['report_path'] == tmp / f'report_{workers}.json'
+            report = json.loads(summary['report_path'].read_text(encoding='utf-8'))
+            assert report['processed_files'] == 3 and report['statuses'] == {'ok': 3}
+            assert {'load', 'split', 'sources', 'questions', 'excel'} <= set(report['stages'])
+            assert report['stages']['load']['count'] == 3
+            assert set(report['stages']['load']) >= {'p50', 'p95', 'p99', 'total'}
+            assert len(report['slowest_files']) == 3
+
+
+def test_batch_analyzer_report():
+    """BatchAnalyzer も段階ごとの処理時間を集め、Excelファイルの隣にレポートを書き出すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        make_files(tmp / 'texts', range(2011, 2014))
+        analyzer = BatchAnalyzer(str(tmp / 'out.xlsx'), config={'batch_processing': {'parallel_mode': False}})
+        analyzer.formatter.save_rows_to_excel = lambda rows, backup=True: True
+        analyzer.analyze_folder(str(tmp / 'texts'))
+        analyzer.save_to_excel()
+
+        path = analyzer.write_report()
+        assert path == tmp / 'out_batch_report.json'
+        report = json.loads(path.read_text(encoding='utf-8'))
+        assert report['processed_files'] == 3
+        assert {'load', 'split', 'sources', 'questions', 'excel'} <= set(report['stages'])
+
+
+if __name__ == "__main__":
+    test_percentile()
+    test_stage_timer_records_only_when_active()
+    test_report_throughput_and_slowest_files()
+    test_batch_analyze_collects_stages_from_workers()
+    test_batch_analyzer_report()
+    print("✅ すべてのテストに合格しました")
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+同時書き込みのストレステスト
+複数のプロセス・スレッドから同じワークブックに保存しても行が失われないことを確認
+"""
+import sys
+import os
+import tempfile
+import threading
+import multiprocessing
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules.result_writer import ResultWriter
+from utils.file_lock import FileLock
+from exceptions import LockTimeoutError
+
+PRODUCERS = 6
+ROWS_PER_PRODUCER = 25
+
+
+def increment_counter(lock_path: str, counter_path: str, times: int) -> None:
+    """ロック内でファイルのカウンタを読み込んでから書き込む（ロックがなければ更新が失われる）"""
+    lock = FileLock(Path(lock_path), timeout=30)
+    for _ in range(times):
+        with lock:
+            with open(counter_path, 'r') as f:
+                value = int(f.read() or 0)
+            with open(counter_path, 'w') as f:
+                f.write(str(value + 1))
+
+
+def produce_rows(excel_path: str, producer: int, start=None) -> None:
+    """1つの生産者として、自分の年度の行と全員で共有する行を保存する"""
+    if start is not None:
+        start.wait(30)  # 全員が同時に新しいストアを開く
+    writer = ResultWriter(Path(excel_path))
+    for n in range(ROWS_PER_PRODUCER):
+        writer.upsert({
+            '開成中学校': [{'年度': 1000 * (producer + 1) + n, '総文字数': n, f'生産者{producer}': True}],
+            # 同じ年度の行に各生産者が自分の項目を追加する（読み込んでから書き込む更新）
+            '共有': [{'年度': 2025, f'生産者{producer}_{n}': n}],
+        }, merge=True, export=False)
+    writer.close()
+
+
+def run_processes(target, args_list):
+    processes = [multiprocessing.Process(target=target, args=args) for args in args_list]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+
+def test_file_lock_serializes_processes():
+    """ロックファイルで複数プロセスの読み込み→書き込みが直列化されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        counter = Path(tmp) / 'counter.txt'
+        counter.write_text('0')
+        lock_path = str(Path(tmp) / 'counter.lock')
+        run_processes(increment_counter, [(lock_path, str(counter), 50)] * PRODUCERS)
+        assert int(counter.read_text()) == 50 * PRODUCERS
+
+
+def test_file_lock_threads_and_reentry():
+    """同じプロセスのスレッド間でも直列化され、同じスレッドでは入れ子で取得できること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        counter = Path(tmp) / 'counter.txt'
+        counter.write_text('0')
+        lock_path = str(Path(tmp) / 'counter.lock')
+        threads = [threading.Thread(target=increment_counter, args=(lock_path, str(counter), 50))
+                   for _ in range(PRODUCERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert int(counter.read_text()) == 50 * PRODUCERS
+
+        lock = FileLock(Path(lock_path))
+        with lock:
+            with lock:
+                pass
+
+
+def test_file_lock_nested_instances():
+    """同じロックファイルの別のインスタンスも同じスレッドでは入れ子で取得でき、外側の解放まで保持されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_path = Path(tmp) / 'db.lock'
+        acquired = []
+
+        def try_acquire():
+            try:
+                with FileLock(lock_path, timeout=0.2):
+                    acquired.append(True)
+            except LockTimeoutError:
+                acquired.append(False)
+
+        def acquired_by_other_thread() -> bool:
+            thread = threading.Thread(target=try_acquire)
+            thread.start()
+            thread.join()
+            return acquired.pop()
+
+        outer, inner = FileLock(lock_path, timeout=1), FileLock(lock_path, timeout=1)
+        with outer:
+            with inner:
+                with outer:
+                    pass
+            assert not acquired_by_other_thread()
+        assert acquired_by_other_thread()
+
+
+def test_file_lock_timeout():
+    """他のプロセスが保持している間はタイムアウトすること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_path = Path(tmp) / 'db.lock'
+        ready = multiprocessing.Event()
+        release = multiprocessing.Event()
+        holder = multiprocessing.Process(target=_hold_lock, args=(str(lock_path), ready, release))
+        holder.start()
+        try:
+            assert ready.wait(10)
+            try:
+                with FileLock(lock_path, timeout=0.2):
+                    assert False, 'LockTimeoutError expected'
+            except LockTimeoutError:
+                pass
+        finally:
+            release.set()
+            holder.join(10)
+
+
+def _hold_lock(lock_path, ready, release):
+    with FileLock(Path(lock_path)):
+        ready.set()
+        release.wait(10)
+
+
+def test_concurrent_producers_lose_no_rows():
+    """まだないストアに複数プロセスが同時に保存しても、すべての行・すべての項目が残ること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        excel_path = str(Path(tmp) / 'db.xlsx')
+        assert not Path(excel_path).with_suffix('.sqlite3').exists()
+        start = multiprocessing.Event()
+        threading.Timer(0.5, start.set).start()
+        run_processes(produce_rows, [(excel_path, producer, start) for producer in range(PRODUCERS)])
+
+        writer = ResultWriter(Path(excel_path))
+        store = writer.store
+        rows = store.read_rows('開成中学校')
+        assert len(rows) == PRODUCERS * ROWS_PER_PRODUCER
+        columns = store.sheet_columns('開成中学校')
+        assert all(f'生産者{producer}' in columns for producer in range(PRODUCERS))
+
+        shared = store.read_rows('共有')
+        assert len(shared) == 1
+        assert len(shared[0]) == 1 + PRODUCERS * ROWS_PER_PRODUCER
+        assert set(store.dirty_sheets()) == {'開成中学校', '共有'}
+        writer.close()
+
+
+def test_hand_edits_survive_export():
+    """出力後にExcelで編集した内容が、次の出力で上書きされないこと"""
+    import openpyxl
+
+    with tempfile.TemporaryDirectory() as tmp:
+        excel_path = Path(tmp) / 'db.xlsx'
+        writer = ResultWriter(excel_path)
+        writer.upsert({'開成中学校': [{'年度': 2024, '備考': '自動'}]})
+        # まだExcelに出力していない行
+        writer.upsert({'開成中学校': [{'年度': 2025, '備考': '未出力'}]}, export=False)
+
+        workbook = openpyxl.load_workbook(excel_path)
+        sheet = workbook['開成中学校']
+        header = [cell.value for cell in sheet[1]]
+        sheet.cell(2, header.index('備考') + 1).value = '手で修正'
+        workbook.save(excel_path)
+
+        # 同じインスタンスでも、別のインスタンスでも編集を取り込んでから出力する
+        for current in (writer, ResultWriter(excel_path)):
+            current.upsert({'麻布中学校': [{'年度': 2024, '備考': '自動'}]})
+            assert [row['備考'] for row in current.store.read_rows('開成中学校')] == ['手で修正', '未出力']
+            current.close()
+
+        # 未出力の行も、次に全シートを出力したときに書き出される
+        writer = ResultWriter(excel_path)
+        writer.export()
+        writer.close()
+        workbook = openpyxl.load_workbook(excel_path, read_only=True)
+        values = [row[1:] for row in workbook['開成中学校'].iter_rows(min_row=2, values_only=True)]
+        workbook.close()
+        assert values == [(2024, '手で修正'), (2025, '未出力')]
+
+
+if __name__ == "__main__":
+    test_file_lock_serializes_processes()
+    test_file_lock_threads_and_reentry()
+    test_file_lock_nested_instances()
+    test_file_lock_timeout()
+    test_concurrent_producers_lose_no_rows()
+    test_hand_edits_survive_export()
+    print("✅ すべてのテストに合格しました")
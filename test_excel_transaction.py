@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Excel書き込みトランザクションのテスト
+複数結果の一括保存で、読み込み・バックアップ・書き込みが1回ずつになることを確認
+"""
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from config.settings import Settings
+from models import AnalysisResult, ExcelExportConfig, Section
+from modules.excel_manager import ExcelManager
+
+
+def make_result(school: str, year: str, chars: int = 1000) -> AnalysisResult:
+    """テスト用の分析結果"""
+    return AnalysisResult(
+        school_name=school,
+        year=year,
+        total_characters=chars,
+        sections=[Section(number=1, title='大問1', text='本文' * 400, section_type='文章読解')],
+        questions=[],
+        question_types={'選択': 2, '記述': 1},
+        sources=[]
+    )
+
+
+def make_manager(tmp: Path) -> ExcelManager:
+    Settings.BACKUP_DIR = tmp / 'backups'
+    config = ExcelExportConfig(db_filename=str(tmp / 'db.xlsx'), include_timestamp=False)
+    return ExcelManager(config)
+
+
+def test_transaction_writes_all_results_once():
+    """トランザクション内の結果がまとめて保存され、同じ年度は上書きされること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(Path(tmp))
+        with manager.transaction() as tx:
+            tx.add(make_result('開成中学校', '2024'))
+            tx.add(make_result('開成中学校', '2025'))
+            tx.add(make_result('麻布中学校', '2025'))
+            tx.add(make_result('開成中学校', '2025', chars=2000))
+        assert tx.pending_count == 3
+
+        kaisei = manager.read_school_data('開成中学校')
+        assert list(kaisei['年度']) == [2024, 2025]
+        assert list(kaisei['総文字数']) == [1000, 2000]
+        assert manager.get_all_schools() == ['開成中学校', '麻布中学校']
+
+
+def test_only_affected_sheets_are_read_and_backup_once():
+    """保存時にExcelを読み込まず（ストアから対象シートだけ書き出す）、バックアップは1回だけ作成すること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(Path(tmp))
+        manager.save_analysis_results([make_result(s, '2023') for s in ('開成中学校', '麻布中学校', '武蔵中学校')])
+
+        read_calls = []
+        original_read_excel = pd.read_excel
+
+        def counting_read_excel(io, sheet_name=0, **kwargs):
+            read_calls.append(sheet_name)
+            return original_read_excel(io, sheet_name=sheet_name, **kwargs)
+
+        pd.read_excel = counting_read_excel
+        try:
+            with manager.transaction() as tx:
+                for year in ('2024', '2025'):
+                    tx.add(make_result('開成中学校', year))
+        finally:
+            pd.read_excel = original_read_excel
+
+        assert read_calls == []
+        assert len(manager.list_backups()) == 1
+        assert manager.get_all_schools() == ['開成中学校', '麻布中学校', '武蔵中学校']
+        assert list(manager.read_school_data('麻布中学校')['年度']) == [2023]
+        assert list(manager.read_school_data('開成中学校')['年度']) == [2023, 2024, 2025]
+
+
+def test_rollback_on_error():
+    """withブロック内で例外が起きた場合は何も書き込まないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(Path(tmp))
+        try:
+            with manager.transaction() as tx:
+                tx.add(make_result('開成中学校', '2025'))
+                raise RuntimeError('中断')
+        except RuntimeError:
+            pass
+        assert not manager.db_path.exists()
+
+
+if __name__ == "__main__":
+    test_transaction_writes_all_results_once()
+    test_only_affected_sheets_are_read_and_backup_once()
+    test_rollback_on_error()
+    print("✅ すべてのテストに合格しました")
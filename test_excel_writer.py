@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+分析結果レポート出力のテスト
+ストリーミングモードと通常モードで同じ内容・見た目のレポートになることを確認
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from openpyxl import load_workbook
+
+from modules import excel_writer as excel_writer_module
+from modules.excel_writer import ExcelWriter
+
+
+def make_results(question_count: int = 12) -> dict:
+    """テスト用の分析結果"""
+    return {
+        'total_characters': 12000,
+        'theme': '成長',
+        'sections': [
+            {'source_info': {'author': '重松清', 'title': 'きみの友だち', 'raw_source': '（重松清『きみの友だち』）'}},
+            {'source_info': {}},
+        ],
+        'questions': [
+            {
+                'section': 1 + n % 2,
+                'number': n + 1,
+                'marker': f'問{n + 1}',
+                'type': '記述' if n % 3 == 0 else '選択',
+                'choice_count': '' if n % 3 == 0 else 4,
+                'character_limit': (60, 80) if n % 3 == 0 else '',
+            }
+            for n in range(question_count)
+        ],
+        'question_types': {'記述': 4, '選択': 8},
+        'answer_sheet_info': {'total_points': 100, 'question_points': {'問1': 10}},
+    }
+
+
+def sheet_snapshot(path: Path) -> dict:
+    """シートごとの (値, 太字, 文字サイズ, 塗りつぶし色) と列幅"""
+    wb = load_workbook(path)
+    snapshot = {}
+    for ws in wb.worksheets:
+        cells = {
+            cell.coordinate: (cell.value, cell.font.b, cell.font.sz, cell.fill.fgColor.rgb if cell.fill.fill_type else None)
+            for row in ws.iter_rows() for cell in row if cell.value is not None
+        }
+        widths = {key: dim.width for key, dim in ws.column_dimensions.items() if dim.width}
+        snapshot[ws.title] = (cells, widths)
+    return snapshot
+
+
+def test_streaming_matches_regular_output():
+    """ストリーミングモードの出力が通常モードと同じであること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        results = make_results()
+        regular = ExcelWriter(Path(tmp) / 'regular', write_only=False)
+        streaming = ExcelWriter(Path(tmp) / 'streaming', write_only=True)
+        for writer in (regular, streaming):
+            writer.output_dir.mkdir()
+
+        regular_path = regular.write_analysis_results(results, '開成中学校', '2025')
+        streaming_path = streaming.write_analysis_results(results, '開成中学校', '2025')
+
+        regular_snapshot = sheet_snapshot(regular_path)
+        streaming_snapshot = sheet_snapshot(streaming_path)
+        # 分析日時（B5）は実行時刻なので除外
+        for snapshot in (regular_snapshot, streaming_snapshot):
+            snapshot['サマリー'][0].pop('B5')
+        assert regular_snapshot == streaming_snapshot
+
+        summary_cells = regular_snapshot['サマリー'][0]
+        assert summary_cells['A1'] == ('国語入試問題分析結果', True, 16, None)
+        assert summary_cells['A14'][0] == '設問タイプ'
+        assert summary_cells['A14'][3] == '00D3D3D3'
+        assert regular_snapshot['詳細分析'][0]['F2'][0] == '60～80字'
+
+
+def test_streaming_is_chosen_for_large_results():
+    """write_only を指定しない場合、大きな分析結果ではストリーミングを使うこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = ExcelWriter(Path(tmp))
+        with patch.object(excel_writer_module, 'Workbook', wraps=excel_writer_module.Workbook) as workbook:
+            path = writer.write_analysis_results(
+                make_results(ExcelWriter.STREAMING_ROW_THRESHOLD + 1), '麻布中学校', '2025'
+            )
+            writer.write_analysis_results(make_results(), '麻布中学校', '2024')
+        assert [call.kwargs['write_only'] for call in workbook.call_args_list] == [True, False]
+
+        wb = load_workbook(path, read_only=True)
+        assert sum(1 for _ in wb['詳細分析'].iter_rows()) == ExcelWriter.STREAMING_ROW_THRESHOLD + 2
+
+
+def benchmark_report_generation():
+    """設問数を増やしたときの生成時間を通常モードとストリーミングモードで比較"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for question_count in (2000, 8000):
+            results = make_results(question_count)
+            for write_only in (False, True):
+                writer = ExcelWriter(Path(tmp), write_only=write_only)
+                start = time.perf_counter()
+                writer.write_analysis_results(results, f'学校{question_count}{write_only}', '2025')
+                elapsed = time.perf_counter() - start
+                mode = 'ストリーミング' if write_only else '通常'
+                print(f"{question_count}問 {mode}: {elapsed:.2f}秒")
+
+
+if __name__ == "__main__":
+    test_streaming_matches_regular_output()
+    test_streaming_is_chosen_for_large_results()
+    print("✅ すべてのテストに合格しました")
+    benchmark_report_generation()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+ファイル索引のテスト
+一度の走査で索引を作り、次回はディレクトリの更新時刻で差分だけ読み直すことを確認
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules.file_index import FileIndex
+from modules.file_selector import FileSelector
+
+
+def make_tree(root: Path) -> None:
+    """テスト用の過去問フォルダ"""
+    (root / '開成' / '2024').mkdir(parents=True)
+    (root / 'azabu').mkdir()
+    (root / '開成' / '2024' / '国語.txt').write_text('問題', encoding='utf-8')
+    (root / '開成' / '2025.pdf').write_bytes(b'%PDF')
+    (root / 'azabu' / 'kokugo.TXT').write_text('問題', encoding='utf-8')
+    (root / 'azabu' / 'empty.txt').write_bytes(b'')
+    (root / 'azabu' / 'memo.docx').write_bytes(b'x')
+
+
+def bump_mtime(path: Path) -> None:
+    """ファイルシステムの時刻の粒度に関係なく更新時刻を変える"""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_index_lists_valid_files_with_school():
+    """有効なテキスト・PDFだけを学校名付きで、新しい順に返すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        make_tree(tmp / 'root')
+        os.utime(tmp / 'root' / '開成' / '2025.pdf', (1, 1))
+
+        selector = FileSelector(search_dirs=[tmp / 'root'], index_path=tmp / 'index.json')
+        files = selector._find_all_text_files()
+        names = [path.name for path in files]
+        assert sorted(names) == ['2025.pdf', 'kokugo.TXT', '国語.txt']
+        assert names[-1] == '2025.pdf'
+
+        grouped = selector._group_files_by_school(files)
+        assert sorted(path.name for path in grouped['開成']) == ['2025.pdf', '国語.txt']
+        assert [path.name for path in grouped['麻布']] == ['kokugo.TXT']
+
+
+def test_incremental_refresh():
+    """2回目は更新時刻が変わったディレクトリだけを読み直すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        root = tmp / 'root'
+        make_tree(root)
+        index_path = tmp / 'index.json'
+
+        first = FileIndex(index_path, lambda path: 'その他')
+        assert len(first.refresh([root])) == 3
+        assert first.stats == {'scanned_dirs': 4, 'reused_dirs': 0}
+
+        # 次回の起動（別のインスタンス）
+        second = FileIndex(index_path, lambda path: 'その他')
+        assert len(second.refresh([root])) == 3
+        assert second.stats == {'scanned_dirs': 0, 'reused_dirs': 4}
+
+        # ファイルの追加・削除があったディレクトリだけ読み直す
+        (root / '開成' / '2024' / '追加.txt').write_text('問題', encoding='utf-8')
+        bump_mtime(root / '開成' / '2024')
+        (root / 'azabu' / 'kokugo.TXT').unlink()
+        bump_mtime(root / 'azabu')
+        third = FileIndex(index_path, lambda path: 'その他')
+        names = sorted(entry.path.name for entry in third.refresh([root]))
+        assert names == ['2025.pdf', '国語.txt', '追加.txt']
+        assert third.stats == {'scanned_dirs': 2, 'reused_dirs': 2}
+
+        # 削除されたディレクトリは索引から除かれる
+        for path in (root / 'azabu').iterdir():
+            path.unlink()
+        (root / 'azabu').rmdir()
+        bump_mtime(root)
+        fourth = FileIndex(index_path, lambda path: 'その他')
+        fourth.refresh([root])
+        assert not any('azabu' in path for path in fourth._dirs)
+
+
+def test_empty_files_are_restatted():
+    """0バイトで登録したファイルは、ディレクトリの更新時刻が変わらなくても読み直すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        root = tmp / 'root'
+        make_tree(root)
+        index_path = tmp / 'index.json'
+        assert len(FileIndex(index_path, lambda path: 'その他').refresh([root])) == 3
+
+        # コピーの途中で登録されたファイルに内容が書き込まれた（ディレクトリの更新時刻は同じ）
+        azabu_stat = (root / 'azabu').stat()
+        (root / 'azabu' / 'empty.txt').write_text('問題', encoding='utf-8')
+        os.utime(root / 'azabu', ns=(azabu_stat.st_atime_ns, azabu_stat.st_mtime_ns))
+
+        second = FileIndex(index_path, lambda path: 'その他')
+        names = sorted(entry.path.name for entry in second.refresh([root]))
+        assert names == ['2025.pdf', 'empty.txt', 'kokugo.TXT', '国語.txt']
+        assert second.stats == {'scanned_dirs': 0, 'reused_dirs': 4}
+
+        # 更新した索引は保存される
+        record = FileIndex(index_path, lambda path: 'その他')._dirs[str((root / 'azabu').absolute())]
+        assert record['files']['empty.txt']['size'] > 0
+
+
+def test_depth_limit_and_unreadable_index():
+    """最大深度より深いファイルは含めず、壊れた索引は作り直すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        deep = tmp / 'root' / 'a' / 'b'
+        deep.mkdir(parents=True)
+        (tmp / 'root' / 'a' / 'ok.txt').write_text('x')
+        (deep / 'too_deep.txt').write_text('x')
+        index_path = tmp / 'index.json'
+        index_path.write_text('{broken')
+
+        index = FileIndex(index_path, lambda path: 'その他', max_depth=1)
+        assert [entry.path.name for entry in index.refresh([tmp / 'root', tmp / 'missing'])] == ['ok.txt']
+        assert FileIndex(index_path, lambda path: 'その他')._dirs
+
+
+def benchmark_startup():
+    """初回（全走査）と2回目（索引の再利用）の時間"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for school in range(50):
+            for year in range(20):
+                directory = tmp / 'root' / f'学校{school}' / f'{2000 + year}'
+                directory.mkdir(parents=True)
+                for name in ('国語.txt', '算数.pdf', '解答.txt', 'memo.docx'):
+                    (directory / name).write_text('x')
+        for label in ('初回', '2回目'):
+            selector = FileSelector(search_dirs=[tmp / 'root'], index_path=tmp / 'index.json')
+            start = time.perf_counter()
+            files = selector._find_all_text_files()
+            print(f"{label}: {len(files)}件 {time.perf_counter() - start:.3f}秒")
+
+
+if __name__ == "__main__":
+    test_index_lists_valid_files_with_school()
+    test_incremental_refresh()
+    test_empty_files_are_restatted()
+    test_depth_limit_and_unreadable_index()
+    print("✅ すべてのテストに合格しました")
+    benchmark_startup()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+FileManager のファイルキャッシュのテスト
+LRUでの削除・バイト数の管理・ディスク上の更新の検出・ディスクキャッシュを確認
+"""
+import sys
+import os
+import json
+import time
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from processors.file_manager import FileManager
+
+
+def make_manager(tmp: Path) -> FileManager:
+    return FileManager(cache_dir=tmp / 'cache', allowed_dirs=[tmp])
+
+
+def test_hit_and_miss_counters():
+    """2回目の読み込みはキャッシュから返り、統計に反映されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        manager = make_manager(tmp)
+        path = tmp / 'a.txt'
+        path.write_text('本文' * 100, encoding='utf-8')
+
+        assert manager.read_text_file(path) == '本文' * 100
+        assert manager.read_text_file(path) == '本文' * 100
+
+        stats = manager.get_cache_stats()
+        assert (stats['entries'], stats['hits'], stats['misses'], stats['evictions']) == (1, 1, 1, 0)
+        assert stats['hit_rate'] == 0.5
+        assert stats['size_bytes'] == sys.getsizeof('本文' * 100)
+
+
+def test_modified_file_is_reread():
+    """ディスク上でファイルが更新されたら、期限内でも読み直すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        manager = make_manager(tmp)
+        path = tmp / 'a.txt'
+        path.write_text('old', encoding='utf-8')
+        assert manager.read_text_file(path) == 'old'
+
+        path.write_text('new content', encoding='utf-8')
+        assert manager.read_text_file(path) == 'new content'
+
+        # 同じサイズでも更新時刻が変われば読み直す
+        path.write_text('NEW CONTENT', encoding='utf-8')
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert manager.read_text_file(path) == 'NEW CONTENT'
+        assert manager.get_cache_stats()['misses'] == 3
+
+
+def test_least_recently_used_is_evicted():
+    """上限を超えたら最も長く使われていないエントリから削除されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        manager = make_manager(tmp)
+        paths = []
+        for name in 'abc':
+            path = tmp / f'{name}.txt'
+            path.write_text(name * 1000, encoding='utf-8')
+            paths.append(path)
+        entry_size = sys.getsizeof('a' * 1000)
+        manager.max_cache_size_mb = (2 * entry_size + 10) / (1024 * 1024)
+
+        manager.read_text_file(paths[0])
+        manager.read_text_file(paths[1])
+        manager.read_text_file(paths[0])  # a を最近使ったことにする
+        manager.read_text_file(paths[2])  # b が追い出される
+
+        stats = manager.get_cache_stats()
+        assert stats['entries'] == 2 and stats['evictions'] == 1
+        assert stats['size_bytes'] == 2 * entry_size
+        hits = stats['hits']
+        manager.read_text_file(paths[0])
+        assert manager.get_cache_stats()['hits'] == hits + 1
+        manager.read_text_file(paths[1])
+        assert manager.get_cache_stats()['hits'] == hits + 1
+
+
+def test_write_and_clear_keep_accounting():
+    """書き込み・クリアでエントリとバイト数が正しく差し引かれること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        manager = make_manager(tmp)
+        path = tmp / 'a.txt'
+        manager.write_text_file(path, 'first', backup=False)
+        manager.read_text_file(path)
+        manager.write_text_file(path, 'second', backup=False)
+        assert manager.get_cache_stats()['size_bytes'] == 0
+        assert manager.read_text_file(path) == 'second'
+
+        manager.clear_cache()
+        stats = manager.get_cache_stats()
+        assert stats['entries'] == 0 and stats['size_bytes'] == 0
+
+
+def test_disk_cache_survives_new_instance():
+    """別のインスタンス（次回の起動）ではディスクキャッシュから読み込むこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = tmp / 'a.txt'
+        path.write_text('国語' * 1000, encoding='utf-8')
+        json_path = tmp / 'a.json'
+        json_path.write_text(json.dumps({'学校': ['開成', '麻布']}, ensure_ascii=False), encoding='utf-8')
+
+        first = make_manager(tmp)
+        first.read_text_file(path)
+        first.read_json(json_path)
+        assert first.get_cache_stats()['disk']['writes'] == 2
+
+        second = make_manager(tmp)
+        assert second.read_text_file(path) == '国語' * 1000
+        data = second.read_json(json_path)
+        assert data == {'学校': ['開成', '麻布']}
+        disk = second.get_cache_stats()['disk']
+        assert (disk['hits'], disk['writes'], disk['entries']) == (2, 0, 2)
+        # 圧縮して保存されていること
+        assert disk['size_mb'] * 1024 * 1024 < len(('国語' * 1000).encode('utf-8'))
+
+        # メモリキャッシュからも呼び出しごとに別のオブジェクトが返ること
+        data['学校'].append('桜蔭')
+        assert second.read_json(json_path) == {'学校': ['開成', '麻布']}
+        assert second.get_cache_stats()['hits'] == 1
+
+
+def test_disk_cache_rejects_stale_and_corrupt_entries():
+    """ファイルが更新されたエントリ・壊れたエントリは使わないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = tmp / 'a.txt'
+        path.write_text('old', encoding='utf-8')
+        make_manager(tmp).read_text_file(path)
+
+        path.write_text('new text', encoding='utf-8')
+        manager = make_manager(tmp)
+        assert manager.read_text_file(path) == 'new text'
+        assert manager.get_cache_stats()['disk']['hits'] == 0
+
+        for entry in (tmp / 'cache' / 'files').iterdir():
+            entry.write_bytes(b'broken')
+        manager = make_manager(tmp)
+        assert manager.read_text_file(path) == 'new text'
+        assert manager.get_cache_stats()['disk']['errors'] == 1
+        assert make_manager(tmp).read_text_file(path) == 'new text'
+
+
+def test_disk_cache_size_cap():
+    """ディスクキャッシュが上限を超えたら最終使用が古いものから削除されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        manager = make_manager(tmp)
+        manager.max_disk_cache_mb = 3000 / (1024 * 1024)
+        for n in range(20):
+            path = tmp / f'{n}.txt'
+            path.write_text(os.urandom(200).hex(), encoding='utf-8')
+            manager.read_text_file(path)
+        disk = manager.get_cache_stats()['disk']
+        assert disk['evictions'] > 0
+        assert disk['size_mb'] * 1024 * 1024 <= 3000
+
+        manager.clear_cache(include_disk=True)
+        assert manager.get_cache_stats()['disk']['entries'] == 0
+
+
+def benchmark_cache_inserts():
+    """多数のファイルを読み込んだときの保存時間（以前は保存ごとに全エントリを集計していた）"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        manager = FileManager(cache_dir=tmp / 'cache', allowed_dirs=[tmp], use_disk_cache=False)
+        manager.max_cache_size_mb = 1
+        for n in range(2000):
+            (tmp / f'{n}.txt').write_text('国語' * 500, encoding='utf-8')
+        start = time.perf_counter()
+        for n in range(2000):
+            manager.read_text_file(tmp / f'{n}.txt')
+        elapsed = time.perf_counter() - start
+        print(f"2000ファイル読み込み: {elapsed:.2f}秒 {manager.get_cache_stats()['evictions']}件削除")
+
+
+if __name__ == "__main__":
+    test_hit_and_miss_counters()
+    test_modified_file_is_reread()
+    test_least_recently_used_is_evicted()
+    test_write_and_clear_keep_accounting()
+    test_disk_cache_survives_new_instance()
+    test_disk_cache_rejects_stale_and_corrupt_entries()
+    test_disk_cache_size_cap()
+    print("✅ すべてのテストに合格しました")
+    benchmark_cache_inserts()
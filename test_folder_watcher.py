@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+フォルダ監視のテスト
+追加・変更されたファイルだけを、書き込みが落ち着いてからまとめて分析することを確認
+"""
+import sys
+import os
+import time
+import tempfile
+import threading
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.folder_watcher import FolderWatcher, PollingSource, is_watched_file
+
+
+class RecordingAnalyzer:
+    """batch_analyze の呼び出しを記録する分析器"""
+
+    def __init__(self, fail=(), raise_times=0):
+        self.batches = []
+        self.fail = set(fail)
+        self.raise_times = raise_times
+
+    def batch_analyze(self, file_paths):
+        self.batches.append([path.name for path in file_paths])
+        if self.raise_times:
+            self.raise_times -= 1
+            raise RuntimeError('Excelに保存できません')
+        failed = [path for path in file_paths if path.name in self.fail]
+        return {'total': len(file_paths), 'success': len(file_paths) - len(failed),
+                'failed': len(failed), 'failed_files': failed, 'results': []}
+
+
+def make_watcher(tmp: Path, analyzer, debounce: float = 2.0) -> FolderWatcher:
+    return FolderWatcher(analyzer, tmp / 'watch', state_path=tmp / 'state.json',
+                         debounce_seconds=debounce, use_events=False)
+
+
+def test_debounce_and_batching():
+    """書き込みが落ち着くまで待ち、準備のできたファイルを1回の呼び出しでまとめて分析すること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'watch' / 'sub').mkdir(parents=True)
+        analyzer = RecordingAnalyzer()
+        watcher = make_watcher(tmp, analyzer)
+
+        (tmp / 'watch' / '開成2025.txt').write_text('問題', encoding='utf-8')
+        (tmp / 'watch' / 'sub' / '麻布2025.pdf').write_bytes(b'%PDF')
+        assert watcher.run_once(now=100.0) is None
+        assert watcher.run_once(now=101.0) is None
+
+        # 待っている間に追記されたファイルは待ち直す
+        (tmp / 'watch' / '開成2025.txt').write_text('問題と続き', encoding='utf-8')
+        assert watcher.run_once(now=102.5) is not None
+        assert analyzer.batches == [['麻布2025.pdf']]
+
+        watcher.run_once(now=103.0)
+        watcher.run_once(now=105.0)
+        assert analyzer.batches == [['麻布2025.pdf'], ['開成2025.txt']]
+
+        # 変更がなければ何もしない
+        assert watcher.run_once(now=110.0) is None
+
+
+def test_only_new_or_changed_files_after_restart():
+    """再起動後は未分析・内容の変わったファイルだけを分析すること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'watch').mkdir()
+        for name in ('a.txt', 'b.txt', 'c.txt'):
+            (tmp / 'watch' / name).write_text(name, encoding='utf-8')
+        analyzer = RecordingAnalyzer()
+        watcher = make_watcher(tmp, analyzer)
+        watcher.run_once(now=0.0)
+        watcher.run_once(now=10.0)
+        assert analyzer.batches == [['a.txt', 'b.txt', 'c.txt']]
+
+        # 停止中に追加・変更・タッチのみ
+        (tmp / 'watch' / 'd.txt').write_text('d', encoding='utf-8')
+        (tmp / 'watch' / 'a.txt').write_text('a changed', encoding='utf-8')
+        stat = (tmp / 'watch' / 'b.txt').stat()
+        os.utime(tmp / 'watch' / 'b.txt', ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+
+        restarted = RecordingAnalyzer()
+        watcher = make_watcher(tmp, restarted)
+        watcher.run_once(now=0.0)
+        watcher.run_once(now=10.0)
+        assert restarted.batches == [['a.txt', 'd.txt']]
+
+
+def test_failed_files_are_retried_when_changed():
+    """失敗したファイルは内容が変わったとき（または再起動時）に再試行すること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'watch').mkdir()
+        path = tmp / 'watch' / 'bad.txt'
+        path.write_text('broken', encoding='utf-8')
+        analyzer = RecordingAnalyzer(fail={'bad.txt'})
+        watcher = make_watcher(tmp, analyzer)
+        watcher.run_once(now=0.0)
+        watcher.run_once(now=10.0)
+        watcher.run_once(now=20.0)
+        assert analyzer.batches == [['bad.txt']]
+
+        path.write_text('fixed text', encoding='utf-8')
+        analyzer.fail.clear()
+        watcher.run_once(now=30.0)
+        watcher.run_once(now=40.0)
+        assert analyzer.batches == [['bad.txt'], ['bad.txt']]
+
+
+def test_files_are_requeued_when_batch_raises():
+    """分析中に例外が起きても監視を続け、同じファイルをデバウンスの後に再試行すること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'watch').mkdir()
+        (tmp / 'watch' / 'a.txt').write_text('a', encoding='utf-8')
+        analyzer = RecordingAnalyzer(raise_times=1)
+        watcher = make_watcher(tmp, analyzer)
+        watcher.run_once(now=0.0)
+        assert watcher.run_once(now=10.0) is None
+        assert analyzer.batches == [['a.txt']]
+        assert not watcher.state_path.exists()  # 分析済みとして記録しない
+
+        assert watcher.run_once(now=11.0) is None  # デバウンスの待ち時間をやり直す
+        assert watcher.run_once(now=20.0) is not None
+        assert analyzer.batches == [['a.txt'], ['a.txt']]
+        assert watcher.run_once(now=30.0) is None
+
+
+def test_run_survives_batch_errors():
+    """監視ループは分析中の例外で止まらないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'watch').mkdir()
+        (tmp / 'watch' / 'a.txt').write_text('a', encoding='utf-8')
+        analyzer = RecordingAnalyzer(raise_times=1)
+        watcher = make_watcher(tmp, analyzer, debounce=0.1)
+        watcher.poll_interval = 0.05
+        stop = threading.Event()
+        thread = threading.Thread(target=watcher.run, args=(stop,))
+        thread.start()
+        try:
+            deadline = time.monotonic() + 5
+            while len(analyzer.batches) < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert thread.is_alive()
+        finally:
+            stop.set()
+            thread.join(5)
+        assert analyzer.batches == [['a.txt'], ['a.txt']]
+
+
+def test_ignored_files():
+    """OCR結果・一時ファイル・隠しファイル・空のファイルは分析しないこと"""
+    assert is_watched_file(Path('開成2025.TXT'))
+    for name in ('開成2025.ocr.txt', '.開成.txt', '~$memo.txt', 'a.pdf.part', 'memo.docx'):
+        assert not is_watched_file(Path(name)), name
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'watch').mkdir()
+        (tmp / 'watch' / 'empty.txt').write_bytes(b'')
+        (tmp / 'watch' / 'scan.ocr.txt').write_text('x')
+        analyzer = RecordingAnalyzer()
+        watcher = make_watcher(tmp, analyzer)
+        watcher.run_once(now=0.0)
+        assert watcher.run_once(now=10.0) is None
+
+
+def test_polling_source_reports_changes_only():
+    """走査のたびに全件ではなく、前回から変わったファイルだけを返すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'a.txt').write_text('a')
+        source = PollingSource(tmp)
+        assert {path.name for path in source.poll()} == {'a.txt'}
+        assert source.poll() == set()
+        (tmp / 'b.txt').write_text('b')
+        assert {path.name for path in source.poll()} == {'b.txt'}
+
+
+def test_run_picks_up_new_files_within_seconds():
+    """監視中に置かれたファイルが数秒以内に分析されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / 'watch').mkdir()
+        analyzer = RecordingAnalyzer()
+        watcher = make_watcher(tmp, analyzer, debounce=0.2)
+        watcher.poll_interval = 0.05
+        stop = threading.Event()
+        thread = threading.Thread(target=watcher.run, args=(stop,))
+        thread.start()
+        try:
+            time.sleep(0.2)
+            (tmp / 'watch' / '桜蔭2025.txt').write_text('問題', encoding='utf-8')
+            deadline = time.monotonic() + 5
+            while not analyzer.batches and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join(5)
+        assert analyzer.batches == [['桜蔭2025.txt']]
+
+
+if __name__ == "__main__":
+    test_debounce_and_batching()
+    test_only_new_or_changed_files_after_restart()
+    test_failed_files_are_retried_when_changed()
+    test_files_are_requeued_when_batch_raises()
+    test_run_survives_batch_errors()
+    test_ignored_files()
+    test_polling_source_reports_changes_only()
+    test_run_picks_up_new_files_within_seconds()
+    print("✅ すべてのテストに合格しました")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+CLIの起動時間のテスト
+--version・--list-schools・--list-plugins などの管理コマンドが分析器や
+pandas などの重いライブラリを読み込まず、読み込み時間の予算内に収まることを確認
+"""
+import sys
+import os
+import json
+import time
+import subprocess
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.cli import CLI
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 管理コマンド
+METADATA_COMMANDS = ['--version', '--list-schools', '--list-plugins']
+
+# 管理コマンドで読み込まないモジュール（使うときに読み込む）
+HEAVY_MODULES = [
+    'pandas', 'numpy', 'openpyxl', 'PIL', 'pdf2image', 'fitz', 'google.cloud.vision',
+    'multiprocessing', 'core.application', 'modules.excel_manager', 'modules.universal_analyzer',
+]
+
+# core.cli の読み込み時間の予算（秒、以前は pandas などを含めて約0.3秒）
+IMPORT_BUDGET_SECONDS = 0.15
+
+
+def run_python(code: str) -> str:
+    """別プロセスで実行して標準出力を返す（読み込み済みのモジュールの影響を受けないため）"""
+    result = subprocess.run([sys.executable, '-c', code], cwd=PACKAGE_DIR,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def loaded_modules(args) -> list:
+    """CLIを実行した後に読み込まれている重いモジュール"""
+    code = (
+        "import sys, json, contextlib, io\n"
+        "from core.cli import CLI\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    try:\n"
+        f"        CLI().run({args!r})\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    return json.loads(run_python(code).strip().splitlines()[-1])
+
+
+def import_seconds() -> float:
+    """core.cli の読み込み時間（別プロセス、3回の最小値）"""
+    code = ("import time\nstart = time.perf_counter()\nimport core.cli\n"
+            "print(time.perf_counter() - start)")
+    return min(float(run_python(code)) for _ in range(3))
+
+
+def test_metadata_commands_skip_heavy_modules():
+    """管理コマンドでは分析器・pandas などを読み込まないこと"""
+    for command in METADATA_COMMANDS:
+        assert loaded_modules([command]) == [], command
+
+
+def test_import_within_budget():
+    """core.cli の読み込みが予算内に収まること"""
+    seconds = import_seconds()
+    assert seconds < IMPORT_BUDGET_SECONDS, f"core.cli の読み込みに{seconds:.3f}秒かかりました"
+
+
+def test_app_is_created_on_first_use():
+    """分析アプリケーションは最初に使うときに作成すること"""
+    cli = CLI()
+    assert cli._app is None
+    assert cli.run(['--list-schools']) == 0
+    assert cli._app is None
+    from core.application import EntranceExamAnalyzer
+    assert isinstance(cli.app, EntranceExamAnalyzer)
+    assert cli.app is cli.app
+
+
+def benchmark_metadata_commands():
+    """管理コマンドの起動から終了までの時間（5回の最小値）"""
+    print(f"core.cli の読み込み: {import_seconds():.3f}秒 (予算 {IMPORT_BUDGET_SECONDS}秒)")
+    for command in METADATA_COMMANDS:
+        best = float('inf')
+        for _ in range(5):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, 'main.py', command], cwd=PACKAGE_DIR, capture_output=True)
+            best = min(best, time.perf_counter() - start)
+        print(f"main.py {command}: {best:.3f}秒")
+
+
+if __name__ == "__main__":
+    test_metadata_commands_skip_heavy_modules()
+    test_import_within_budget()
+    test_app_is_created_on_first_use()
+    print("✅ すべてのテストに合格しました")
+    benchmark_metadata_commands()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+大問単位の差分再分析のテスト
+変更のない大問の結果再利用と、全体を再分析した場合との結果一致を確認
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Section
+from modules.universal_analyzer import UniversalAnalyzer
+from modules.incremental_analyzer import IncrementalAnalyzer, section_content_hash
+
+
+def build_exam_text(second_body: str = "第二の文章が続く。") -> str:
+    """3つの大問からなる試験テキストを生成"""
+    return (
+        "二〇二五年度 入学試験問題 国語\n\n"
+        "一、次の文章を読んで、後の問いに答えなさい。\n" + "吾輩は猫である。名前はまだ無い。" * 60 +
+        "\n（夏目漱石『吾輩は猫である』による）\n"
+        "問一　傍線部①とはどういうことか。三十字以内で説明しなさい。\n"
+        "問二　最も適当なものを次のア～エから選びなさい。\nア．希望　イ．絶望　ウ．期待　エ．不安\n\n"
+        "二、次の文章を読んで、後の問いに答えなさい。\n" + second_body * 80 +
+        "\n（森鴎外『高瀬舟』による）\n"
+        "問一　なぜか。理由を五十字以内で説明しなさい。\n問二　文中から十字で抜き出しなさい。\n\n"
+        "三、次の各問いに答えなさい。\n問一　次のカタカナを漢字に直しなさい。\n" +
+        "①ケントウ ②シュウリ ③カンケツ\n" * 20 +
+        "問二　次の漢字の読みをひらがなで書きなさい。\n" + "④往来 ⑤貿易\n" * 20
+    )
+
+
+def snapshot(result):
+    """比較用に分析結果を文字列化（差分レポートは除く）"""
+    data = {k: v for k, v in vars(result).items() if k != 'section_diff'}
+    data['sections'] = [vars(section) for section in result.sections]
+    return repr(data)
+
+
+def test_matches_full_analysis():
+    """差分再分析の結果が全体の再分析と一致すること"""
+    analyzer = UniversalAnalyzer()
+    incremental = IncrementalAnalyzer(analyzer)
+    original = build_exam_text()
+    edited = build_exam_text("修正した第二の文章。")
+
+    first = incremental.analyze(original, '開成中学校', '2025')
+    assert snapshot(first) == snapshot(analyzer.analyze(original, '開成中学校', '2025'))
+    assert not first.section_diff.previous_found
+    assert first.section_diff.reanalyzed_count == 3
+
+    second = incremental.analyze(edited, '開成中学校', '2025')
+    assert snapshot(second) == snapshot(analyzer.analyze(edited, '開成中学校', '2025'))
+
+
+def test_only_changed_sections_are_reanalyzed():
+    """修正した大問だけが再分析され、差分レポートに載ること"""
+    incremental = IncrementalAnalyzer(UniversalAnalyzer())
+    incremental.analyze(build_exam_text(), '開成中学校', '2025', document_key='kaisei.ocr.txt')
+
+    calls = []
+    original_analyze_section = incremental.analyzer.analyze_section
+    incremental.analyzer.analyze_section = lambda section: calls.append(section.number) or original_analyze_section(section)
+
+    result = incremental.analyze(build_exam_text("修正した第二の文章。"), '開成中学校', '2025',
+                                 document_key='kaisei.ocr.txt')
+    report = result.section_diff
+    assert calls == [2]
+    assert report.previous_found
+    assert [c.number for c in report.sections_with('changed')] == [2]
+    assert [c.number for c in report.sections_with('unchanged')] == [1, 3]
+    assert report.reused_count == 2 and report.reanalyzed_count == 1
+    assert any('[変更] 大問2' in line for line in report.to_lines())
+
+
+def test_removed_section_and_shared_records():
+    """削除された大問が報告され、再利用した結果が前回の結果と共有されないこと"""
+    incremental = IncrementalAnalyzer(UniversalAnalyzer())
+    text = build_exam_text()
+    first = incremental.analyze(text, '開成中学校', '2025', document_key='doc')
+
+    truncated = text[:text.index("三、次の各問いに答えなさい。")]
+    second = incremental.analyze(truncated, '開成中学校', '2025', document_key='doc')
+    assert [c.number for c in second.section_diff.sections_with('removed')] == [3]
+
+    second.sections[0].question_details['選択']['count'] = 99
+    assert first.sections[0].question_details['選択']['count'] != 99
+
+
+def test_report_matches_sections_by_hash_first():
+    """前に大問が挿入されて番号がずれても、内容が同じ大問は変更なしと報告すること"""
+    incremental = IncrementalAnalyzer(UniversalAnalyzer())
+    bodies = ['第一の文章', '第二の文章', '第三の文章']
+    sections = [Section(number=n, title=f'大問{n}', text=body) for n, body in enumerate(bodies, 1)]
+    incremental._save_manifest('doc', sections, [section_content_hash(s) for s in sections])
+
+    # 先頭に大問を挿入し、元の大問3を書き換える
+    bodies = ['挿入した文章', '第一の文章', '第二の文章', '書き換えた文章']
+    sections = [Section(number=n, title=f'大問{n}', text=body) for n, body in enumerate(bodies, 1)]
+    hashes = [section_content_hash(s) for s in sections]
+    report = incremental._build_report('doc', sections, hashes, [False, True, True, False])
+
+    assert [(c.number, c.status) for c in report.changes] == [
+        (1, 'added'), (2, 'unchanged'), (3, 'unchanged'), (4, 'added'), (3, 'removed'),
+    ]
+    assert report.reused_count == 2 and report.reanalyzed_count == 2
+
+    # 内容の一致しない大問は同じ番号の大問と対応づける
+    edited = [Section(number=n, title=f'大問{n}', text=body + '（修正）') for n, body in enumerate(bodies, 1)]
+    report = incremental._build_report('doc', edited, [section_content_hash(s) for s in edited], [False] * 4)
+    assert [(c.number, c.status) for c in report.changes] == [(1, 'changed'), (2, 'changed'), (3, 'changed'), (4, 'added')]
+
+
+def test_persistent_store_across_runs():
+    """保存ディレクトリの記録を別のインスタンス（再実行）でも再利用すること"""
+    text = build_exam_text()
+    edited = build_exam_text("修正した第二の文章。")
+    with tempfile.TemporaryDirectory() as tmp:
+        IncrementalAnalyzer(UniversalAnalyzer(), store_dir=tmp, fingerprint='v1').analyze(
+            text, '開成中学校', '2025', document_key='doc')
+
+        rerun = IncrementalAnalyzer(UniversalAnalyzer(), store_dir=tmp, fingerprint='v1')
+        report = rerun.analyze(edited, '開成中学校', '2025', document_key='doc').section_diff
+        assert report.previous_found
+        assert report.reused_count == 2
+        assert [c.number for c in report.sections_with('changed')] == [2]
+
+        # 分析器が変わった場合は記録を使わない
+        upgraded = IncrementalAnalyzer(UniversalAnalyzer(), store_dir=tmp, fingerprint='v2')
+        report = upgraded.analyze(edited, '開成中学校', '2025', document_key='doc').section_diff
+        assert not report.previous_found
+        assert report.reused_count == 0
+
+
+def test_records_are_not_shared_with_results():
+    """新しく分析した結果・保存ディレクトリから読み込んだ記録を変更しても、記録は変わらないこと"""
+    text = build_exam_text()
+    with tempfile.TemporaryDirectory() as tmp:
+        incremental = IncrementalAnalyzer(UniversalAnalyzer(), store_dir=tmp)
+        first = incremental.analyze(text, '開成中学校', '2025', document_key='doc')
+        expected = first.sections[0].question_details['選択']['count']
+        first.sections[0].question_details['選択']['count'] = 99
+        assert incremental.analyze(text, '開成中学校', '2025').sections[0].question_details['選択']['count'] == expected
+
+        rerun = IncrementalAnalyzer(UniversalAnalyzer(), store_dir=tmp)
+        second = rerun.analyze(text, '開成中学校', '2025', document_key='doc')
+        assert second.section_diff.reused_count == 3
+        second.sections[0].question_details['選択']['count'] = 99
+        assert rerun.analyze(text, '開成中学校', '2025').sections[0].question_details['選択']['count'] == expected
+
+
+def test_store_size_is_capped():
+    """保存ディレクトリが上限を超えたら、最近使われていない記録から削除すること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        incremental = IncrementalAnalyzer(UniversalAnalyzer(), store_dir=tmp, max_size_mb=0.005)  # 約5KB
+        for i in range(8):
+            incremental.analyze(build_exam_text(f"第{i}版の文章。"), '開成中学校', '2025', document_key=f'doc{i}')
+
+        files = [p for p in tmp.rglob('*') if p.is_file()]
+        total = sum(p.stat().st_size for p in files)
+        assert incremental.evictions > 0
+        assert total <= incremental.max_size_bytes
+        assert incremental._total_bytes == total
+        assert not any(p.name.endswith('.tmp') for p in files)
+
+
+def benchmark_single_section_edit(repeat: int = 5):
+    """1つの大問を修正して再実行したときの時間を全体再分析と比較"""
+    analyzer = UniversalAnalyzer()
+    incremental = IncrementalAnalyzer(analyzer)
+    incremental.analyze(build_exam_text(), '開成中学校', '2025')
+
+    started = time.perf_counter()
+    for i in range(repeat):
+        analyzer.analyze(build_exam_text(f"修正{i}回目の文章。"), '開成中学校', '2025')
+    full = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for i in range(repeat):
+        incremental.analyze(build_exam_text(f"修正{i}回目の文章。"), '開成中学校', '2025')
+    partial = (time.perf_counter() - started) / repeat
+
+    print("=== 大問1つを修正した再実行 ===")
+    print(f"全体の再分析: {full * 1000:8.1f} ms")
+    print(f"差分再分析  : {partial * 1000:8.1f} ms （{full / partial:.1f}倍）")
+
+
+if __name__ == "__main__":
+    test_matches_full_analysis()
+    test_only_changed_sections_are_reanalyzed()
+    test_removed_section_and_shared_records()
+    test_report_matches_sections_by_hash_first()
+    test_records_are_not_shared_with_results()
+    test_store_size_is_capped()
+    test_persistent_store_across_runs()
+    print("✅ すべてのテストに合格しました\n")
+    benchmark_single_section_edit()
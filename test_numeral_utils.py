@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+数字表記解析ユーティリティのテスト
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.numeral_utils import parse_numeral, numeral_to_str, to_halfwidth_digits
+from modules.universal_analyzer import UniversalAnalyzer
+from modules.question_analyzer import QuestionAnalyzer
+from modules.question_validator import QuestionValidator
+from modules.exam_structure_analyzer import ExamStructureAnalyzer
+from modules.enhanced_question_type_analyzer import EnhancedQuestionTypeAnalyzer
+from modules.improved_question_analyzer import ImprovedQuestionAnalyzer
+
+
+def test_kanji_numerals():
+    """漢数字（位取りあり・なし）の変換"""
+    cases = {
+        '一': 1, '十': 10, '十二': 12, '二十': 20, '二十五': 25,
+        '百': 100, '百五': 105, '三百': 300, '千二百': 1200,
+        '三万二千': 32000, '二〇二五': 2025, '〇': 0,
+        '百十': 110, '千百十一': 1111, '万十': 10010,
+    }
+    for token, expected in cases.items():
+        assert parse_numeral(token) == expected, token
+
+
+def test_width_and_enclosed_numerals():
+    """全角・丸数字・括弧付き数字の変換"""
+    cases = {
+        '12': 12, '１２': 12, '①': 1, '⑮': 15, '⑳': 20, '㉑': 21, '㊿': 50,
+        '⑴': 1, '⒇': 20, '⒈': 1, '㈠': 1, '㊉': 10, '❶': 1, '➀': 1,
+        '（３）': 3, '(12)': 12, '【二】': 2, '［十一］': 11,
+    }
+    for token, expected in cases.items():
+        assert parse_numeral(token) == expected, token
+
+
+def test_invalid_numerals():
+    """数字として解釈できない文字列"""
+    for token in ('', 'abc', '二三十', '問一', '()', '十十', '百百', '二十二十', '十百', '万万'):
+        assert parse_numeral(token) is None, token
+    assert numeral_to_str('abc') == 'abc'
+    assert numeral_to_str('x', default='0') == '0'
+    assert to_halfwidth_digits('問１２') == '問12'
+
+
+def test_parse_cache():
+    """同じトークンの再解析はキャッシュから返ること"""
+    parse_numeral.cache_clear()
+    parse_numeral('十三')
+    parse_numeral('十三')
+    info = parse_numeral.cache_info()
+    assert info.hits == 1 and info.misses == 1
+
+
+def test_analyzers_share_parser():
+    """各分析器の変換メソッドが共通パーサーの結果を返すこと"""
+    assert UniversalAnalyzer()._convert_to_number('十二') == 12
+    assert UniversalAnalyzer()._convert_to_number('？') == 0
+    assert UniversalAnalyzer()._convert_to_arabic('１０') == '10'
+    assert QuestionAnalyzer()._normalize_number('二十') == 20
+    assert QuestionAnalyzer()._normalize_number('不明') == 1
+    assert EnhancedQuestionTypeAnalyzer()._normalize_number('五百') == '500'
+    assert ImprovedQuestionAnalyzer()._convert_kanji_to_number('八十') == '80'
+    assert ExamStructureAnalyzer()._convert_to_number('１５') == 15
+    validator = QuestionValidator()
+    assert validator.convert_question_number('十四') == 14
+    assert validator.convert_question_number('⑤') == 5
+    assert validator.convert_question_number('500') is None
+
+
+if __name__ == "__main__":
+    test_kanji_numerals()
+    test_width_and_enclosed_numerals()
+    test_invalid_numerals()
+    test_parse_cache()
+    test_analyzers_share_parser()
+    print("✅ すべてのテストに合格しました")
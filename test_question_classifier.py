@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+設問タイプ分類器のテスト
+パターン表を1本の正規表現にまとめても、従来の逐次判定と同じ優先順位で分類されることを確認
+"""
+import re
+import sys
+import os
+import itertools
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import Settings
+from patterns.question_classifier import QuestionTypeClassifier
+from modules.text_analyzer import TextAnalyzer
+from modules.final_content_extractor import FinalContentExtractor
+from modules.question_analyzer import QuestionAnalyzer
+from plugins.default_plugin import DefaultPlugin
+from plugins.musashi_plugin import MusashiPlugin
+from models import Question
+
+
+FRAGMENTS = [
+    '問一　傍線部①「それ」とは何を指しますか。',
+    '次のア～エの中から最も適当なものを選びなさい。',
+    'ア．正しい　イ、誤り',
+    'A. apple',
+    'a. apple',
+    '本文中から十字で抜き出しなさい。',
+    'そのまま書き抜きなさい。',
+    '五十字以内で説明しなさい。',
+    '80字以内で書きなさい',
+    '漢字の読みをひらがなで書きなさい。',
+    'カタカナを漢字に直しなさい。',
+    '①　次の慣用句の意味を答えなさい。',
+    '① 次の語群から選び',
+    '言葉の意味として',
+    'なぜですか。理由を書きなさい',
+    'どう思いますか。あなたの考えを書きなさい',
+    '文中から探しなさい',
+    '該当する箇所を示しなさい',
+    '答えなさい。',
+    '\n',
+    '',
+]
+
+
+def build_corpus():
+    """断片の組み合わせから設問テキストを生成"""
+    corpus = list(FRAGMENTS)
+    for a, b in itertools.permutations(FRAGMENTS, 2):
+        corpus.append(a + b)
+    return corpus
+
+
+def legacy_text_analyzer_table(compiled_patterns, question_text):
+    """TextAnalyzer._classify_question_type の従来のパターン表判定部分"""
+    if any(p.search(question_text) for p in compiled_patterns.get('漢字・語句', [])):
+        return '漢字・語句'
+    if re.search(r'^[①②③④⑤⑥⑦⑧⑨⑩]', question_text[:10]) and \
+       re.search(r'慣用句|ことわざ|語句|漢字|語群|に入る', question_text):
+        return '漢字・語句'
+    if re.search(r'[ア-ン]\s*[\.。、]', question_text) or \
+       re.search(r'[A-H]\s*[\.。、]', question_text) or \
+       any(p.search(question_text) for p in compiled_patterns.get('記号選択', [])):
+        return '記号選択'
+    if any(p.search(question_text) for p in compiled_patterns.get('抜き出し', [])):
+        return '抜き出し'
+    if any(p.search(question_text) for p in compiled_patterns.get('脱文挿入', [])):
+        return '脱文挿入'
+    if re.search(r'\d+字', question_text):
+        return '記述'
+    return None
+
+
+def legacy_final_classify(text):
+    """FinalContentExtractor._classify_question の従来実装"""
+    if any(k in text for k in ['漢字', '語句', '慣用句', 'ことわざ', '語群']):
+        return '漢字・語句'
+    if any(k in text for k in ['抜き出し', '書き抜き', 'そのまま抜き出']):
+        return '抜き出し'
+    if re.search(r'[ア-ン][。、．\s]', text) or '選び' in text:
+        return '選択'
+    return '記述'
+
+
+def legacy_table_classify(table, flags, text, default=None):
+    """パターン表を優先順に1つずつ search する従来方式"""
+    for q_type, patterns in table.items():
+        for pattern in patterns:
+            if re.search(pattern, text, flags):
+                return q_type
+    return default
+
+
+def test_classifier_precedence():
+    """先に並んだタイプが優先されること"""
+    classifier = QuestionTypeClassifier.from_pattern_table(
+        {'A': ['後'], 'B': ['前']}, default='なし'
+    )
+    assert classifier.classify('前…後') == 'A'
+    assert classifier.classify('前') == 'B'
+    assert classifier.classify('') == 'なし'
+    assert classifier.classify_all(['後', '前', 'x']) == ['A', 'B', 'なし']
+    assert classifier.count_types(['後', '前', '前', 'x']) == {'A': 1, 'B': 2, 'なし': 1}
+
+
+def test_backreference_falls_back_to_sequential():
+    """後方参照を含むパターン表でも正しく分類できること"""
+    classifier = QuestionTypeClassifier.from_pattern_table({'繰り返し': [r'(.)\1'], '他': ['.']})
+    assert classifier.classify('ああ') == '繰り返し'
+    assert classifier.classify('あい') == '他'
+
+
+def test_text_analyzer_matches_legacy():
+    """TextAnalyzer の分類結果が従来と一致すること"""
+    analyzer = TextAnalyzer(Settings.QUESTION_PATTERNS)
+    for text in build_corpus():
+        expected = legacy_text_analyzer_table(analyzer.compiled_patterns, text)
+        assert analyzer.type_classifier.classify(text) == expected, text
+
+
+def test_final_content_extractor_matches_legacy():
+    """FinalContentExtractor の分類結果が従来と一致すること"""
+    extractor = FinalContentExtractor()
+    corpus = build_corpus()
+    assert extractor.classify_questions(corpus) == [legacy_final_classify(t) for t in corpus]
+
+
+def test_question_analyzer_matches_legacy():
+    """QuestionAnalyzer の分類結果が従来と一致すること"""
+    analyzer = QuestionAnalyzer()
+    for text in build_corpus():
+        expected = legacy_table_classify(analyzer.question_types, re.IGNORECASE, text, 'その他')
+        assert analyzer.type_classifier.classify(text) == expected, text
+
+
+def test_plugins_match_legacy():
+    """プラグインのパターン表による分類が従来と一致すること"""
+    for plugin in (DefaultPlugin(), MusashiPlugin()):
+        table = plugin.get_question_patterns()
+        corpus = build_corpus()
+        expected = [legacy_table_classify(table, re.MULTILINE | re.DOTALL, t) for t in corpus]
+        assert plugin.classify_questions(corpus) == expected
+
+
+def test_plugin_aggregate_does_not_modify_questions():
+    """集計は設問を変更せず、タイプ未設定の設問は「その他」として数えること"""
+    plugin = DefaultPlugin()
+    questions = [
+        Question(number=1, text='選びなさい', type='記述', section=1),
+        Question(number=2, text='漢字の読みを書きなさい', type='', section=1),
+    ]
+    counts = plugin.aggregate_question_types(questions)
+    assert [q.type for q in questions] == ['記述', '']
+    assert counts['記述'] == 1 and counts['その他'] == 1 and counts['漢字・語句'] == 0
+
+
+if __name__ == "__main__":
+    test_classifier_precedence()
+    test_backreference_falls_back_to_sequential()
+    test_text_analyzer_matches_legacy()
+    test_final_content_extractor_matches_legacy()
+    test_question_analyzer_matches_legacy()
+    test_plugins_match_legacy()
+    test_plugin_aggregate_does_not_modify_questions()
+    print("✅ すべてのテストに合格しました")
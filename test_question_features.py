@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+設問特徴抽出（1回走査）のテスト
+字数制限・選択肢数・サブタイプの各抽出器が共通の特徴レコードから同じ結果を返すことを確認
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.question_features import extract_question_features, scan_question_features
+from utils.text_utils import extract_character_limit
+from modules.pattern_extractor import PatternExtractor
+from modules.enhanced_question_type_analyzer import EnhancedQuestionTypeAnalyzer
+from batch_analyzer import BatchAnalyzer
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 特徴レコードに移す前の BatchAnalyzer._analyze_choice_counts の集計結果（リポジトリのOCR結果）
+BASELINE_CHOICE_COUNTS = {
+    'seiko_output/seiko_kokugo_text.txt': {'5択': 8},
+    'seiko_output/combined_seiko_text.txt': {'5択': 7},
+    'seiko_output/seiko_output_page_017_p1.md': {},
+    'seiko_output/seiko_output_page_019_p1.md': {'5択': 1},
+    'seiko_output/seiko_output_page_026_p1.md': {},
+    'yomitoku_test_output/yomitoku_test_output_page_011_p1.md': {'3択': 1},
+    'yomitoku_test_output/yomitoku_test_output_page_016_p1.md': {'3択': 1},
+    'ocr_output.txt': {},
+}
+
+
+def test_char_limits():
+    """字数制限の種類ごとの抽出"""
+    features = scan_question_features("10字以上50字以内で説明し、さらに40字程度でまとめなさい。")
+    assert [(l.min, l.max, l.condition) for l in features.char_limits] == [
+        (10, 50, '範囲'), (0, 50, '以内'), (40, 40, '程度')
+    ]
+    # first_limit はテキスト中で最も前の制限、preferred_limit は条件の優先順
+    mixed = scan_question_features("40字程度で書き、さらに100字以内でまとめなさい。")
+    assert mixed.first_limit('以内', '程度').value == 40
+    assert mixed.preferred_limit('以内', '程度').value == 100
+    assert extract_question_features("３０文字以内").first_limit('以内').max == 30
+    assert extract_question_features("20～40字").first_limit('範囲').min == 20
+    assert extract_question_features("100字以上").first_limit('以上').max is None
+    assert extract_question_features("説明しなさい。").char_limits == ()
+
+
+def test_character_limit_consumers():
+    """各モジュールの字数制限抽出が特徴レコードを使うこと"""
+    assert extract_character_limit("10字から50字で") == (10, 50)
+    assert extract_character_limit("30字以内") == (0, 30)
+    assert extract_character_limit("説明しなさい") is None
+
+    extractor = PatternExtractor([])
+    assert extractor.extract_character_limit("50字以内") == (0, 50)
+    assert extractor.extract_character_limit("100字程度") == (80, 120)
+
+    analyzer = EnhancedQuestionTypeAnalyzer()
+    assert analyzer._extract_char_limit("40字程度") == {'type': 'single', 'limit': 40, 'condition': '程度'}
+    assert analyzer._extract_char_limit("20字～40字") == {'type': 'range', 'min': 20, 'max': 40}
+    assert analyzer._extract_char_limit("80字以上") == {'type': 'minimum', 'min': 80}
+    assert analyzer._extract_char_limit("60字以下") == {'type': 'maximum', 'max': 60}
+
+
+def test_mixed_conditions_match_baseline():
+    """条件が混在する設問で、特徴レコードに移す前と同じ字数制限を返すこと"""
+    analyzer = EnhancedQuestionTypeAnalyzer()
+    extractor = PatternExtractor([])
+    batch = BatchAnalyzer.__new__(BatchAnalyzer)
+
+    # 単一制限は条件によらずテキスト中で最も前のもの
+    text = "40字程度で書き、さらに100字以内でまとめなさい。"
+    assert analyzer._extract_char_limit(text) == {'type': 'single', 'limit': 40, 'condition': '程度'}
+    # 条件の優先順で調べる抽出器は従来どおり
+    assert extractor.extract_character_limit(text) == (0, 100)
+    assert extract_character_limit(text) == (0, 100)
+    assert batch._analyze_description_limits(text)['all_limits'] == [40, 100]
+
+    # 「10字以上50字以内」は範囲指定であり、50字以内の単一制限でもある
+    text = "10字以上50字以内で答えなさい。"
+    assert analyzer._extract_char_limit(text) == {'type': 'single', 'limit': 50, 'condition': '以内'}
+    assert extractor.extract_character_limit(text) == (0, 50)
+    assert extract_character_limit(text) == (10, 50)
+    assert batch._analyze_description_limits(text)['all_limits'] == [(10, 50), 50]
+
+    text = "80字以上で書き、60字以下にまとめなさい。"
+    assert analyzer._extract_char_limit(text) == {'type': 'minimum', 'min': 80}
+
+
+def test_choice_counts():
+    """選択肢数（明示・範囲・ラベル）の判定"""
+    assert extract_question_features("次の4つから選びなさい").choice_count == 4
+    assert extract_question_features("ア～オから選び記号で答えなさい").choice_count == 5
+    assert extract_question_features("ア．赤 イ．青 ウ．黄").choice_count == 3
+    assert extract_question_features("①犬 ②猫").choice_count == 2
+    assert extract_question_features("説明しなさい").choice_count is None
+    assert extract_question_features("二つ選びなさい").multiple_selection
+    # OCRの書式: 長音符・ハイフンの範囲、エスケープされた～、<br> の後のラベル
+    assert extract_question_features("次のアーカの中から選び").choice_count == 6
+    assert extract_question_features("次のア-エから選び").choice_count == 4
+    assert extract_question_features("次のア\\~オの中から一つ選び").choice_count == 5
+    assert extract_question_features("ア 赤<br>イ 青<br>ウ 黄").choice_count == 3
+    assert extract_question_features("ケーキを食べた").choice_range is None
+
+    extractor = PatternExtractor([])
+    assert extractor.extract_choice_count("ア．赤 イ．青 ウ．黄 エ．白") == 4
+    assert EnhancedQuestionTypeAnalyzer()._count_choices("次の5つから選べ") == 5
+
+
+def test_batch_choice_counts_match_baseline():
+    """BatchAnalyzer の選択肢数の集計が従来の結果と同じになること"""
+    analyzer = BatchAnalyzer(os.path.join(PACKAGE_DIR, 'test_output', 'choice_counts.xlsx'), config={})
+    for name, expected in BASELINE_CHOICE_COUNTS.items():
+        with open(os.path.join(PACKAGE_DIR, name), encoding='utf-8') as f:
+            counts = analyzer._analyze_choice_counts(f.read())
+        assert {key: value for key, value in counts.items() if value} == expected, name
+
+    # 7つ以上の選択肢は6択、カまである「二つ選」は複数選択
+    counts = analyzer._analyze_choice_counts("問一 次のア～クから選びなさい。\nア イ")
+    assert counts['6択'] == 1
+    counts = analyzer._analyze_choice_counts("問一 次のア～カから二つ選びなさい。\nア イ")
+    assert counts['複数選択'] == 1
+
+
+def test_subtypes_and_difficulty():
+    """サブタイプ判定と難易度指標は従来の優先順を保つこと"""
+    analyzer = EnhancedQuestionTypeAnalyzer()
+    assert analyzer._determine_kanji_subtype("漢字の読みを書きなさい") == '読み'
+    assert analyzer._determine_description_subtype("なぜそう思ったのか") == '理由説明'
+    assert analyzer._determine_selection_subtype("最も正しいものを選べ") == '正誤'
+    assert analyzer._extract_difficulty_indicators("要約して簡潔に書きなさい") == ['簡潔に', '要約して']
+    features = extract_question_features("文章を要約して書きなさい")
+    assert features.description_subtype == '要約'
+
+
+if __name__ == "__main__":
+    test_char_limits()
+    test_character_limit_consumers()
+    test_mixed_conditions_match_baseline()
+    test_choice_counts()
+    test_batch_choice_counts_match_baseline()
+    test_subtypes_and_difficulty()
+    print("✅ すべてのテストに合格しました")
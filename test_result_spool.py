@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+BatchAnalyzer のストリーミングモードのテスト
+結果が本文を除いてスプールに書き出され、保存・サマリーが通常のモードと
+同じ内容になることを確認
+"""
+import sys
+import os
+import io
+import time
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import batch_analyzer
+from batch_analyzer import BatchAnalyzer
+from modules.result_spool import ResultSpool, compact_analysis_data
+from batch_test_helpers import make_files
+
+
+# 2校の入力ファイル（本文の長さは3通り）
+SCHOOLS = ('開成中学校', '麻布中学校')
+
+
+def make_analyzer(tmp: Path, stream: bool, parallel: bool = False) -> BatchAnalyzer:
+    config = {'batch_processing': {'parallel_mode': parallel, 'max_workers': 2, 'stream_results': stream}}
+    analyzer = BatchAnalyzer(str(tmp / 'out.xlsx'), config=config)
+    analyzer.saved = []
+
+    def save_rows_to_excel(rows, backup=True):
+        analyzer.saved.append((backup, rows))
+        return True
+    analyzer.formatter.save_rows_to_excel = save_rows_to_excel
+    return analyzer
+
+
+def summary_text(analyzer: BatchAnalyzer) -> str:
+    """サマリーの表示（実行ごとに変わる処理時間は除く）"""
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        analyzer.print_summary()
+    return buffer.getvalue().split('【処理時間】')[0]
+
+
+def test_compact_keeps_everything_but_question_text():
+    """本文だけを取り除き、Excelの行は元の結果と同じになること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        make_files(tmp / 'texts', [2001], schools=SCHOOLS, cycle=3)
+        analyzer = make_analyzer(tmp, stream=False)
+        result = analyzer.analyze_folder(str(tmp / 'texts'))[0]
+        compact = compact_analysis_data(result)
+
+        questions = [q for section in result['sections'] for q in section['questions']]
+        assert questions and all('full_text' in q for q in questions)
+        compact_questions = [q for section in compact['sections'] for q in section['questions']]
+        assert all('text' not in q and 'full_text' not in q and 'type' in q for q in compact_questions)
+        # 元の結果は変更しない
+        assert all('full_text' in q for q in questions)
+        assert analyzer._build_rows([compact]) == analyzer._build_rows([result])
+
+
+def test_streaming_matches_in_memory():
+    """ストリーミングモードでも保存する行とサマリーが同じで、結果をメモリに溜めないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        make_files(tmp / 'texts', range(2001, 2008), schools=SCHOOLS, cycle=3)
+
+        normal = make_analyzer(tmp, stream=False)
+        normal.analyze_folder(str(tmp / 'texts'))
+        assert normal.save_to_excel()
+
+        original_chunk_size = batch_analyzer.SPOOL_CHUNK_SIZE
+        batch_analyzer.SPOOL_CHUNK_SIZE = 3
+        try:
+            for parallel in (False, True):
+                streaming = make_analyzer(tmp, stream=True, parallel=parallel)
+                spool = streaming.analyze_folder(str(tmp / 'texts'))
+                assert len(spool) == 7 and streaming.results == []
+                assert streaming.save_to_excel()
+
+                # 3件ずつ保存し、バックアップは最初だけ
+                assert [len(rows) for _, rows in streaming.saved] == [3, 3, 1]
+                assert [backup for backup, _ in streaming.saved] == [True, False, False]
+                assert sum((rows for _, rows in streaming.saved), []) == normal.saved[0][1]
+                assert summary_text(streaming) == summary_text(normal)
+                streaming.close()
+                assert not spool.path.exists()
+        finally:
+            batch_analyzer.SPOOL_CHUNK_SIZE = original_chunk_size
+
+
+def test_spool_reads_in_chunks():
+    """追加した順に指定件数ずつ読み出せること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        spool = ResultSpool(Path(tmp) / 'spool.jsonl')
+        for n in range(5):
+            spool.append({'school_name': '開成', 'year': n, 'sections': []})
+        assert [[item['year'] for item in chunk] for chunk in spool.iter_chunks(2)] == [[0, 1], [2, 3], [4]]
+        spool.close()
+        # パスを指定したスプールは残す
+        assert (Path(tmp) / 'spool.jsonl').exists()
+
+
+def benchmark_streaming_memory():
+    """通常のモードとストリーミングモードのメモリ使用量（ピーク）"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        make_files(tmp / 'texts', range(1401, 2001), schools=SCHOOLS, cycle=3, repeat=5)
+        for stream in (False, True):
+            analyzer = make_analyzer(tmp, stream=stream)
+            tracemalloc.start()
+            start = time.perf_counter()
+            analyzer.analyze_folder(str(tmp / 'texts'))
+            analyzer.save_to_excel()
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            analyzer.close()
+            print(f"{'ストリーミング' if stream else '通常'}: {elapsed:.2f}秒 ピーク {peak / 1024 / 1024:.1f}MB")
+
+
+if __name__ == "__main__":
+    test_compact_keeps_everything_but_question_text()
+    test_streaming_matches_in_memory()
+    test_spool_reads_in_chunks()
+    print("✅ すべてのテストに合格しました")
+    benchmark_streaming_memory()
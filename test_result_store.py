@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+分析結果ストアのテスト
+行の置き換え・列順の維持・Excel未反映シートの管理・集計を確認
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules.result_store import ResultStore
+
+
+def make_row(year: int, chars: int = 1000, questions: int = 10, **extra) -> dict:
+    """テスト用の行データ"""
+    row = {'年度': year, '総設問数': questions, '総文字数': chars, '大問数': 2}
+    row.update(extra)
+    return row
+
+
+def test_upsert_replaces_same_year_and_sorts():
+    """同じ年度は置き換えられ、年度順に読み出されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        store.upsert_rows('開成中学校', [make_row(2025), make_row(2023)])
+        store.upsert_rows('開成中学校', [make_row(2025, chars=2000)])
+
+        rows = store.read_rows('開成中学校')
+        assert [row['年度'] for row in rows] == [2023, 2025]
+        assert rows[1]['総文字数'] == 2000
+        assert store.record_count() == 2
+        store.close()
+
+
+def test_columns_keep_order_and_extend():
+    """列順は最初の書き込み順を維持し、新しい列は末尾に追加されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        store.upsert_rows('麻布中学校', [make_row(2024, 文章1_出典='不明')])
+        store.upsert_rows('麻布中学校', [make_row(2025, その他1_設問数=5)])
+        assert store.sheet_columns('麻布中学校') == [
+            '年度', '総設問数', '総文字数', '大問数', '文章1_出典', 'その他1_設問数'
+        ]
+
+        fixed = ['学校名', '年度', '総設問数', '総文字数']
+        store.upsert_rows('桜蔭中学校', [{'年度': 2025, '学校名': '桜蔭中学校'}], columns=fixed)
+        assert store.sheet_columns('桜蔭中学校') == fixed
+        store.close()
+
+
+def test_dirty_sheets_track_exports():
+    """書き込んだシートだけが未反映になり、出力済みの記録で解消されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        store.upsert_sheets({
+            '開成中学校': [make_row(2024)],
+            '麻布中学校': [make_row(2024)],
+            '武蔵中学校': [make_row(2024)],
+        })
+        assert store.sheet_names() == ['開成中学校', '麻布中学校', '武蔵中学校']
+        assert store.dirty_sheets() == store.sheet_names()
+
+        store.mark_exported(store.sheet_names())
+        assert store.dirty_sheets() == []
+
+        store.upsert_rows('麻布中学校', [make_row(2025)])
+        assert store.dirty_sheets() == ['麻布中学校']
+
+        store.mark_all_dirty()
+        assert len(store.dirty_sheets()) == 3
+        store.close()
+
+
+def test_summary_and_missing_columns():
+    """集計がSQL上で計算され、必須列の不足が検出されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        store.upsert_rows('開成中学校', [make_row(2023, chars=1000, questions=10),
+                                         make_row(2025, chars=3000, questions=20)])
+        store.upsert_rows('雙葉中学校', [{'年度': 2024, '総文字数': 500}])
+
+        summary = {row['school']: row for row in store.summary()}
+        assert summary['開成中学校']['years'] == 2
+        assert (summary['開成中学校']['oldest'], summary['開成中学校']['newest']) == (2023, 2025)
+        assert summary['開成中学校']['avg_characters'] == 2000
+        assert summary['開成中学校']['avg_questions'] == 15
+        assert summary['雙葉中学校']['avg_questions'] == 0
+
+        missing = store.missing_columns(['年度', '総設問数', '総文字数', '大問数'])
+        assert missing == {'雙葉中学校': ['総設問数', '大問数']}
+        store.close()
+
+
+def test_nan_and_persistence_and_backup():
+    """NaNはNoneとして保存され、再オープン後もバックアップからも読めること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        store.upsert_rows('開成中学校', [make_row(2024, 文章1_テーマ=float('nan'))])
+        backup_path = store.backup(Path(tmp) / 'backups' / 'db_copy.sqlite3')
+        store.close()
+
+        for path in (Path(tmp) / 'db.sqlite3', backup_path):
+            reopened = ResultStore(path)
+            assert reopened.read_rows('開成中学校')[0]['文章1_テーマ'] is None
+            assert reopened.dirty_sheets() == ['開成中学校']
+            reopened.close()
+
+
+def test_write_error_rolls_back():
+    """年度のない行を含む書き込みは全体が取り消されること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        try:
+            store.upsert_sheets({'開成中学校': [make_row(2024)], '麻布中学校': [{'総文字数': 1}]})
+        except KeyError:
+            pass
+        assert store.is_empty()
+        assert store.sheet_names() == []
+        store.close()
+
+
+def benchmark_store_queries():
+    """50校×10年度のデータで一覧・集計・1校の読み込みの時間を計測"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        columns = {f'文章{i}_{name}': '' for i in range(1, 4) for name in ('著者', '作品', 'ジャンル', 'テーマ')}
+        store.upsert_sheets({
+            f'学校{n:02d}': [make_row(2015 + year, **columns) for year in range(10)]
+            for n in range(50)
+        })
+
+        start = time.perf_counter()
+        for _ in range(100):
+            store.sheet_names()
+            store.summary()
+            store.read_rows('学校25')
+        elapsed = (time.perf_counter() - start) / 100
+        print(f"一覧・集計・読み込み: {elapsed * 1000:.2f}ms/回（50校×10年度）")
+        store.close()
+
+
+if __name__ == "__main__":
+    test_upsert_replaces_same_year_and_sorts()
+    test_columns_keep_order_and_extend()
+    test_dirty_sheets_track_exports()
+    test_summary_and_missing_columns()
+    test_nan_and_persistence_and_backup()
+    test_write_error_rolls_back()
+    print("✅ すべてのテストに合格しました")
+    benchmark_store_queries()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+大問マーカー一括スキャナーのテスト
+従来の8パターン個別走査との結果一致と、大規模な複数年度テキストでの処理速度を確認
+"""
+import re
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules.section_marker_scanner import SectionMarkerScanner, build_line_starts, line_end_at
+from modules.section_splitter_v2 import ImprovedSectionSplitter
+from modules.section_splitter_v3 import ImprovedSectionSplitterV3
+
+
+LEGACY_PATTERNS = [
+    ('daimon_explicit', r'(?m)^大問\s*([一二三四五六七八九十])', 10),
+    ('dai_mon', r'(?m)^第([一二三四五六七八九十])問', 9),
+    ('kanji_next_sentence', r'(?m)^([一二三四五六七八九十])[、，]\s*次の文章を読んで', 8),
+    ('kanji_next_text', r'(?m)^([一二三四五六七八九十])[、，]\s*次のテキストを読んで', 8),
+    ('kanji_next_general', r'(?m)^([一二三四五六七八九十])[、，]\s*次の', 7),
+    ('bracket_kanji', r'(?m)^[【［]([一二三四五六七八九十])[】］]', 6),
+    ('paren_kanji', r'(?m)^[（(]([一二三四五六七八九十])[）)]', 5),
+    ('simple_kanji', r'(?m)^([一二三四五六七八九十])[、，]', 3),
+]
+
+KANJI_TO_INT = {ch: i + 1 for i, ch in enumerate('一二三四五六七八九十')}
+
+
+def legacy_find_marker_candidates(text):
+    """従来実装（パターンごとに全文を走査）"""
+    candidates = []
+    for pattern_name, pattern_regex, priority in LEGACY_PATTERNS:
+        for match in re.finditer(pattern_regex, text):
+            line_start = text.rfind('\n', 0, match.start()) + 1
+            line_end = text.find('\n', match.end())
+            if line_end == -1:
+                line_end = len(text)
+            candidates.append({
+                'start': match.start(),
+                'end': match.end(),
+                'number': KANJI_TO_INT.get(match.group(1), 0),
+                'text': match.group(0).strip(),
+                'full_line': text[line_start:line_end].strip()[:100],
+                'type': pattern_name,
+                'priority': priority
+            })
+    candidates.sort(key=lambda x: x['start'])
+    return candidates
+
+
+SAMPLE_EXAM = """二〇二五年度 入学試験問題
+国語
+
+一、次の文章を読んで、後の問いに答えなさい。
+（本文）吾輩は猫である。名前はまだ無い。どこで生れたかとんと見当がつかぬ。
+""" + "本文が続く。" * 120 + """
+夏目漱石『吾輩は猫である』による
+
+問一　傍線部①「それ」とは何を指しますか。
+問二　空欄に入る語句を選びなさい。
+
+二、次のテキストを読んで、後の問いに答えなさい。
+""" + "第二の文章が続く。" * 120 + """
+【三】次の漢字の読みを答えなさい。
+（四）次の各問いに答えなさい。
+大問
+五 次の詩を読んで答えなさい。
+第六問　解答用紙に記入しなさい。
+七，
+次の文章を読んで答えなさい。
+八、
+"""
+
+
+def build_multi_year_text(years: int = 30) -> str:
+    """複数年度分を連結した大規模テキストを生成"""
+    blocks = []
+    for i in range(years):
+        blocks.append(f"{2025 - i}年度 入学試験問題\n")
+        blocks.append(SAMPLE_EXAM)
+    return "\n".join(blocks)
+
+
+def test_scan_matches_legacy_candidates():
+    """一括スキャナーが従来の8パターン走査と同一の候補を返すこと"""
+    scanner = SectionMarkerScanner()
+    for text in (SAMPLE_EXAM, build_multi_year_text(3), "", "一、", "大問\n一、次の"):
+        assert scanner.scan(text) == legacy_find_marker_candidates(text)
+
+
+def test_splitters_use_shared_scanner():
+    """v2/v3がスキャナーを共有し、分割結果が従来と変わらないこと"""
+    v2 = ImprovedSectionSplitter(min_section_length=100)
+    v3 = ImprovedSectionSplitterV3()
+    assert v2.marker_scanner is v3.marker_scanner
+
+    text = build_multi_year_text(2)
+    assert v2._find_marker_candidates(text) == legacy_find_marker_candidates(text)
+
+    legacy_v3 = v3._filter_true_markers(legacy_find_marker_candidates(text), text)
+    assert v3._filter_true_markers(v3._find_marker_candidates(text), text) == legacy_v3
+
+    legacy_v2 = v2._filter_true_markers(legacy_find_marker_candidates(text), text)
+    assert v2._filter_true_markers(v2._find_marker_candidates(text), text) == legacy_v2
+
+
+def test_noise_and_small_question_filters():
+    """OCRノイズと小問の判定"""
+    scanner = SectionMarkerScanner()
+    assert scanner.has_ocr_noise("大問二 解答用紙に記入")
+    assert not scanner.has_ocr_noise("大問二 次の文章を読んで")
+    assert scanner.has_small_question_indicator("問三について説明しなさい")
+    assert scanner.has_small_question_indicator("傍線部")
+    assert not scanner.has_small_question_indicator("次の文章を読んで")
+
+
+def test_line_start_table():
+    """行頭テーブルから行末位置を求められること"""
+    text = "abc\nde\n\nfgh"
+    starts = build_line_starts(text)
+    assert starts == [0, 4, 7, 8]
+    for pos in range(len(text)):
+        expected = text.find('\n', pos)
+        if expected == -1:
+            expected = len(text)
+        assert line_end_at(starts, pos, len(text)) == expected
+
+
+def benchmark_splitter_throughput(years: int = 200, repeat: int = 5):
+    """大規模な複数年度テキストでのマーカー検出スループットを計測"""
+    text = build_multi_year_text(years)
+    scanner = SectionMarkerScanner()
+    splitter = ImprovedSectionSplitterV3()
+
+    def measure(func):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func(text)
+        return (time.perf_counter() - started) / repeat
+
+    legacy_time = measure(legacy_find_marker_candidates)
+    scan_time = measure(scanner.scan)
+    split_time = measure(splitter.split_sections)
+
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    print(f"=== 大問マーカー検出ベンチマーク（{years}年度分, {len(text):,}文字） ===")
+    print(f"従来（8パターン個別走査）: {legacy_time * 1000:8.1f} ms")
+    print(f"一括スキャナー          : {scan_time * 1000:8.1f} ms "
+          f"（{legacy_time / scan_time:.1f}倍）")
+    print(f"v3 split_sections全体   : {split_time * 1000:8.1f} ms "
+          f"（{size_mb / split_time:.1f} MB/秒）")
+
+
+if __name__ == "__main__":
+    test_scan_matches_legacy_candidates()
+    test_splitters_use_shared_scanner()
+    test_noise_and_small_question_filters()
+    test_line_start_table()
+    print("✅ すべてのテストに合格しました\n")
+    benchmark_splitter_throughput()
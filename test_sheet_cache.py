@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+シート読み込みキャッシュのテスト
+同じシートの再読み込みが省略され、書き込みで読み直されることを確認
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from modules.result_store import ResultStore, SheetFrameCache
+
+
+def make_row(year: int, chars: int = 1000) -> dict:
+    """テスト用の行データ"""
+    return {'年度': year, '総設問数': 10, '総文字数': chars, '大問数': 2}
+
+
+class CountingLoader:
+    """読み込み回数を数えるローダー"""
+
+    def __init__(self, store: ResultStore, sheet: str):
+        self.store = store
+        self.sheet = sheet
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.store.read_rows(self.sheet)
+
+
+def test_repeated_reads_are_cached():
+    """リビジョンが変わらなければ読み直さず、複製を返すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        store.upsert_rows('開成中学校', [make_row(2024)])
+        cache = SheetFrameCache()
+        loader = CountingLoader(store, '開成中学校')
+
+        first = cache.get(store, '開成中学校', loader)
+        first.append('呼び出し側の変更')
+        second = cache.get(store, '開成中学校', loader)
+
+        assert loader.calls == 1
+        assert len(second) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+        store.close()
+
+
+def test_writes_from_other_connections_invalidate():
+    """別の接続（別インスタンス・別プロセス）からの書き込みでも読み直すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        store.upsert_rows('麻布中学校', [make_row(2024)])
+        cache = SheetFrameCache()
+        loader = CountingLoader(store, '麻布中学校')
+        cache.get(store, '麻布中学校', loader)
+
+        other = ResultStore(Path(tmp) / 'db.sqlite3')
+        other.upsert_rows('麻布中学校', [make_row(2025)])
+        other.close()
+
+        rows = cache.get(store, '麻布中学校', loader)
+        assert loader.calls == 2
+        assert [row['年度'] for row in rows] == [2024, 2025]
+        store.close()
+
+
+def test_invalidate_and_eviction():
+    """明示的な破棄と最大数を超えたときの削除"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        store.upsert_sheets({f'学校{n}': [make_row(2024)] for n in range(3)})
+        cache = SheetFrameCache(max_entries=2)
+        loaders = {f'学校{n}': CountingLoader(store, f'学校{n}') for n in range(3)}
+
+        for sheet, loader in loaders.items():
+            cache.get(store, sheet, loader)
+        # 最も古い学校0は削除されている
+        cache.get(store, '学校0', loaders['学校0'])
+        assert loaders['学校0'].calls == 2
+
+        cache.invalidate(store.db_path, ['学校0'])
+        cache.get(store, '学校0', loaders['学校0'])
+        assert loaders['学校0'].calls == 3
+        store.close()
+
+
+def benchmark_cached_reads():
+    """20年度分のシートを100回読み込む時間をキャッシュの有無で比較"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultStore(Path(tmp) / 'db.sqlite3')
+        store.upsert_rows('開成中学校', [make_row(2000 + year) for year in range(20)])
+        cache = SheetFrameCache()
+        loader = CountingLoader(store, '開成中学校')
+
+        start = time.perf_counter()
+        for _ in range(100):
+            loader()
+        uncached = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(100):
+            cache.get(store, '開成中学校', loader)
+        cached = time.perf_counter() - start
+        print(f"キャッシュなし: {uncached * 1000:.1f}ms / あり: {cached * 1000:.1f}ms（100回）")
+        store.close()
+
+
+if __name__ == "__main__":
+    test_repeated_reads_are_cached()
+    test_writes_from_other_connections_invalidate()
+    test_invalidate_and_eviction()
+    print("✅ すべてのテストに合格しました")
+    benchmark_cached_reads()
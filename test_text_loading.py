@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+テキストファイル読み込みのテスト
+一度の読み込みでエンコーディングを判定し、復号したテキストを返すことを確認
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import text_utils
+from utils.text_utils import read_text_file, decode_text_bytes, detect_encoding
+from exceptions import EncodingError
+
+SAMPLE = '国語の入試問題です。次の文章を読んで、後の問いに答えなさい。'
+
+
+def test_detects_japanese_encodings():
+    """主な日本語エンコーディングとBOM付きのファイルを正しく復号すること"""
+    text = 'Header line\n' + SAMPLE * 5
+    for encoding, expected in [
+        ('utf-8', 'utf-8'),
+        ('shift-jis', 'shift-jis'),
+        ('euc-jp', 'euc-jp'),
+        ('iso-2022-jp', 'iso-2022-jp'),
+        ('utf-8-sig', 'utf-8-sig'),
+        ('utf-16', 'utf-16'),
+    ]:
+        decoded, detected = decode_text_bytes(text.encode(encoding))
+        assert (decoded, detected) == (text, expected), encoding
+
+    # cp932 の拡張文字（丸数字）は shift-jis では復号できないので cp932 になる
+    decoded, detected = decode_text_bytes(('問①' + SAMPLE).encode('cp932'))
+    assert (decoded, detected) == ('問①' + SAMPLE, 'cp932')
+
+
+def test_ascii_header_does_not_hide_shift_jis():
+    """先頭が長いASCIIでも、本文の多バイト文字から判定すること"""
+    text = '#' * 200_000 + '\n' + SAMPLE * 100 + '\n' + '-' * 200_000
+    for encoding in ('shift-jis', 'euc-jp'):
+        decoded, detected = decode_text_bytes(text.encode(encoding))
+        assert (decoded, detected) == (text, encoding)
+
+
+def test_normalizes_newlines():
+    """CRLF・CRの改行を LF に揃えること（テキストモードの open と同じ）"""
+    text = 'Header line\n' + SAMPLE + '\n' + SAMPLE + '\n'
+    for encoding in ('utf-8', 'shift-jis', 'utf-16'):
+        decoded, _ = decode_text_bytes(text.replace('\n', '\r\n').encode(encoding))
+        assert decoded == text, encoding
+    decoded, _ = decode_text_bytes(text.replace('\n', '\r').encode('utf-8'))
+    assert decoded == text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'crlf.txt'
+        path.write_bytes(text.replace('\n', '\r\n').encode('shift-jis'))
+        assert read_text_file(path) == (text, 'shift-jis')
+        with open(path, encoding='shift-jis') as f:
+            assert f.read() == text
+
+
+def test_reads_file_once():
+    """ファイルを一度だけ開き、大きなファイルはメモリマップで読むこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / '開成中学校_2025.txt'
+        text = SAMPLE * 2000
+        path.write_bytes(text.encode('shift-jis'))
+
+        with patch('builtins.open', wraps=open) as opened:
+            assert read_text_file(path) == (text, 'shift-jis')
+        assert opened.call_count == 1
+
+        with patch.object(text_utils, 'MMAP_THRESHOLD_BYTES', 1024), \
+                patch.object(text_utils.mmap, 'mmap', wraps=text_utils.mmap.mmap) as mapped:
+            assert read_text_file(path) == (text, 'shift-jis')
+        assert mapped.call_count == 1
+
+        assert detect_encoding(path) == 'shift-jis'
+        empty = Path(tmp) / 'empty.txt'
+        empty.write_bytes(b'')
+        assert read_text_file(empty) == ('', 'utf-8')
+
+
+def test_undecodable_file():
+    """どの候補でも復号できない場合は EncodingError になること"""
+    try:
+        decode_text_bytes(b'\xff\xfe\x00'[1:] + b'\x81', encodings=['utf-8', 'shift-jis'], file_path='x.txt')
+        assert False, 'EncodingError expected'
+    except EncodingError as e:
+        assert e.tried_encodings == ['utf-8', 'shift-jis']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'bad.txt'
+        path.write_bytes(b'\x81')
+        with patch.object(text_utils.Settings, 'DEFAULT_ENCODING_LIST', ['utf-8', 'shift-jis']):
+            assert detect_encoding(path) is None
+
+
+def benchmark_loading():
+    """以前の方式（候補ごとに開いて判定し、もう一度全体を読む）との比較"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'large.txt'
+        path.write_bytes((SAMPLE * 50_000).encode('euc-jp'))
+
+        start = time.perf_counter()
+        for _ in range(10):
+            read_text_file(path)
+        print(f"一度読み: {(time.perf_counter() - start) / 10 * 1000:.1f}ms")
+
+        start = time.perf_counter()
+        for _ in range(10):
+            for encoding in ['utf-8', 'shift-jis', 'euc-jp']:
+                try:
+                    with open(path, 'r', encoding=encoding) as f:
+                        f.read(100)
+                    break
+                except UnicodeError:
+                    continue
+            with open(path, 'r', encoding=encoding) as f:
+                f.read()
+        print(f"従来方式: {(time.perf_counter() - start) / 10 * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    test_detects_japanese_encodings()
+    test_ascii_header_does_not_hide_shift_jis()
+    test_normalizes_newlines()
+    test_reads_file_once()
+    test_undecodable_file()
+    print("✅ すべてのテストに合格しました")
+    benchmark_loading()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+共有作業キューのテスト
+リースの期限・ハートビート・重複の防止と、複数のプロセスで分担した結果が
+1回だけデータベースへ反映されることを確認
+"""
+import sys
+import os
+import time
+import sqlite3
+import tempfile
+import pickle
+import threading
+import multiprocessing
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.queue_worker import QueueWorker
+from processors.work_queue import WorkQueue
+from models import AnalysisResult, ExamSource, Question, Section
+from batch_test_helpers import make_app, make_files
+
+
+def test_lease_expiry_and_lost_lease():
+    """期限の切れた項目は他のワーカーが引き継ぎ、元のワーカーの完了報告は捨てること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp / 'texts', [2020, 2021], cycle=1)
+        queue = WorkQueue(tmp / 'queue.sqlite3', lease_seconds=10)
+        assert queue.enqueue(paths, now=0) == 2
+
+        a_items = queue.claim('a', limit=1, now=0)
+        b_items = queue.claim('b', limit=5, now=1)
+        assert [item.path for item in a_items] == [paths[0]]
+        assert [item.path for item in b_items] == [paths[1]]
+        assert queue.claim('c', now=2) == []
+
+        # b はハートビートを続け、a は止まった
+        assert queue.heartbeat('b', [b_items[0].id], now=8) == 1
+        c_items = queue.claim('c', now=12)
+        assert [(item.path, item.attempts) for item in c_items] == [(paths[0], 2)]
+
+        assert not queue.complete(a_items[0].id, 'a', ['stale'], now=13)
+        assert queue.complete(c_items[0].id, 'c', ['fresh'], now=13)
+        assert queue.fail(b_items[0].id, 'b', 'broken', now=13)
+        assert queue.counts() == {'done': 1, 'failed': 1}
+        assert not queue.has_open_work()
+
+        claimed = queue.claim_results('merger', now=14)
+        assert [results for _, results in claimed] == [['fresh']]
+        assert queue.claim_results('other', now=14) == []
+
+
+def test_enqueue_is_idempotent_and_detects_changes():
+    """同じファイルは1件として扱い、内容が変わったファイルだけを未処理に戻すこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp / 'texts', [2020, 2021], cycle=1)
+        queue = WorkQueue(tmp / 'queue.sqlite3')
+        assert queue.enqueue(paths) == 2
+        for item in queue.claim('a', limit=2):
+            queue.complete(item.id, 'a', [])
+
+        assert queue.enqueue(paths) == 0
+        paths[1].write_text('変更', encoding='utf-8')
+        assert queue.enqueue(paths) == 1
+        assert queue.counts() == {'done': 1, 'pending': 1}
+        assert queue.enqueue(paths, force=True) == 2
+
+        # 相対パスで保存し、キューファイルの場所から解決する
+        rows = sqlite3.connect(str(tmp / 'queue.sqlite3')).execute('SELECT path FROM items').fetchall()
+        assert sorted(row[0] for row in rows) == sorted(f'texts/{path.name}' for path in paths)
+
+
+def test_lease_expires_repeatedly_then_fails():
+    """何度もワーカーを止めたファイルは失敗として扱い、他のファイルを止めないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp / 'texts', [2020], cycle=1)
+        queue = WorkQueue(tmp / 'queue.sqlite3', lease_seconds=10, max_attempts=2)
+        queue.enqueue(paths, now=0)
+        assert len(queue.claim('a', now=0)) == 1
+        assert len(queue.claim('b', now=20)) == 1
+        assert queue.claim('c', now=40) == []
+        assert queue.counts() == {'failed': 1}
+
+
+def test_results_are_stored_as_json():
+    """分析結果をJSONで保存して元に戻し、pickle の結果は読まずに失敗にすること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp / 'texts', [2020, 2021], cycle=1)
+        queue = WorkQueue(tmp / 'queue.sqlite3')
+        queue.enqueue(paths)
+
+        question = Question(1, '説明しなさい。', '記述', 1, character_limit=(40, 60))
+        result = AnalysisResult('開成中学校', '2020', 1000, [Section(1, questions=[question])], [question],
+                                {'記述': 1}, [ExamSource(author='夏目漱石', title='こころ')])
+        result.choice_distribution = {'4択': 2}
+        first, second = queue.claim('a', limit=2)
+        assert queue.complete(first.id, 'a', [result])
+        assert queue.complete(second.id, 'a', [result])
+
+        conn = sqlite3.connect(str(tmp / 'queue.sqlite3'))
+        stored = conn.execute('SELECT result FROM items WHERE id = ?', (first.id,)).fetchone()[0]
+        assert isinstance(stored, str) and '夏目漱石' in stored
+        # 以前の形式（pickle）の結果
+        conn.execute('UPDATE items SET result = ? WHERE id = ?', (pickle.dumps([result]), second.id))
+        conn.commit()
+        conn.close()
+
+        claimed = queue.claim_results('merger')
+        assert [item.id for item, _ in claimed] == [first.id]
+        restored = claimed[0][1][0]
+        assert restored == result
+        assert restored.sections[0].questions[0].character_limit == (40, 60)
+        assert restored.choice_distribution == {'4択': 2}
+        assert queue.counts() == {'merging': 1, 'failed': 1}
+
+
+def test_merge_keeps_lease_while_saving():
+    """保存に時間がかかっても、反映中の項目を他の反映に引き継がないこと"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = make_files(tmp / 'texts', [2020], cycle=1)
+        queue = WorkQueue(tmp / 'queue.sqlite3', lease_seconds=0.3)
+        queue.enqueue(paths)
+        item = queue.claim('a')[0]
+        queue.complete(item.id, 'a', [])
+
+        app = make_app(tmp, batch_workers=0)
+        other_queue = WorkQueue(tmp / 'queue.sqlite3', lease_seconds=0.3)
+        committing = threading.Event()
+        other_claims = []
+        original_transaction = app.excel_manager.transaction
+
+        def slow_transaction():
+            transaction = original_transaction()
+            commit = transaction.commit
+
+            def slow_commit():
+                committing.set()
+                for _ in range(5):
+                    time.sleep(0.2)
+                    other_claims.extend(other_queue.claim_results('other'))
+                return commit()
+            transaction.commit = slow_commit
+            return transaction
+        app.excel_manager.transaction = slow_transaction
+
+        assert QueueWorker(app, queue).merge()['files'] == 1
+        assert committing.is_set() and other_claims == []
+        assert queue.counts() == {'merged': 1}
+        other_queue.close()
+
+
+def run_worker_process(queue_path: str, tmp: str) -> None:
+    """別プロセスのワーカー（キューはプロセスごとに開く）"""
+    queue = WorkQueue(Path(queue_path), lease_seconds=30)
+    QueueWorker(make_app(Path(tmp), batch_workers=0), queue, poll_interval=0.1).run()
+    queue.close()
+
+
+def test_several_processes_split_the_corpus():
+    """複数のプロセスで分担しても各ファイルを1回だけ分析し、1回だけ反映すること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        years = list(range(2001, 2025))
+        paths = make_files(tmp / 'texts', years, cycle=1)
+        queue = WorkQueue(tmp / 'queue.sqlite3')
+        queue.enqueue(paths)
+
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=run_worker_process, args=(str(tmp / 'queue.sqlite3'), str(tmp)))
+                     for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+            assert process.exitcode == 0
+
+        assert queue.counts() == {'done': len(years)}
+        conn = sqlite3.connect(str(tmp / 'queue.sqlite3'))
+        assert conn.execute('SELECT MAX(attempts) FROM items').fetchone()[0] == 1
+
+        app = make_app(tmp, batch_workers=0)
+        summary = QueueWorker(app, queue).merge()
+        assert summary['files'] == len(years)
+        assert app.excel_manager.saved == [str(year) for year in years]
+        assert QueueWorker(app, queue).merge()['files'] == 0
+        assert queue.counts() == {'merged': len(years)}
+
+
+if __name__ == "__main__":
+    test_lease_expiry_and_lost_lease()
+    test_enqueue_is_idempotent_and_detects_changes()
+    test_lease_expires_repeatedly_then_fails()
+    test_results_are_stored_as_json()
+    test_merge_keeps_lease_while_saving()
+    test_several_processes_split_the_corpus()
+    print("✅ すべてのテストに合格しました")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+ワークブック走査のテスト
+1回の走査で求めた検証結果・集計が従来のDataFrameによる結果と同じ形式になることを確認
+"""
+import sys
+import os
+import math
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import ExcelExportConfig
+from modules.excel_manager import ExcelManager
+from modules.result_store import workbook_signature
+from modules.workbook_scanner import SheetAggregate, WorkbookScan
+
+
+def make_sheet(name, columns, rows) -> SheetAggregate:
+    """行を順に加えたシートの走査結果"""
+    aggregate = SheetAggregate(name=name, columns=columns)
+    for row in rows:
+        aggregate.add_row(row)
+    return aggregate
+
+
+FULL_COLUMNS = ['年度', '総設問数', '総文字数', '大問数']
+
+
+def test_summary_row_aggregates():
+    """行数・年度範囲・平均が求められること"""
+    sheet = make_sheet('開成中学校', FULL_COLUMNS, [
+        {'年度': 2025, '総設問数': 20, '総文字数': 3000, '大問数': 3},
+        {'年度': 2023.0, '総設問数': 10, '総文字数': 1000, '大問数': 2},
+        {'年度': 2024, '総設問数': None, '総文字数': 2000, '大問数': 2},
+    ])
+    assert sheet.summary_row() == {
+        '学校名': '開成中学校',
+        'データ年数': 3,
+        '最古年度': 2023,
+        '最新年度': 2025,
+        '平均文字数': 2000,
+        '平均設問数': 15,
+    }
+
+
+def test_missing_columns_and_empty_values():
+    """列がなければ平均は0、列があって値がなければNaNになること"""
+    sheet = make_sheet('麻布中学校', ['年度', '総文字数'], [{'年度': 2024, '総文字数': None}])
+    row = sheet.summary_row()
+    assert row['平均設問数'] == 0
+    assert math.isnan(row['平均文字数'])
+    assert sheet.missing_columns() == ['総設問数', '大問数']
+
+    assert make_sheet('空', FULL_COLUMNS, []).summary_row() is None
+    assert make_sheet('年度なし', ['総文字数'], [{'総文字数': 1}]).summary_row() is None
+
+
+def test_validation_result_matches_existing_format():
+    """検証結果の辞書が validate_database と同じ内容になること"""
+    scan = WorkbookScan(path=Path('db.xlsx'), sheets=[
+        make_sheet('開成中学校', FULL_COLUMNS, [{'年度': 2024}, {'年度': 2025}]),
+        make_sheet('武蔵中学校', ['年度', '総文字数'], [{'年度': '令和6年'}]),
+    ])
+    result = scan.to_validation_result()
+    assert result == {
+        'is_valid': False,
+        'errors': ['武蔵中学校: 年度列に無効なデータが含まれています'],
+        'warnings': ["武蔵中学校: 必須列が不足 ['総設問数', '大問数']"],
+        'info': {'school_count': 2, 'total_records': 3},
+    }
+    assert [row['学校名'] for row in scan.summary_rows()] == ['開成中学校', '武蔵中学校']
+    assert scan.sheet('武蔵中学校').records == 1
+
+
+def test_validate_database_compares_year_range():
+    """出力済みのExcelの年度範囲がストアと食い違えば警告すること"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'db.xlsx'
+        manager = ExcelManager(ExcelExportConfig(db_filename=str(path)))
+        rows = [{'年度': year, '総設問数': 10, '総文字数': 1000, '大問数': 2} for year in (2023, 2024)]
+        manager.writer.upsert({'開成中学校': rows})
+        assert manager.validate_database()['warnings'] == []
+        store = manager.store
+
+        # ストアが取り込み済みと見なしたまま、Excelの年度だけが書き換わった状態にする
+        from openpyxl import load_workbook
+        workbook = load_workbook(path)
+        sheet = workbook['開成中学校']
+        column = next(cell.column for cell in sheet[1] if cell.value == '年度')
+        sheet.cell(row=2, column=column, value=2020)
+        workbook.save(path)
+        store.set_workbook_signature(workbook_signature(path))
+
+        result = manager.validate_database()
+        assert result['info']['excel_records'] == 2
+        assert result['warnings'] == ['開成中学校: Excelの年度範囲(2020〜2024)がストア(2023〜2024)と一致しません']
+        manager.writer.close()
+
+
+if __name__ == "__main__":
+    test_summary_row_aggregates()
+    test_missing_columns_and_empty_values()
+    test_validation_result_matches_existing_format()
+    test_validate_database_compares_year_range()
+    print("✅ すべてのテストに合格しました")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+ワーカープロセスプールのテスト
+時間切れ・異常終了・例外がその1件の失敗として扱われ、残りの処理が続くことを確認
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.worker_pool import IsolatedWorkerPool, STATUS_OK, STATUS_ERROR, STATUS_TIMEOUT, STATUS_CRASHED
+
+_prefix = None
+
+
+def init_prefix(prefix):
+    global _prefix
+    _prefix = prefix
+
+
+def work(item):
+    """テスト用の処理（item の内容で動作を変える）"""
+    if item == 'hang':
+        time.sleep(60)
+    if item == 'crash':
+        os._exit(3)
+    if item == 'raise':
+        raise ValueError('bad input')
+    if item == 'memory':
+        return bytearray(512 * 1024 * 1024)
+    if isinstance(item, float):
+        time.sleep(item)
+    return f'{_prefix}{item}'
+
+
+def test_results_in_input_order():
+    """map は処理の終わった順ではなく入力の順で返すこと"""
+    pool = IsolatedWorkerPool(work, max_workers=3, initializer=init_prefix, initargs=('done:',))
+    outcomes = pool.map([0.3, 0.0, 0.1, 0.2])
+    assert [outcome.index for outcome in outcomes] == [0, 1, 2, 3]
+    assert [outcome.value for outcome in outcomes] == ['done:0.3', 'done:0.0', 'done:0.1', 'done:0.2']
+    assert all(outcome.ok and outcome.elapsed >= 0 for outcome in outcomes)
+
+
+def test_failures_are_isolated():
+    """止まった・落ちた・例外を出した1件だけが失敗になり、他は処理されること"""
+    items = ['a', 'hang', 'b', 'crash', 'c', 'raise', 'd']
+    start = time.monotonic()
+    pool = IsolatedWorkerPool(work, max_workers=2, timeout=1.0, initializer=init_prefix, initargs=('',))
+    outcomes = pool.map(items)
+    assert time.monotonic() - start < 10
+
+    statuses = {outcome.item: outcome.status for outcome in outcomes}
+    assert statuses == {
+        'a': STATUS_OK, 'hang': STATUS_TIMEOUT, 'b': STATUS_OK, 'crash': STATUS_CRASHED,
+        'c': STATUS_OK, 'raise': STATUS_ERROR, 'd': STATUS_OK,
+    }
+    assert [outcome.value for outcome in outcomes if outcome.ok] == ['a', 'b', 'c', 'd']
+    errors = {outcome.item: outcome.error for outcome in outcomes}
+    assert errors['raise'] == 'ValueError: bad input'
+    assert 'exit code 3' in errors['crash']
+
+
+def test_memory_limit():
+    """メモリ上限を超えた1件は失敗になり、ワーカーを入れ替えて続けること"""
+    if not hasattr(os, 'fork'):
+        return  # resource による上限は Unix のみ
+    pool = IsolatedWorkerPool(work, max_workers=1, memory_limit_mb=256,
+                              initializer=init_prefix, initargs=('',))
+    outcomes = pool.map(['memory', 'after'])
+    assert outcomes[0].status == STATUS_ERROR and outcomes[0].error.startswith('MemoryError')
+    assert outcomes[1].ok and outcomes[1].value == 'after'
+
+
+if __name__ == "__main__":
+    test_results_in_input_order()
+    test_failures_are_isolated()
+    test_memory_limit()
+    print("✅ すべてのテストに合格しました")
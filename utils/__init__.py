@@ -1,47 +1,62 @@
 # Utils module initialization
-from .text_utils import (
-    detect_encoding,
-    normalize_text,
-    extract_number_from_string,
-    calculate_text_similarity,
-    split_text_by_years,
-    clean_path_string
-)
-from .file_utils import (
-    is_valid_text_file,
-    get_file_size_formatted,
-    create_backup,
-    ensure_directory_exists,
-    resolve_path_safely
-)
-from .display_utils import (
-    print_colored,
-    print_header,
-    print_section,
-    print_progress,
-    format_table,
-    truncate_path
-)
+# 各関数・クラスは最初に使うときにモジュールごと読み込む
+# （display_utils だけを使うCLIの管理コマンドで multiprocessing や正規表現表を読み込まないため）
+import importlib
 
-__all__ = [
+_EXPORTS = {
     # text_utils
-    'detect_encoding',
-    'normalize_text',
-    'extract_number_from_string',
-    'calculate_text_similarity',
-    'split_text_by_years',
-    'clean_path_string',
+    'detect_encoding': '.text_utils',
+    'decode_text_bytes': '.text_utils',
+    'read_text_file': '.text_utils',
+    'normalize_text': '.text_utils',
+    'extract_number_from_string': '.text_utils',
+    'calculate_text_similarity': '.text_utils',
+    'split_text_by_years': '.text_utils',
+    'clean_path_string': '.text_utils',
     # file_utils
-    'is_valid_text_file',
-    'get_file_size_formatted',
-    'create_backup',
-    'ensure_directory_exists',
-    'resolve_path_safely',
+    'is_valid_text_file': '.file_utils',
+    'get_file_size_formatted': '.file_utils',
+    'create_backup': '.file_utils',
+    'ensure_directory_exists': '.file_utils',
+    'resolve_path_safely': '.file_utils',
+    'atomic_write_file': '.file_utils',
+    'atomic_write_bytes': '.file_utils',
+    'atomic_write_text': '.file_utils',
+    # numeral_utils
+    'parse_numeral': '.numeral_utils',
+    'numeral_to_str': '.numeral_utils',
+    'to_halfwidth_digits': '.numeral_utils',
+    # question_features
+    'CharLimit': '.question_features',
+    'QuestionFeatures': '.question_features',
+    'extract_question_features': '.question_features',
+    'scan_question_features': '.question_features',
+    # backup_store
+    'BackupEntry': '.backup_store',
+    'BackupStore': '.backup_store',
+    'file_sha256': '.backup_store',
+    # file_lock
+    'FileLock': '.file_lock',
+    # worker_pool
+    'IsolatedWorkerPool': '.worker_pool',
+    'TaskOutcome': '.worker_pool',
+    # batch_telemetry
+    'BatchTelemetry': '.batch_telemetry',
+    'StageTimer': '.batch_telemetry',
+    'timed_stage': '.batch_telemetry',
     # display_utils
-    'print_colored',
-    'print_header',
-    'print_section',
-    'print_progress',
-    'format_table',
-    'truncate_path',
-]
\ No newline at end of file
+    'print_colored': '.display_utils',
+    'print_header': '.display_utils',
+    'print_section': '.display_utils',
+    'print_progress': '.display_utils',
+    'format_table': '.display_utils',
+    'truncate_path': '.display_utils',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
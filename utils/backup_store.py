@@ -0,0 +1,213 @@
+"""
+バックアップ保管ユーティリティ
+内容のハッシュで重複を除いたバックアップを世代数の上限つきで保管する
+"""
+import json
+import shutil
+import hashlib
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+from .file_lock import FileLock
+from .file_utils import atomic_write_file, atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    ファイル内容のSHA-256
+
+    Args:
+        file_path: ファイルパス
+        chunk_size: 一度に読み込むサイズ
+
+    Returns:
+        ハッシュ（16進文字列）
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class BackupEntry:
+    """バックアップの1世代"""
+    backup_id: str
+    created_at: str
+    content_hash: str
+    file_name: str
+    size: int
+    label: str = ''
+
+
+class BackupStore:
+    """
+    重複を除いたバックアップの保管庫
+
+    バックアップの実体は内容のハッシュごとに1ファイルだけ保存し、世代の一覧は
+    マニフェスト（JSON）で管理する。直前の世代と内容が同じ場合は世代を追加しない。
+    世代数が上限を超えたら古い世代から削除し、どの世代からも参照されない実体を削除する。
+    マニフェストの読み込みから書き込みまではロックファイルで直列化し、複数のプロセス・
+    スレッドが同時にバックアップしても世代が失われないようにする。
+    """
+
+    def __init__(self, backup_dir: Path, name: str, max_count: int = 5):
+        """
+        初期化
+
+        Args:
+            backup_dir: バックアップディレクトリ
+            name: バックアップ対象のファイル名（実体とマニフェストの名前に使用）
+            max_count: 保持する世代数の上限
+        """
+        self.backup_dir = Path(backup_dir)
+        self.name = Path(name)
+        self.max_count = max(1, int(max_count))
+        self.manifest_path = self.backup_dir / f'{self.name.name}.backups.json'
+        self.lock = FileLock(self.backup_dir / f'{self.name.name}.backups.lock')
+
+    # ---- 世代の一覧 ----
+
+    def entries(self) -> List[BackupEntry]:
+        """
+        バックアップの一覧（古い順）
+
+        Returns:
+            バックアップのリスト
+        """
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable backup manifest {self.manifest_path}: {e}")
+            return []
+        return [BackupEntry(**entry) for entry in data.get('entries', [])]
+
+    def latest(self) -> Optional[BackupEntry]:
+        """最新のバックアップ"""
+        entries = self.entries()
+        return entries[-1] if entries else None
+
+    def get(self, backup_id: str) -> Optional[BackupEntry]:
+        """IDでバックアップを取得"""
+        return next((entry for entry in self.entries() if entry.backup_id == backup_id), None)
+
+    def path_of(self, entry: BackupEntry) -> Path:
+        """バックアップの実体のパス"""
+        return self.backup_dir / entry.file_name
+
+    # ---- 作成 ----
+
+    def backup_file(self, source_path: Path, label: str = '') -> Tuple[BackupEntry, bool]:
+        """
+        ファイルをバックアップ
+
+        Args:
+            source_path: バックアップするファイル
+            label: 世代の説明
+
+        Returns:
+            (バックアップ, 新しい世代を作成した場合True)
+        """
+        return self.backup_with(
+            file_sha256(source_path),
+            lambda dest: shutil.copy2(source_path, dest),
+            label=label
+        )
+
+    def backup_with(self, content_hash: str, write: Callable[[Path], Any],
+                    label: str = '') -> Tuple[BackupEntry, bool]:
+        """
+        内容のハッシュを指定してバックアップ（実体は write で書き出す）
+
+        直前の世代と同じ内容なら何もせずに直前の世代を返す。以前の世代と同じ内容なら
+        実体は複製せず、世代だけを追加する。
+
+        Args:
+            content_hash: 内容のハッシュ
+            write: 指定されたパスにバックアップの実体を書き出す関数
+            label: 世代の説明
+
+        Returns:
+            (バックアップ, 新しい世代を作成した場合True)
+        """
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            return self._backup_locked(content_hash, write, label)
+
+    def _backup_locked(self, content_hash: str, write: Callable[[Path], Any],
+                       label: str) -> Tuple[BackupEntry, bool]:
+        """ロック内でマニフェストを読み込み、世代を追加して書き込む"""
+        entries = self.entries()
+        if entries and entries[-1].content_hash == content_hash:
+            return entries[-1], False
+
+        file_name = f'{self.name.stem}_{content_hash[:16]}{self.name.suffix}'
+        object_path = self.backup_dir / file_name
+        if not object_path.exists():
+            atomic_write_file(object_path, write)
+
+        now = datetime.now()
+        entry = BackupEntry(
+            backup_id=now.strftime('%Y%m%d_%H%M%S_%f'),
+            created_at=now.isoformat(timespec='seconds'),
+            content_hash=content_hash,
+            file_name=file_name,
+            size=object_path.stat().st_size,
+            label=label,
+        )
+        entries.append(entry)
+        self._save(self._rotate(entries))
+        return entry, True
+
+    def _rotate(self, entries: List[BackupEntry]) -> List[BackupEntry]:
+        """上限を超えた古い世代と、参照されなくなった実体を削除"""
+        kept = entries[-self.max_count:]
+        referenced = {entry.file_name for entry in kept}
+        for entry in entries[:-self.max_count]:
+            if entry.file_name not in referenced:
+                referenced.add(entry.file_name)  # 同じ実体を二重に削除しない
+                try:
+                    (self.backup_dir / entry.file_name).unlink()
+                    logger.debug(f"Removed rotated backup {entry.file_name}")
+                except OSError:
+                    pass
+        return kept
+
+    def _save(self, entries: List[BackupEntry]) -> None:
+        """マニフェストを書き込み"""
+        atomic_write_text(self.manifest_path, json.dumps(
+            {'name': self.name.name, 'entries': [asdict(entry) for entry in entries]},
+            ensure_ascii=False, indent=2))
+
+    # ---- 復元 ----
+
+    def restore(self, backup_id: str, dest_path: Path) -> Path:
+        """
+        バックアップを復元
+
+        Args:
+            backup_id: 復元するバックアップのID
+            dest_path: 復元先のパス
+
+        Returns:
+            復元先のパス
+
+        Raises:
+            FileNotFoundError: バックアップが存在しない場合
+        """
+        entry = self.get(backup_id)
+        if entry is None or not self.path_of(entry).exists():
+            raise FileNotFoundError(f"バックアップが見つかりません: {backup_id}")
+
+        dest_path = Path(dest_path)
+        atomic_write_file(dest_path, lambda tmp_path: shutil.copy2(self.path_of(entry), tmp_path))
+        return dest_path
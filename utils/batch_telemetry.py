@@ -0,0 +1,253 @@
+"""
+バッチ処理の計測
+ファイルごと・段階ごと（読み込み/OCR・分割・出典抽出・設問分析・Excel保存）の処理時間を集め、
+処理速度・残り時間の見込み・段階ごとのパーセンタイル・遅いファイルをまとめる
+"""
+import json
+import math
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from models import ProcessingStatus
+
+# 段階の名前
+STAGE_LOAD = 'load'            # テキストの読み込み・学校名/年度の検出
+STAGE_OCR = 'ocr'              # PDFのOCR（読み込みの代わり）
+STAGE_SPLIT = 'split'          # 年度・大問への分割
+STAGE_SOURCES = 'sources'      # 出典の抽出
+STAGE_QUESTIONS = 'questions'  # 設問の抽出・分類
+STAGE_EXCEL = 'excel'          # Excelへの保存（ファイル単位ではなく保存1回ごと）
+
+# 報告するパーセンタイル
+PERCENTILES = (50, 95, 99)
+
+# 処理中のファイルの計測（timed_stage の記録先）
+_active_timer: ContextVar[Optional['StageTimer']] = ContextVar('active_stage_timer', default=None)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    パーセンタイル（隣り合う値の間は線形補間）
+
+    Args:
+        values: 値のリスト
+        pct: パーセント（0-100）
+
+    Returns:
+        パーセンタイル（値がない場合は0.0）
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = math.floor(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class StageTimer:
+    """
+    1ファイル分の段階ごとの処理時間
+
+    段階の時間は ProcessingStatus の経過時間で測り、同じ段階を何度も通った場合
+    （年度・大問ごとの出典抽出など）は合計する。
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[ProcessingStatus]:
+        """
+        段階の処理時間を測る
+
+        Args:
+            name: 段階の名前
+
+        Yields:
+            この段階の処理状態
+        """
+        status = ProcessingStatus(current_step=name, total_steps=1, current_progress=0.0, message='')
+        try:
+            yield status
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + status.get_elapsed_time()
+
+    @contextmanager
+    def activate(self) -> Iterator['StageTimer']:
+        """この間の timed_stage をこの計測に記録する"""
+        token = _active_timer.set(self)
+        try:
+            yield self
+        finally:
+            _active_timer.reset(token)
+
+
+@contextmanager
+def timed_stage(name: str) -> Iterator[None]:
+    """
+    処理中のファイルの計測に段階の時間を記録（計測していない場合は何もしない）
+
+    Args:
+        name: 段階の名前
+    """
+    timer = _active_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+class BatchTelemetry:
+    """
+    バッチ処理全体の計測
+
+    ワーカープロセスで測ったファイルごとの段階の時間を record_file で受け取り、
+    このプロセスで測った保存の時間（stage）と合わせて集計する。
+    """
+
+    def __init__(self, total_files: int = 0):
+        """
+        初期化
+
+        Args:
+            total_files: 処理する予定のファイル数（残り時間の見込みに使う）
+        """
+        self.total_files = total_files
+        self.files: List[Dict[str, Any]] = []
+        self.stages: Dict[str, List[float]] = {}
+        self.started_at = ProcessingStatus(current_step='batch', total_steps=max(1, total_files),
+                                           current_progress=0.0, message='')
+
+    def record_file(self, file_path: Any, status: str, elapsed: float,
+                    stages: Optional[Dict[str, float]] = None) -> None:
+        """
+        1ファイル分の処理時間を記録
+
+        Args:
+            file_path: ファイルパス
+            status: 処理結果の状態
+            elapsed: 処理時間（秒）
+            stages: 段階ごとの処理時間（秒）
+        """
+        stages = dict(stages or {})
+        self.files.append({'file': str(file_path), 'status': status, 'elapsed': elapsed, 'stages': stages})
+        for name, seconds in stages.items():
+            self.stages.setdefault(name, []).append(seconds)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[ProcessingStatus]:
+        """
+        このプロセスで行う段階（Excelへの保存など）の処理時間を測る
+
+        Args:
+            name: 段階の名前
+
+        Yields:
+            この段階の処理状態
+        """
+        timer = StageTimer()
+        try:
+            with timer.stage(name) as status:
+                yield status
+        finally:
+            self.stages.setdefault(name, []).extend(timer.timings.values())
+
+    def elapsed(self) -> float:
+        """開始からの経過時間（秒）"""
+        return self.started_at.get_elapsed_time()
+
+    def files_per_second(self) -> float:
+        """これまでの処理速度（ファイル/秒）"""
+        elapsed = self.elapsed()
+        return len(self.files) / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self) -> Optional[float]:
+        """残りのファイルの処理にかかる時間の見込み（秒、見込めない場合はNone）"""
+        remaining = max(0, self.total_files - len(self.files))
+        if not remaining:
+            return 0.0
+        rate = self.files_per_second()
+        return remaining / rate if rate > 0 else None
+
+    def progress_text(self) -> str:
+        """進捗表示に添える処理速度・残り時間"""
+        eta = self.eta_seconds()
+        eta_text = f"残り約{eta:.0f}秒" if eta is not None else "残り時間を計測中"
+        return f"{self.files_per_second():.2f}件/秒, {eta_text}"
+
+    def report(self, slowest: int = 10) -> Dict[str, Any]:
+        """
+        集計結果
+
+        Args:
+            slowest: 報告する遅いファイルの件数
+
+        Returns:
+            処理速度・残り時間・段階ごとの統計・遅いファイルの辞書（JSONに変換できる）
+        """
+        stages = {}
+        for name, values in self.stages.items():
+            stats = {'count': len(values), 'total': sum(values), 'mean': sum(values) / len(values),
+                     'max': max(values)}
+            for pct in PERCENTILES:
+                stats[f'p{pct}'] = percentile(values, pct)
+            stages[name] = stats
+
+        statuses: Dict[str, int] = {}
+        for record in self.files:
+            statuses[record['status']] = statuses.get(record['status'], 0) + 1
+
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'total_files': self.total_files,
+            'processed_files': len(self.files),
+            'statuses': statuses,
+            'elapsed': self.elapsed(),
+            'files_per_second': self.files_per_second(),
+            'eta_seconds': self.eta_seconds(),
+            'stages': stages,
+            'slowest_files': sorted(self.files, key=lambda record: record['elapsed'], reverse=True)[:slowest],
+        }
+
+    def to_lines(self, slowest: int = 5) -> List[str]:
+        """
+        コンソール表示用の行
+
+        Args:
+            slowest: 表示する遅いファイルの件数
+
+        Returns:
+            表示する行のリスト
+        """
+        report = self.report(slowest)
+        lines = [f"処理速度: {report['files_per_second']:.2f}件/秒 "
+                 f"({report['processed_files']}件 / {report['elapsed']:.1f}秒)"]
+        for name, stats in sorted(report['stages'].items(), key=lambda item: -item[1]['total']):
+            lines.append(f"  {name:<10} 合計 {stats['total']:.2f}秒  p50 {stats['p50']:.3f}  "
+                         f"p95 {stats['p95']:.3f}  p99 {stats['p99']:.3f}  (n={stats['count']})")
+        if report['slowest_files']:
+            lines.append("遅いファイル:")
+            for record in report['slowest_files']:
+                lines.append(f"  {Path(record['file']).name}: {record['elapsed']:.2f}秒 ({record['status']})")
+        return lines
+
+    def write_json(self, path: Path, slowest: int = 10) -> Path:
+        """
+        集計結果をJSONファイルに書き出す
+
+        Args:
+            path: 書き出し先
+            slowest: 報告する遅いファイルの件数
+
+        Returns:
+            書き出したファイルのパス
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(slowest), ensure_ascii=False, indent=2), encoding='utf-8')
+        return path
@@ -0,0 +1,146 @@
+"""
+ファイルロックユーティリティ
+ロックファイルを使って、プロセス間・スレッド間で書き込みを直列化する
+"""
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Dict
+
+from exceptions import LockTimeoutError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class _PathState:
+    """
+    同じプロセス内で同じロックファイルを使うすべての FileLock が共有する状態
+
+    スレッドロックで直列化し、保持しているスレッドのファイル記述子と入れ子の深さは
+    スレッドローカルに持つ（同じスレッドの別のインスタンスでも入れ子として扱う）。
+    """
+
+    def __init__(self):
+        self.thread_lock = threading.RLock()
+        self.local = threading.local()
+
+
+_path_states: Dict[str, _PathState] = {}
+_path_states_guard = threading.Lock()
+
+
+def _state_for(path: Path) -> _PathState:
+    key = str(path.resolve())
+    with _path_states_guard:
+        state = _path_states.get(key)
+        if state is None:
+            state = _path_states[key] = _PathState()
+        return state
+
+
+class FileLock:
+    """
+    ロックファイルによる排他ロック
+
+    同じスレッド内では、同じロックファイルの別のインスタンスを含めて入れ子で取得できる。
+
+    使用例:
+        with FileLock(Path('db.xlsx.lock')):
+            ...
+    """
+
+    def __init__(self, lock_path: Path, timeout: float = 60.0, poll_interval: float = 0.05):
+        """
+        初期化
+
+        Args:
+            lock_path: ロックファイルのパス
+            timeout: 取得を待つ最大秒数
+            poll_interval: 取得を再試行する間隔（秒）
+        """
+        self.lock_path = Path(lock_path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        state = _state_for(self.lock_path)
+        self._thread_lock = state.thread_lock
+        self._local = state.local
+
+    @property
+    def _depth(self) -> int:
+        return getattr(self._local, 'depth', 0)
+
+    def acquire(self) -> None:
+        """
+        ロックを取得
+
+        Raises:
+            LockTimeoutError: timeout 秒以内に取得できなかった場合
+        """
+        deadline = time.monotonic() + self.timeout
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise LockTimeoutError(str(self.lock_path), self.timeout)
+        if self._depth:
+            self._local.depth += 1
+            return
+
+        try:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            while not self._try_lock(fd):
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise LockTimeoutError(str(self.lock_path), self.timeout)
+                time.sleep(self.poll_interval)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+        self._local.fd = fd
+        self._local.depth = 1
+
+    def release(self) -> None:
+        """ロックを解放"""
+        if not self._depth:
+            return
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            fd = self._local.fd
+            try:
+                self._unlock(fd)
+            finally:
+                os.close(fd)
+                self._local.fd = None
+        self._thread_lock.release()
+
+    @staticmethod
+    def _try_lock(fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _unlock(fd: int) -> None:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self.release()
+        return False
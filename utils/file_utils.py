@@ -2,10 +2,9 @@
 ファイル操作関連のユーティリティ関数
 """
 import os
-import shutil
+import threading
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, List
+from typing import Any, Callable, Optional, List
 
 
 def is_valid_text_file(file_path: Path) -> bool:
@@ -58,13 +57,18 @@ def get_file_size_formatted(file_path: Path) -> str:
     return f"{size:.1f} TB"
 
 
-def create_backup(file_path: Path, backup_dir: Optional[Path] = None) -> Optional[Path]:
+def create_backup(file_path: Path, backup_dir: Optional[Path] = None,
+                  max_count: int = 5) -> Optional[Path]:
     """
     ファイルのバックアップを作成
     
+    内容が直前のバックアップと同じ場合は複製せず、直前のバックアップを返す。
+    バックアップは max_count 世代まで保持し、古いものから削除する。
+    
     Args:
         file_path: バックアップ対象のファイル
         backup_dir: バックアップ先ディレクトリ（省略時はdata/backups）
+        max_count: 保持する世代数の上限
     
     Returns:
         バックアップファイルのパス、失敗時はNone
@@ -75,21 +79,63 @@ def create_backup(file_path: Path, backup_dir: Optional[Path] = None) -> Optiona
     if backup_dir is None:
         backup_dir = Path("data/backups")
     
-    # バックアップディレクトリを作成
-    backup_dir.mkdir(parents=True, exist_ok=True)
-    
-    # タイムスタンプ付きのバックアップファイル名
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_name = f"{file_path.stem}_{timestamp}{file_path.suffix}"
-    backup_path = backup_dir / backup_name
+    # backup_store はこのモジュールの atomic_write_file を使うため、ここで読み込む
+    from .backup_store import BackupStore
     
     try:
-        shutil.copy2(file_path, backup_path)
-        return backup_path
+        backups = BackupStore(backup_dir, file_path.name, max_count=max_count)
+        entry, _ = backups.backup_file(file_path)
+        return backups.path_of(entry)
     except Exception:
         return None
 
 
+def atomic_write_file(path: Path, write: Callable[[Path], Any]) -> None:
+    """
+    一時ファイルに書き込んでから置き換え、書きかけのファイルを残さない
+    
+    一時ファイル名にはプロセスIDとスレッドIDを含め、同時に書き込む他のプロセス・スレッドと
+    衝突しないようにする。失敗した場合は一時ファイルを削除して例外をそのまま送出する。
+    
+    Args:
+        path: 書き込み先のパス
+        write: 一時ファイルのパスを受け取り、内容を書き込む関数
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        try:
+            tmp_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    バイト列をファイルに置き換えで書き込み
+    
+    Args:
+        path: 書き込み先のパス
+        data: 書き込むバイト列
+    """
+    atomic_write_file(path, lambda tmp_path: tmp_path.write_bytes(data))
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = 'utf-8') -> None:
+    """
+    文字列をファイルに置き換えで書き込み
+    
+    Args:
+        path: 書き込み先のパス
+        text: 書き込む文字列
+        encoding: 文字コード
+    """
+    atomic_write_bytes(path, text.encode(encoding))
+
+
 def ensure_directory_exists(directory: Path) -> bool:
     """
     ディレクトリが存在することを保証（なければ作成）
@@ -0,0 +1,147 @@
+"""
+数字表記の解析ユーティリティ
+漢数字・全角数字・丸数字・括弧付き数字を共通の変換表で整数に変換する
+"""
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional
+
+
+# 全角数字 → 半角数字
+_HALFWIDTH_DIGITS_TABLE = str.maketrans('０１２３４５６７８９', '0123456789')
+
+# 漢数字の数字部分（位取り表記「二〇二五」にも対応）
+KANJI_DIGITS: Dict[str, int] = {
+    '〇': 0, '零': 0,
+    '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
+    '六': 6, '七': 7, '八': 8, '九': 9,
+}
+
+# 漢数字の位（小さい位）
+KANJI_SMALL_UNITS: Dict[str, int] = {'十': 10, '百': 100, '千': 1000}
+
+# 漢数字の位（大きい位）
+KANJI_LARGE_UNITS: Dict[str, int] = {'万': 10000}
+
+# 数字トークンを囲む括弧類
+_ENCLOSING_BRACKETS = '()（）【】［］[]〔〕〈〉《》'
+
+# 丸数字・括弧付き数字などの1文字表記が収録されているUnicode範囲
+_ENCLOSED_NUMERAL_RANGES = (
+    (0x2460, 0x24FF),  # ①-⑳, ⑴-⒇, ⒈-⒛, ⓪, ⓫-⓴, ⓵-⓾, ⓿
+    (0x2776, 0x2793),  # ❶-❿, ➀-➉, ➊-➓
+    (0x3220, 0x3229),  # ㈠-㈩
+    (0x3251, 0x325F),  # ㉑-㉟
+    (0x3280, 0x3289),  # ㊀-㊉
+    (0x32B1, 0x32BF),  # ㊱-㊿
+)
+
+
+def _build_enclosed_numeral_table() -> Dict[str, int]:
+    """丸数字・括弧付き数字の変換表を作成"""
+    table = {}
+    for first, last in _ENCLOSED_NUMERAL_RANGES:
+        for code in range(first, last + 1):
+            char = chr(code)
+            value = unicodedata.numeric(char, None)
+            if value is not None and value == int(value):
+                table[char] = int(value)
+    return table
+
+
+ENCLOSED_NUMERALS: Dict[str, int] = _build_enclosed_numeral_table()
+
+
+def to_halfwidth_digits(text: str) -> str:
+    """全角数字を半角数字に変換"""
+    return text.translate(_HALFWIDTH_DIGITS_TABLE)
+
+
+def _parse_kanji(token: str) -> Optional[int]:
+    """漢数字（「十二」「二十」「百五」などの位取りのある表記、または「二〇二五」）を変換"""
+    if not any(c in KANJI_SMALL_UNITS or c in KANJI_LARGE_UNITS for c in token):
+        # 位のない表記は1文字ずつ並べた数字として扱う
+        value = 0
+        for char in token:
+            value = value * 10 + KANJI_DIGITS[char]
+        return value
+
+    total = 0    # 万以上の確定分
+    section = 0  # 万未満の累計
+    digit = None
+    last_unit = None  # 万未満で直前に使った位
+    for char in token:
+        if char in KANJI_DIGITS:
+            if digit is not None:
+                return None  # 「二三十」のような不正な並び
+            digit = KANJI_DIGITS[char]
+        elif char in KANJI_SMALL_UNITS:
+            unit = KANJI_SMALL_UNITS[char]
+            if last_unit is not None and unit >= last_unit:
+                return None  # 「十十」「十百」のような位の重複・逆順
+            section += (1 if digit is None else digit) * unit
+            digit = None
+            last_unit = unit
+        else:
+            if total:
+                return None  # 「一万一万」のような大きい位の重複
+            section += digit or 0
+            total += (section or 1) * KANJI_LARGE_UNITS[char]
+            section = 0
+            digit = None
+            last_unit = None
+    return total + section + (digit or 0)
+
+
+@lru_cache(maxsize=4096)
+def parse_numeral(token: str) -> Optional[int]:
+    """
+    数字を表す文字列を整数に変換
+
+    算用数字（半角・全角）、漢数字（「十二」「二十」「二〇二五」など）、
+    丸数字・括弧付き数字（①、⑴、㈠、❶ など）、括弧で囲まれた数字（「（３）」など）に対応する。
+    同じトークンの再解析はLRUキャッシュで省略される。
+
+    Args:
+        token: 数字を表す文字列
+
+    Returns:
+        変換した整数、数字として解釈できない場合はNone
+    """
+    if not token:
+        return None
+
+    token = token.strip()
+    if len(token) >= 2 and token[0] in _ENCLOSING_BRACKETS and token[-1] in _ENCLOSING_BRACKETS:
+        token = token[1:-1].strip()
+    if not token:
+        return None
+
+    if len(token) == 1 and token in ENCLOSED_NUMERALS:
+        return ENCLOSED_NUMERALS[token]
+
+    halfwidth = to_halfwidth_digits(token)
+    if halfwidth.isascii() and halfwidth.isdigit():
+        return int(halfwidth)
+
+    if all(c in KANJI_DIGITS or c in KANJI_SMALL_UNITS or c in KANJI_LARGE_UNITS for c in token):
+        return _parse_kanji(token)
+
+    return None
+
+
+def numeral_to_str(token: str, default: Optional[str] = None) -> str:
+    """
+    数字を表す文字列を算用数字の文字列に変換
+
+    Args:
+        token: 数字を表す文字列
+        default: 変換できない場合の戻り値（省略時は全角数字のみ半角にした元の文字列）
+
+    Returns:
+        算用数字の文字列
+    """
+    value = parse_numeral(token)
+    if value is not None:
+        return str(value)
+    return to_halfwidth_digits(token) if default is None else default
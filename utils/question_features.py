@@ -0,0 +1,286 @@
+"""
+設問の特徴抽出ユーティリティ
+設問テキストを1回走査して、字数制限・選択肢・サブタイプ・難易度指標をまとめた特徴レコードを作成する
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .numeral_utils import parse_numeral
+
+
+# 選択肢ラベルの並び（選択肢の範囲「ア～エ」から個数を求めるのに使用）
+KATAKANA_LABELS = 'アイウエオカキクケコサシスセソタチツテト'
+
+# サブタイプ判定のキーワード（優先順）
+KANJI_SUBTYPE_RULES: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (('読み',), '読み'),
+    (('書き', '漢字に'), '書き'),
+    (('類義語', '同義語'), '類義語'),
+    (('対義語', '反対'), '対義語'),
+    (('ことわざ',), 'ことわざ'),
+    (('慣用句',), '慣用句'),
+    (('四字熟語',), '四字熟語'),
+    (('品詞',), '文法'),
+)
+
+DESCRIPTION_SUBTYPE_RULES: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (('理由', 'なぜ'), '理由説明'),
+    (('どのような', 'どういう'), '内容説明'),
+    (('気持ち', '心情'), '心情説明'),
+    (('あなたの考え', '自分の意見'), '意見記述'),
+    (('まとめ', '要約'), '要約'),
+)
+
+SELECTION_SUBTYPE_RULES: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (('正しい',), '正誤'),
+    (('誤って', '間違'), '誤り選択'),
+    (('最も',), '最適選択'),
+    (('該当', '当てはまる'), '該当選択'),
+)
+
+# 難易度を示唆する表現（出力順）
+DIFFICULTY_KEYWORDS: Tuple[str, ...] = (
+    '必ず', '全て', 'すべて', '詳しく', '具体的に',
+    '簡潔に', '要約して', '自分の言葉で', '根拠を示して'
+)
+
+
+def _collect_keywords() -> Tuple[str, ...]:
+    """走査対象のキーワードを長い順に収集"""
+    keywords = set(DIFFICULTY_KEYWORDS)
+    for rules in (KANJI_SUBTYPE_RULES, DESCRIPTION_SUBTYPE_RULES, SELECTION_SUBTYPE_RULES):
+        for words, _ in rules:
+            keywords.update(words)
+    return tuple(sorted(keywords, key=lambda k: (-len(k), k)))
+
+
+_KEYWORDS = _collect_keywords()
+
+# 同じ位置から始まる短いキーワード（長いキーワードが見つかれば短い方も含まれる）
+_KEYWORD_PREFIXES: Dict[str, Tuple[str, ...]] = {
+    kw: tuple(other for other in _KEYWORDS if other != kw and kw.startswith(other))
+    for kw in _KEYWORDS
+}
+
+_N = r'[0-9０-９]+'
+_UNIT = r'(?:文字|字)'
+
+# 1回の走査で全トークンを拾う統合パターン（同じ位置では先に書いた選択肢が優先）
+_FEATURE_PATTERN = re.compile(
+    # 字数制限: 「10字以上50字以内」
+    rf'(?P<ra_min>{_N})\s*(?P<ra_unit>{_UNIT})\s*以上\s*(?P<ra_max>{_N})\s*{_UNIT}\s*以内'
+    # 字数制限: 「10～50字」「10字～50字」「10字から50字」
+    rf'|(?P<rb_min>{_N})\s*(?:{_UNIT}\s*)?(?:～|〜|~|から)\s*(?P<rb_max>{_N})\s*(?P<rb_unit>{_UNIT})'
+    # 字数制限: 「50字以内」「40字程度」「10字で」など
+    rf'|(?P<s_num>{_N})\s*(?P<s_unit>{_UNIT})\s*'
+    r'(?P<s_cond>以内|程度|前後|ぴったり|ちょうど|以上|以下|まで|で)?'
+    # 選択肢数の明示: 「次の4つから」
+    r'|次の(?P<explicit>[2-8２-８])つから'
+    # 複数選択: 「二つ選び」
+    r'|(?P<multi>[2２二])つ選'
+    # 選択肢の範囲: 「ア～エ」「ア\~オ」（OCRのMarkdownでは～がエスケープされる）、
+    # 「アーカ」「ア-エ」（長音符・ハイフンは「ケーキ」などと区別するためアから始まる範囲のみ）
+    r'|(?<![ァ-ヴ])(?P<range_first>[ア-ン](?=\s*\\?[～〜~])|ア)\s*\\?[～〜~ー－\-]\s*(?P<range_last>[ア-ン])(?![ァ-ヴー])'
+    # 選択肢ラベル（行頭のラベルはOCRのMarkdownの改行 <br> の後も含む）
+    r'|(?P<kana>[ア-ン])\s*[\.。、．]'
+    r'|(?:(?m:^)|<br>)[ \t　]*(?P<kana_head>[アイウエオカキクケコ])(?=[ \t　])'
+    r'|(?P<alpha>[A-HＡ-Ｈ])\s*[\.。、．]'
+    r'|(?P<number>[1-9１-９])\s*[\.．]'
+    r'|(?P<circle>[①②③④⑤⑥⑦⑧⑨⑩⑪⑫⑬⑭⑮⑯⑰⑱⑲⑳])'
+    # キーワード（幅0の先読みなので重なり合う出現もすべて拾う）
+    r'|(?=(?P<keyword>' + '|'.join(re.escape(k) for k in _KEYWORDS) + r'))'
+)
+
+
+@dataclass(frozen=True)
+class CharLimit:
+    """字数制限"""
+    min: Optional[int]
+    max: Optional[int]
+    condition: str  # '範囲', '以内', '程度', '前後', 'ぴったり', 'ちょうど', '以上', '以下', 'まで', 'で', ''
+    unit: str       # '字' または '文字'
+    position: int
+
+    @property
+    def value(self) -> Optional[int]:
+        """単一指定の字数（範囲指定の場合は最大値）"""
+        return self.max if self.max is not None else self.min
+
+
+@dataclass(frozen=True)
+class QuestionFeatures:
+    """設問の特徴レコード"""
+    char_limits: Tuple[CharLimit, ...] = ()
+    choice_markers: Tuple[Tuple[str, str], ...] = ()  # (字種, ラベル) の出現順
+    choice_range: Optional[Tuple[str, str]] = None    # 「ア～エ」の (最初, 最後)
+    explicit_choice_count: Optional[int] = None       # 「次の4つから」の数
+    multiple_selection: bool = False
+    keywords: FrozenSet[str] = frozenset()
+
+    def first_limit(self, *conditions: str) -> Optional[CharLimit]:
+        """指定した条件の字数制限のうち、テキスト中で最も前にあるものを返す"""
+        limits = [limit for limit in self.char_limits if limit.condition in conditions]
+        return min(limits, key=lambda limit: limit.position) if limits else None
+
+    def preferred_limit(self, *conditions: str) -> Optional[CharLimit]:
+        """条件を優先順に調べ、最初に該当する字数制限を返す"""
+        for condition in conditions:
+            for limit in self.char_limits:
+                if limit.condition == condition:
+                    return limit
+        return None
+
+    def limits_with(self, *conditions: str) -> List[CharLimit]:
+        """指定した条件の字数制限を条件の順、出現順に返す"""
+        return [limit for condition in conditions
+                for limit in self.char_limits if limit.condition == condition]
+
+    def choice_marker_count(self, alphabet: str) -> int:
+        """指定字種の選択肢ラベルの出現数"""
+        return sum(1 for kind, _ in self.choice_markers if kind == alphabet)
+
+    def choice_labels(self, alphabet: str) -> Tuple[str, ...]:
+        """指定字種の選択肢ラベル（重複なし、出現順）"""
+        return tuple(dict.fromkeys(label for kind, label in self.choice_markers if kind == alphabet))
+
+    @property
+    def choice_alphabet(self) -> Optional[str]:
+        """選択肢の字種（'katakana', 'alphabet', 'number', 'circle'）"""
+        for alphabet in ('katakana', 'alphabet', 'number', 'circle'):
+            if len(self.choice_labels(alphabet)) >= 2:
+                return alphabet
+        return None
+
+    @property
+    def choice_count(self) -> Optional[int]:
+        """選択肢数（明示 → 範囲 → ラベル数の順に判定）"""
+        if self.explicit_choice_count:
+            return self.explicit_choice_count
+        if self.choice_range:
+            first, last = self.choice_range
+            if first in KATAKANA_LABELS and last in KATAKANA_LABELS:
+                size = KATAKANA_LABELS.index(last) - KATAKANA_LABELS.index(first) + 1
+                if size >= 2:
+                    return size
+        alphabet = self.choice_alphabet
+        if alphabet:
+            return len(self.choice_labels(alphabet))
+        return None
+
+    def has_keyword(self, *keywords: str) -> bool:
+        """いずれかのキーワードを含むか"""
+        return any(k in self.keywords for k in keywords)
+
+    def _subtype(self, rules) -> Optional[str]:
+        for words, subtype in rules:
+            if self.has_keyword(*words):
+                return subtype
+        return None
+
+    @property
+    def kanji_subtype(self) -> Optional[str]:
+        """漢字・語句問題のサブタイプ"""
+        return self._subtype(KANJI_SUBTYPE_RULES)
+
+    @property
+    def description_subtype(self) -> Optional[str]:
+        """記述式問題のサブタイプ"""
+        return self._subtype(DESCRIPTION_SUBTYPE_RULES)
+
+    @property
+    def selection_subtype(self) -> Optional[str]:
+        """選択式問題のサブタイプ"""
+        return self._subtype(SELECTION_SUBTYPE_RULES)
+
+    @property
+    def difficulty_indicators(self) -> List[str]:
+        """難易度を示唆する表現"""
+        return [k for k in DIFFICULTY_KEYWORDS if k in self.keywords]
+
+
+def scan_question_features(text: str) -> QuestionFeatures:
+    """
+    テキストを1回走査して特徴レコードを作成（キャッシュなし）
+
+    文書全体のような長いテキストにはこちらを使う。
+
+    Args:
+        text: 設問テキスト
+
+    Returns:
+        特徴レコード
+    """
+    limits = []
+    markers = []
+    keywords = set()
+    choice_range = None
+    explicit = None
+    multiple = False
+
+    for match in _FEATURE_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'keyword':
+            keyword = match.group('keyword')
+            keywords.add(keyword)
+            keywords.update(_KEYWORD_PREFIXES[keyword])
+        elif kind == 'ra_max':
+            ra_max = parse_numeral(match.group('ra_max'))
+            limits.append(CharLimit(parse_numeral(match.group('ra_min')), ra_max,
+                                    '範囲', match.group('ra_unit'), match.start()))
+            # 「10字以上50字以内」の「50字以内」は単独の以内指定としても数える
+            limits.append(CharLimit(0, ra_max, '以内', match.group('ra_unit'), match.start('ra_max')))
+        elif kind == 'rb_unit':
+            limits.append(CharLimit(parse_numeral(match.group('rb_min')), parse_numeral(match.group('rb_max')),
+                                    '範囲', match.group('rb_unit'), match.start()))
+        elif kind in ('s_unit', 's_cond'):
+            num = parse_numeral(match.group('s_num'))
+            condition = match.group('s_cond') or ''
+            if condition == '以上':
+                limits.append(CharLimit(num, None, condition, match.group('s_unit'), match.start()))
+            elif condition == '以内' or condition == '以下' or condition == 'まで':
+                limits.append(CharLimit(0, num, condition, match.group('s_unit'), match.start()))
+            else:
+                limits.append(CharLimit(num, num, condition, match.group('s_unit'), match.start()))
+        elif kind == 'explicit':
+            if explicit is None:
+                explicit = parse_numeral(match.group('explicit'))
+        elif kind == 'multi':
+            multiple = True
+        elif kind == 'range_last':
+            if choice_range is None:
+                choice_range = (match.group('range_first'), match.group('range_last'))
+        elif kind in ('kana', 'kana_head'):
+            markers.append(('katakana', match.group(kind)))
+        elif kind == 'alpha':
+            markers.append(('alphabet', match.group('alpha')))
+        elif kind == 'number':
+            markers.append(('number', str(parse_numeral(match.group('number')))))
+        elif kind == 'circle':
+            markers.append(('circle', match.group('circle')))
+
+    return QuestionFeatures(
+        char_limits=tuple(limits),
+        choice_markers=tuple(markers),
+        choice_range=choice_range,
+        explicit_choice_count=explicit,
+        multiple_selection=multiple,
+        keywords=frozenset(keywords)
+    )
+
+
+@lru_cache(maxsize=2048)
+def extract_question_features(text: str) -> QuestionFeatures:
+    """
+    設問テキストの特徴レコードを取得
+
+    同じ設問に対して複数の分析器が問い合わせても、走査は1回だけになる。
+
+    Args:
+        text: 設問テキスト
+
+    Returns:
+        特徴レコード
+    """
+    return scan_question_features(text)
@@ -1,15 +1,175 @@
 """
 テキスト処理関連のユーティリティ関数
 """
+import os
 import re
+import mmap
+import codecs
 import unicodedata
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Sequence, Tuple, Union
 from pathlib import Path
 
+from config.settings import Settings
+from exceptions import EncodingError
+from .question_features import extract_question_features
+
+# BOMとエンコーディング（長いBOMから順に判定する）
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# これより大きいファイルはメモリマップで読み込む
+MMAP_THRESHOLD_BYTES = 4 * 1024 * 1024
+
+# エンコーディングの推定に使うサンプルの大きさ（先頭・中央・末尾からそれぞれ）
+SNIFF_CHUNK_BYTES = 8 * 1024
+
+# 日本語の文章らしさの判定に使う文字（ひらがな・カタカナ・漢字・全角記号）
+_JAPANESE_CHARS = re.compile(r'[\u3000-\u30ff\u4e00-\u9fff\uff01-\uff5e]')
+# 誤判定で現れやすい文字（半角カナ・制御文字・私用領域）
+_UNLIKELY_CHARS = re.compile(r'[\uff61-\uff9f\x00-\x08\x0e-\x1f\ue000-\uf8ff]')
+
+
+def _sample_chunks(data: Union[bytes, mmap.mmap]) -> List[bytes]:
+    """
+    エンコーディング推定用に、先頭・中央・末尾からサンプルを取り出す
+
+    先頭がASCIIだけのファイルでも本文の多バイト文字を含むようにする。
+    """
+    if len(data) <= SNIFF_CHUNK_BYTES * 3:
+        return [bytes(data)]
+    middle = (len(data) - SNIFF_CHUNK_BYTES) // 2
+    return [
+        bytes(data[:SNIFF_CHUNK_BYTES]),
+        bytes(data[middle:middle + SNIFF_CHUNK_BYTES]),
+        bytes(data[-SNIFF_CHUNK_BYTES:]),
+    ]
+
+
+def _score_encoding(chunks: List[bytes], encoding: str) -> Optional[float]:
+    """
+    サンプルを指定エンコーディングで復号したときの日本語らしさ
+
+    途中から切り出したサンプルは先頭が文字の途中になりうるため、復号できるまで
+    先頭を最大3バイトずらす。末尾の不完全な文字は無視する。
+
+    Returns:
+        スコア（大きいほど自然）、復号できない場合はNone
+    """
+    # BOMのないUTF-16/32は、ASCII部分に由来するNULバイトがなければ候補から外す
+    # （ASCIIのバイト列は2バイトずつ漢字として復号できてしまうため）
+    if codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32')):
+        if not any(b'\x00' in chunk for chunk in chunks):
+            return None
+
+    text_parts = []
+    for index, chunk in enumerate(chunks):
+        offsets = (0,) if index == 0 else range(4)
+        for offset in offsets:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            try:
+                text_parts.append(decoder.decode(chunk[offset:], final=False))
+                break
+            except (UnicodeDecodeError, UnicodeError):
+                continue
+        else:
+            return None
+    text = ''.join(text_parts)
+    if not text:
+        return 0.0
+    japanese = len(_JAPANESE_CHARS.findall(text))
+    unlikely = len(_UNLIKELY_CHARS.findall(text))
+    return (japanese - 4 * unlikely) / len(text)
+
+
+def _decode(data: Union[bytes, mmap.mmap], encoding: str) -> str:
+    """復号して改行（CRLF・CR）を LF に揃える"""
+    text = str(data, encoding)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def decode_text_bytes(data: Union[bytes, mmap.mmap],
+                      encodings: Optional[Sequence[str]] = None,
+                      file_path: Union[str, Path] = '') -> Tuple[str, str]:
+    """
+    バイト列のエンコーディングを判定して復号
+
+    BOMがあればそれに従う。なければ候補ごとに代表的なサンプル（先頭・中央・末尾）を
+    復号して日本語らしさで順位付けし、全体を復号できた最初の候補を採用する。
+    改行はテキストモードの open と同じく LF に揃える。
+
+    Args:
+        data: ファイルの内容
+        encodings: 候補のエンコーディング（省略時は Settings.DEFAULT_ENCODING_LIST）
+        file_path: エラーメッセージ用のファイルパス
+
+    Returns:
+        (復号したテキスト, エンコーディング)
+
+    Raises:
+        EncodingError: どの候補でも復号できない場合
+    """
+    encodings = list(encodings or Settings.DEFAULT_ENCODING_LIST)
+
+    for bom, encoding in _BOMS:
+        if data[:len(bom)] == bom:
+            return _decode(data, encoding), encoding
+
+    chunks = _sample_chunks(data)
+    scores = {encoding: _score_encoding(chunks, encoding) for encoding in encodings}
+    # サンプルを復号できた候補をスコア順に（同点なら候補リストの順）、できなかった候補は最後に試す
+    ranked = sorted(
+        encodings,
+        key=lambda enc: (scores[enc] is None, -(scores[enc] or 0.0), encodings.index(enc))
+    )
+    for encoding in ranked:
+        try:
+            return _decode(data, encoding), encoding
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+
+    raise EncodingError(str(file_path), encodings)
+
+
+def read_text_file(file_path: Union[str, Path],
+                   encodings: Optional[Sequence[str]] = None) -> Tuple[str, str]:
+    """
+    テキストファイルを一度だけ読み込み、エンコーディングを判定して復号
+
+    大きなファイルはメモリマップで読み込む。
+
+    Args:
+        file_path: ファイルパス
+        encodings: 候補のエンコーディング（省略時は Settings.DEFAULT_ENCODING_LIST）
+
+    Returns:
+        (復号したテキスト, エンコーディング)
+
+    Raises:
+        EncodingError: どの候補でも復号できない場合
+        OSError: ファイルを読み込めない場合
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return '', 'utf-8'
+        if size < MMAP_THRESHOLD_BYTES:
+            return decode_text_bytes(f.read(), encodings, file_path)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return decode_text_bytes(mapped, encodings, file_path)
+
 
 def detect_encoding(file_path: Path) -> Optional[str]:
     """
     ファイルのエンコーディングを検出
+
+    テキストも必要な場合は read_text_file を使うと読み込みが一度で済む。
     
     Args:
         file_path: 検出対象のファイルパス
@@ -17,17 +177,10 @@ def detect_encoding(file_path: Path) -> Optional[str]:
     Returns:
         検出されたエンコーディング名、検出失敗時はNone
     """
-    encodings = ['utf-8', 'shift-jis', 'euc-jp', 'cp932', 'iso-2022-jp', 'utf-16']
-    
-    for encoding in encodings:
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                f.read(100)  # 最初の100文字だけ読んで確認
-            return encoding
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-    
-    return None
+    try:
+        return read_text_file(file_path)[1]
+    except EncodingError:
+        return None
 
 
 def normalize_text(text: str) -> str:
@@ -186,25 +339,8 @@ def extract_character_limit(text: str) -> Optional[Tuple[int, int]]:
     Returns:
         (最小文字数, 最大文字数)のタプル、見つからない場合はNone
     """
-    patterns = [
-        r'(\d+)字以上(\d+)字以内',
-        r'(\d+)〜(\d+)字',
-        r'(\d+)字から(\d+)字',
-        r'(\d+)字以内',  # 最大のみ
-        r'(\d+)字で',    # 固定
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            groups = match.groups()
-            if len(groups) == 2:
-                return (int(groups[0]), int(groups[1]))
-            elif len(groups) == 1:
-                limit = int(groups[0])
-                if '以内' in pattern:
-                    return (0, limit)
-                else:
-                    return (limit, limit)
-    
-    return None
\ No newline at end of file
+    # 範囲指定 → 最大のみ（以内） → 固定（字で）の順に優先
+    limit = extract_question_features(text).preferred_limit('範囲', '以内', 'で')
+    if limit is None:
+        return None
+    return (limit.min, limit.max)
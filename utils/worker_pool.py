@@ -0,0 +1,275 @@
+"""
+ワーカープロセスプール
+1件ずつ別プロセスで処理し、時間・メモリの上限を超えたワーカーや
+異常終了したワーカーだけを入れ替えて、残りの処理を続ける
+"""
+import time
+import logging
+import multiprocessing
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 処理結果の状態
+STATUS_OK = 'ok'            # 正常終了
+STATUS_ERROR = 'error'      # 例外（メモリ上限を超えた場合も含む）
+STATUS_TIMEOUT = 'timeout'  # 時間切れ（ワーカーを強制終了）
+STATUS_CRASHED = 'crashed'  # ワーカーが異常終了
+
+
+@dataclass
+class TaskOutcome:
+    """1件分の処理結果"""
+    index: int                  # 入力の順番
+    item: Any                   # 入力
+    status: str
+    value: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0        # 処理時間（秒）
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+
+def _address_space_bytes() -> int:
+    """現在のプロセスの仮想メモリサイズ（取得できない場合は0）"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[0])
+        import resource
+        return pages * resource.getpagesize()
+    except (OSError, ValueError, ImportError):
+        return 0
+
+
+def _apply_memory_limit(memory_limit_mb: Optional[float]) -> None:
+    """
+    ワーカーのメモリ上限を設定（対応していないOSでは何もしない）
+
+    上限は起動・初期化を終えた時点の使用量に memory_limit_mb を足した値で、
+    1件の処理に使えるメモリの予算になる。
+    """
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+        limit = _address_space_bytes() + int(memory_limit_mb * 1024 * 1024)
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ImportError, ValueError, OSError) as e:
+        logger.debug(f"Memory limit is not supported here: {e}")
+
+
+def _worker_main(conn, func: Callable[[Any], Any],
+                 initializer: Optional[Callable[..., None]], initargs: Tuple,
+                 memory_limit_mb: Optional[float]) -> None:
+    """ワーカープロセスの本体（None を受け取るか接続が切れるまで処理を続ける）"""
+    if initializer is not None:
+        initializer(*initargs)
+    _apply_memory_limit(memory_limit_mb)
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        index, item = message
+        start = time.perf_counter()
+        try:
+            value = func(item)
+            conn.send((index, STATUS_OK, value, None, time.perf_counter() - start))
+        except MemoryError:
+            # メモリ上限に達したワーカーは状態が不確かなので、報告して終了する（親が入れ替える）
+            conn.send((index, STATUS_ERROR, None, 'MemoryError: memory limit exceeded',
+                       time.perf_counter() - start))
+            break
+        except BaseException as e:
+            try:
+                conn.send((index, STATUS_ERROR, None, f'{type(e).__name__}: {e}',
+                           time.perf_counter() - start))
+            except BaseException:
+                break
+    conn.close()
+
+
+class _Worker:
+    """親プロセス側のワーカーの状態"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.task: Optional[Tuple[int, Any]] = None
+        self.started = 0.0
+        self.deadline = float('inf')
+
+
+class IsolatedWorkerPool:
+    """
+    処理を隔離するワーカープロセスプール
+
+    ワーカーは1件ずつ処理する。時間切れのワーカーは強制終了して新しいワーカーに入れ替え、
+    異常終了・メモリ不足もその1件の失敗として扱うため、1つのファイルが
+    全体を止めたり落としたりすることはない。
+    """
+
+    def __init__(self, func: Callable[[Any], Any], max_workers: int = 4,
+                 timeout: Optional[float] = None,
+                 memory_limit_mb: Optional[float] = None,
+                 initializer: Optional[Callable[..., None]] = None,
+                 initargs: Sequence[Any] = (),
+                 start_method: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            func: 1件を処理する関数（ワーカーで実行するため、モジュールの最上位で定義すること）
+            max_workers: ワーカー数
+            timeout: 1件あたりの制限時間（秒、Noneは無制限）
+            memory_limit_mb: 1件あたりのメモリの予算（MB、初期化後の使用量に加算、Noneは無制限）
+            initializer: ワーカー起動時に1回だけ呼ぶ関数
+            initargs: initializer の引数
+            start_method: multiprocessing の起動方式（省略時はOSの既定）
+        """
+        self.func = func
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self._context = multiprocessing.get_context(start_method)
+
+    def _spawn(self) -> _Worker:
+        """ワーカーを起動"""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.func, self.initializer, self.initargs, self.memory_limit_mb),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _assign(self, worker: _Worker, task: Tuple[int, Any]) -> None:
+        """ワーカーに1件を渡す"""
+        worker.task = task
+        worker.started = time.monotonic()
+        worker.deadline = worker.started + self.timeout if self.timeout else float('inf')
+        try:
+            worker.conn.send(task)
+        except (OSError, ValueError):
+            pass  # 起動直後に終了したワーカー（次の確認で異常終了として扱う）
+
+    @staticmethod
+    def _stop(worker: _Worker, force: bool = False) -> None:
+        """ワーカーを終了"""
+        if not force:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.process.join(1)
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(1)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(1)
+        worker.conn.close()
+
+    def _collect(self, worker: _Worker) -> Tuple[Optional[TaskOutcome], bool]:
+        """
+        ワーカーの状態を確認
+
+        Returns:
+            (処理結果（まだなければNone）, ワーカーを入れ替える必要があるか)
+        """
+        index, item = worker.task
+        elapsed = time.monotonic() - worker.started
+
+        if worker.conn.poll():
+            try:
+                _, status, value, error, task_elapsed = worker.conn.recv()
+            except (EOFError, OSError):
+                code = worker.process.exitcode
+                return TaskOutcome(index, item, STATUS_CRASHED,
+                                   error=f'worker exited unexpectedly (exit code {code})',
+                                   elapsed=elapsed), True
+            worker.task = None
+            # メモリ不足で終了したワーカーは入れ替える
+            replace = error is not None and error.startswith('MemoryError')
+            return TaskOutcome(index, item, status, value, error, task_elapsed), replace
+
+        if not worker.process.is_alive():
+            return TaskOutcome(index, item, STATUS_CRASHED,
+                               error=f'worker exited unexpectedly (exit code {worker.process.exitcode})',
+                               elapsed=elapsed), True
+
+        if time.monotonic() >= worker.deadline:
+            return TaskOutcome(index, item, STATUS_TIMEOUT,
+                               error=f'timed out after {self.timeout}s', elapsed=elapsed), True
+
+        return None, False
+
+    def imap_unordered(self, items: Iterable[Any]) -> Iterator[TaskOutcome]:
+        """
+        処理が終わった順に結果を返す
+
+        Args:
+            items: 入力のリスト
+
+        Yields:
+            1件ごとの処理結果（index で入力の順番がわかる）
+        """
+        pending = deque(enumerate(items))
+        workers: List[_Worker] = []
+        try:
+            while pending or any(worker.task is not None for worker in workers):
+                # 空いているワーカーに割り当て、足りなければ起動する
+                for worker in workers:
+                    if worker.task is None and pending:
+                        self._assign(worker, pending.popleft())
+                while pending and len(workers) < self.max_workers:
+                    worker = self._spawn()
+                    workers.append(worker)
+                    self._assign(worker, pending.popleft())
+
+                busy = [worker for worker in workers if worker.task is not None]
+                next_deadline = min(worker.deadline for worker in busy)
+                wait_seconds = None if next_deadline == float('inf') else max(0.0, next_deadline - time.monotonic())
+                wait([worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                     timeout=wait_seconds)
+
+                for worker in busy:
+                    outcome, replace = self._collect(worker)
+                    if replace:
+                        if outcome is not None and outcome.status != STATUS_OK:
+                            logger.warning(f"Worker replaced after {outcome.status}: {outcome.item} ({outcome.error})")
+                        self._stop(worker, force=outcome is None or outcome.status != STATUS_ERROR)
+                        workers.remove(worker)
+                    if outcome is not None:
+                        yield outcome
+        finally:
+            for worker in workers:
+                self._stop(worker, force=worker.task is not None)
+
+    def map(self, items: Iterable[Any]) -> List[TaskOutcome]:
+        """
+        すべて処理し、入力の順番で結果を返す
+
+        Args:
+            items: 入力のリスト
+
+        Returns:
+            入力と同じ順番の処理結果のリスト
+        """
+        return sorted(self.imap_unordered(items), key=lambda outcome: outcome.index)